@@ -1,10 +1,18 @@
 import streamlit as st
 import pandas as pd
 import requests
-from datetime import timedelta, datetime
+from datetime import timedelta
 from login import tela_login
 from utils.supremo_config import TOKEN_SUPREMO
 from utils.notificacoes_json import processar_eventos
+from utils.data_loader import baixar_planilha_csv, ler_planilha_csv, tratar_planilha, versao_planilha
+from utils.formatacao import moeda_valor
+from utils.indicadores import calcular_status_final
+from utils.filtros_cache import agregado_filtrado, filtro_normalizado, recorte_filtrado
+from utils.particoes import fatiar, indice_particoes
+from utils.perf import cache_medido, finalizar_medicao, iniciar_medicao, medir
+
+iniciar_medicao("app_dashboard")
 
 
 
@@ -39,15 +47,11 @@ if not st.session_state.logado:
     tela_login()
     st.stop()
 # ---------------------------------------------------------
-# AUTO REFRESH (para notificações e dados)
+# AUTO REFRESH
 # ---------------------------------------------------------
-from streamlit_autorefresh import st_autorefresh
-
-st_autorefresh(interval=30 * 1000, key="auto_refresh_dashboard")
-
-# 🔓 quebra cache no refresh automático
-if "auto_refresh_dashboard" in st.session_state:
-    st.session_state["refresh_planilha"] = True
+# Não há mais rerun da página inteira: os indicadores (painel_indicadores)
+# e as notificações (iniciar_app) são fragmentos que se atualizam sozinhos.
+from utils.versao_dados import INTERVALO_VERIFICACAO_S
 
 # ---------------------------------------------------------
 # ESTILO (CSS) – TEMA MIDNIGHT BLUE MR
@@ -206,228 +210,101 @@ if perfil == "corretor":
     st.sidebar.warning("🔒 Demais páginas são restritas")
 
 # ---------------------------------------------------------
-# PLANILHA – GOOGLE SHEETS
+# PLANILHA – GOOGLE SHEETS (download compartilhado em utils.data_loader)
 # ---------------------------------------------------------
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID_ANALISES = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_ANALISES}"
-
 
-def limpar_para_data(serie: pd.Series) -> pd.Series:
-    dt = pd.to_datetime(serie, dayfirst=True, errors="coerce")
-    return dt.dt.date
 
-
-def mes_ano_ptbr_para_date(valor: str):
-    """
-    Converte textos tipo 'novembro 2025' em date(2025, 11, 1).
-    Se não conseguir, retorna NaT.
-    """
-    if pd.isna(valor):
-        return pd.NaT
-    s = str(valor).strip().lower()
-    if not s:
-        return pd.NaT
-
-    meses = {
-        "janeiro": 1,
-        "fevereiro": 2,
-        "março": 3,
-        "marco": 3,
-        "abril": 4,
-        "maio": 5,
-        "junho": 6,
-        "julho": 7,
-        "agosto": 8,
-        "setembro": 9,
-        "outubro": 10,
-        "novembro": 11,
-        "dezembro": 12,
-    }
-
-    partes = s.split()
-    try:
-        mes_txt = partes[0]
-        ano = int(partes[-1])
-        mes_num = meses.get(mes_txt)
-        if mes_num is None:
-            return pd.NaT
-        return datetime(ano, mes_num, 1).date()
-    except Exception:
-        return pd.NaT
-
-
-@st.cache_data(ttl=60)
 def carregar_dados_planilha(_refresh_key=None) -> pd.DataFrame:
     """
     Carrega e trata a base da planilha do Google Sheets.
-    Cache de 5 minutos.
+    Cache por versão: só recalcula quando o conteúdo da planilha muda.
     """
-    df = pd.read_csv(CSV_URL)
-    df.columns = [c.strip().upper() for c in df.columns]
-
-    # DATA / DIA
-    if "DATA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DATA"])
-    elif "DIA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DIA"])
-    else:
-        df["DIA"] = pd.NaT
-
-    # DATA BASE (MÊS COMERCIAL) - TEXTO IGUAL À PLANILHA + REFERÊNCIA DE DATA
-    possiveis_cols_base = [
-        "DATA BASE",
-        "DATA_BASE",
-        "DT BASE",
-        "DATA REF",
-        "DATA REFERÊNCIA",
-        "DATA REFERENCIA",
-    ]
-    col_data_base = next((c for c in possiveis_cols_base if c in df.columns), None)
-
-    if col_data_base:
-        base_raw = df[col_data_base].astype(str).str.strip()
-        df["DATA_BASE_LABEL"] = base_raw.str.lower().str.title()
-        df["DATA_BASE"] = base_raw.apply(mes_ano_ptbr_para_date)
-
-        if df["DATA_BASE"].dropna().empty:
-            df["DATA_BASE"] = df["DIA"]
-            df["DATA_BASE_LABEL"] = df["DIA"].apply(
-                lambda d: d.strftime("%m/%Y") if pd.notnull(d) else ""
-            )
-    else:
-        df["DATA_BASE"] = df["DIA"]
-        df["DATA_BASE_LABEL"] = df["DIA"].apply(
-            lambda d: d.strftime("%m/%Y") if pd.notnull(d) else ""
-        )
+    versao, conteudo = baixar_planilha_csv()
+    return _carregar_dados_planilha_versao(versao, conteudo)
 
-    # EQUIPE / CORRETOR
-    for col in ["EQUIPE", "CORRETOR"]:
-        if col in df.columns:
-            df[col] = (
-                df[col]
-                .fillna("NÃO INFORMADO")
-                .astype(str)
-                .str.upper()
-                .str.strip()
-            )
-        else:
-            df[col] = "NÃO INFORMADO"
-
-    # STATUS BASE
-    possiveis_cols_situacao = [
-        "SITUAÇÃO",
-        "SITUAÇÃO ATUAL",
-        "STATUS",
-        "SITUACAO",
-        "SITUACAO ATUAL",
-    ]
-    col_situacao = next((c for c in possiveis_cols_situacao if c in df.columns), None)
-
-    df["STATUS_BASE"] = ""
-    if col_situacao:
-        s = df[col_situacao].fillna("").astype(str).str.upper()
-        df.loc[s.str.contains("EM ANÁLISE"), "STATUS_BASE"] = "EM ANÁLISE"
-        df.loc[s.str.contains("REANÁLISE"), "STATUS_BASE"] = "REANÁLISE"
-        df.loc[s.str.strip() == "APROVAÇÃO", "STATUS_BASE"] = "APROVADO"
-        df.loc[s.str.contains("REPROV"), "STATUS_BASE"] = "REPROVADO"
-        df.loc[s.str.contains("VENDA GERADA"), "STATUS_BASE"] = "VENDA GERADA"
-        df.loc[s.str.contains("VENDA INFORMADA"), "STATUS_BASE"] = "VENDA INFORMADA"
-        # 👇 NOVO – mapeia qualquer coisa com DESIST (DESISTIU, DESISTÊNCIA etc.)
-        df.loc[s.str.contains("DESIST"), "STATUS_BASE"] = "DESISTIU"
-
-    # VGV
-    if "OBSERVAÇÕES" in df.columns:
-        df["VGV"] = pd.to_numeric(df["OBSERVAÇÕES"], errors="coerce").fillna(0)
-    else:
-        df["VGV"] = 0
 
-    # NOME / CPF BASE
-    possiveis_nome = ["NOME", "CLIENTE", "NOME CLIENTE", "NOME DO CLIENTE"]
-    possiveis_cpf = ["CPF", "CPF CLIENTE", "CPF DO CLIENTE"]
+@cache_medido("planilha_dashboard", st.cache_data, max_entries=2, show_spinner=False)
+def _carregar_dados_planilha_versao(versao: str, _conteudo: bytes) -> pd.DataFrame:
+    return tratar_planilha(ler_planilha_csv(_conteudo))
 
-    col_nome = next((c for c in possiveis_nome if c in df.columns), None)
-    col_cpf = next((c for c in possiveis_cpf if c in df.columns), None)
 
-    if col_nome is None:
-        df["NOME_CLIENTE_BASE"] = "NÃO INFORMADO"
-    else:
-        df["NOME_CLIENTE_BASE"] = (
-            df[col_nome]
-            .fillna("NÃO INFORMADO")
-            .astype(str)
-            .str.upper()
-            .str.strip()
-        )
+# ---------------------------------------------------------
+# CONTEXTO DO USUÁRIO LOGADO
+# ---------------------------------------------------------
+perfil = st.session_state.get("perfil")
+nome_corretor_logado = (
+    st.session_state.get("nome_usuario", "")
+    .upper()
+    .strip()
+)
 
-    if col_cpf is None:
-        df["CPF_CLIENTE_BASE"] = ""
-    else:
-        df["CPF_CLIENTE_BASE"] = (
-            df[col_cpf]
-            .fillna("")
-            .astype(str)
-            .str.replace(r"\D", "", regex=True)
-        )
 
-    # 👇 NOVO – CHAVE_CLIENTE global (nome + CPF) para todas as regras
-    df["CHAVE_CLIENTE"] = (
-        df["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO")
-        + " | "
-        + df["CPF_CLIENTE_BASE"].fillna("")
+@cache_medido("base_painel", st.cache_resource, max_entries=64, show_spinner=False)
+def _base_painel(versao: str, corretor, _conteudo: bytes) -> tuple:
+    """
+    (df, status_final_por_cliente, estrutura_dos_filtros) por versão da
+    planilha e escopo: `corretor` = nome do corretor logado, None = base
+    inteira. cache_resource: gestores e admins compartilham UM objeto —
+    somente leitura, recortes via visao().
+    """
+    # carrega a base (BASE COMPLETA)
+    df = _carregar_dados_planilha_versao(versao, _conteudo)
+
+    # 🔔 PROCESSA NOTIFICAÇÕES (ANTES DE QUALQUER FILTRO)
+    with medir("processar_eventos"):
+        processar_eventos(df)
+
+    # BLOQUEIO GLOBAL DE DADOS PARA PERFIL CORRETOR
+    # (fatia pelo índice de partições da versão, sem varrer a base inteira)
+    if corretor is not None:
+        if "CORRETOR" in df.columns:
+            indice = indice_particoes(("app_dashboard", versao), df)
+            df = fatiar(df, indice, CORRETOR=corretor)
+
+    # 👇 NOVO – STATUS FINAL DO CLIENTE (HISTÓRICO COMPLETO DA PLANILHA)
+    with medir("status_final_por_cliente"):
+        status_final = calcular_status_final(df)
+
+    # o que alimenta as opções da sidebar: se mudar, a página inteira recarrega
+    estrutura = (
+        df["DIA"].dropna().max() if not df.empty else None,
+        df["DATA_BASE_LABEL"].nunique(),
+        df["EQUIPE"].nunique(),
+        df["CORRETOR"].nunique(),
     )
 
-    return df
+    return (df, status_final, estrutura)
 
 
-# carrega a base (BASE COMPLETA)
-df = carregar_dados_planilha(
-    _refresh_key=st.session_state.get("refresh_planilha")
-)
+def base_do_usuario():
+    """
+    Base completa já com bloqueio de corretor + status final por cliente.
+    Recalcula só quando a versão da planilha muda, e é usada tanto no rerun
+    completo quanto no fragmento dos indicadores.
+    Retorna (df, status_final_por_cliente, estrutura_dos_filtros).
+    """
+    corretor = nome_corretor_logado if perfil == "corretor" else None
+    versao, conteudo = baixar_planilha_csv()
+    return _base_painel(versao, corretor, conteudo)
+
 
-# 🔔 PROCESSA NOTIFICAÇÕES (ANTES DE QUALQUER FILTRO)
-processar_eventos(df)
+df, status_final_por_cliente, estrutura_filtros = base_do_usuario()
 
 # bootstrap do app (login, layout, etc)
 from utils.bootstrap import iniciar_app
 iniciar_app()
 
-
-# ---------------------------------------------------------
-# CONTEXTO DO USUÁRIO LOGADO
-# ---------------------------------------------------------
-perfil = st.session_state.get("perfil")
-nome_corretor_logado = (
-    st.session_state.get("nome_usuario", "")
-    .upper()
-    .strip()
-)
-
-# ---------------------------------------------------------
-# BLOQUEIO GLOBAL DE DADOS PARA PERFIL CORRETOR
-# ---------------------------------------------------------
-if perfil == "corretor":
-    if "CORRETOR" in df.columns:
-        df = df[df["CORRETOR"] == nome_corretor_logado]
-
 if df.empty:
     st.error("Erro ao carregar planilha.")
     st.stop()
 
-# 👇 NOVO – STATUS FINAL DO CLIENTE (HISTÓRICO COMPLETO DA PLANILHA)
-df_ordenado_global = df.sort_values("DIA")
-status_final_por_cliente = (
-    df_ordenado_global.groupby("CHAVE_CLIENTE")["STATUS_BASE"].last().fillna("")
-)
-status_final_por_cliente.name = "STATUS_FINAL_CLIENTE"
-
 # ---------------------------------------------------------
 # LEADS – API SUPREMO (CACHE 1 HORA)
 # ---------------------------------------------------------
 BASE_URL_LEADS = "https://api.supremocrm.com.br/v1/leads"
 
 
-@st.cache_data(ttl=3600)
+@cache_medido("leads_crm", st.cache_data, ttl=3600)
 def carregar_leads_direto(limit: int = 1000, max_pages: int = 100) -> pd.DataFrame:
     headers = {"Authorization": f"Bearer {TOKEN_SUPREMO}"}
 
@@ -435,39 +312,42 @@ def carregar_leads_direto(limit: int = 1000, max_pages: int = 100) -> pd.DataFra
     total = 0
     pagina = 1
 
-    while total < limit and pagina <= max_pages:
-        params = {"pagina": pagina}
-        try:
-            resp = requests.get(
-                BASE_URL_LEADS,
-                headers=headers,
-                params=params,
-                timeout=30,
-            )
-        except Exception:
-            break
-
-        if resp.status_code != 200:
-            break
-
-        try:
-            data = resp.json()
-        except Exception:
-            break
-
-        if isinstance(data, dict) and "data" in data:
-            df_page = pd.DataFrame(data["data"])
-        elif isinstance(data, list):
-            df_page = pd.DataFrame(data)
-        else:
-            df_page = pd.DataFrame()
-
-        if df_page.empty:
-            break
-
-        dfs.append(df_page)
-        total += len(df_page)
-        pagina += 1
+    with medir("crm_paginacao") as m:
+        while total < limit and pagina <= max_pages:
+            params = {"pagina": pagina}
+            try:
+                resp = requests.get(
+                    BASE_URL_LEADS,
+                    headers=headers,
+                    params=params,
+                    timeout=30,
+                )
+            except Exception:
+                break
+
+            if resp.status_code != 200:
+                break
+
+            try:
+                data = resp.json()
+            except Exception:
+                break
+
+            if isinstance(data, dict) and "data" in data:
+                df_page = pd.DataFrame(data["data"])
+            elif isinstance(data, list):
+                df_page = pd.DataFrame(data)
+            else:
+                df_page = pd.DataFrame()
+
+            if df_page.empty:
+                break
+
+            dfs.append(df_page)
+            total += len(df_page)
+            pagina += 1
+
+        m["linhas"] = total
 
     if not dfs:
         return pd.DataFrame()
@@ -603,83 +483,34 @@ if "df_leads" not in st.session_state:
     st.session_state["df_leads"] = df_leads
 
 # ---------------------------------------------------------
-# FILTRO PRINCIPAL NA PLANILHA
-# ---------------------------------------------------------
-if tipo_periodo == "DIA":
-    df_filtrado = df[
-        (df["DIA"] >= data_ini) &
-        (df["DIA"] <= data_fim)
-    ].copy()
-else:
-    df_filtrado = df[df["DATA_BASE_LABEL"].isin(bases_selecionadas)].copy()
-    dias_sel = df_filtrado["DIA"].dropna()
-    if not dias_sel.empty:
-        data_ini = dias_sel.min()
-        data_fim = dias_sel.max()
-    else:
-        data_ini = dias_validos.min()
-        data_fim = dias_validos.max()
-
-if equipe_sel != "Todas":
-    df_filtrado = df_filtrado[df_filtrado["EQUIPE"] == equipe_sel]
-
-if corretor_sel != "Todos":
-    df_filtrado = df_filtrado[df_filtrado["CORRETOR"] == corretor_sel]
-
-registros_filtrados = len(df_filtrado)
-
-# ---------------------------------------------------------
-# TÍTULO / CAPTION
+# TÍTULO
 # ---------------------------------------------------------
 st.title("📊 Painel comercial – MR Imóveis")
 
-if tipo_periodo == "DIA":
-    label_periodo = "Período (DIA)"
-    periodo_str = f"{data_ini.strftime('%d/%m/%Y')} até {data_fim.strftime('%d/%m/%Y')}"
-else:
-    label_periodo = "Período (DATA BASE)"
-    if len(bases_selecionadas) == 1:
-        periodo_str = bases_selecionadas[0]
-    else:
-        periodo_str = f"{bases_selecionadas[0]} até {bases_selecionadas[-1]}"
 
-st.caption(
-    f"{label_periodo}: {periodo_str} • Registros filtrados: {registros_filtrados}"
-)
-
-# ---------------------------------------------------------
-# SELETOR DE VENDAS (GERADAS + INFORMADAS vs SOMENTE GERADAS)
-# ---------------------------------------------------------
-filtro_vendas = st.radio(
-    "Tipo de vendas consideradas nos indicadores:",
-    ["GERADAS + INFORMADAS", "Somente GERADAS"],
-    index=0,
-    horizontal=True,
-)
+def indicadores_planilha(df_filtrado, status_final_por_cliente, somente_geradas: bool) -> dict:
+    """
+    Contagens de status + vendas (1 por cliente, regra do DESISTIU) do recorte.
+    Fica no cache de recortes: mesmo filtro = mesmo resultado para todos.
+    """
+    ind = {
+        "em_analise": int((df_filtrado["STATUS_BASE"] == "EM ANÁLISE").sum()),
+        "reanalise": int((df_filtrado["STATUS_BASE"] == "REANÁLISE").sum()),
+        "aprovacoes": int((df_filtrado["STATUS_BASE"] == "APROVADO").sum()),
+        "reprovacoes": int((df_filtrado["STATUS_BASE"] == "REPROVADO").sum()),
+        "venda_gerada": 0,
+        "venda_informada": 0,
+        "vendas_total": 0,
+        "vgv_total": 0,
+        "maior_vgv": 0,
+    }
 
-# ---------------------------------------------------------
-# CÁLCULOS PRINCIPAIS (PLANILHA)
-# ---------------------------------------------------------
-em_analise = (df_filtrado["STATUS_BASE"] == "EM ANÁLISE").sum()
-reanalise = (df_filtrado["STATUS_BASE"] == "REANÁLISE").sum()
-aprovacoes = (df_filtrado["STATUS_BASE"] == "APROVADO").sum()
-reprovacoes = (df_filtrado["STATUS_BASE"] == "REPROVADO").sum()
-
-analises_total = em_analise + reanalise
-
-# Base de vendas: GERADA ou INFORMADA (todas as ocorrências)
-df_vendas_ref = df_filtrado[
-    df_filtrado["STATUS_BASE"].isin(["VENDA GERADA", "VENDA INFORMADA"])
-].copy()
-
-if not df_vendas_ref.empty:
-    # garante CHAVE_CLIENTE
-    if "CHAVE_CLIENTE" not in df_vendas_ref.columns:
-        df_vendas_ref["CHAVE_CLIENTE"] = (
-            df_vendas_ref["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO")
-            + " | "
-            + df_vendas_ref["CPF_CLIENTE_BASE"].fillna("")
-        )
+    # Base de vendas: GERADA ou INFORMADA (todas as ocorrências)
+    df_vendas_ref = df_filtrado[
+        df_filtrado["STATUS_BASE"].isin(["VENDA GERADA", "VENDA INFORMADA"])
+    ]
+    if df_vendas_ref.empty:
+        return ind
 
     # 👇 NOVO – junta STATUS_FINAL_CLIENTE (histórico completo) e aplica regra DESISTIU
     df_vendas_ref = df_vendas_ref.merge(
@@ -692,140 +523,209 @@ if not df_vendas_ref.empty:
     df_vendas_ref = df_vendas_ref[
         df_vendas_ref["STATUS_FINAL_CLIENTE"] != "DESISTIU"
     ]
+    if df_vendas_ref.empty:
+        return ind
 
-    if not df_vendas_ref.empty:
-        df_vendas_ref = df_vendas_ref.sort_values("DIA")
-        # última ocorrência de cada cliente
-        df_vendas_ult_base = df_vendas_ref.groupby("CHAVE_CLIENTE").tail(1)
+    # última ocorrência de cada cliente
+    df_vendas_ult = df_vendas_ref.sort_values("DIA").groupby("CHAVE_CLIENTE").tail(1)
 
-        # aplica filtro do botão
-        if filtro_vendas == "Somente GERADAS":
-            df_vendas_ult = df_vendas_ult_base[
-                df_vendas_ult_base["STATUS_BASE"] == "VENDA GERADA"
-            ].copy()
-        else:
-            df_vendas_ult = df_vendas_ult_base.copy()
+    # aplica filtro do botão
+    if somente_geradas:
+        df_vendas_ult = df_vendas_ult[df_vendas_ult["STATUS_BASE"] == "VENDA GERADA"]
+    if df_vendas_ult.empty:
+        return ind
 
-        if not df_vendas_ult.empty:
-            venda_gerada = (df_vendas_ult["STATUS_BASE"] == "VENDA GERADA").sum()
-            venda_informada = (df_vendas_ult["STATUS_BASE"] == "VENDA INFORMADA").sum()
-            vendas_total = int(venda_gerada + venda_informada)
+    ind["venda_gerada"] = int((df_vendas_ult["STATUS_BASE"] == "VENDA GERADA").sum())
+    ind["venda_informada"] = int((df_vendas_ult["STATUS_BASE"] == "VENDA INFORMADA").sum())
+    ind["vendas_total"] = ind["venda_gerada"] + ind["venda_informada"]
+    ind["vgv_total"] = df_vendas_ult["VGV"].sum()
+    ind["maior_vgv"] = df_vendas_ult["VGV"].max() if ind["vendas_total"] > 0 else 0
+    return ind
 
-            vgv_total = df_vendas_ult["VGV"].sum()
-            maior_vgv = df_vendas_ult["VGV"].max() if vendas_total > 0 else 0
-        else:
-            venda_gerada = 0
-            venda_informada = 0
-            vendas_total = 0
-            vgv_total = 0
-            maior_vgv = 0
-    else:
-        venda_gerada = 0
-        venda_informada = 0
-        vendas_total = 0
-        vgv_total = 0
-        maior_vgv = 0
-else:
-    venda_gerada = 0
-    venda_informada = 0
-    vendas_total = 0
-    vgv_total = 0
-    maior_vgv = 0
-
-ticket_medio = (vgv_total / vendas_total) if vendas_total > 0 else 0
-
-taxa_aprov_analise = (aprovacoes / analises_total * 100) if analises_total else 0
-taxa_venda_analise = (vendas_total / analises_total * 100) if analises_total else 0
-taxa_venda_aprov = (vendas_total / aprovacoes * 100) if aprovacoes else 0
 
 # ---------------------------------------------------------
-# CARDS – ANÁLISES & VENDAS
+# INDICADORES AO VIVO (FRAGMENTO)
 # ---------------------------------------------------------
-st.subheader("Resumo de Análises & Vendas")
+# Só este bloco roda a cada INTERVALO_VERIFICACAO_S: CSS, logo, sidebar e
+# leads não são reprocessados. A base é relida do cache por versão.
+@st.fragment(run_every=INTERVALO_VERIFICACAO_S)
+def painel_indicadores(
+    tipo_periodo, data_ini, data_fim, bases_selecionadas, equipe_sel, corretor_sel
+):
+    df, status_final_por_cliente, estrutura = base_do_usuario()
 
-c1, c2, c3, c4 = st.columns(4)
-c1.metric("Em análise", em_analise)
-c2.metric("Reanálise", reanalise)
-c3.metric("Aprovações", aprovacoes)
-c4.metric("Reprovações", reprovacoes)
+    # novo dia / base / equipe / corretor: opções da sidebar mudaram
+    if estrutura != estrutura_filtros:
+        st.rerun(scope="app")
 
-c5, c6, c7 = st.columns(3)
-c5.metric("Vendas GERADAS (clientes)", int(venda_gerada))
-c6.metric("Vendas INFORMADAS (clientes)", int(venda_informada))
-c7.metric("Total Vendas (clientes)", int(vendas_total))
+    dias_validos = df["DIA"].dropna()
 
-c8, c9, c10 = st.columns(3)
-c8.metric("Aprov./Análises", f"{taxa_aprov_analise:.1f}%")
-c9.metric("Vendas/Análises", f"{taxa_venda_analise:.1f}%")
-c10.metric("Vendas/Aprovações", f"{taxa_venda_aprov:.1f}%")
+    # ---------------------------------------------------------
+    # FILTRO PRINCIPAL NA PLANILHA (RECORTE EM CACHE COMPARTILHADO)
+    # ---------------------------------------------------------
+    versao = versao_planilha()
+    contexto = ("app_dashboard", perfil, nome_corretor_logado if perfil == "corretor" else None)
 
-# ---------------------------------------------------------
-# LEADS – RESUMO (CRM)
-# ---------------------------------------------------------
-st.markdown("---")
-st.subheader("📈 Resumo de Leads (Supremo CRM)")
+    if tipo_periodo == "DIA":
+        filtro_periodo = filtro_normalizado(periodo=(data_ini, data_fim))
+    else:
+        filtro_periodo = filtro_normalizado(bases=bases_selecionadas)
+        dias_sel = recorte_filtrado(contexto, versao, filtro_periodo, df)["DIA"].dropna()
+        if not dias_sel.empty:
+            data_ini = dias_sel.min()
+            data_fim = dias_sel.max()
+        else:
+            data_ini = dias_validos.min()
+            data_fim = dias_validos.max()
 
-df_leads_use = df_leads.copy()
+    filtro = filtro_normalizado(*filtro_periodo[:2], equipe=equipe_sel, corretor=corretor_sel)
+    df_filtrado = recorte_filtrado(contexto, versao, filtro, df)
 
-if not df_leads_use.empty and "data_captura_date" in df_leads_use.columns:
-    df_leads_use = df_leads_use.dropna(subset=["data_captura_date"])
-    df_leads_use = df_leads_use[
-        (df_leads_use["data_captura_date"] >= data_ini)
-        & (df_leads_use["data_captura_date"] <= data_fim)
-    ]
+    registros_filtrados = len(df_filtrado)
 
-    if equipe_sel != "Todas" and "equipe_lead_norm" in df_leads_use.columns:
-        df_leads_use = df_leads_use[
-            df_leads_use["equipe_lead_norm"] == equipe_sel
-        ]
+    # ---------------------------------------------------------
+    # CAPTION
+    # ---------------------------------------------------------
+    if tipo_periodo == "DIA":
+        label_periodo = "Período (DIA)"
+        periodo_str = f"{data_ini.strftime('%d/%m/%Y')} até {data_fim.strftime('%d/%m/%Y')}"
+    else:
+        label_periodo = "Período (DATA BASE)"
+        if len(bases_selecionadas) == 1:
+            periodo_str = bases_selecionadas[0]
+        else:
+            periodo_str = f"{bases_selecionadas[0]} até {bases_selecionadas[-1]}"
 
-    if corretor_sel != "Todos" and "nome_corretor_norm" in df_leads_use.columns:
+    st.caption(
+        f"{label_periodo}: {periodo_str} • Registros filtrados: {registros_filtrados}"
+    )
+
+    # ---------------------------------------------------------
+    # SELETOR DE VENDAS (GERADAS + INFORMADAS vs SOMENTE GERADAS)
+    # ---------------------------------------------------------
+    filtro_vendas = st.radio(
+        "Tipo de vendas consideradas nos indicadores:",
+        ["GERADAS + INFORMADAS", "Somente GERADAS"],
+        index=0,
+        horizontal=True,
+    )
+
+    # ---------------------------------------------------------
+    # CÁLCULOS PRINCIPAIS (PLANILHA) — EM CACHE POR FILTRO
+    # ---------------------------------------------------------
+    ind = agregado_filtrado(
+        contexto, versao, filtro, df, "indicadores_planilha",
+        lambda recorte, somente_geradas: indicadores_planilha(
+            recorte, status_final_por_cliente, somente_geradas
+        ),
+        filtro_vendas == "Somente GERADAS",
+    )
+    em_analise = ind["em_analise"]
+    reanalise = ind["reanalise"]
+    aprovacoes = ind["aprovacoes"]
+    reprovacoes = ind["reprovacoes"]
+    venda_gerada = ind["venda_gerada"]
+    venda_informada = ind["venda_informada"]
+    vendas_total = ind["vendas_total"]
+    vgv_total = ind["vgv_total"]
+    maior_vgv = ind["maior_vgv"]
+
+    analises_total = em_analise + reanalise
+
+    ticket_medio = (vgv_total / vendas_total) if vendas_total > 0 else 0
+
+    taxa_aprov_analise = (aprovacoes / analises_total * 100) if analises_total else 0
+    taxa_venda_analise = (vendas_total / analises_total * 100) if analises_total else 0
+    taxa_venda_aprov = (vendas_total / aprovacoes * 100) if aprovacoes else 0
+
+    # ---------------------------------------------------------
+    # CARDS – ANÁLISES & VENDAS
+    # ---------------------------------------------------------
+    st.subheader("Resumo de Análises & Vendas")
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Em análise", em_analise)
+    c2.metric("Reanálise", reanalise)
+    c3.metric("Aprovações", aprovacoes)
+    c4.metric("Reprovações", reprovacoes)
+
+    c5, c6, c7 = st.columns(3)
+    c5.metric("Vendas GERADAS (clientes)", int(venda_gerada))
+    c6.metric("Vendas INFORMADAS (clientes)", int(venda_informada))
+    c7.metric("Total Vendas (clientes)", int(vendas_total))
+
+    c8, c9, c10 = st.columns(3)
+    c8.metric("Aprov./Análises", f"{taxa_aprov_analise:.1f}%")
+    c9.metric("Vendas/Análises", f"{taxa_venda_analise:.1f}%")
+    c10.metric("Vendas/Aprovações", f"{taxa_venda_aprov:.1f}%")
+
+    # ---------------------------------------------------------
+    # LEADS – RESUMO (CRM)
+    # ---------------------------------------------------------
+    st.markdown("---")
+    st.subheader("📈 Resumo de Leads (Supremo CRM)")
+
+    df_leads_use = df_leads
+
+    if not df_leads_use.empty and "data_captura_date" in df_leads_use.columns:
+        df_leads_use = df_leads_use.dropna(subset=["data_captura_date"])
         df_leads_use = df_leads_use[
-            df_leads_use["nome_corretor_norm"] == corretor_sel
+            (df_leads_use["data_captura_date"] >= data_ini)
+            & (df_leads_use["data_captura_date"] <= data_fim)
         ]
 
-    total_leads_periodo = len(df_leads_use)
+        if equipe_sel != "Todas" and "equipe_lead_norm" in df_leads_use.columns:
+            df_leads_use = df_leads_use[
+                df_leads_use["equipe_lead_norm"] == equipe_sel
+            ]
 
-    if corretor_sel != "Todos":
-        label_leads = "Leads do corretor (período filtrado)"
-    elif equipe_sel != "Todas":
-        label_leads = "Leads da equipe (período filtrado)"
-    else:
-        label_leads = "Leads da imobiliária (período filtrado)"
+        if corretor_sel != "Todos" and "nome_corretor_norm" in df_leads_use.columns:
+            df_leads_use = df_leads_use[
+                df_leads_use["nome_corretor_norm"] == corretor_sel
+            ]
+
+        total_leads_periodo = len(df_leads_use)
 
-    cL1, cL2, cL3 = st.columns(3)
-    cL1.metric(label_leads, total_leads_periodo)
+        if corretor_sel != "Todos":
+            label_leads = "Leads do corretor (período filtrado)"
+        elif equipe_sel != "Todas":
+            label_leads = "Leads da equipe (período filtrado)"
+        else:
+            label_leads = "Leads da imobiliária (período filtrado)"
+
+        cL1, cL2, cL3 = st.columns(3)
+        cL1.metric(label_leads, total_leads_periodo)
 
-    if "nome_corretor_norm" in df_leads_use.columns and not df_leads_use.empty:
-        qtd_corretor = df_leads_use["nome_corretor_norm"].nunique()
-        cL2.metric("Corretores com leads no período", qtd_corretor)
+        if "nome_corretor_norm" in df_leads_use.columns and not df_leads_use.empty:
+            qtd_corretor = df_leads_use["nome_corretor_norm"].nunique()
+            cL2.metric("Corretores com leads no período", qtd_corretor)
 
-        if qtd_corretor > 0:
-            media_leads = total_leads_periodo / qtd_corretor
-            cL3.metric("Média de leads por corretor", f"{media_leads:.1f}")
+            if qtd_corretor > 0:
+                media_leads = total_leads_periodo / qtd_corretor
+                cL3.metric("Média de leads por corretor", f"{media_leads:.1f}")
+            else:
+                cL3.metric("Média de leads por corretor", "-")
         else:
+            cL2.metric("Corretores com leads no período", "-")
             cL3.metric("Média de leads por corretor", "-")
     else:
-        cL2.metric("Corretores com leads no período", "-")
-        cL3.metric("Média de leads por corretor", "-")
-else:
-    st.info("Nenhum lead carregado ou campo 'data_captura' ausente na base.")
-
-# ---------------------------------------------------------
-# INDICADORES DE VGV
-# ---------------------------------------------------------
-st.markdown("---")
-st.subheader("💰 Indicadores de VGV (apenas clientes com venda)")
+        st.info("Nenhum lead carregado ou campo 'data_captura' ausente na base.")
 
+    # ---------------------------------------------------------
+    # INDICADORES DE VGV
+    # ---------------------------------------------------------
+    st.markdown("---")
+    st.subheader("💰 Indicadores de VGV (apenas clientes com venda)")
 
-def format_currency(valor: float) -> str:
-    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    c11, c12, c13 = st.columns(3)
+    c11.metric("VGV Total", moeda_valor(vgv_total))
+    c12.metric("Ticket Médio", moeda_valor(ticket_medio))
+    c13.metric("Maior VGV", moeda_valor(maior_vgv))
 
 
-c11, c12, c13 = st.columns(3)
-c11.metric("VGV Total", format_currency(vgv_total))
-c12.metric("Ticket Médio", format_currency(ticket_medio))
-c13.metric("Maior VGV", format_currency(maior_vgv))
+painel_indicadores(
+    tipo_periodo, data_ini, data_fim, bases_selecionadas, equipe_sel, corretor_sel
+)
 
 st.markdown(
     "<hr><p style='text-align:center; color:#6b7280;'>"
@@ -834,3 +734,4 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+finalizar_medicao()
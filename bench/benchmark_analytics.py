@@ -0,0 +1,214 @@
+"""
+Benchmark dos caminhos analíticos do dashboard sobre planilhas sintéticas.
+
+Mede o mesmo código que as páginas usam (utils.data_loader, utils.indicadores,
+utils.planejamento, utils.series_diarias, utils.formatacao,
+utils.notificacoes_json), sem Google Sheets e sem Streamlit rodando.
+
+Uso:
+    python bench/benchmark_analytics.py                          # 10k, 100k e 1M (gera em memória)
+    python bench/benchmark_analytics.py --linhas 100000 --repeticoes 5
+    python bench/benchmark_analytics.py --arquivo bench/dados/planilha_sintetica_100000.csv
+    python bench/benchmark_analytics.py --salvar base.csv        # grava a linha de base
+    python bench/benchmark_analytics.py --comparar base.csv      # falha se houver regressão
+"""
+import argparse
+import io
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+import pandas as pd  # noqa: E402
+
+from bench.gerar_planilha_sintetica import TAMANHOS_PADRAO, gerar_planilha  # noqa: E402
+from utils import notificacoes_json  # noqa: E402
+from utils.data_loader import classificar_status_base, tratar_planilha  # noqa: E402
+from utils.indicadores import (  # noqa: E402
+    bases_anteriores,
+    calcular_status_final,
+    meta_historica,
+    ranking_por,
+    ultima_linha_por_chave,
+    vendas_unicas,
+)
+from utils.formatacao import data_br, moeda  # noqa: E402
+from utils.planejamento import construir_planejamento  # noqa: E402
+from utils.series_diarias import construir_series  # noqa: E402
+
+TIPOS_META = ["Número de Análises", "Número de Aprovações", "Número de Vendas"]
+VENDAS_GERADAS = ["VENDA GERADA"]
+VENDAS_TODAS = ["VENDA GERADA", "VENDA INFORMADA"]
+
+
+# =========================================================
+# CRONÔMETRO
+# =========================================================
+def cronometrar(func, repeticoes: int, preparar=None) -> list:
+    """Executa `func` N vezes e devolve os tempos em ms (preparar() fora do tempo)."""
+    tempos = []
+    for _ in range(repeticoes):
+        args = preparar() if preparar else ()
+        inicio = time.perf_counter()
+        func(*args)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+# =========================================================
+# CENÁRIOS
+# =========================================================
+def _csv_em_bytes(df_bruto: pd.DataFrame) -> bytes:
+    buffer = io.StringIO()
+    df_bruto.to_csv(buffer, index=False)
+    return buffer.getvalue().encode("utf-8")
+
+
+def cenarios(conteudo_csv: bytes, pasta_tmp: Path):
+    """
+    Lista (nome, func, preparar). A base tratada é montada uma vez e
+    reaproveitada pelos cenários de indicadores, como nas páginas.
+    """
+    df = tratar_planilha(pd.read_csv(io.BytesIO(conteudo_csv)))
+    situacao = df["SITUAÇÃO"]
+    status_final = calcular_status_final(df)
+
+    # 05_Funil trabalha com DIA / DATA_BASE em datetime
+    df_funil = df.copy()
+    df_funil["DIA"] = pd.to_datetime(df_funil["DIA"], errors="coerce")
+    df_funil["DATA_BASE"] = pd.to_datetime(df_funil["DATA_BASE"], errors="coerce")
+    status_final_funil = calcular_status_final(df_funil)
+    base_ref = df_funil["DATA_BASE"].max()
+
+    def meta_funil():
+        labels = bases_anteriores(df_funil, base_ref, n=3)
+        for tipo in TIPOS_META:
+            meta_historica(df_funil, labels, tipo, status_final_funil)
+
+    # processar_eventos grava JSON: aponta para uma pasta temporária
+    notificacoes_json.ARQ_NOTIFICACOES = pasta_tmp / "notificacoes.json"
+    notificacoes_json.ARQ_SNAPSHOT = pasta_tmp / "snapshot_clientes.json"
+
+    def estado_vazio():
+        for arq in (notificacoes_json.ARQ_NOTIFICACOES, notificacoes_json.ARQ_SNAPSHOT):
+            arq.unlink(missing_ok=True)
+        return ()
+
+    def estado_em_dia():
+        if not notificacoes_json.ARQ_SNAPSHOT.exists():
+            notificacoes_json.processar_eventos(df)
+        return ()
+
+    return [
+        ("loader: read_csv (inferência)", lambda: pd.read_csv(io.BytesIO(conteudo_csv)), None),
+        ("loader: read_csv (dtype=str)",
+         lambda: pd.read_csv(io.BytesIO(conteudo_csv), dtype=str, keep_default_na=False), None),
+        ("loader: read_csv + tratar_planilha",
+         lambda: tratar_planilha(pd.read_csv(io.BytesIO(conteudo_csv))), None),
+        ("classificação STATUS_BASE (exata)", lambda: classificar_status_base(situacao, True), None),
+        ("classificação STATUS_BASE (contém APROV)", lambda: classificar_status_base(situacao, False), None),
+        ("status_final_por_cliente", lambda: calcular_status_final(df), None),
+        ("última linha por cliente (carteira)",
+         lambda: ultima_linha_por_chave(df, ["NOME_CLIENTE_BASE", "CPF_CLIENTE_BASE"]), None),
+        ("vendas únicas (geradas)", lambda: vendas_unicas(df, status_final, VENDAS_GERADAS), None),
+        ("vendas únicas (geradas + informadas)", lambda: vendas_unicas(df, status_final, VENDAS_TODAS), None),
+        ("ranking por CORRETOR", lambda: ranking_por(df, status_final, "CORRETOR", VENDAS_TODAS), None),
+        ("ranking por EQUIPE", lambda: ranking_por(df, status_final, "EQUIPE", VENDAS_TODAS), None),
+        ("funil: meta histórica (3 bases × 3 tipos)", meta_funil, None),
+        ("funil: tabela de planejamento (todos os escopos)",
+         lambda: construir_planejamento(df_funil, status_final_funil), None),
+        ("funil: séries diárias Meta x Real (todos os escopos)",
+         lambda: construir_series(df_funil, status_final_funil), None),
+        ("formatação: VGV em R$ (coluna inteira)", lambda: moeda(df["VGV"]), None),
+        ("formatação: DIA em dd/mm/aaaa (coluna inteira)", lambda: data_br(df_funil["DIA"]), None),
+        ("processar_eventos (1ª carga)", lambda: notificacoes_json.processar_eventos(df), estado_vazio),
+        ("processar_eventos (sem mudanças)", lambda: notificacoes_json.processar_eventos(df), estado_em_dia),
+    ]
+
+
+def rodar(df_bruto: pd.DataFrame, repeticoes: int) -> pd.DataFrame:
+    conteudo = _csv_em_bytes(df_bruto)
+    linhas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for nome, func, preparar in cenarios(conteudo, Path(tmp)):
+            tempos = cronometrar(func, repeticoes, preparar)
+            linhas.append({
+                "LINHAS": len(df_bruto),
+                "CENÁRIO": nome,
+                "MÍN (ms)": round(min(tempos), 1),
+                "MEDIANA (ms)": round(statistics.median(tempos), 1),
+                "MÁX (ms)": round(max(tempos), 1),
+            })
+            print(f"  {nome:<45} {statistics.median(tempos):>10.1f} ms", flush=True)
+    return pd.DataFrame(linhas)
+
+
+# =========================================================
+# REGRESSÃO
+# =========================================================
+def comparar(atual: pd.DataFrame, base: pd.DataFrame, tolerancia: float) -> pd.DataFrame:
+    """Cenários cuja mediana piorou mais que `tolerancia` (0.2 = 20%) contra a linha de base."""
+    juntos = atual.merge(
+        base[["LINHAS", "CENÁRIO", "MEDIANA (ms)"]],
+        on=["LINHAS", "CENÁRIO"],
+        suffixes=("", " BASE"),
+    )
+    juntos["VARIAÇÃO"] = juntos["MEDIANA (ms)"] / juntos["MEDIANA (ms) BASE"] - 1
+    return juntos[juntos["VARIAÇÃO"] > tolerancia]
+
+
+# =========================================================
+# CLI
+# =========================================================
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark dos indicadores do dashboard.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=TAMANHOS_PADRAO)
+    parser.add_argument("--arquivo", type=Path, nargs="+",
+                        help="CSV(s) já gerados por gerar_planilha_sintetica.py")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--salvar", type=Path, help="grava os resultados (CSV) como linha de base")
+    parser.add_argument("--comparar", type=Path, help="linha de base (CSV) para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if args.arquivo:
+        planilhas = ((str(p), lambda p=p: pd.read_csv(p, dtype=str, keep_default_na=False))
+                     for p in args.arquivo)
+    else:
+        planilhas = ((f"{n:,} linhas (sintética)".replace(",", "."),
+                      lambda n=n: gerar_planilha(n, seed=args.seed))
+                     for n in args.linhas)
+
+    resultados = []
+    for titulo, carregar in planilhas:
+        print(f"\n📊 {titulo}")
+        resultados.append(rodar(carregar(), args.repeticoes))
+
+    resultado = pd.concat(resultados, ignore_index=True)
+    print()
+    print(resultado.to_string(index=False))
+
+    if args.salvar:
+        resultado.to_csv(args.salvar, index=False)
+        print(f"\n💾 Linha de base gravada em {args.salvar}")
+
+    if args.comparar:
+        regressoes = comparar(resultado, pd.read_csv(args.comparar), args.tolerancia)
+        if not regressoes.empty:
+            print(f"\n⚠️ Regressões acima de {args.tolerancia:.0%}:")
+            print(regressoes[["LINHAS", "CENÁRIO", "MEDIANA (ms) BASE", "MEDIANA (ms)", "VARIAÇÃO"]]
+                  .to_string(index=False))
+            return 1
+        print(f"\n✅ Nenhuma regressão acima de {args.tolerancia:.0%}.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""
+Teste de carga headless: várias sessões simultâneas rodando os scripts reais
+(app_dashboard.py e pages/*.py) com usuários logados de cada perfil.
+
+A planilha e o CRM são servidos localmente (dados sintéticos de
+gerar_planilha_sintetica.py), então nada sai para a rede; cada busca que
+sairia é contada. Os caches do Streamlit (st.cache_data / st.cache_resource)
+são compartilhados entre as sessões, como no servidor de verdade.
+
+Uso:
+    python bench/carga_sessoes.py                                   # 1, 10, 20 e 40 sessões
+    python bench/carga_sessoes.py --sessoes 5 40 --reruns 3 --linhas 100000
+    python bench/carga_sessoes.py --paginas app_dashboard.py pages/05_Funil.py
+    python bench/carga_sessoes.py --latencia-ms 800 --tracemalloc --salvar carga.csv
+"""
+import argparse
+import io
+import itertools
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+RAIZ = Path(__file__).resolve().parents[1]
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+import pandas as pd  # noqa: E402
+import requests  # noqa: E402
+
+from bench.gerar_planilha_sintetica import gerar_leads_crm, gerar_planilha  # noqa: E402
+
+# =========================================================
+# PERFIS E PÁGINAS
+# =========================================================
+PAGINAS_POR_PERFIL = {
+    "corretor": [
+        "app_dashboard.py",
+        "pages/08_Clientes_MR.py",
+        "pages/12_Carteira_Clientes.py",
+    ],
+    "gestor": [
+        "app_dashboard.py",
+        "pages/01_Analises_Diarias.py",
+        "pages/02_Ranking_Corretores.py",
+        "pages/03_Ranking_Equipe.py",
+        "pages/05_Funil.py",
+        "pages/13_Vendas.py",
+        "pages/14_Corretores_Visao_Geral.py",
+        "pages/15_Atendimento_Leads.py",
+        "pages/18_Pre_Cadastro.py",
+    ],
+    "admin": [
+        "app_dashboard.py",
+        "pages/07_Alertas.py",
+        "pages/09_Clientes_em_Analise.py",
+        "pages/10_Clientes_com_Pendencia.py",
+        "pages/11_Clientes_Aprovados.py",
+        "pages/15_Atendimento_Leads.py",
+        "pages/16_Oferta_Ativa.py",
+        "pages/17_Funil_de_leads.py",
+        "pages/99_pagina_teste.py",
+    ],
+}
+
+HOST_PLANILHA = "docs.google.com"
+HOST_CRM = "api.supremocrm.com.br"
+LEADS_POR_PAGINA_CRM = 50
+
+
+# =========================================================
+# FONTES LOCAIS (PLANILHA + CRM) COM CONTAGEM DE BUSCAS
+# =========================================================
+class _Resposta:
+    def __init__(self, status_code=200, content=b"", dados=None):
+        self.status_code = status_code
+        self.content = content
+        self._dados = dados
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return self._dados
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+
+class FontesLocais:
+    """Substitui requests.get e pd.read_csv(URL) enquanto o teste roda."""
+
+    def __init__(self, conteudo_csv: bytes, leads: list, latencia_s: float = 0.0):
+        self.conteudo_csv = conteudo_csv
+        self.leads = leads
+        self.latencia_s = latencia_s
+        self._lock = threading.Lock()
+        self._read_csv_original = pd.read_csv
+        self.zerar()
+
+    def zerar(self):
+        with self._lock:
+            self.buscas = {"planilha": 0, "crm": 0, "outros": 0}
+
+    def _contar(self, fonte):
+        with self._lock:
+            self.buscas[fonte] += 1
+        if self.latencia_s:
+            time.sleep(self.latencia_s)
+
+    def get(self, url, params=None, **kwargs):
+        if HOST_PLANILHA in url:
+            self._contar("planilha")
+            return _Resposta(content=self.conteudo_csv)
+
+        if HOST_CRM in url:
+            self._contar("crm")
+            pagina = int((params or {}).get("pagina", 1))
+            inicio = (pagina - 1) * LEADS_POR_PAGINA_CRM
+            return _Resposta(dados={"data": self.leads[inicio:inicio + LEADS_POR_PAGINA_CRM]})
+
+        self._contar("outros")
+        raise requests.ConnectionError(f"sem rede no teste de carga: {url}")
+
+    def read_csv(self, origem, *args, **kwargs):
+        if isinstance(origem, str) and HOST_PLANILHA in origem:
+            self._contar("planilha")
+            origem = io.BytesIO(self.conteudo_csv)
+        return self._read_csv_original(origem, *args, **kwargs)
+
+    def ativar(self):
+        return [
+            mock.patch.object(requests, "get", self.get),
+            mock.patch.object(pd, "read_csv", self.read_csv),
+        ]
+
+
+# =========================================================
+# SESSÕES
+# =========================================================
+def _usuarios(df_planilha: pd.DataFrame):
+    corretores = sorted(df_planilha["CORRETOR"].str.upper().str.strip().unique())
+    return {
+        "corretor": [{"usuario": c.lower().replace(" ", "."), "nome_usuario": c} for c in corretores],
+        "gestor": [{"usuario": "gestor.carga", "nome_usuario": "GESTOR CARGA"}],
+        "admin": [{"usuario": "admin.carga", "nome_usuario": "ADMIN CARGA"}],
+    }
+
+
+def rodar_sessao(pagina: str, perfil: str, usuario: dict, reruns: int, timeout_s: float):
+    """
+    Uma sessão = uma página aberta por um usuário logado; cada rerun
+    equivale a um autorefresh/interação. Devolve (tempos_ms, erros).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(RAIZ / pagina), default_timeout=timeout_s)
+    at.session_state["logado"] = True
+    at.session_state["perfil"] = perfil
+    at.session_state["usuario"] = usuario["usuario"]
+    at.session_state["nome_usuario"] = usuario["nome_usuario"]
+
+    tempos, erros = [], []
+    for _ in range(reruns):
+        inicio = time.perf_counter()
+        try:
+            at.run()
+        except Exception as e:  # timeout ou erro do próprio AppTest
+            erros.append(f"{type(e).__name__}: {e}")
+            break
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        erros.extend(str(x.value) for x in at.exception)
+    return tempos, erros
+
+
+def _plano(n_sessoes: int, perfis: list, paginas_fixas, usuarios: dict):
+    """Distribui N sessões entre perfis e páginas (round-robin)."""
+    ciclo_perfis = itertools.cycle(perfis)
+    ciclos_paginas = {p: itertools.cycle(paginas_fixas or PAGINAS_POR_PERFIL[p]) for p in perfis}
+    ciclos_usuarios = {p: itertools.cycle(usuarios[p]) for p in perfis}
+
+    plano = []
+    for _ in range(n_sessoes):
+        perfil = next(ciclo_perfis)
+        plano.append((next(ciclos_paginas[perfil]), perfil, next(ciclos_usuarios[perfil])))
+    return plano
+
+
+def _limpar_caches():
+    import streamlit as st
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def _pico_rss_mb() -> float:
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1024 / 1024 if sys.platform == "darwin" else pico / 1024
+
+
+def rodar_nivel(n_sessoes, plano, fontes, reruns, timeout_s, cache_frio, usar_tracemalloc):
+    if cache_frio:
+        _limpar_caches()
+    fontes.zerar()
+    if usar_tracemalloc:
+        tracemalloc.reset_peak()
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessoes) as pool:
+        futuros = [
+            (pagina, perfil, pool.submit(rodar_sessao, pagina, perfil, usuario, reruns, timeout_s))
+            for pagina, perfil, usuario in plano
+        ]
+        resultados = [(pagina, perfil, f.result()) for pagina, perfil, f in futuros]
+    duracao_s = time.perf_counter() - inicio
+
+    linhas = []
+    por_pagina = {}
+    for pagina, perfil, (tempos, erros) in resultados:
+        item = por_pagina.setdefault((pagina, perfil), {"tempos": [], "erros": [], "sessoes": 0})
+        item["tempos"].extend(tempos)
+        item["erros"].extend(erros)
+        item["sessoes"] += 1
+
+    for (pagina, perfil), item in sorted(por_pagina.items()):
+        tempos = item["tempos"] or [float("nan")]
+        linhas.append({
+            "SESSÕES": n_sessoes,
+            "PÁGINA": Path(pagina).stem,
+            "PERFIL": perfil,
+            "ABERTAS": item["sessoes"],
+            "RERUNS": len(item["tempos"]),
+            "P50 (ms)": round(statistics.median(tempos), 1),
+            "P95 (ms)": round(float(pd.Series(tempos).quantile(0.95)), 1),
+            "MÁX (ms)": round(max(tempos), 1),
+            "ERROS": len(item["erros"]),
+            "1º ERRO": item["erros"][0][:120] if item["erros"] else "",
+        })
+
+    resumo = {
+        "SESSÕES": n_sessoes,
+        "DURAÇÃO (s)": round(duracao_s, 2),
+        "BUSCAS PLANILHA": fontes.buscas["planilha"],
+        "BUSCAS CRM": fontes.buscas["crm"],
+        "BUSCAS OUTRAS": fontes.buscas["outros"],
+        "PICO RSS (MB)": round(_pico_rss_mb(), 1),
+    }
+    if usar_tracemalloc:
+        resumo["PICO PYTHON (MB)"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+
+    return pd.DataFrame(linhas), resumo
+
+
+# =========================================================
+# CLI
+# =========================================================
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga com sessões Streamlit simultâneas.")
+    parser.add_argument("--sessoes", type=int, nargs="+", default=[1, 10, 20, 40])
+    parser.add_argument("--reruns", type=int, default=2, help="reruns por sessão (abertura + autorefresh)")
+    parser.add_argument("--perfis", nargs="+", default=list(PAGINAS_POR_PERFIL), choices=list(PAGINAS_POR_PERFIL))
+    parser.add_argument("--paginas", nargs="+", help="restringe a estas páginas (caminho relativo à raiz)")
+    parser.add_argument("--linhas", type=int, default=20_000, help="linhas da planilha sintética")
+    parser.add_argument("--leads", type=int, default=3_000, help="leads do CRM sintético")
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="latência simulada por busca externa")
+    parser.add_argument("--timeout-s", type=float, default=120.0)
+    parser.add_argument("--cache-quente", action="store_true",
+                        help="não limpa os caches do Streamlit entre os níveis")
+    parser.add_argument("--tracemalloc", action="store_true", help="mede o pico de memória Python (mais lento)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--salvar", type=Path, help="grava a tabela por página (CSV)")
+    args = parser.parse_args(argv)
+
+    df_planilha = gerar_planilha(args.linhas, seed=args.seed)
+    buffer = io.StringIO()
+    df_planilha.to_csv(buffer, index=False)
+    fontes = FontesLocais(
+        buffer.getvalue().encode("utf-8"),
+        gerar_leads_crm(args.leads, seed=args.seed),
+        latencia_s=args.latencia_ms / 1000,
+    )
+    usuarios = _usuarios(df_planilha)
+
+    # notificações e snapshot vão para uma pasta temporária (antes de qualquer
+    # import que copie os caminhos)
+    from utils import notificacoes_json
+    pasta_tmp = tempfile.TemporaryDirectory()
+    notificacoes_json.ARQ_NOTIFICACOES = Path(pasta_tmp.name) / "notificacoes.json"
+    notificacoes_json.ARQ_SNAPSHOT = Path(pasta_tmp.name) / "snapshot_clientes.json"
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    tabelas, resumos = [], []
+    patches = fontes.ativar()
+    for p in patches:
+        p.start()
+    try:
+        for n in args.sessoes:
+            print(f"\n🚦 {n} sessão(ões) simultânea(s)…", flush=True)
+            plano = _plano(n, args.perfis, args.paginas, usuarios)
+            tabela, resumo = rodar_nivel(
+                n, plano, fontes, args.reruns, args.timeout_s,
+                cache_frio=not args.cache_quente,
+                usar_tracemalloc=args.tracemalloc,
+            )
+            tabelas.append(tabela)
+            resumos.append(resumo)
+            print(pd.DataFrame([resumo]).to_string(index=False))
+    finally:
+        for p in patches:
+            p.stop()
+        pasta_tmp.cleanup()
+
+    por_pagina = pd.concat(tabelas, ignore_index=True)
+    print("\n📄 Latência por página")
+    print(por_pagina.drop(columns=["1º ERRO"]).to_string(index=False))
+    print("\n📦 Resumo por nível")
+    print(pd.DataFrame(resumos).to_string(index=False))
+
+    com_erro = por_pagina[por_pagina["ERROS"] > 0]
+    if not com_erro.empty:
+        print("\n⚠️ Páginas com erro")
+        print(com_erro[["SESSÕES", "PÁGINA", "PERFIL", "ERROS", "1º ERRO"]].to_string(index=False))
+
+    if args.salvar:
+        por_pagina.to_csv(args.salvar, index=False)
+        print(f"\n💾 Resultados gravados em {args.salvar}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
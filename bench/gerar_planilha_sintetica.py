@@ -0,0 +1,251 @@
+"""
+Gera exportações sintéticas da planilha de análises (mesmo layout do CSV do
+Google Sheets) para medir o desempenho do app offline.
+
+Uso:
+    python bench/gerar_planilha_sintetica.py                 # 10k, 100k e 1M linhas
+    python bench/gerar_planilha_sintetica.py --linhas 50000 --saida /tmp/planilhas
+"""
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# PARÂMETROS DA BASE SINTÉTICA
+# =========================================================
+TAMANHOS_PADRAO = [10_000, 100_000, 1_000_000]
+PASTA_PADRAO = Path(__file__).resolve().parent / "dados"
+
+MESES = [
+    "janeiro", "fevereiro", "março", "abril", "maio", "junho",
+    "julho", "agosto", "setembro", "outubro", "novembro", "dezembro",
+]
+
+EQUIPES = ["ALFA", "BRAVO", "CHARLIE", "DELTA", "ECO", "FOX", "GOLF", "HOTEL"]
+CORRETORES_POR_EQUIPE = 8
+
+PRIMEIROS_NOMES = [
+    "ANA", "JOÃO", "MARIA", "JOSÉ", "ANTÔNIO", "FRANCISCA", "CARLOS", "PAULO",
+    "LUCAS", "LUÍSA", "MÁRCIA", "FÁBIO", "PATRÍCIA", "RAFAEL", "JÚLIA", "SÉRGIO",
+    "BRUNO", "CAMILA", "DÉBORA", "GABRIEL", "HELENA", "ÍCARO", "LETÍCIA", "VINÍCIUS",
+]
+SOBRENOMES = [
+    "SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "RODRIGUES", "FERREIRA", "ALVES",
+    "PEREIRA", "LIMA", "GOMES", "COSTA", "RIBEIRO", "MARTINS", "CARVALHO",
+    "ARAÚJO", "MELO", "BARBOSA", "CONCEIÇÃO", "GONÇALVES", "FALCÃO",
+]
+
+EMPREENDIMENTOS = [
+    ("MRV", "PARQUE DAS FLORES"),
+    ("MRV", "RESIDENCIAL BELA VISTA"),
+    ("DIRECIONAL", "CONQUISTA ITAPARICA"),
+    ("DIRECIONAL", "VIVER BEM"),
+    ("CURY", "JARDIM DAS ÁGUAS"),
+    ("TENDA", "PORTAL DO SOL"),
+    ("TENDA", "VILA NOVA"),
+    ("PACAEMBU", "RECANTO FELIZ"),
+]
+
+# Jornadas típicas de um cliente (ordem cronológica) e peso de cada uma.
+# Cobrem reanálises, pendências, vendas informadas que viram geradas e
+# desistências depois da venda (regra do DESISTIU).
+JORNADAS = [
+    (["EM ANÁLISE"], 18),
+    (["EM ANÁLISE", "APROVAÇÃO"], 16),
+    (["EM ANÁLISE", "REPROVAÇÃO"], 14),
+    (["EM ANÁLISE", "PENDÊNCIA", "REANÁLISE", "APROVAÇÃO"], 10),
+    (["EM ANÁLISE", "REPROVAÇÃO", "REANÁLISE", "REPROVAÇÃO"], 8),
+    (["EM ANÁLISE", "APROVAÇÃO", "VENDA GERADA"], 12),
+    (["EM ANÁLISE", "APROVAÇÃO", "VENDA INFORMADA", "VENDA GERADA"], 8),
+    (["EM ANÁLISE", "APROVAÇÃO", "VENDA INFORMADA"], 5),
+    (["EM ANÁLISE", "REPROVAÇÃO", "REANÁLISE", "APROVAÇÃO", "VENDA GERADA"], 5),
+    (["EM ANÁLISE", "APROVAÇÃO", "VENDA GERADA", "DESISTIU"], 3),
+    (["EM ANÁLISE", "PENDÊNCIA", "DESISTIU"], 1),
+]
+
+OBS_TEXTO = [
+    "", "", "", "AGUARDANDO DOCUMENTAÇÃO", "RENDA INFORMAL",
+    "COMPROVANTE DE RESIDÊNCIA PENDENTE", "CLIENTE PEDIU RETORNO",
+]
+
+# Leads do CRM (API Supremo)
+ORIGENS_CRM = ["SITE", "FACEBOOK", "INSTAGRAM", "INDICAÇÃO", "PORTAL ZAP", "LEADS ANTIGOS"]
+CAMPANHAS_CRM = ["MCMV", "FEIRÃO", "LANÇAMENTO", "REMARKETING", ""]
+SITUACOES_CRM = ["NOVO", "EM ATENDIMENTO", "QUALIFICANDO", "VISITA AGENDADA", "DESCARTADO"]
+
+
+# =========================================================
+# GERAÇÃO
+# =========================================================
+def _corretores():
+    nomes, equipes = [], []
+    for equipe in EQUIPES:
+        for i in range(CORRETORES_POR_EQUIPE):
+            nomes.append(f"CORRETOR {equipe} {i + 1:02d}")
+            equipes.append(equipe)
+    return np.array(nomes), np.array(equipes)
+
+
+def gerar_planilha(n_linhas: int, seed: int = 42, dias_historico: int = 540,
+                   data_fim: date = None) -> pd.DataFrame:
+    """
+    Monta a planilha com `n_linhas` linhas em ordem de lançamento (DATA),
+    como na planilha real: cada cliente tem sua jornada espalhada no tempo.
+    """
+    rng = np.random.default_rng(seed)
+    data_fim = data_fim or date.today()
+
+    # --- jornadas por cliente ---
+    pesos = np.array([p for _, p in JORNADAS], dtype=float)
+    pesos /= pesos.sum()
+    tamanhos = np.array([len(j) for j, _ in JORNADAS])
+    n_clientes = int(np.ceil(n_linhas / float((tamanhos * pesos).sum())))
+
+    # o sorteio pode ficar abaixo da média: completa até ter `n_linhas` passos
+    tipo_jornada = rng.choice(len(JORNADAS), size=n_clientes, p=pesos)
+    while tamanhos[tipo_jornada].sum() < n_linhas:
+        extra = max(n_clientes // 100, 16)
+        tipo_jornada = np.concatenate([tipo_jornada, rng.choice(len(JORNADAS), size=extra, p=pesos)])
+    n_clientes = len(tipo_jornada)
+    passos_por_cliente = tamanhos[tipo_jornada]
+
+    cliente = np.repeat(np.arange(n_clientes), passos_por_cliente)
+    inicio_cliente = np.cumsum(passos_por_cliente) - passos_por_cliente
+    passo = np.arange(len(cliente)) - np.repeat(inicio_cliente, passos_por_cliente)
+
+    jornadas_flat = np.array([s for j, _ in JORNADAS for s in j], dtype=object)
+    offset_jornada = np.concatenate([[0], np.cumsum(tamanhos)[:-1]])
+    situacao = jornadas_flat[offset_jornada[tipo_jornada[cliente]] + passo]
+
+    # --- datas: início aleatório no histórico + 1 a 12 dias entre passos ---
+    dia_inicio = rng.integers(0, dias_historico, size=n_clientes)
+    saltos = np.where(passo == 0, 0, rng.integers(1, 13, size=len(cliente)))
+    acumulado = np.cumsum(saltos)
+    deslocamento = dia_inicio[cliente] + acumulado - np.repeat(acumulado[inicio_cliente], passos_por_cliente)
+    deslocamento = np.minimum(deslocamento, dias_historico)
+    datas = pd.Timestamp(data_fim) - pd.to_timedelta(dias_historico - deslocamento, unit="D")
+
+    # --- pessoas ---
+    nomes_corretor, equipes_corretor = _corretores()
+    corretor_cliente = rng.integers(0, len(nomes_corretor), size=n_clientes)
+    corretor = corretor_cliente[cliente]
+    # ~3% das linhas trocam de corretor no meio da jornada
+    troca = rng.random(len(cliente)) < 0.03
+    corretor = np.where(troca, rng.integers(0, len(nomes_corretor), size=len(cliente)), corretor)
+
+    primeiro = rng.integers(0, len(PRIMEIROS_NOMES), size=n_clientes)
+    meio = rng.integers(0, len(SOBRENOMES), size=n_clientes)
+    ultimo = rng.integers(0, len(SOBRENOMES), size=n_clientes)
+    nome_cliente = (
+        np.array(PRIMEIROS_NOMES, dtype=object)[primeiro] + " "
+        + np.array(SOBRENOMES, dtype=object)[meio] + " "
+        + np.array(SOBRENOMES, dtype=object)[ultimo]
+    )
+
+    cpf_num = rng.integers(10**9, 10**11 - 1, size=n_clientes)
+    cpf_txt = pd.Series(cpf_num).astype(str).str.zfill(11)
+    cpf_fmt = (
+        cpf_txt.str[0:3] + "." + cpf_txt.str[3:6] + "." + cpf_txt.str[6:9] + "-" + cpf_txt.str[9:11]
+    ).to_numpy(dtype=object)
+    cpf_fmt[rng.random(n_clientes) < 0.04] = ""   # CPF não informado
+
+    emp = rng.integers(0, len(EMPREENDIMENTOS), size=n_clientes)
+    construtoras = np.array([c for c, _ in EMPREENDIMENTOS], dtype=object)
+    empreendimentos = np.array([e for _, e in EMPREENDIMENTOS], dtype=object)
+
+    # --- OBSERVAÇÕES: VGV nas vendas, texto livre no resto ---
+    eh_venda = np.isin(situacao, ["VENDA GERADA", "VENDA INFORMADA"])
+    vgv = (rng.integers(150, 420, size=len(cliente)) * 1000).astype(str)
+    obs = np.array(OBS_TEXTO, dtype=object)[rng.integers(0, len(OBS_TEXTO), size=len(cliente))]
+    observacoes = np.where(eh_venda, vgv, obs)
+    obs2 = np.where(situacao == "PENDÊNCIA", "PENDÊNCIA DE DOCUMENTAÇÃO", "")
+
+    df = pd.DataFrame({
+        "DATA": datas.strftime("%d/%m/%Y"),
+        "DATA BASE": np.array(MESES, dtype=object)[datas.month.to_numpy() - 1] + " " + datas.year.astype(str).to_numpy(),
+        "EQUIPE": equipes_corretor[corretor],
+        "CORRETOR": nomes_corretor[corretor],
+        "CLIENTE": nome_cliente[cliente],
+        "CPF": cpf_fmt[cliente],
+        "SITUAÇÃO": situacao,
+        "OBSERVAÇÕES": observacoes,
+        "OBSERVAÇÕES 2": obs2,
+        "CONSTRUTORA": construtoras[emp[cliente]],
+        "EMPREENDIMENTO": empreendimentos[emp[cliente]],
+        "_ORDEM": datas.values,
+    })
+
+    # corta no tamanho pedido (a última jornada pode ficar incompleta) e
+    # ordena como a planilha real, que é lançada em ordem cronológica
+    df = df.iloc[:n_linhas]
+    assert len(df) == n_linhas, (len(df), n_linhas)
+    df = df.sort_values("_ORDEM", kind="stable").drop(columns="_ORDEM")
+    return df.reset_index(drop=True)
+
+
+def gerar_leads_crm(n_leads: int, seed: int = 42, dias_historico: int = 120,
+                    data_fim: date = None) -> list:
+    """
+    Leads no formato da API do Supremo CRM (lista de dicts, do mais recente
+    para o mais antigo, como a paginação da API devolve).
+    """
+    rng = np.random.default_rng(seed + 1)
+    data_fim = pd.Timestamp(data_fim or date.today())
+    nomes_corretor, equipes_corretor = _corretores()
+
+    captura = data_fim - pd.to_timedelta(rng.integers(0, dias_historico * 24 * 60, size=n_leads), unit="min")
+    atendido = rng.random(n_leads) < 0.7
+    primeiro_contato = captura + pd.to_timedelta(rng.integers(5, 48 * 60, size=n_leads), unit="min")
+    corretor = rng.integers(0, len(nomes_corretor), size=n_leads)
+
+    def _fmt(ts, ok=True):
+        return ts.strftime("%Y-%m-%d %H:%M:%S") if ok else None
+
+    leads = []
+    for i in np.argsort(captura.values)[::-1]:
+        leads.append({
+            "id": int(i) + 1,
+            "nome_pessoa": f"{PRIMEIROS_NOMES[i % len(PRIMEIROS_NOMES)]} {SOBRENOMES[(i // 7) % len(SOBRENOMES)]}",
+            "telefone_pessoa": f"(71) 9{rng.integers(1000, 9999)}-{rng.integers(1000, 9999)}",
+            "nome_origem": ORIGENS_CRM[rng.integers(0, len(ORIGENS_CRM))],
+            "nome_campanha": CAMPANHAS_CRM[rng.integers(0, len(CAMPANHAS_CRM))],
+            "nome_corretor": nomes_corretor[corretor[i]],
+            "nome_equipe_lead": equipes_corretor[corretor[i]],
+            "nome_situacao": SITUACOES_CRM[rng.integers(0, len(SITUACOES_CRM))],
+            "data_captura": _fmt(captura[i]),
+            "data_com_corretor": _fmt(captura[i]),
+            "data_primeiro_contato": _fmt(primeiro_contato[i], atendido[i]),
+            "data_ultima_interacao": _fmt(primeiro_contato[i], atendido[i]),
+        })
+    return leads
+
+
+def caminho_planilha(pasta: Path, n_linhas: int) -> Path:
+    return Path(pasta) / f"planilha_sintetica_{n_linhas}.csv"
+
+
+# =========================================================
+# CLI
+# =========================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera planilhas sintéticas (CSV) para benchmark.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=TAMANHOS_PADRAO)
+    parser.add_argument("--saida", type=Path, default=PASTA_PADRAO)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    args.saida.mkdir(parents=True, exist_ok=True)
+    for n in args.linhas:
+        df = gerar_planilha(n, seed=args.seed)
+        destino = caminho_planilha(args.saida, n)
+        df.to_csv(destino, index=False)
+        tamanho_mb = destino.stat().st_size / 1024 / 1024
+        print(f"✅ {destino} – {len(df):,} linhas, {tamanho_mb:.1f} MB".replace(",", "."))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,261 +1,296 @@
-import pandas as pd
+"""
+Gera o dashboard estático (HTML) para quem só consulta: KPIs e rankings
+de uma DATA BASE (ou de todas), da MR inteira ou por equipe.
+
+Usa a mesma camada de dados das páginas (utils.data_loader.tratar_planilha,
+utils.indicadores, utils.filtros_cache, utils.formatacao), sem Streamlit
+rodando: as páginas geradas são arquivos estáticos, servidos sem abrir
+nenhuma sessão do app.
+
+Uso:
+    python gera_dashboard_web.py                                  # última DATA BASE, MR inteira -> dashboard_web.html
+    python gera_dashboard_web.py --base "JANEIRO 2025" --equipe "EQUIPE ALFA"
+    python gera_dashboard_web.py --todas-bases                    # histórico completo
+    python gera_dashboard_web.py --por-equipe --saida publicado/  # index.html + uma página por equipe
+    python gera_dashboard_web.py --arquivo planilha.csv           # CSV local no formato da planilha
+    python gera_dashboard_web.py --listar-bases
+
+Agendamento (cron, a cada 10 min; só regrava quando a planilha muda):
+    */10 * * * * cd /srv/mr && python gera_dashboard_web.py --por-equipe --se-mudou --saida /var/www/dashboard
+"""
+import argparse
+import hashlib
+import html
+import io
+import re
+import sys
+from datetime import datetime
 from pathlib import Path
 
-ARQUIVO = "dados_imobiliaria.csv"
-
-# Lê o CSV
-df = pd.read_csv(ARQUIVO, sep=",", encoding="utf-8-sig")
-df.columns = [c.strip().upper() for c in df.columns]
-
-# Datas
-df["DATA"] = pd.to_datetime(df["DATA"], dayfirst=True, errors="coerce")
-
-# Situações
-df["EM_ANALISE"]      = (df["SITUAÇÃO"] == "EM ANÁLISE").astype(int)
-df["REANALISE"]       = (df["SITUAÇÃO"] == "REANÁLISE").astype(int)
-df["APROVACAO"]       = (df["SITUAÇÃO"] == "APROVAÇÃO").astype(int)
-df["APROVADO_BACEN"]  = (df["SITUAÇÃO"] == "APROVADO BACEN").astype(int)
-df["REPROVACAO"]      = (df["SITUAÇÃO"] == "REPROVAÇÃO").astype(int)
-df["VENDA_GERADA"]    = (df["SITUAÇÃO"] == "VENDA GERADA").astype(int)
-df["VENDA_INFORMADA"] = (df["SITUAÇÃO"] == "VENDA INFORMADA").astype(int)
-
-df["APROVACAO_TOTAL"] = df["APROVACAO"] + df["APROVADO_BACEN"]
-df["VENDAS_TOTAL"]    = df["VENDA_GERADA"] + df["VENDA_INFORMADA"]
-
-# ===== KPIs gerais =====
-total_em_analise      = int(df["EM_ANALISE"].sum())
-total_reanalise       = int(df["REANALISE"].sum())
-total_aprovacoes      = int(df["APROVACAO_TOTAL"].sum())
-total_reprovacoes     = int(df["REPROVACAO"].sum())
-total_vendas          = int(df["VENDAS_TOTAL"].sum())
-total_venda_gerada    = int(df["VENDA_GERADA"].sum())
-total_venda_informada = int(df["VENDA_INFORMADA"].sum())
-
-etapa1 = total_em_analise
-etapa2 = total_reanalise
-etapa3 = total_aprovacoes
-etapa4 = total_vendas
-
-taxa_aprov_sobre_etapa1 = (total_aprovacoes / etapa1 * 100) if etapa1 > 0 else 0
-taxa_venda_sobre_etapa1 = (total_vendas / etapa1 * 100) if etapa1 > 0 else 0
-taxa_venda_sobre_aprov  = (total_vendas / total_aprovacoes * 100) if total_aprovacoes > 0 else 0
-
-# ===== Rankings =====
-tabela_corretor = (
-    df.groupby("CORRETOR")
-    .agg(
-        em_analise=("EM_ANALISE", "sum"),
-        reanalise=("REANALISE", "sum"),
-        aprovacoes=("APROVACAO_TOTAL", "sum"),
-        vendas_total=("VENDAS_TOTAL", "sum")
+import pandas as pd
+import requests
+
+from utils.data_loader import CSV_URL, tratar_planilha
+from utils.filtros_cache import aplicar_filtro, filtro_normalizado
+from utils.formatacao import moeda, moeda_valor, percentual
+from utils.indicadores import STATUS_ANALISE, calcular_status_final, ranking_por, vendas_unicas
+
+VENDAS_TODAS = ("VENDA GERADA", "VENDA INFORMADA")
+ARQ_PADRAO = "dashboard_web.html"
+ARQ_VERSAO = ".versao_dashboard"
+
+COLUNAS_RANKING = {
+    "POSICAO": "Posição",
+    "ANALISES": "Análises",
+    "APROVACOES": "Aprovações",
+    "VENDAS": "Vendas",
+    "VGV": "VGV",
+    "TAXA_APROV_ANALISES": "Aprov./Análises",
+    "TAXA_VENDAS_ANALISES": "Vendas/Análises",
+}
+
+
+# =========================================================
+# DADOS
+# =========================================================
+def carregar_base(arquivo=None) -> tuple:
+    """(versão, base tratada). Versão = hash do CSV, como em versao_planilha()."""
+    if arquivo:
+        conteudo = Path(arquivo).read_bytes()
+    else:
+        resp = requests.get(CSV_URL, timeout=30)
+        resp.raise_for_status()
+        conteudo = resp.content
+
+    versao = hashlib.sha1(conteudo).hexdigest()[:16]
+    return versao, tratar_planilha(pd.read_csv(io.BytesIO(conteudo)))
+
+
+def bases_disponiveis(df: pd.DataFrame) -> list:
+    """Labels de DATA_BASE em ordem cronológica."""
+    bases = (
+        df[["DATA_BASE", "DATA_BASE_LABEL"]]
+        .dropna()
+        .drop_duplicates(subset=["DATA_BASE_LABEL"])
+        .sort_values("DATA_BASE", kind="mergesort")
     )
-    .sort_values(by="vendas_total", ascending=False)
-)
+    return bases["DATA_BASE_LABEL"].tolist()
+
 
-tabela_corretor["analises_total"] = (
-    tabela_corretor["em_analise"] + tabela_corretor["reanalise"]
-)
+def indicadores(df_recorte: pd.DataFrame, status_final) -> dict:
+    """Mesmas contagens do painel: vendas 1 por cliente, regra do DESISTIU."""
+    status = df_recorte["STATUS_BASE"]
+    df_vendas = vendas_unicas(df_recorte, status_final, VENDAS_TODAS)
 
-tabela_corretor_html = tabela_corretor.head(20).to_html(classes="tabela", border=0)
+    ind = {
+        "em_analise": int((status == "EM ANÁLISE").sum()),
+        "reanalise": int((status == "REANÁLISE").sum()),
+        "aprovacoes": int((status == "APROVADO").sum()),
+        "reprovacoes": int((status == "REPROVADO").sum()),
+        "venda_gerada": int((df_vendas["STATUS_BASE"] == "VENDA GERADA").sum()),
+        "venda_informada": int((df_vendas["STATUS_BASE"] == "VENDA INFORMADA").sum()),
+        "vgv_total": float(df_vendas["VGV"].sum()) if not df_vendas.empty else 0.0,
+    }
+    ind["analises"] = int(status.isin(STATUS_ANALISE).sum())
+    ind["vendas_total"] = ind["venda_gerada"] + ind["venda_informada"]
+    ind["ticket_medio"] = ind["vgv_total"] / ind["vendas_total"] if ind["vendas_total"] else 0.0
+    ind["taxa_aprov"] = ind["aprovacoes"] / ind["analises"] * 100 if ind["analises"] else 0.0
+    ind["taxa_venda"] = ind["vendas_total"] / ind["analises"] * 100 if ind["analises"] else 0.0
+    ind["taxa_venda_aprov"] = ind["vendas_total"] / ind["aprovacoes"] * 100 if ind["aprovacoes"] else 0.0
+    return ind
 
-tabela_equipe = (
-    df.groupby("EQUIPE")
-    .agg(
-        em_analise=("EM_ANALISE", "sum"),
-        reanalise=("REANALISE", "sum"),
-        vendas_total=("VENDAS_TOTAL", "sum")
+
+def tabela_ranking(ranking: pd.DataFrame, chave: str, rotulo: str, top=None) -> str:
+    if ranking.empty:
+        return "<p>Sem registros no recorte.</p>"
+    tabela = ranking.head(top) if top else ranking
+    tabela = tabela.assign(
+        VGV=moeda(tabela["VGV"]),
+        TAXA_APROV_ANALISES=percentual(tabela["TAXA_APROV_ANALISES"]),
+        TAXA_VENDAS_ANALISES=percentual(tabela["TAXA_VENDAS_ANALISES"]),
+    )
+    colunas = ["POSICAO", chave] + [c for c in COLUNAS_RANKING if c != "POSICAO"]
+    return (
+        tabela[colunas]
+        .rename(columns={**COLUNAS_RANKING, chave: rotulo})
+        .to_html(classes="tabela", border=0, index=False)
     )
-)
-tabela_equipe["analises_total"] = (
-    tabela_equipe["em_analise"] + tabela_equipe["reanalise"]
-)
-tabela_equipe = tabela_equipe[["analises_total", "vendas_total"]]
-tabela_equipe_html = tabela_equipe.to_html(classes="tabela", border=0)
-
-tabela_construtora = (
-    df.groupby("CONSTRUTORA")
-    .agg(vendas_total=("VENDAS_TOTAL", "sum"))
-    .sort_values(by="vendas_total", ascending=False)
-)
-tabela_construtora_html = tabela_construtora.head(15).to_html(classes="tabela", border=0)
-
-tabela_empreendimento = (
-    df.groupby("EMPREENDIMENTO")
-    .agg(vendas_total=("VENDAS_TOTAL", "sum"))
-    .sort_values(by="vendas_total", ascending=False)
-)
-tabela_empreendimento_html = tabela_empreendimento.head(15).to_html(classes="tabela", border=0)
-
-# ===== HTML =====
-html = f"""
-<!DOCTYPE html>
+
+
+# =========================================================
+# HTML
+# =========================================================
+CSS = """
+    body { font-family: Arial, sans-serif; margin: 20px; background-color: #f5f7fb; }
+    h1, h2, h3 { color: #0b2e4e; }
+    nav a { margin-right: 12px; color: #0b2e4e; }
+    .kpis { display: flex; flex-wrap: wrap; gap: 15px; margin-bottom: 25px; }
+    .card { background: #ffffff; padding: 12px 16px; border-radius: 8px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.05); min-width: 160px; }
+    .card .label { font-size: 12px; color: #666; }
+    .card .value { font-size: 20px; font-weight: bold; color: #0b2e4e; }
+    .card .sub { font-size: 11px; color: #888; }
+    .section { margin-top: 30px; margin-bottom: 10px; }
+    .tabela { border-collapse: collapse; width: 100%; font-size: 12px; background: #ffffff; }
+    .tabela th, .tabela td { border: 1px solid #ddd; padding: 6px 8px; text-align: left; }
+    .tabela th { background-color: #0b2e4e; color: #fff; }
+"""
+
+
+def _card(rotulo: str, valor, sub: str = "") -> str:
+    sub_html = f'<div class="sub">{html.escape(sub)}</div>' if sub else ""
+    return (
+        f'<div class="card"><div class="label">{html.escape(rotulo)}</div>'
+        f'<div class="value">{html.escape(str(valor))}</div>{sub_html}</div>'
+    )
+
+
+def montar_html(titulo: str, recorte: str, ind: dict, tabela_corretores: str, tabela_equipes: str,
+                versao: str, links: dict = None) -> str:
+    cards = "\n        ".join([
+        _card("Análises (EM + RE)", ind["analises"], f"Em análise: {ind['em_analise']} | Reanálise: {ind['reanalise']}"),
+        _card("Aprovações", ind["aprovacoes"]),
+        _card("Reprovações", ind["reprovacoes"]),
+        _card("Vendas", ind["vendas_total"], f"Gerada: {ind['venda_gerada']} | Informada: {ind['venda_informada']}"),
+        _card("VGV total", moeda_valor(ind["vgv_total"])),
+        _card("Ticket médio", moeda_valor(ind["ticket_medio"])),
+        _card("Aprovações / Análises", f"{ind['taxa_aprov']:.1f}%"),
+        _card("Vendas / Análises", f"{ind['taxa_venda']:.1f}%"),
+        _card("Vendas / Aprovações", f"{ind['taxa_venda_aprov']:.1f}%"),
+    ])
+    nav = ""
+    if links:
+        nav = "<nav>" + "".join(
+            f'<a href="{html.escape(arq)}">{html.escape(nome)}</a>' for nome, arq in links.items()
+        ) + "</nav>"
+    gerado_em = datetime.now().strftime("%d/%m/%Y %H:%M")
+
+    return f"""<!DOCTYPE html>
 <html lang="pt-br">
 <head>
 <meta charset="utf-8">
-<title>Dashboard Imobiliária</title>
-<style>
-    body {{
-        font-family: Arial, sans-serif;
-        margin: 20px;
-        background-color: #f5f7fb;
-    }}
-    h1, h2, h3 {{
-        color: #0b2e4e;
-    }}
-    .kpis {{
-        display: flex;
-        flex-wrap: wrap;
-        gap: 15px;
-        margin-bottom: 25px;
-    }}
-    .card {{
-        background: #ffffff;
-        padding: 12px 16px;
-        border-radius: 8px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-        min-width: 160px;
-    }}
-    .card .label {{
-        font-size: 12px;
-        color: #666;
-    }}
-    .card .value {{
-        font-size: 20px;
-        font-weight: bold;
-        color: #0b2e4e;
-    }}
-    .card .sub {{
-        font-size: 11px;
-        color: #888;
-    }}
-    .section {{
-        margin-top: 30px;
-        margin-bottom: 10px;
-    }}
-    .tabela {{
-        border-collapse: collapse;
-        width: 100%;
-        font-size: 12px;
-        background: #ffffff;
-    }}
-    .tabela th, .tabela td {{
-        border: 1px solid #ddd;
-        padding: 6px 8px;
-        text-align: left;
-    }}
-    .tabela th {{
-        background-color: #0b2e4e;
-        color: #fff;
-    }}
-    img {{
-        max-width: 100%;
-        height: auto;
-        border-radius: 8px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-        background: #fff;
-    }}
-    .grid {{
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(260px, 1fr));
-        gap: 20px;
-        align-items: start;
-    }}
-</style>
+<title>{html.escape(titulo)}</title>
+<style>{CSS}</style>
 </head>
 <body>
-    <h1>📊 Dashboard Imobiliária – Versão Web (HTML)</h1>
-    <p>Arquivo base: <strong>{ARQUIVO}</strong></p>
+    <h1>📊 {html.escape(titulo)}</h1>
+    {nav}
+    <p>Recorte: <strong>{html.escape(recorte)}</strong></p>
 
     <div class="kpis">
-        <div class="card">
-            <div class="label">Em análise</div>
-            <div class="value">{total_em_analise}</div>
-        </div>
-        <div class="card">
-            <div class="label">Reanálise</div>
-            <div class="value">{total_reanalise}</div>
-        </div>
-        <div class="card">
-            <div class="label">Aprovações (total)</div>
-            <div class="value">{total_aprovacoes}</div>
-            <div class="sub">Aprovação: {df['APROVACAO'].sum()} | Bacen: {df['APROVADO_BACEN'].sum()}</div>
-        </div>
-        <div class="card">
-            <div class="label">Reprovações</div>
-            <div class="value">{total_reprovacoes}</div>
-        </div>
-        <div class="card">
-            <div class="label">Vendas totais</div>
-            <div class="value">{total_vendas}</div>
-            <div class="sub">Gerada: {total_venda_gerada} | Informada: {total_venda_informada}</div>
-        </div>
-        <div class="card">
-            <div class="label">Aprovações / Em análise</div>
-            <div class="value">{taxa_aprov_sobre_etapa1:.1f}%</div>
-        </div>
-        <div class="card">
-            <div class="label">Vendas / Em análise</div>
-            <div class="value">{taxa_venda_sobre_etapa1:.1f}%</div>
-        </div>
-        <div class="card">
-            <div class="label">Vendas / Aprovações</div>
-            <div class="value">{taxa_venda_sobre_aprov:.1f}%</div>
-        </div>
+        {cards}
     </div>
 
     <div class="section">
-        <h2>Funil de conversão</h2>
-        <p>Em análise → Reanálise → Aprovações → Vendas</p>
-        <img src="funil_conversao_4_etapas.png" alt="Funil de conversão">
+        <h2>Ranking de corretores</h2>
+        {tabela_corretores}
     </div>
 
     <div class="section">
-        <h2>Equipes – Análises x Vendas</h2>
-        <div class="grid">
-            <div>
-                <h3>Gráfico</h3>
-                <img src="equipes_analises_vendas.png" alt="Equipes - Análises x Vendas">
-            </div>
-            <div>
-                <h3>Tabela</h3>
-                {tabela_equipe_html}
-            </div>
-        </div>
-    </div>
-
-    <div class="section">
-        <h2>Top 20 Corretores por Vendas</h2>
-        <div class="grid">
-            <div>
-                <h3>Gráfico (Top 10)</h3>
-                <img src="top10_corretores_vendas.png" alt="Top 10 corretores por vendas">
-            </div>
-            <div>
-                <h3>Tabela (Top 20)</h3>
-                {tabela_corretor_html}
-            </div>
-        </div>
-    </div>
-
-    <div class="section">
-        <h2>Top Construtoras por Vendas</h2>
-        {tabela_construtora_html}
-    </div>
-
-    <div class="section">
-        <h2>Top Empreendimentos por Vendas</h2>
-        {tabela_empreendimento_html}
+        <h2>Ranking de equipes</h2>
+        {tabela_equipes}
     </div>
 
     <hr>
     <p style="font-size: 11px; color: #777;">
-        Página gerada automaticamente em Python a partir de <strong>{ARQUIVO}</strong>.
+        Página estática gerada em {gerado_em} (versão da planilha {versao}).
     </p>
 </body>
 </html>
 """
 
-# Salva o HTML
-saida = Path("dashboard_web.html")
-saida.write_text(html, encoding="utf-8")
-print(f"Dashboard web gerado em: {saida.resolve()}")
+
+def nome_pagina(equipe=None) -> str:
+    if not equipe:
+        return "index.html"
+    return "equipe_" + re.sub(r"[^0-9A-Za-z]+", "_", equipe).strip("_").lower() + ".html"
+
+
+def gerar_pagina(df, status_final, versao, bases, equipe=None, top=20, links=None) -> str:
+    recorte = aplicar_filtro(df, filtro_normalizado(bases=bases, equipe=equipe))
+    descricao = ", ".join(bases) if bases else "todas as DATA BASE"
+    titulo = f"MR Imóveis – {equipe}" if equipe else "MR Imóveis – Painel comercial"
+
+    return montar_html(
+        titulo,
+        descricao + (f" | equipe {equipe}" if equipe else ""),
+        indicadores(recorte, status_final),
+        tabela_ranking(ranking_por(recorte, status_final, "CORRETOR", VENDAS_TODAS), "CORRETOR", "Corretor", top),
+        tabela_ranking(ranking_por(recorte, status_final, "EQUIPE", VENDAS_TODAS), "EQUIPE", "Equipe"),
+        versao,
+        links,
+    )
+
+
+# =========================================================
+# CLI
+# =========================================================
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Gera o dashboard estático (HTML) a partir da planilha.")
+    parser.add_argument("--arquivo", type=Path, help="CSV local (padrão: planilha ao vivo do Google Sheets)")
+    parser.add_argument("--base", nargs="+", help="DATA BASE (labels); padrão: a mais recente")
+    parser.add_argument("--todas-bases", action="store_true", help="sem filtro de DATA BASE")
+    parser.add_argument("--equipe", help="só esta equipe")
+    parser.add_argument("--por-equipe", action="store_true", help="index.html + uma página por equipe")
+    parser.add_argument("--top", type=int, default=20, help="corretores no ranking (padrão: 20)")
+    parser.add_argument("--saida", type=Path, default=Path("."), help="pasta de saída")
+    parser.add_argument("--se-mudou", action="store_true",
+                        help="não regrava se a planilha e os parâmetros forem os mesmos da última execução")
+    parser.add_argument("--listar-bases", action="store_true")
+    args = parser.parse_args(argv)
+
+    versao, df = carregar_base(args.arquivo)
+    disponiveis = bases_disponiveis(df)
+
+    if args.listar_bases:
+        print("\n".join(disponiveis))
+        return 0
+
+    if args.todas_bases:
+        bases = None
+    elif args.base:
+        faltando = [b for b in args.base if b not in disponiveis]
+        if faltando:
+            print(f"❌ DATA BASE não encontrada: {', '.join(faltando)} (veja --listar-bases)", file=sys.stderr)
+            return 1
+        bases = args.base
+    else:
+        bases = disponiveis[-1:]
+
+    if args.equipe:
+        args.equipe = args.equipe.upper().strip()  # EQUIPE vem maiúscula do tratar_planilha
+        if args.equipe not in set(df["EQUIPE"].dropna().unique()):
+            print(f"❌ EQUIPE não encontrada: {args.equipe}", file=sys.stderr)
+            return 1
+
+    args.saida.mkdir(parents=True, exist_ok=True)
+    assinatura = f"{versao}|{bases}|{args.equipe}|{args.por_equipe}|{args.top}"
+    arq_versao = args.saida / ARQ_VERSAO
+    if args.se_mudou and arq_versao.exists() and arq_versao.read_text(encoding="utf-8") == assinatura:
+        print("✅ Planilha sem mudanças; páginas mantidas.")
+        return 0
+
+    status_final = calcular_status_final(df)
+
+    if args.por_equipe:
+        equipes = sorted(e for e in df["EQUIPE"].dropna().unique() if e)
+        links = {"Geral": nome_pagina()} | {e: nome_pagina(e) for e in equipes}
+        paginas = {None: links} | {e: links for e in equipes}
+    else:
+        paginas = {args.equipe: None}
+
+    for equipe, links in paginas.items():
+        arquivo = nome_pagina(equipe) if (equipe or args.por_equipe) else ARQ_PADRAO
+        saida = args.saida / arquivo
+        saida.write_text(
+            gerar_pagina(df, status_final, versao, bases, equipe, args.top, links),
+            encoding="utf-8",
+        )
+        print(f"📄 {saida}")
+
+    arq_versao.write_text(assinatura, encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,21 @@
 import streamlit as st
 import pandas as pd
 from datetime import date, datetime, timedelta
-from streamlit_autorefresh import st_autorefresh
-import altair as alt
+
+from utils.data_loader import baixar_planilha_csv, versao_planilha
+from utils.graficos import dados_heatmap, exibir_grafico, grafico_heatmap
+from utils.versao_dados import INTERVALO_VERIFICACAO_S
+from utils.analises_diarias import (
+    CSS_TV,
+    carregar_dados,
+    formatar_data_br,
+    painel_tv_html,
+    rankings_do_dia,
+    resumo_do_dia,
+)
+from utils.perf import finalizar_medicao, iniciar_medicao, medir
+
+iniciar_medicao("01_Analises_Diarias")
 
 # ---------------------------------------------------------
 # CONFIGURAÇÃO DA PÁGINA
@@ -13,8 +26,38 @@ st.set_page_config(
     layout="wide",
 )
 
-# AUTO-REFRESH DISCRETO (30 SEGUNDOS)
-st_autorefresh(interval=30 * 1000, key="analises_refresh")
+# AUTO-REFRESH DISCRETO: só o card de meta e os rankings do dia (fragmentos
+# mais abaixo) se atualizam; CSS, sidebar e heatmap não são reprocessados.
+
+# ---------------------------------------------------------
+# MODO TV / QUIOSQUE  (?tv=1  [&meta=15]  [&dia=AAAA-MM-DD])
+# ---------------------------------------------------------
+# Tela somente leitura para as TVs do escritório: sem sidebar, sem
+# widgets, sem gráficos. O HTML é montado uma vez por versão da planilha
+# (painel_tv_html) e cada TV apenas recebe a string pronta.
+if st.query_params.get("tv") in ("1", "true", "sim"):
+    st.markdown(CSS_TV, unsafe_allow_html=True)
+
+    try:
+        meta_tv = int(st.query_params.get("meta", 15))
+    except ValueError:
+        meta_tv = 15
+    try:
+        dia_tv = date.fromisoformat(st.query_params.get("dia", "")).isoformat()
+    except ValueError:
+        dia_tv = None  # sem dia (ou inválido): último dia com registro
+
+    @st.fragment(run_every=INTERVALO_VERIFICACAO_S)
+    def painel_tv():
+        versao_tv, conteudo_tv = baixar_planilha_csv()
+        st.markdown(
+            painel_tv_html(versao_tv, dia_tv, meta_tv, conteudo_tv),
+            unsafe_allow_html=True,
+        )
+
+    painel_tv()
+    finalizar_medicao()
+    st.stop()
 
 # ---------------------------------------------------------
 # ESTILO / CSS
@@ -132,98 +175,10 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# ---------------------------------------------------------
-# CONSTANTES – PLANILHA
-# ---------------------------------------------------------
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID_ANALISES = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_ANALISES}"
-
-
-# ---------------------------------------------------------
-# FUNÇÕES AUXILIARES
-# ---------------------------------------------------------
-def limpar_para_data(serie: pd.Series) -> pd.Series:
-    dt = pd.to_datetime(serie, dayfirst=True, errors="coerce")
-    return dt.dt.date
-
-
-def carregar_dados() -> pd.DataFrame:
-    """Carrega a base em tempo real – sem cache."""
-    df = pd.read_csv(CSV_URL)
-    df.columns = [c.strip().upper() for c in df.columns]
-
-    # DATA
-    if "DATA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DATA"])
-    elif "DIA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DIA"])
-    else:
-        df["DIA"] = pd.NaT
-
-    # EQUIPE / CORRETOR
-    for col in ["EQUIPE", "CORRETOR"]:
-        if col in df.columns:
-            df[col] = (
-                df[col]
-                .fillna("NÃO INFORMADO")
-                .astype(str)
-                .str.upper()
-                .str.strip()
-            )
-        else:
-            df[col] = "NÃO INFORMADO"
-
-    # STATUS
-    possiveis_cols_situacao = [
-        "SITUAÇÃO",
-        "SITUAÇÃO ATUAL",
-        "STATUS",
-        "SITUACAO",
-        "SITUACAO ATUAL",
-    ]
-    col_sit = next((c for c in possiveis_cols_situacao if c in df.columns), None)
-
-    df["STATUS_BASE"] = ""
-    if col_sit:
-        status_original = df[col_sit].fillna("").astype(str)
-        s = status_original.str.upper()
-
-        # EM ANÁLISE
-        df.loc[s.str.contains("EM ANÁLISE"), "STATUS_BASE"] = "EM ANÁLISE"
-        # REANÁLISE (só pra registro / não entra nas contas)
-        df.loc[s.str.contains("REANÁLISE"), "STATUS_BASE"] = "REANÁLISE"
-        # APROVADO apenas quando tiver APROVAÇÃO
-        df.loc[s.str.contains(r"\bAPROVAÇÃO\b"), "STATUS_BASE"] = "APROVADO"
-
-    return df
-
-
-def formatar_data_br(d: date) -> str:
-    if pd.isna(d):
-        return "-"
-    return d.strftime("%d/%m/%Y")
-
-
-def criar_coluna_rank(n: int) -> list:
-    ranks = []
-    for i in range(n):
-        pos = i + 1
-        if pos == 1:
-            ranks.append("🥇 1º")
-        elif pos == 2:
-            ranks.append("🥈 2º")
-        elif pos == 3:
-            ranks.append("🥉 3º")
-        else:
-            ranks.append(f"{pos}º")
-    return ranks
-
-
 # ---------------------------------------------------------
 # CARREGAR BASE
 # ---------------------------------------------------------
-df = carregar_dados()
+df = carregar_dados(*baixar_planilha_csv())
 
 if df.empty:
     st.error("Não foi possível carregar dados da planilha.")
@@ -259,42 +214,14 @@ META_DIA = st.sidebar.number_input(
     step=1
 )
 
-# ---------------------------------------------------------
-# FILTRAR BASE PARA O DIA
-# ---------------------------------------------------------
-df_dia = df[df["DIA"] == dia_selecionado].copy()
-df_em_analise = df_dia[df_dia["STATUS_BASE"] == "EM ANÁLISE"]
 
-total_analises = len(df_em_analise)
-meta_batida = total_analises >= META_DIA
-faltam_meta = max(META_DIA - total_analises, 0)
+@st.fragment(run_every=INTERVALO_VERIFICACAO_S)
+def card_meta(dia_selecionado, META_DIA):
+    df_em_analise = resumo_do_dia(dia_selecionado)["df_em_analise"]
 
-# ---------------------------------------------------------
-# CABEÇALHO
-# ---------------------------------------------------------
-col_top_left, col_top_right = st.columns([3, 1])
-
-with col_top_left:
-    st.markdown(
-        f"""
-        <div class="top-banner">
-            <div class="top-banner-title">
-                📅 Análises Diárias – Gestão à Vista
-            </div>
-            <p class="top-banner-subtitle">
-                Dia <strong>{formatar_data_br(dia_selecionado)}</strong> • 
-                Atualização automática a cada <strong>30 segundos</strong>.
-            </p>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-
-with col_top_right:
-    try:
-        st.image("logo_mr.png", use_container_width=True)
-    except Exception:
-        pass
+    total_analises = len(df_em_analise)
+    meta_batida = total_analises >= META_DIA
+    faltam_meta = max(META_DIA - total_analises, 0)
 
     # -----------------------------------------------------
     # CARD DE META (ANTES / DEPOIS)
@@ -345,129 +272,166 @@ with col_top_right:
             unsafe_allow_html=True,
         )
 
-# ---------------------------------------------------------
-# CASO NÃO TENHA ANÁLISES NO DIA
-# ---------------------------------------------------------
-if total_analises == 0:
+
+@st.fragment(run_every=INTERVALO_VERIFICACAO_S)
+def painel_do_dia(dia_selecionado, META_DIA, total_inicial):
+    resumo = resumo_do_dia(dia_selecionado)
+    df_em_analise = resumo["df_em_analise"]
+
+    total_analises = len(df_em_analise)
+    meta_batida = total_analises >= META_DIA
+
+    # virou o dia (TV acompanhando o último dia) ou o painel "acendeu":
+    # aí sim recarrega a página inteira (sidebar / matriz dependem disso)
+    acompanhando_ultimo_dia = dia_selecionado == data_max
+    if (
+        (acompanhando_ultimo_dia and resumo["data_max"] != data_max)
+        or (total_inicial == 0) != (total_analises == 0)
+    ):
+        st.rerun(scope="app")
+
+    # ---------------------------------------------------------
+    # CASO NÃO TENHA ANÁLISES NO DIA
+    # ---------------------------------------------------------
+    if total_analises == 0:
+        st.markdown(
+            """
+            <p class="motivational-text">
+                Ainda não temos análises em <strong>EM ANÁLISE</strong> para este dia.
+                Assim que a primeira subir, o painel acende. 😉
+            </p>
+            """,
+            unsafe_allow_html=True,
+        )
+        return
+
+    # ---------------------------------------------------------
+    # MENSAGEM DE META BATIDA (FAIXA HORIZONTAL)
+    # ---------------------------------------------------------
+    if meta_batida:
+        st.markdown(
+            f"""
+            <div style="
+                background: linear-gradient(90deg, #14532d, #22c55e, #14532d);
+                padding: 14px 18px;
+                border-radius: 14px;
+                margin-bottom: 1.2rem;
+                box-shadow: 0 0 30px rgba(34,197,94,0.55);
+            ">
+                <span style="font-size:1rem; color:white; font-weight:600;">
+                    🎉 <strong>META BATIDA!</strong> Parabéns, time!  
+                    A meta de <strong>{META_DIA}</strong> análises foi alcançada hoje.
+                </span>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+
+    # ---------------------------------------------------------
+    # MÉTRICAS PRINCIPAIS
+    # ---------------------------------------------------------
+    equipes_ativas = df_em_analise["EQUIPE"].nunique()
+    corretores_ativos = df_em_analise["CORRETOR"].nunique()
+
     st.markdown(
-        """
+        f"""
         <p class="motivational-text">
-            Ainda não temos análises em <strong>EM ANÁLISE</strong> para este dia.
-            Assim que a primeira subir, o painel acende. 😉
+            Hoje já registramos <span class="number">{total_analises}</span> análises.
+            <strong>Nenhum de nós é tão bom quanto todos nós juntos!</strong> 🤝✨
         </p>
         """,
         unsafe_allow_html=True,
     )
-    st.stop()
-# ---------------------------------------------------------
-# MENSAGEM DE META BATIDA (FAIXA HORIZONTAL)
-# ---------------------------------------------------------
-if meta_batida:
+
     st.markdown(
         f"""
-        <div style="
-            background: linear-gradient(90deg, #14532d, #22c55e, #14532d);
-            padding: 14px 18px;
-            border-radius: 14px;
-            margin-bottom: 1.2rem;
-            box-shadow: 0 0 30px rgba(34,197,94,0.55);
-        ">
-            <span style="font-size:1rem; color:white; font-weight:600;">
-                🎉 <strong>META BATIDA!</strong> Parabéns, time!  
-                A meta de <strong>{META_DIA}</strong> análises foi alcançada hoje.
-            </span>
+        <div class="metric-chips">
+            <div class="metric-chip">
+                Análises no dia: <span class="value">{total_analises}</span>
+            </div>
+            <div class="metric-chip">
+                Equipes ativas: <span class="value">{equipes_ativas}</span>
+            </div>
+            <div class="metric-chip">
+                Corretores ativos: <span class="value">{corretores_ativos}</span>
+            </div>
         </div>
         """,
         unsafe_allow_html=True,
     )
 
-# ---------------------------------------------------------
-# MÉTRICAS PRINCIPAIS
-# ---------------------------------------------------------
-equipes_ativas = df_em_analise["EQUIPE"].nunique()
-corretores_ativos = df_em_analise["CORRETOR"].nunique()
+    # ---------------------------------------------------------
+    # RANKINGS (EQUIPE / CORRETOR)
+    # ---------------------------------------------------------
+    df_equipes, df_corretor = rankings_do_dia(df_em_analise)
 
-st.markdown(
-    f"""
-    <p class="motivational-text">
-        Hoje já registramos <span class="number">{total_analises}</span> análises.
-        <strong>Nenhum de nós é tão bom quanto todos nós juntos!</strong> 🤝✨
-    </p>
-    """,
-    unsafe_allow_html=True,
-)
+    col_eq, col_cor = st.columns(2)
+
+    with col_eq:
+        st.markdown(
+            """
+            <div class="rank-header">
+                <div class="section-title">📌 Análises por Equipe</div>
+                <span class="badge">Top equipes</span>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+
+        st.table(df_equipes)
+
+    with col_cor:
+        st.markdown(
+            """
+            <div class="rank-header">
+                <div class="section-title">👥 Ranking de Corretores</div>
+                <span class="badge">Destaques do dia</span>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+
+        st.table(df_corretor)
 
-st.markdown(
-    f"""
-    <div class="metric-chips">
-        <div class="metric-chip">
-            Análises no dia: <span class="value">{total_analises}</span>
-        </div>
-        <div class="metric-chip">
-            Equipes ativas: <span class="value">{equipes_ativas}</span>
-        </div>
-        <div class="metric-chip">
-            Corretores ativos: <span class="value">{corretores_ativos}</span>
-        </div>
-    </div>
-    """,
-    unsafe_allow_html=True,
-)
 
 # ---------------------------------------------------------
-# RANKINGS (EQUIPE / CORRETOR)
+# TOTAL DO DIA (NO RERUN COMPLETO)
 # ---------------------------------------------------------
-col_eq, col_cor = st.columns(2)
+total_analises = len(resumo_do_dia(dia_selecionado)["df_em_analise"])
 
-with col_eq:
+# ---------------------------------------------------------
+# CABEÇALHO
+# ---------------------------------------------------------
+col_top_left, col_top_right = st.columns([3, 1])
+
+with col_top_left:
     st.markdown(
-        """
-        <div class="rank-header">
-            <div class="section-title">📌 Análises por Equipe</div>
-            <span class="badge">Top equipes</span>
+        f"""
+        <div class="top-banner">
+            <div class="top-banner-title">
+                📅 Análises Diárias – Gestão à Vista
+            </div>
+            <p class="top-banner-subtitle">
+                Dia <strong>{formatar_data_br(dia_selecionado)}</strong> • 
+                Atualização automática a cada <strong>30 segundos</strong>.
+            </p>
         </div>
         """,
         unsafe_allow_html=True,
     )
 
-    df_equipes = (
-        df_em_analise.groupby("EQUIPE").size().reset_index(name="ANÁLISES")
-    )
-    df_equipes = (
-        df_equipes.sort_values("ANÁLISES", ascending=False)
-        .reset_index(drop=True)
-    )
-    df_equipes.insert(0, "POSIÇÃO", criar_coluna_rank(len(df_equipes)))
-    df_equipes = df_equipes.rename(
-        columns={"EQUIPE": "Equipe", "ANÁLISES": "Análises no dia"}
-    )
-
-    st.table(df_equipes)
+with col_top_right:
+    try:
+        st.image("logo_mr.png", use_container_width=True)
+    except Exception:
+        pass
 
-with col_cor:
-    st.markdown(
-        """
-        <div class="rank-header">
-            <div class="section-title">👥 Ranking de Corretores</div>
-            <span class="badge">Destaques do dia</span>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+    card_meta(dia_selecionado, META_DIA)
 
-    df_corretor = (
-        df_em_analise.groupby("CORRETOR").size().reset_index(name="ANÁLISES")
-    )
-    df_corretor = (
-        df_corretor.sort_values("ANÁLISES", ascending=False)
-        .reset_index(drop=True)
-    )
-    df_corretor.insert(0, "POSIÇÃO", criar_coluna_rank(len(df_corretor)))
-    df_corretor = df_corretor.rename(
-        columns={"CORRETOR": "Corretor", "ANÁLISES": "Análises no dia"}
-    )
+painel_do_dia(dia_selecionado, META_DIA, total_analises)
 
-    st.table(df_corretor)
+if total_analises == 0:
+    st.stop()
 
 # ---------------------------------------------------------
 # ACOMPANHAMENTO DIÁRIO POR EQUIPE (MATRIZ + HEATMAP)
@@ -516,20 +480,20 @@ st.markdown(
 )
 
 # filtra o período escolhido
-df_periodo = df[(df["DIA"] >= data_ini) & (df["DIA"] <= data_fim)].copy()
+df_periodo = df[(df["DIA"] >= data_ini) & (df["DIA"] <= data_fim)]
 
 # ---------------------------------------------------------
 # MATRIZ E HEATMAP
 # ---------------------------------------------------------
 if tipo_visao.startswith("Análises"):
-    df_base = df_periodo[df_periodo["STATUS_BASE"] == "EM ANÁLISE"].copy()
+    df_base = df_periodo[df_periodo["STATUS_BASE"] == "EM ANÁLISE"]
 else:
-    df_base = df_periodo[df_periodo["STATUS_BASE"] == "APROVADO"].copy()
+    df_base = df_periodo[df_periodo["STATUS_BASE"] == "APROVADO"]
 
 if df_base.empty:
     st.info("Não há registros para este tipo de visão no período selecionado.")
 else:
-    df_base = df_base.dropna(subset=["DIA"]).copy()
+    df_base = df_base.dropna(subset=["DIA"])
     df_base["DIA"] = pd.to_datetime(df_base["DIA"]).dt.date
 
     # Pivot: Equipe x Dia
@@ -563,34 +527,24 @@ else:
     ]
 
     st.markdown("#### Tabela diária (equipes x dia)")
-    st.dataframe(tabela_final, use_container_width=True)
-
-    # Heatmap
-    df_heat = (
-        df_base.groupby(["EQUIPE", "DIA"])
-        .size()
-        .reset_index(name="QTDE")
+    with medir("st_dataframe"):
+        st.dataframe(tabela_final, use_container_width=True)
+
+    # Heatmap: só (equipe, dia, qtde) vai para o spec, em cache por versão/filtros
+    def montar_heatmap():
+        dados, ordem, titulo_x = dados_heatmap(df_base, data_ini, data_fim)
+        return grafico_heatmap(dados, ordem, titulo_x)
+
+    st.markdown("#### Mapa de calor diário")
+    exibir_grafico(
+        ("01_Analises_Diarias", versao_planilha(), tipo_visao, data_ini, data_fim),
+        montar_heatmap,
     )
 
-    if not df_heat.empty:
-        df_heat["DIA_STR"] = pd.to_datetime(df_heat["DIA"]).dt.strftime("%d/%m")
-
-        st.markdown("#### Mapa de calor diário")
-        chart = (
-            alt.Chart(df_heat)
-            .mark_rect()
-            .encode(
-                x=alt.X("DIA_STR:N", title="Dia"),
-                y=alt.Y("EQUIPE:N", title="Equipe"),
-                color=alt.Color("QTDE:Q", title="Qtd."),
-                tooltip=["EQUIPE", "DIA_STR", "QTDE"],
-            )
-            .properties(height=260)
-        )
-        st.altair_chart(chart, use_container_width=True)
-
 # ---------------------------------------------------------
 # RODAPÉ
 # ---------------------------------------------------------
 st.markdown("---")
 st.caption("Dashboard MR Imóveis • Gestão à Vista • Atualização suave a cada 30s")
+
+finalizar_medicao()
@@ -1,8 +1,15 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import altair as alt
-from datetime import timedelta, datetime
+from datetime import timedelta
+from utils.data_loader import baixar_planilha_csv, ler_planilha_csv, tratar_planilha
+from utils.filtros_cache import agregado_filtrado, filtro_normalizado, recorte_filtrado
+from utils.formatacao import moeda, percentual
+from utils.graficos import dados_barras_vgv, exibir_grafico, grafico_barras_vgv
+from utils.indicadores import calcular_status_final, ranking_por
+from utils.perf import finalizar_medicao, iniciar_medicao, medir
+
+iniciar_medicao("02_Ranking_Corretores")
+
 if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
     st.stop()
@@ -25,185 +32,23 @@ st.set_page_config(
 
 st.title("🏆 Ranking por Corretor – MR Imóveis")
 
-# ---------------------------------------------------------
-# CONFIG: LINK DA PLANILHA
-# ---------------------------------------------------------
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID_ANALISES = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_ANALISES}"
-
 # ---------------------------------------------------------
 # FUNÇÕES AUXILIARES
 # ---------------------------------------------------------
-def limpar_para_data(serie: pd.Series) -> pd.Series:
-    dt = pd.to_datetime(serie, dayfirst=True, errors="coerce")
-    return dt.dt.date
-
-
-def mes_ano_ptbr_para_date(valor: str):
-    """
-    Converte textos tipo 'novembro 2025' em date(2025, 11, 1).
-    Se não conseguir, retorna NaT.
-    """
-    if pd.isna(valor):
-        return pd.NaT
-    s = str(valor).strip().lower()
-    if not s:
-        return pd.NaT
-
-    meses = {
-        "janeiro": 1,
-        "fevereiro": 2,
-        "março": 3,
-        "marco": 3,
-        "abril": 4,
-        "maio": 5,
-        "junho": 6,
-        "julho": 7,
-        "agosto": 8,
-        "setembro": 9,
-        "outubro": 10,
-        "novembro": 11,
-        "dezembro": 12,
-    }
-
-    partes = s.split()
-    try:
-        mes_txt = partes[0]
-        ano = int(partes[-1])
-        mes_num = meses.get(mes_txt)
-        if mes_num is None:
-            return pd.NaT
-        return datetime(ano, mes_num, 1).date()
-    except Exception:
-        return pd.NaT
-
-# ---------------------------------------------------------
-# CARREGAR DADOS
-# ---------------------------------------------------------
-def carregar_dados() -> pd.DataFrame:
-    df = pd.read_csv(CSV_URL)
-
-    # Padroniza nomes de colunas
-    df.columns = [c.strip().upper() for c in df.columns]
-
-    # DATA (DIA)
-    if "DATA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DATA"])
-    elif "DIA" in df.columns:
-        df["DIA"] = limpar_para_data(df["DIA"])
-    else:
-        df["DIA"] = pd.NaT
-
-    # DATA BASE (MÊS COMERCIAL) - TEXTO IGUAL À PLANILHA + REFERÊNCIA DE DATA
-    possiveis_cols_base = [
-        "DATA BASE",
-        "DATA_BASE",
-        "DT BASE",
-        "DATA REF",
-        "DATA REFERÊNCIA",
-        "DATA REFERENCIA",
-    ]
-    col_data_base = next((c for c in possiveis_cols_base if c in df.columns), None)
-
-    if col_data_base:
-        base_raw = df[col_data_base].astype(str).str.strip()
-        # Label igual à planilha, só organizando capitalização
-        df["DATA_BASE_LABEL"] = base_raw.str.lower().str.title()
-        # Converte "novembro 2025" -> 2025-11-01 para ordenar
-        df["DATA_BASE"] = base_raw.apply(mes_ano_ptbr_para_date)
-
-        # Se não conseguir converter nenhum, cai para DIA
-        if df["DATA_BASE"].dropna().empty:
-            df["DATA_BASE"] = df["DIA"]
-            df["DATA_BASE_LABEL"] = df["DIA"].apply(
-                lambda d: d.strftime("%m/%Y") if pd.notnull(d) else ""
-            )
-    else:
-        # Sem coluna de data base: usa DIA como base
-        df["DATA_BASE"] = df["DIA"]
-        df["DATA_BASE_LABEL"] = df["DIA"].apply(
-            lambda d: d.strftime("%m/%Y") if pd.notnull(d) else ""
-        )
-
-    # EQUIPE / CORRETOR
-    for col in ["EQUIPE", "CORRETOR"]:
-        if col in df.columns:
-            df[col] = (
-                df[col]
-                .fillna("NÃO INFORMADO")
-                .astype(str)
-                .str.upper()
-                .str.strip()
-            )
-        else:
-            df[col] = "NÃO INFORMADO"
-
-    # STATUS_BASE
-    possiveis_cols_situacao = [
-        "SITUAÇÃO",
-        "SITUAÇÃO ATUAL",
-        "STATUS",
-        "SITUACAO",
-        "SITUACAO ATUAL",
-    ]
-    col_situacao = next((c for c in possiveis_cols_situacao if c in df.columns), None)
-
-    df["STATUS_BASE"] = ""
-    if col_situacao is not None:
-        s = df[col_situacao].fillna("").astype(str).str.upper()
-        df.loc[s.str.contains("EM ANÁLISE"), "STATUS_BASE"] = "EM ANÁLISE"
-        df.loc[s.str.contains("REANÁLISE"), "STATUS_BASE"] = "REANÁLISE"
-        df.loc[s.str.contains("APROV"), "STATUS_BASE"] = "APROVADO"
-        df.loc[s.str.contains("REPROV"), "STATUS_BASE"] = "REPROVADO"
-        df.loc[s.str.contains("VENDA GERADA"), "STATUS_BASE"] = "VENDA GERADA"
-        df.loc[s.str.contains("VENDA INFORMADA"), "STATUS_BASE"] = "VENDA INFORMADA"
-        # 👇 NOVO – mapeia qualquer coisa com DESIST (DESISTIU, DESISTÊNCIA etc.)
-        df.loc[s.str.contains("DESIST"), "STATUS_BASE"] = "DESISTIU"
-
-    # VGV (OBSERVAÇÕES)
-    if "OBSERVAÇÕES" in df.columns:
-        df["VGV"] = pd.to_numeric(df["OBSERVAÇÕES"], errors="coerce").fillna(0)
-    else:
-        df["VGV"] = 0.0
-
-    # Nome / CPF base para chave de cliente
-    possiveis_nome = ["NOME", "CLIENTE", "NOME CLIENTE", "NOME DO CLIENTE"]
-    possiveis_cpf = ["CPF", "CPF CLIENTE", "CPF DO CLIENTE"]
-
-    col_nome = next((c for c in possiveis_nome if c in df.columns), None)
-    col_cpf = next((c for c in possiveis_cpf if c in df.columns), None)
+@st.cache_data(max_entries=2, show_spinner=False)
+def carregar_dados(versao: str, _conteudo: bytes) -> pd.DataFrame:
+    # download compartilhado (utils.data_loader); recalcula só quando a versão muda
+    return tratar_planilha(ler_planilha_csv(_conteudo), aprovacao_exata=False)
 
-    if col_nome is None:
-        df["NOME_CLIENTE_BASE"] = "NÃO INFORMADO"
-    else:
-        df["NOME_CLIENTE_BASE"] = (
-            df[col_nome].fillna("NÃO INFORMADO").astype(str).str.upper().str.strip()
-        )
-
-    if col_cpf is None:
-        df["CPF_CLIENTE_BASE"] = ""
-    else:
-        df["CPF_CLIENTE_BASE"] = (
-            df[col_cpf]
-            .fillna("")
-            .astype(str)
-            .str.replace(r"\D", "", regex=True)
-        )
-
-    # 👇 NOVO – CHAVE_CLIENTE global (nome + CPF)
-    df["CHAVE_CLIENTE"] = (
-        df["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO")
-        + " | "
-        + df["CPF_CLIENTE_BASE"].fillna("")
-    )
-
-    return df
 
 # ---------------------------------------------------------
 # CARREGAR BASE
 # ---------------------------------------------------------
-df = carregar_dados()
+versao, conteudo = baixar_planilha_csv()
+
+with medir("carregar_dados") as m:
+    df = carregar_dados(versao, conteudo)
+    m["linhas"] = len(df)
 
 if df.empty:
     st.error("Erro ao carregar planilha.")
@@ -220,11 +65,8 @@ if dias_validos.empty and bases_validas.empty:
 # ---------------------------------------------------------
 # NOVO – STATUS FINAL DO CLIENTE (HISTÓRICO COMPLETO)
 # ---------------------------------------------------------
-df_ordenado_global = df.sort_values("DIA")
-status_final_por_cliente = (
-    df_ordenado_global.groupby("CHAVE_CLIENTE")["STATUS_BASE"].last().fillna("")
-)
-status_final_por_cliente.name = "STATUS_FINAL_CLIENTE"
+with medir("status_final_por_cliente"):
+    status_final_por_cliente = calcular_status_final(df)
 
 # ---------------------------------------------------------
 # SIDEBAR – FILTROS (PERÍODO + EQUIPE + TIPO DE VENDA)
@@ -304,15 +146,18 @@ else:
 # ---------------------------------------------------------
 # FILTRAGEM PRINCIPAL (PERÍODO + EQUIPE)
 # ---------------------------------------------------------
+# recorte em cache compartilhado: (versão, filtro) iguais = mesmo objeto
 if tipo_periodo == "DIA":
-    df_ref = df[
-        (df["DIA"] >= data_ini) &
-        (df["DIA"] <= data_fim)
-    ].copy()
+    filtro_periodo = filtro_normalizado(periodo=(data_ini, data_fim))
 else:
-    df_ref = df[df["DATA_BASE_LABEL"].isin(bases_selecionadas)].copy()
+    filtro_periodo = filtro_normalizado(bases=bases_selecionadas)
+
+filtro = filtro_normalizado(*filtro_periodo[:2], equipe=equipe_sel)
+df_ref = recorte_filtrado("02_Ranking_Corretores", versao, filtro, df)
+
+if tipo_periodo == "DATA_BASE":
     # calcula o intervalo real de dias desse(s) mês(es) para exibir no texto, se quiser
-    dias_sel = df_ref["DIA"].dropna()
+    dias_sel = recorte_filtrado("02_Ranking_Corretores", versao, filtro_periodo, df)["DIA"].dropna()
     if not dias_sel.empty:
         data_ini = dias_sel.min()
         data_fim = dias_sel.max()
@@ -320,9 +165,6 @@ else:
         data_ini = dias_validos.min()
         data_fim = dias_validos.max()
 
-if equipe_sel != "Todas":
-    df_ref = df_ref[df_ref["EQUIPE"] == equipe_sel]
-
 registros_ref = len(df_ref)
 
 # Texto do período para caption
@@ -355,126 +197,25 @@ st.caption(
 # CÁLCULOS DE RANKING
 # ---------------------------------------------------------
 
-# Análises = EM ANÁLISE + REANÁLISE
-mask_analises = df_ref["STATUS_BASE"].isin(["EM ANÁLISE", "REANÁLISE"])
-df_analises = df_ref[mask_analises]
-
-analises_por_corretor = (
-    df_analises.groupby("CORRETOR").size().rename("ANALISES")
-)
-
-# Aprovações
-df_aprov = df_ref[df_ref["STATUS_BASE"] == "APROVADO"]
-aprov_por_corretor = df_aprov.groupby("CORRETOR").size().rename("APROVACOES")
-
-# ---------------------------------------------------------
-# Vendas (1 por cliente) e VGV – com REGRA DO DESISTIU
-# ---------------------------------------------------------
-df_vendas = df_ref[df_ref["STATUS_BASE"].isin(status_venda_considerado)].copy()
-
-if not df_vendas.empty:
-
-    # Garante CHAVE_CLIENTE
-    if "CHAVE_CLIENTE" not in df_vendas.columns:
-        df_vendas["CHAVE_CLIENTE"] = (
-            df_vendas["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO")
-            + " | "
-            + df_vendas["CPF_CLIENTE_BASE"].fillna("")
-        )
-
-    # Junta o STATUS_FINAL_CLIENTE vindo do histórico completo
-    df_vendas = df_vendas.merge(
-        status_final_por_cliente,
-        on="CHAVE_CLIENTE",
-        how="left",
-    )
-
-    # Remove clientes cujo último status global é DESISTIU
-    df_vendas = df_vendas[df_vendas["STATUS_FINAL_CLIENTE"] != "DESISTIU"]
-
-    if not df_vendas.empty:
-        df_vendas = df_vendas.sort_values("DIA")
-        # 1 registro por cliente (o último do período)
-        df_vendas_ult = df_vendas.groupby("CHAVE_CLIENTE").tail(1)
-    else:
-        df_vendas_ult = pd.DataFrame()
-else:
-    df_vendas_ult = pd.DataFrame()
-
-vendas_por_corretor = (
-    df_vendas_ult.groupby("CORRETOR").size().rename("VENDAS")
-    if not df_vendas_ult.empty
-    else pd.Series(dtype=int, name="VENDAS")
-)
-
-vgv_por_corretor = (
-    df_vendas_ult.groupby("CORRETOR")["VGV"].sum().rename("VGV")
-    if not df_vendas_ult.empty
-    else pd.Series(dtype=float, name="VGV")
-)
-
-# Junta tudo
-ranking = (
-    pd.concat(
-        [analises_por_corretor, aprov_por_corretor, vendas_por_corretor, vgv_por_corretor],
-        axis=1,
-    )
-    .fillna(0)
-    .reset_index()
-)
+# ranking em cache junto com o recorte (cópia: a formatação abaixo altera o df)
+ranking = agregado_filtrado(
+    "02_Ranking_Corretores", versao, filtro, df, "ranking",
+    lambda recorte, status_venda: ranking_por(
+        recorte, status_final_por_cliente, "CORRETOR", list(status_venda)
+    ),
+    tuple(status_venda_considerado),
+).copy()
 
 if ranking.empty:
     st.warning("Não há dados suficientes para montar o ranking.")
     st.stop()
 
-# Garante tipos
-ranking["ANALISES"] = ranking["ANALISES"].astype(int)
-ranking["APROVACOES"] = ranking["APROVACOES"].astype(int)
-ranking["VENDAS"] = ranking["VENDAS"].astype(int)
-ranking["VGV"] = ranking["VGV"].astype(float)
-
-# Taxas
-ranking["TAXA_APROV_ANALISES"] = np.where(
-    ranking["ANALISES"] > 0,
-    ranking["APROVACOES"] / ranking["ANALISES"] * 100,
-    0.0,
-)
-ranking["TAXA_VENDAS_ANALISES"] = np.where(
-    ranking["ANALISES"] > 0,
-    ranking["VENDAS"] / ranking["ANALISES"] * 100,
-    0.0,
-)
-
-# Ordenação do ranking: VGV, VENDAS, APROVACOES, ANALISES
-ranking = ranking.sort_values(
-    by=["VGV", "VENDAS", "APROVACOES", "ANALISES"],
-    ascending=[False, False, False, False],
-).reset_index(drop=True)
-
-# Posição com medalhas
-posicoes = []
-for i in range(len(ranking)):
-    pos = i + 1
-    if pos == 1:
-        posicoes.append("🥇 1º")
-    elif pos == 2:
-        posicoes.append("🥈 2º")
-    elif pos == 3:
-        posicoes.append("🥉 3º")
-    else:
-        posicoes.append(f"{pos}º")
-
-ranking["POSICAO"] = posicoes
-
 # ---------------------------------------------------------
 # FORMATAÇÃO
 # ---------------------------------------------------------
-def formata_moeda(v: float) -> str:
-    return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-ranking["VGV_FMT"] = ranking["VGV"].apply(formata_moeda)
-ranking["TAXA_APROV_ANALISES_FMT"] = ranking["TAXA_APROV_ANALISES"].map(lambda v: f"{v:.1f}%")
-ranking["TAXA_VENDAS_ANALISES_FMT"] = ranking["TAXA_VENDAS_ANALISES"].map(lambda v: f"{v:.1f}%")
+ranking["VGV_FMT"] = moeda(ranking["VGV"])
+ranking["TAXA_APROV_ANALISES_FMT"] = percentual(ranking["TAXA_APROV_ANALISES"])
+ranking["TAXA_VENDAS_ANALISES_FMT"] = percentual(ranking["TAXA_VENDAS_ANALISES"])
 
 ranking_exibe = ranking[
     [
@@ -505,38 +246,22 @@ ranking_exibe = ranking[
 # ---------------------------------------------------------
 st.markdown("### 📊 Tabela detalhada do ranking por corretor")
 
-st.dataframe(
-    ranking_exibe,
-    use_container_width=True,
-    hide_index=True,
-)
+with medir("st_dataframe"):
+    st.dataframe(
+        ranking_exibe,
+        use_container_width=True,
+        hide_index=True,
+    )
 
 # ---------------------------------------------------------
 # GRÁFICO DE BARRAS – VGV POR CORRETOR
 # ---------------------------------------------------------
-chart_data = ranking.copy()
-
-chart = (
-    alt.Chart(chart_data)
-    .mark_bar()
-    .encode(
-        x=alt.X("CORRETOR:N", sort="-y", title="Corretor"),
-        y=alt.Y("VGV:Q", title="VGV"),
-        tooltip=[
-            alt.Tooltip("CORRETOR:N", title="Corretor"),
-            alt.Tooltip("VGV:Q", title="VGV", format=",.2f"),
-            alt.Tooltip("VENDAS:Q", title="Vendas"),
-            alt.Tooltip("ANALISES:Q", title="Análises"),
-            alt.Tooltip("APROVACOES:Q", title="Aprovações"),
-            alt.Tooltip("TAXA_APROV_ANALISES:Q", title="% Aprov./Análises", format=".1f"),
-            alt.Tooltip("TAXA_VENDAS_ANALISES:Q", title="% Vendas/Análises", format=".1f"),
-        ],
-    )
-    .properties(height=500)
+# só as colunas do gráfico vão para o spec, em cache por (versão, filtro, tipo de venda)
+exibir_grafico(
+    ("02_Ranking_Corretores", versao, filtro, tuple(status_venda_considerado)),
+    lambda: grafico_barras_vgv(dados_barras_vgv(ranking, "CORRETOR"), "CORRETOR", "Corretor", altura=500),
 )
 
-st.altair_chart(chart, use_container_width=True)
-
 st.markdown(
     "<hr><p style='text-align:center;color:#666;'>"
     "Ranking por corretor baseado em análises, aprovações, vendas (1 por cliente) e VGV, "
@@ -544,3 +269,5 @@ st.markdown(
     "</p>",
     unsafe_allow_html=True,
 )
+
+finalizar_medicao()
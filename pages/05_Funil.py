@@ -7,7 +7,22 @@ import math
 
 from utils.bootstrap import iniciar_app
 from app_dashboard import carregar_dados_planilha
-from streamlit_autorefresh import st_autorefresh
+from utils.data_loader import versao_planilha
+from utils.particoes import indice_particoes
+from utils.planejamento import bases_do_escopo, chave_escopo, meta_das_anteriores, tabela_planejamento
+from utils.series_diarias import (
+    indicador_da_meta,
+    linha_meta,
+    ritmo_necessario,
+    serie_diaria,
+    series_diarias,
+    ultimo_dia_com_registro,
+)
+from utils.versao_dados import atualizar_quando_mudar
+from utils.indicadores import calcular_status_final
+from utils.perf import finalizar_medicao, iniciar_medicao, medir
+
+iniciar_medicao("05_Funil")
 
 
 # ---------------------------------------------------------
@@ -19,7 +34,9 @@ st.set_page_config(
     layout="wide",
 )
 
-st_autorefresh(interval=600 * 1000, key="auto_refresh_meta")
+# Verifica a cada 10 min; só recarrega se a planilha mudou
+# (as notificações do iniciar_app se atualizam sozinhas)
+atualizar_quando_mudar("auto_refresh_meta", fontes=("planilha",), intervalo_s=600)
 
 
 # ---------------------------------------------------------
@@ -40,98 +57,6 @@ def format_int(v):
         return "0"
 
 
-def obter_vendas_unicas(df, status_final_map):
-    if df.empty:
-        return df.iloc[0:0].copy()
-
-    df_v = df[df["STATUS_BASE"] == "VENDA GERADA"].copy()
-    if df_v.empty:
-        return df_v
-
-    df_v["STATUS_FINAL"] = df_v["CHAVE_CLIENTE"].map(status_final_map)
-    df_v = df_v[df_v["STATUS_FINAL"] != "DESISTIU"]
-
-    df_v = df_v.sort_values("DIA").groupby("CHAVE_CLIENTE").tail(1)
-    return df_v
-
-
-# HISTÓRICO / VOLUME (para conversões e meta histórica)
-def contar_analises_volume(df):
-    return int(df["STATUS_BASE"].isin(["EM ANÁLISE", "REANÁLISE"]).sum())
-
-
-# REALIZADO (para o mês comercial): APENAS "EM ANÁLISE"
-def contar_analises_realizado(df):
-    return int((df["STATUS_BASE"] == "EM ANÁLISE").sum())
-
-
-def contar_aprovacoes(df):
-    return int((df["STATUS_BASE"] == "APROVADO").sum())
-
-
-def total_por_tipo(df, tipo, status_final_map, modo="volume"):
-    """
-    modo:
-      - "volume": análises = EM ANÁLISE + REANÁLISE
-      - "realizado": análises = APENAS EM ANÁLISE
-    """
-    if df.empty:
-        return 0
-
-    if tipo == "Número de Análises":
-        return contar_analises_realizado(df) if modo == "realizado" else contar_analises_volume(df)
-
-    if tipo == "Número de Aprovações":
-        return contar_aprovacoes(df)
-
-    return int(len(obter_vendas_unicas(df, status_final_map)))
-
-
-def serie_diaria_real(df, tipo, status_final_map, modo="realizado"):
-    """
-    Série diária do REAL (para gráfico).
-    Para Análises no modo 'realizado' conta APENAS 'EM ANÁLISE'.
-    """
-    if df.empty:
-        return pd.Series(dtype=int)
-
-    if tipo == "Número de Análises":
-        if modo == "realizado":
-            s = df[df["STATUS_BASE"] == "EM ANÁLISE"].groupby("DIA").size()
-        else:
-            s = df[df["STATUS_BASE"].isin(["EM ANÁLISE", "REANÁLISE"])].groupby("DIA").size()
-
-    elif tipo == "Número de Aprovações":
-        s = df[df["STATUS_BASE"] == "APROVADO"].groupby("DIA").size()
-
-    else:
-        df_v = obter_vendas_unicas(df, status_final_map)
-        s = df_v.groupby("DIA").size()
-
-    return s.sort_index()
-
-
-def bases_anteriores(df_scope, base_ref, n=3):
-    """
-    Retorna as N DATA_BASE_LABEL imediatamente anteriores à base_ref (DATA_BASE datetime).
-    """
-    if df_scope.empty or "DATA_BASE" not in df_scope.columns:
-        return []
-
-    uniq = (
-        df_scope[["DATA_BASE", "DATA_BASE_LABEL"]]
-        .dropna()
-        .drop_duplicates()
-        .sort_values("DATA_BASE")
-        .reset_index(drop=True)
-    )
-
-    prev = uniq[uniq["DATA_BASE"] < base_ref]
-    labels = prev["DATA_BASE_LABEL"].tolist()
-
-    return labels[-n:] if labels else []
-
-
 # ---------------------------------------------------------
 # BASE
 # ---------------------------------------------------------
@@ -148,8 +73,8 @@ if "CHAVE_CLIENTE" not in df.columns:
     cpf = df.get("CPF_CLIENTE_BASE", "").astype(str)
     df["CHAVE_CLIENTE"] = nome + " | " + cpf
 
-df_final = df.sort_values("DIA").groupby("CHAVE_CLIENTE").tail(1)
-status_final_por_cliente = df_final.set_index("CHAVE_CLIENTE")["STATUS_BASE"].to_dict()
+with medir("status_final_por_cliente"):
+    status_final_por_cliente = calcular_status_final(df)
 
 
 # ---------------------------------------------------------
@@ -157,18 +82,28 @@ status_final_por_cliente = df_final.set_index("CHAVE_CLIENTE")["STATUS_BASE"].to
 # ---------------------------------------------------------
 st.sidebar.title("Filtros 🔎")
 
-df_scope = df.copy()
+# partições CORRETOR/EQUIPE (valores dos filtros), montadas 1x por versão da planilha
+particoes = indice_particoes(("05_Funil", versao_planilha()), df)
+
+escopo = chave_escopo()
 
 if perfil == "corretor":
-    df_scope = df_scope[df_scope["CORRETOR"] == nome_usuario]
+    escopo = chave_escopo(corretor=nome_usuario)
 else:
     visao = st.sidebar.radio("Visão", ["MR IMÓVEIS", "Equipe", "Corretor"])
     if visao == "Equipe":
-        eq = st.sidebar.selectbox("Equipe", sorted(df_scope["EQUIPE"].unique()))
-        df_scope = df_scope[df_scope["EQUIPE"] == eq]
+        eq = st.sidebar.selectbox("Equipe", sorted(particoes["EQUIPE"]))
+        escopo = chave_escopo(equipe=eq)
     elif visao == "Corretor":
-        cr = st.sidebar.selectbox("Corretor", sorted(df_scope["CORRETOR"].unique()))
-        df_scope = df_scope[df_scope["CORRETOR"] == cr]
+        cr = st.sidebar.selectbox("Corretor", sorted(particoes["CORRETOR"]))
+        escopo = chave_escopo(corretor=cr)
+
+# escopo × DATA_BASE já agregado (volume, realizado, aprovações, vendas
+# únicas e somas das 3 bases anteriores), montado 1x por versão da planilha
+planejamento = tabela_planejamento(("05_Funil", versao_planilha()), df, status_final_por_cliente)
+
+# mesmos escopos em matriz escopo × dia (acumulado por indicador)
+series = series_diarias(("05_Funil", versao_planilha()), df, status_final_por_cliente)
 
 
 # ---------------------------------------------------------
@@ -185,28 +120,26 @@ tipo_meta = st.selectbox(
 # ---------------------------------------------------------
 # SELETOR DA DATA_BASE (REFERÊNCIA PARA PEGAR AS 3 ANTERIORES)
 # ---------------------------------------------------------
-uniq_bases = (
-    df_scope[["DATA_BASE", "DATA_BASE_LABEL"]]
-    .dropna()
-    .drop_duplicates()
-    .sort_values("DATA_BASE")
-)
+bases_escopo = bases_do_escopo(planejamento, escopo)
 
-lista_labels = uniq_bases["DATA_BASE_LABEL"].tolist()
-base_label_sel = st.selectbox("Mês de Referência (DATA_BASE)", lista_labels)
+if bases_escopo.empty:
+    st.info("Sem DATA_BASE para o escopo selecionado.")
+    st.stop()
 
-base_ref = uniq_bases[uniq_bases["DATA_BASE_LABEL"] == base_label_sel]["DATA_BASE"].iloc[0]
-labels_prev3 = bases_anteriores(df_scope, base_ref, n=3)
+lista_labels = bases_escopo["DATA_BASE_LABEL"].tolist()
+base_label_sel = st.selectbox("Mês de Referência (DATA_BASE)", lista_labels)
 
-df_prev3 = df_scope[df_scope["DATA_BASE_LABEL"].isin(labels_prev3)].copy()
+linha_base = bases_escopo[bases_escopo["DATA_BASE_LABEL"] == base_label_sel].iloc[0]
+base_ref = linha_base["DATA_BASE"]
+labels_prev3 = list(linha_base["BASES_ANT"])
 
 
 # ---------------------------------------------------------
 # CONVERSÕES (BASEADAS NAS 3 BASES ANTERIORES) - VOLUME
 # ---------------------------------------------------------
-vendas_prev3 = len(obter_vendas_unicas(df_prev3, status_final_por_cliente))
-anal_prev3 = contar_analises_volume(df_prev3)   # volume: análise + reanálise
-aprov_prev3 = contar_aprovacoes(df_prev3)
+vendas_prev3 = int(linha_base["VENDAS_ANT"])
+anal_prev3 = int(linha_base["ANALISES_ANT"])   # volume: análise + reanálise
+aprov_prev3 = int(linha_base["APROVACOES_ANT"])
 
 anal_por_venda = (anal_prev3 / vendas_prev3) if vendas_prev3 > 0 else 0
 aprov_por_venda = (aprov_prev3 / vendas_prev3) if vendas_prev3 > 0 else 0
@@ -228,13 +161,8 @@ st.caption("Bases referência (anteriores): " + (" | ".join(labels_prev3) if lab
 # ---------------------------------------------------------
 # META HISTÓRICA (MÉDIA DAS 3 BASES ANTERIORES)
 # ---------------------------------------------------------
-valores_meta = []
-for lab in labels_prev3:
-    df_b = df_scope[df_scope["DATA_BASE_LABEL"] == lab]
-    # meta histórica usa "volume" (análise + reanálise)
-    valores_meta.append(total_por_tipo(df_b, tipo_meta, status_final_por_cliente, modo="volume"))
-
-meta_historica = int(math.ceil(np.mean(valores_meta))) if valores_meta else 0
+# meta histórica usa "volume" (análise + reanálise)
+meta_hist = meta_das_anteriores(linha_base, tipo_meta)
 
 
 # ---------------------------------------------------------
@@ -251,7 +179,7 @@ if vendas_desejadas > 0:
         meta_valor = int(math.ceil(vendas_desejadas * aprov_por_venda))
         origem_meta = "Meta definida pelo Simulador (convertida em aprovações)"
 else:
-    meta_valor = meta_historica
+    meta_valor = meta_hist
     origem_meta = "Meta histórica (média das 3 DATA_BASE anteriores)"
 
 st.markdown("### 🎯 Meta Atual")
@@ -272,24 +200,20 @@ if dt_fim < dt_inicio:
     st.error("Fim do mês comercial não pode ser menor que o início.")
     st.stop()
 
-df_periodo = df_scope[
-    (df_scope["DIA"].dt.date >= dt_inicio) &
-    (df_scope["DIA"].dt.date <= dt_fim)
-].copy()
+# REAL só até o último dia existente na planilha dentro do período
+ultimo_dia_planilha = ultimo_dia_com_registro(series, escopo, dt_inicio, dt_fim)
 
-if df_periodo.empty:
+if ultimo_dia_planilha is None:
     st.info("Sem registros no período selecionado.")
     st.stop()
 
-# REAL só até o último dia existente na planilha dentro do período
-ultimo_dia_planilha = df_periodo["DIA"].max().date()
-df_real = df_periodo[df_periodo["DIA"].dt.date <= ultimo_dia_planilha].copy()
-
 
 # ---------------------------------------------------------
 # REAL x META (REALIZADO: análises = APENAS EM ANÁLISE)
 # ---------------------------------------------------------
-real_total = total_por_tipo(df_real, tipo_meta, status_final_por_cliente, modo="realizado")
+indicador = indicador_da_meta(tipo_meta, modo="realizado")
+cont_real = serie_diaria(series, escopo, indicador, dt_inicio, ultimo_dia_planilha)
+real_total = int(cont_real.sum())
 faltam = max(meta_valor - real_total, 0)
 pct = (real_total / meta_valor) if meta_valor > 0 else 0
 
@@ -305,8 +229,8 @@ from datetime import timedelta
 # Dias totais do mês comercial
 dias_totais = (dt_fim - dt_inicio).days + 1
 
-# Último dia real considerado (já existe no seu código)
-ultimo_dia_real = df_real["DIA"].max().date()
+# Último dia real considerado
+ultimo_dia_real = ultimo_dia_planilha
 
 # Dias já ocorridos dentro do mês comercial
 dias_decorridos = (ultimo_dia_real - dt_inicio).days + 1
@@ -316,11 +240,7 @@ dias_decorridos = max(dias_decorridos, 0)
 dias_restantes = dias_totais - dias_decorridos
 
 faltam = max(meta_valor - real_total, 0)
-
-if dias_restantes > 0 and faltam > 0:
-    ritmo_diario = faltam / dias_restantes
-else:
-    ritmo_diario = 0
+ritmo_diario = ritmo_necessario(meta_valor, real_total, dias_restantes)
 st.markdown("### 📌 Produção necessária por dia")
 
 if dias_restantes <= 0:
@@ -351,11 +271,9 @@ st.markdown("### 📊 Resultado acumulado — últimas 3 DATA_BASE")
 if not labels_prev3:
     st.info("Não há 3 DATA_BASE anteriores suficientes para exibir o acumulado.")
 else:
-    df_3bases = df_scope[df_scope["DATA_BASE_LABEL"].isin(labels_prev3)].copy()
-
-    anal_3b = contar_analises_realizado(df_3bases)
-    aprov_3b = contar_aprovacoes(df_3bases)
-    vendas_3b = len(obter_vendas_unicas(df_3bases, status_final_por_cliente))
+    anal_3b = int(linha_base["ANALISES_EM_ANT"])
+    aprov_3b = int(linha_base["APROVACOES_ANT"])
+    vendas_3b = int(linha_base["VENDAS_ANT"])
 
     c1, c2, c3 = st.columns(3)
 
@@ -390,13 +308,14 @@ st.altair_chart(donut, use_container_width=True)
 # ---------------------------------------------------------
 st.subheader("📈 Acompanhamento — Meta x Real (acumulado)")
 
-cont_real = serie_diaria_real(df_real, tipo_meta, status_final_por_cliente, modo="realizado")
-real_acum = cont_real.cumsum().reset_index()
-real_acum.columns = ["DIA", "Valor"]
-real_acum["Série"] = "Real"
+real_acum = pd.DataFrame({
+    "DIA": pd.date_range(dt_inicio, ultimo_dia_planilha, freq="D"),
+    "Valor": np.cumsum(cont_real),
+    "Série": "Real"
+})
 
 dias_meta = pd.date_range(dt_inicio, dt_fim, freq="D")
-meta_linear = np.linspace(0, meta_valor, num=len(dias_meta), endpoint=True)
+meta_linear = linha_meta(meta_valor, len(dias_meta))
 
 df_meta = pd.DataFrame({
     "DIA": dias_meta,
@@ -424,3 +343,5 @@ st.caption(
     "Meta e conversões usam volume (análise + reanálise) nas 3 DATA_BASE anteriores. "
     "Real contabiliza somente até o último dia registrado na planilha dentro do período."
 )
+
+finalizar_medicao()
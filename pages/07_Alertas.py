@@ -2,6 +2,10 @@ import streamlit as st
 import pandas as pd
 from datetime import timedelta, date
 import numpy as np
+from utils.perf import finalizar_medicao, iniciar_medicao
+
+iniciar_medicao("07_Alertas")
+
 if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
     st.stop()
@@ -329,3 +333,5 @@ else:
                 "Vendas com **status final VENDA INFORMADA** há **5 dias ou mais**, "
                 "sem registro posterior de VENDA GERADA."
             )
+
+finalizar_medicao()
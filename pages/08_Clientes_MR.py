@@ -1,8 +1,16 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 from utils.bootstrap import iniciar_app
 from app_dashboard import carregar_dados_planilha
-from streamlit_autorefresh import st_autorefresh
+from utils.data_loader import versao_planilha
+from utils.versao_dados import atualizar_quando_mudar
+from utils.busca_clientes import buscar_cpf, buscar_nome, indice_busca
+from utils.paginacao import paginar
+from utils.particoes import indice_particoes, posicoes_particao
+from utils.perf import finalizar_medicao, iniciar_medicao, medir
+
+iniciar_medicao("08_Clientes_MR")
 
 # =========================================================
 # INICIALIZAÇÃO
@@ -15,8 +23,8 @@ st.set_page_config(
     layout="wide"
 )
 
-# Auto refresh
-st_autorefresh(interval=30 * 1000, key="auto_refresh_clientes")
+# Auto refresh (só quando a planilha muda)
+atualizar_quando_mudar("auto_refresh_clientes", fontes=("planilha",))
 
 # =========================================================
 # CONTEXTO DO USUÁRIO
@@ -75,7 +83,7 @@ def formatar_observacao(linha):
 
 def obter_status_atual(grupo):
     # Remove registros sem data válida
-    grupo = grupo[grupo["DIA"].notna()].copy()
+    grupo = grupo[grupo["DIA"].notna()]
 
     if grupo.empty:
         return None
@@ -100,7 +108,7 @@ def obter_status_atual(grupo):
 # CARREGAR BASE
 # =========================================================
 @st.cache_data(ttl=60)
-def carregar_base():
+def carregar_base(versao: str):
     df = carregar_dados_planilha()
     df.columns = df.columns.str.upper().str.strip()
 
@@ -137,7 +145,8 @@ def carregar_base():
 
     return df
 
-df = carregar_base()
+versao = versao_planilha()
+df = carregar_base(versao)
 
 # =========================================================
 # BUSCA
@@ -154,23 +163,30 @@ if not cpf_busca and not nome_busca:
     st.info("Informe CPF ou nome para buscar.")
     st.stop()
 
-mask = pd.Series(False, index=df.index)
+# índice (CPF exato + trigramas do nome) montado 1x por versão da planilha
+indice = indice_busca(("08_Clientes_MR", versao), df["NOME_CLIENTE_BASE"], df["CPF_CLIENTE_BASE"])
 
-if cpf_busca:
-    cpf = cpf_busca.replace(".", "").replace("-", "").strip()
-    mask = df["CPF_CLIENTE_BASE"] == cpf
+with medir("busca_clientes") as m:
+    posicoes = []
+    if cpf_busca:
+        posicoes.append(buscar_cpf(indice, cpf_busca.replace(".", "").replace("-", "").strip()))
+    if nome_busca:
+        posicoes.append(buscar_nome(indice, nome_busca))
 
-if nome_busca:
-    nome = nome_busca.upper().strip()
-    mask = mask | df["NOME_CLIENTE_BASE"].str.contains(nome, na=False)
+    posicoes = np.union1d(*posicoes) if len(posicoes) > 1 else posicoes[0]
 
-resultado = df[mask].copy()
+    # =========================================================
+    # TRAVA DE POSSE
+    # =========================================================
+    # cruza com as linhas do próprio corretor (índice de partições da versão)
+    if perfil == "corretor":
+        particoes = indice_particoes(("08_Clientes_MR", versao), df)
+        posicoes = np.intersect1d(
+            posicoes, posicoes_particao(particoes, "CORRETOR", nome_corretor_logado)
+        )
 
-# =========================================================
-# TRAVA DE POSSE
-# =========================================================
-if perfil == "corretor":
-    resultado = resultado[resultado["CORRETOR"] == nome_corretor_logado]
+    resultado = df.iloc[posicoes]
+    m["linhas"] = len(resultado)
 
 if resultado.empty:
     st.warning("⚠️ Cliente não encontrado ou não pertence à sua carteira.")
@@ -179,7 +195,19 @@ if resultado.empty:
 # =========================================================
 # EXIBIÇÃO
 # =========================================================
-for (chave, corretor), grupo in resultado.groupby(["CHAVE", "CORRETOR"]):
+# ordena UMA vez: cada grupo já sai em ordem de data (linha do tempo pronta)
+resultado = resultado.sort_values("DIA", kind="mergesort")
+
+# paginação: numera os clientes (CHAVE + CORRETOR) e monta só os da página
+id_cliente = resultado.groupby(["CHAVE", "CORRETOR"], sort=False).ngroup()
+inicio, fim = paginar(
+    int(id_cliente.max()) + 1,
+    "08_clientes",
+    assinatura=(versao, cpf_busca, nome_busca),
+)
+resultado = resultado[(id_cliente >= inicio) & (id_cliente < fim)]
+
+for (chave, corretor), grupo in resultado.groupby(["CHAVE", "CORRETOR"], sort=False):
 
     ultima = obter_status_atual(grupo)
     if ultima is None:
@@ -213,10 +241,11 @@ for (chave, corretor), grupo in resultado.groupby(["CHAVE", "CORRETOR"]):
         st.info(obs_final)
 
     # Linha do tempo
-    hist = grupo[grupo["DIA"].notna()].sort_values("DIA")[["DIA", "SITUACAO_ORIGINAL"]].copy()
+    hist = grupo.loc[grupo["DIA"].notna(), ["DIA", "SITUACAO_ORIGINAL"]]
     hist["DIA"] = hist["DIA"].dt.strftime("%d/%m/%Y")
     hist.columns = ["Data", "Situação"]
 
     st.markdown("#### 📜 Linha do tempo do cliente")
     st.dataframe(hist, use_container_width=True, hide_index=True)
 
+finalizar_medicao()
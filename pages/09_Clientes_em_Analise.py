@@ -1,6 +1,16 @@
 import streamlit as st
 import pandas as pd
 from datetime import date, timedelta
+from utils.busca_clientes import buscar_cpf, buscar_nome, indice_busca
+from utils.data_loader import baixar_planilha_csv, ler_planilha_csv
+from utils.formatacao import moeda_valor
+from utils.historico_clientes import chave_cliente, historico_clientes, resumo_dos_clientes
+from utils.paginacao import paginar
+from utils.perf import finalizar_medicao, iniciar_medicao, medir
+from utils.visoes import com_colunas
+
+iniciar_medicao("09_Clientes_em_Analise")
+
 if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
     st.stop()
@@ -49,20 +59,12 @@ def limpar_para_data(serie):
     return dt.dt.date
 
 
-# ---------------------------------------------------------
-# CONFIG: LINK DA PLANILHA (MESMO DA PÁGINA CLIENTES MR)
-# ---------------------------------------------------------
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID_ANALISES = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_ANALISES}"
-
-
 # ---------------------------------------------------------
 # CARREGAR E PREPARAR DADOS (MESMA LÓGICA DA CLIENTES MR)
 # ---------------------------------------------------------
-@st.cache_data(ttl=60)
-def carregar_dados():
-    df = pd.read_csv(CSV_URL)
+@st.cache_data(max_entries=2, show_spinner=False)
+def carregar_dados(versao: str, _conteudo: bytes):
+    df = ler_planilha_csv(_conteudo)
 
     # Padroniza nomes de colunas
     df.columns = [c.strip().upper() for c in df.columns]
@@ -202,7 +204,8 @@ def carregar_dados():
     return df
 
 
-df = carregar_dados()
+versao, conteudo = baixar_planilha_csv()
+df = carregar_dados(versao, conteudo)
 
 if df.empty:
     st.error("Não foi possível carregar dados da planilha.")
@@ -225,17 +228,17 @@ if "DIA" not in df.columns:
 
 # Garantir datetime
 df["DIA"] = pd.to_datetime(df["DIA"], errors="coerce")
-df_valid = df.dropna(subset=["DIA"]).copy()
+df_valid = df.dropna(subset=["DIA"])
 df_valid = df_valid.sort_values(by=[col_cliente, "DIA"])
 
 # Última linha = status atual
-df_status_atual = df_valid.drop_duplicates(subset=[col_cliente], keep="last").copy()
+df_status_atual = df_valid.drop_duplicates(subset=[col_cliente], keep="last")
 
 # Filtra quem está EM ANÁLISE / REANÁLISE
 status_em_analise = ["EM ANÁLISE", "REANÁLISE"]
 df_em_analise_atual = df_status_atual[
     df_status_atual["STATUS_BASE"].isin(status_em_analise)
-].copy()
+]
 
 if df_em_analise_atual.empty:
     st.info("No momento não há clientes com status atual EM ANÁLISE ou REANÁLISE.")
@@ -279,14 +282,14 @@ limite_tempo = data_ref - timedelta(days=periodo)
 
 df_em_analise_periodo = df_em_analise_atual[
     df_em_analise_atual["DIA"] >= limite_tempo
-].copy()
+]
 
 if df_em_analise_periodo.empty:
     st.info(f"Não há clientes em análise nos últimos {periodo} dias.")
     st.stop()
 
 # Filtro por equipe (na área principal)
-df_filtrado = df_em_analise_periodo.copy()
+df_filtrado = df_em_analise_periodo
 
 st.markdown("Filtrar por equipe:")
 if "EQUIPE" in df_em_analise_periodo.columns:
@@ -308,7 +311,7 @@ if "EQUIPE" in df_em_analise_periodo.columns:
     if equipe_sel != "Todas":
         df_filtrado = df_em_analise_periodo[
             df_em_analise_periodo["EQUIPE"] == equipe_sel
-        ].copy()
+        ]
 else:
     st.warning("Coluna 'EQUIPE' não encontrada. Filtro por equipe desativado.")
 
@@ -347,65 +350,31 @@ if termo_busca.strip():
 
     termo_limpo = termo_busca.strip().upper()
 
-    if tipo_busca.startswith("Nome"):
-        df_resultado = df[
-            df["NOME_CLIENTE_BASE"].str.contains(termo_limpo, na=False)
-        ].copy()
-    else:
-        termo_cpf = "".join(ch for ch in termo_busca if ch.isdigit())
-        df_resultado = df[
-            df["CPF_CLIENTE_BASE"].str.contains(termo_cpf, na=False)
-        ].copy()
+    # índice montado 1x por versão da planilha (sem varrer a coluna inteira)
+    indice = indice_busca(("09_Clientes_em_Analise", versao), df["NOME_CLIENTE_BASE"], df["CPF_CLIENTE_BASE"])
+
+    with medir("busca_clientes") as m:
+        if tipo_busca.startswith("Nome"):
+            posicoes = buscar_nome(indice, termo_limpo)
+        else:
+            posicoes = buscar_cpf(indice, termo_busca, parcial=True)
+        df_resultado = df.iloc[posicoes]
+        m["linhas"] = len(df_resultado)
 
     if df_resultado.empty:
         st.warning("Nenhum cliente encontrado com esse critério de busca.")
     else:
-        # Cria chave única
-        df_resultado["CHAVE_CLIENTE"] = (
-            df_resultado["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO")
-            + " | "
-            + df_resultado["CPF_CLIENTE_BASE"].fillna("")
-        )
+        # Histórico por cliente pré-calculado (1x por versão da planilha)
+        historico = historico_clientes(("09_Clientes_em_Analise", versao), df)
 
         # Mesma chave para o conjunto filtrado (clientes em análise dentro do período/equipe)
-        df_filtrado["CHAVE_CLIENTE"] = (
-            df_filtrado["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO")
-            + " | "
-            + df_filtrado["CPF_CLIENTE_BASE"].fillna("")
-        )
-
+        df_filtrado = com_colunas(df_filtrado, CHAVE_CLIENTE=chave_cliente(df_filtrado))
         chaves_em_analise = set(df_filtrado["CHAVE_CLIENTE"].unique())
 
-        # Resumo por cliente (base Cliente MR)
-        def conta_analises(s):
-            return s.isin(["EM ANÁLISE", "REANÁLISE"]).sum()
-
-        def conta_aprovacoes(s):
-            return (s == "APROVADO").sum()
-
-        def conta_vendas(s):
-            return s.isin(["VENDA GERADA", "VENDA INFORMADA"]).sum()
-
-        resumo = (
-            df_resultado.groupby("CHAVE_CLIENTE")
-            .agg(
-                NOME=("NOME_CLIENTE_BASE", "first"),
-                CPF=("CPF_CLIENTE_BASE", "first"),
-                ANALISES=("STATUS_BASE", conta_analises),
-                APROVACOES=("STATUS_BASE", conta_aprovacoes),
-                VENDAS=("STATUS_BASE", conta_vendas),
-                VGV=("VGV", "sum"),
-                ULT_STATUS=(
-                    "SITUACAO_ORIGINAL",
-                    lambda x: x.iloc[-1] if len(x) > 0 else "",
-                ),
-                ULT_DATA=("DIA", lambda x: x.max()),
-            )
-            .reset_index()
-        )
-
         # Mantém somente clientes que estão EM ANÁLISE/REANÁLISE dentro do filtro da página
-        resumo = resumo[resumo["CHAVE_CLIENTE"].isin(chaves_em_analise)].copy()
+        resumo = resumo_dos_clientes(
+            historico, set(chave_cliente(df_resultado)) & chaves_em_analise
+        )
 
         if resumo.empty:
             st.warning(
@@ -415,44 +384,24 @@ if termo_busca.strip():
         else:
             st.markdown("### 💳 Detalhes por cliente (cards)")
 
-            # Função para checar se uma observação é numérica
-            def observacao_e_numero(txt: str) -> bool:
-                if not txt:
-                    return False
-                t = (
-                    txt.upper()
-                    .replace("R$", "")
-                    .replace(".", "")
-                    .replace(",", "")
-                    .replace(" ", "")
-                )
-                return t.isdigit()
-
             # Cards (mesmo layout da página Clientes MR)
-            for _, row in resumo.sort_values(
-                ["VENDAS", "VGV"], ascending=False
-            ).iterrows():
-                chave = row["CHAVE_CLIENTE"]
-                df_cli = df_resultado[df_resultado["CHAVE_CLIENTE"] == chave].copy()
-
-                # Ordena por data para pegar última movimentação
-                df_cli = df_cli.sort_values("DIA")
-                ultima_linha = df_cli.iloc[-1]
-
-                ult_constr = ultima_linha.get("CONSTRUTORA_BASE", "NÃO INFORMADO")
-                ult_empr = ultima_linha.get("EMPREENDIMENTO_BASE", "NÃO INFORMADO")
-                ult_corretor = ultima_linha.get("CORRETOR", "NÃO INFORMADO")
-
-                obs_validas = [
-                    obs
-                    for obs in df_cli["OBSERVACOES_RAW"].fillna("")
-                    if obs and not observacao_e_numero(obs)
-                ]
-                ultima_obs = obs_validas[-1] if obs_validas else ""
-
-                analises_em = (df_cli["STATUS_BASE"] == "EM ANÁLISE").sum()
-                reanalises = (df_cli["STATUS_BASE"] == "REANÁLISE").sum()
-                analises_total = analises_em + reanalises
+            cards = resumo.sort_values(["VENDAS", "VGV"], ascending=False)
+            inicio, fim = paginar(
+                len(cards),
+                "09_cards",
+                assinatura=(versao, tipo_busca, termo_limpo, len(cards)),
+            )
+
+            for _, row in cards.iloc[inicio:fim].iterrows():
+                # campos da última movimentação já vêm prontos do histórico
+                ult_constr = row["ULT_CONSTRUTORA"]
+                ult_empr = row["ULT_EMPREENDIMENTO"]
+                ult_corretor = row["ULT_CORRETOR"]
+                ultima_obs = row["ULT_OBS"]
+
+                analises_em = row["ANALISES_EM"]
+                reanalises = row["REANALISES"]
+                analises_total = row["ANALISES"]
 
                 st.markdown("---")
                 st.markdown(f"##### 👤 {row['NOME']}")
@@ -493,12 +442,7 @@ if termo_busca.strip():
                 m4.metric("Aprovações", int(row["APROVACOES"]))
 
                 m5.metric("Vendas", int(row["VENDAS"]))
-                m6.metric(
-                    "VGV total",
-                    f"R$ {row['VGV']:,.2f}".replace(",", "X")
-                    .replace(".", ",")
-                    .replace("X", "."),
-                )
+                m6.metric("VGV total", moeda_valor(row["VGV"]))
 
 # ---------------------------------------------------------
 # LINHA DE SEPARAÇÃO
@@ -521,7 +465,7 @@ colunas_preferidas = [
 ]
 colunas_existentes = [c for c in colunas_preferidas if c in df_filtrado.columns]
 
-df_tabela = df_filtrado[colunas_existentes].copy()
+df_tabela = df_filtrado[colunas_existentes]
 
 # Formata data
 if "DIA" in df_tabela.columns:
@@ -563,3 +507,5 @@ if "Equipe" in df_tabela.columns:
     )
 
     st.dataframe(resumo_equipe, use_container_width=True, hide_index=True)
+
+finalizar_medicao()
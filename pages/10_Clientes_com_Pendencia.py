@@ -1,6 +1,15 @@
 import streamlit as st
 import pandas as pd
 from datetime import date, timedelta
+from utils.busca_clientes import buscar_cpf, buscar_nome, indice_busca
+from utils.data_loader import baixar_planilha_csv, ler_planilha_csv
+from utils.historico_clientes import chave_cliente, historico_clientes, resumo_dos_clientes
+from utils.paginacao import paginar
+from utils.perf import finalizar_medicao, iniciar_medicao, medir
+from utils.visoes import com_colunas
+
+iniciar_medicao("10_Clientes_com_Pendencia")
+
 if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
     st.stop()
@@ -48,21 +57,13 @@ def limpar_para_data(serie):
     return dt.dt.date
 
 
-# ---------------------------------------------------------
-# CONFIG: LINK DA PLANILHA (MESMO DA CLIENTES MR)
-# ---------------------------------------------------------
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID_ANALISES = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_ANALISES}"
-
-
 # ---------------------------------------------------------
 # CARREGAR E PREPARAR DADOS (MESMA LÓGICA DA CLIENTES MR)
 # + MAPEANDO PENDÊNCIA
 # ---------------------------------------------------------
-@st.cache_data(ttl=60)
-def carregar_dados():
-    df = pd.read_csv(CSV_URL)
+@st.cache_data(max_entries=2, show_spinner=False)
+def carregar_dados(versao: str, _conteudo: bytes):
+    df = ler_planilha_csv(_conteudo)
 
     # Padroniza nomes de colunas
     df.columns = [c.strip().upper() for c in df.columns]
@@ -203,7 +204,8 @@ def carregar_dados():
     return df
 
 
-df = carregar_dados()
+versao, conteudo = baixar_planilha_csv()
+df = carregar_dados(versao, conteudo)
 
 if df.empty:
     st.error("Não foi possível carregar dados da planilha.")
@@ -226,14 +228,14 @@ if "DIA" not in df.columns:
     st.stop()
 
 df["DIA"] = pd.to_datetime(df["DIA"], errors="coerce")
-df_valid = df.dropna(subset=["DIA"]).copy()
+df_valid = df.dropna(subset=["DIA"])
 df_valid = df_valid.sort_values(by=[col_cliente, "DIA"])
 
 # Última linha = status atual
-df_status_atual = df_valid.drop_duplicates(subset=[col_cliente], keep="last").copy()
+df_status_atual = df_valid.drop_duplicates(subset=[col_cliente], keep="last")
 
 # Filtra quem está com PENDÊNCIA
-df_pend_atual = df_status_atual[df_status_atual["STATUS_BASE"] == "PENDÊNCIA"].copy()
+df_pend_atual = df_status_atual[df_status_atual["STATUS_BASE"] == "PENDÊNCIA"]
 
 if df_pend_atual.empty:
     st.info("No momento não há clientes com status atual PENDÊNCIA.")
@@ -276,7 +278,7 @@ periodo = st.radio(
 data_ref = df_valid["DIA"].max()
 limite_tempo = data_ref - timedelta(days=periodo)
 
-df_pend_periodo = df_pend_atual[df_pend_atual["DIA"] >= limite_tempo].copy()
+df_pend_periodo = df_pend_atual[df_pend_atual["DIA"] >= limite_tempo]
 
 if df_pend_periodo.empty:
     st.info(f"Não há clientes com pendência nos últimos {periodo} dias.")
@@ -303,12 +305,12 @@ if "EQUIPE" in df_pend_periodo.columns:
     )
 
     if equipe_sel != "Todas":
-        df_filtrado = df_pend_periodo[df_pend_periodo["EQUIPE"] == equipe_sel].copy()
+        df_filtrado = df_pend_periodo[df_pend_periodo["EQUIPE"] == equipe_sel]
     else:
-        df_filtrado = df_pend_periodo.copy()
+        df_filtrado = df_pend_periodo
 else:
     st.warning("Coluna 'EQUIPE' não encontrada. Filtro por equipe desativado.")
-    df_filtrado = df_pend_periodo.copy()
+    df_filtrado = df_pend_periodo
 
 if df_filtrado.empty:
     st.info("Nenhum cliente com pendência dentro desse filtro.")
@@ -332,47 +334,28 @@ if termo_busca.strip():
     df_resultado = pd.DataFrame()
     termo_limpo = termo_busca.strip().upper()
 
-    if tipo_busca.startswith("Nome"):
-        df_resultado = df[
-            df["NOME_CLIENTE_BASE"].str.contains(termo_limpo, na=False)
-        ].copy()
-    else:
-        termo_cpf = "".join(ch for ch in termo_busca if ch.isdigit())
-        df_resultado = df[
-            df["CPF_CLIENTE_BASE"].str.contains(termo_cpf, na=False)
-        ].copy()
+    # índice montado 1x por versão da planilha (sem varrer a coluna inteira)
+    indice = indice_busca(("10_Clientes_com_Pendencia", versao), df["NOME_CLIENTE_BASE"], df["CPF_CLIENTE_BASE"])
+
+    with medir("busca_clientes") as m:
+        if tipo_busca.startswith("Nome"):
+            posicoes = buscar_nome(indice, termo_limpo)
+        else:
+            posicoes = buscar_cpf(indice, termo_busca, parcial=True)
+        df_resultado = df.iloc[posicoes]
+        m["linhas"] = len(df_resultado)
 
     if df_resultado.empty:
         st.warning("Nenhum cliente encontrado com esse critério de busca.")
     else:
-        # Chaves
-        df_resultado["CHAVE_CLIENTE"] = (
-            df_resultado["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO")
-            + " | "
-            + df_resultado["CPF_CLIENTE_BASE"].fillna("")
-        )
-        df_filtrado["CHAVE_CLIENTE"] = (
-            df_filtrado["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO")
-            + " | "
-            + df_filtrado["CPF_CLIENTE_BASE"].fillna("")
-        )
+        # Histórico por cliente pré-calculado (1x por versão da planilha)
+        historico = historico_clientes(("10_Clientes_com_Pendencia", versao), df)
 
+        df_filtrado = com_colunas(df_filtrado, CHAVE_CLIENTE=chave_cliente(df_filtrado))
         chaves_pend = set(df_filtrado["CHAVE_CLIENTE"].unique())
 
         # Resumo
-        resumo = (
-            df_resultado.groupby("CHAVE_CLIENTE")
-            .agg(
-                NOME=("NOME_CLIENTE_BASE", "first"),
-                CPF=("CPF_CLIENTE_BASE", "first"),
-                VGV=("VGV", "sum"),
-                ULT_STATUS=("SITUACAO_ORIGINAL", lambda x: x.iloc[-1] if len(x) > 0 else ""),
-                ULT_DATA=("DIA", lambda x: x.max()),
-            )
-            .reset_index()
-        )
-
-        resumo = resumo[resumo["CHAVE_CLIENTE"].isin(chaves_pend)].copy()
+        resumo = resumo_dos_clientes(historico, set(chave_cliente(df_resultado)) & chaves_pend)
 
         if resumo.empty:
             st.warning(
@@ -382,35 +365,19 @@ if termo_busca.strip():
         else:
             st.markdown("### 💳 Detalhes por cliente com pendência (cards)")
 
-            def observacao_e_numero(txt: str) -> bool:
-                if not txt:
-                    return False
-                t = (
-                    txt.upper()
-                    .replace("R$", "")
-                    .replace(".", "")
-                    .replace(",", "")
-                    .replace(" ", "")
-                )
-                return t.isdigit()
-
-            for _, row in resumo.sort_values("VGV", ascending=False).iterrows():
-                chave = row["CHAVE_CLIENTE"]
-                df_cli = df_resultado[df_resultado["CHAVE_CLIENTE"] == chave].copy()
-
-                df_cli = df_cli.sort_values("DIA")
-                ultima_linha = df_cli.iloc[-1]
-
-                ult_constr = ultima_linha.get("CONSTRUTORA_BASE", "NÃO INFORMADO")
-                ult_empr = ultima_linha.get("EMPREENDIMENTO_BASE", "NÃO INFORMADO")
-                ult_corretor = ultima_linha.get("CORRETOR", "NÃO INFORMADO")
-
-                obs_validas = [
-                    obs
-                    for obs in df_cli["OBSERVACOES_RAW"].fillna("")
-                    if obs and not observacao_e_numero(obs)
-                ]
-                ultima_obs = obs_validas[-1] if obs_validas else ""
+            cards = resumo.sort_values("VGV", ascending=False)
+            inicio, fim = paginar(
+                len(cards),
+                "10_cards",
+                assinatura=(versao, tipo_busca, termo_limpo, len(cards)),
+            )
+
+            for _, row in cards.iloc[inicio:fim].iterrows():
+                # campos da última movimentação já vêm prontos do histórico
+                ult_constr = row["ULT_CONSTRUTORA"]
+                ult_empr = row["ULT_EMPREENDIMENTO"]
+                ult_corretor = row["ULT_CORRETOR"]
+                ultima_obs = row["ULT_OBS"]
 
                 st.markdown("---")
                 st.markdown(f"##### 👤 {row['NOME']}")
@@ -464,7 +431,7 @@ colunas_preferidas = [
 ]
 colunas_existentes = [c for c in colunas_preferidas if c in df_filtrado.columns]
 
-df_tabela = df_filtrado[colunas_existentes].copy()
+df_tabela = df_filtrado[colunas_existentes]
 
 if "DIA" in df_tabela.columns:
     df_tabela["DIA"] = pd.to_datetime(df_tabela["DIA"], errors="coerce").dt.strftime(
@@ -505,3 +472,5 @@ if "Equipe" in df_tabela.columns:
     )
 
     st.dataframe(resumo_equipe, use_container_width=True, hide_index=True)
+
+finalizar_medicao()
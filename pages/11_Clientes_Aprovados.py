@@ -1,6 +1,16 @@
 import streamlit as st
 import pandas as pd
 from datetime import date, timedelta
+from utils.busca_clientes import buscar_cpf, buscar_nome, indice_busca
+from utils.data_loader import baixar_planilha_csv, ler_planilha_csv
+from utils.formatacao import data_br, moeda, moeda_valor
+from utils.historico_clientes import chave_cliente, historico_clientes, resumo_dos_clientes
+from utils.paginacao import paginar
+from utils.perf import finalizar_medicao, iniciar_medicao, medir
+from utils.visoes import com_colunas
+
+iniciar_medicao("11_Clientes_Aprovados")
+
 if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
     st.stop()
@@ -46,19 +56,12 @@ def limpar_para_data(serie):
     dt = pd.to_datetime(serie, dayfirst=True, errors="coerce")
     return dt.dt.date
 
-# ---------------------------------------------------------
-# CONFIG: LINK DA PLANILHA (MESMO DA PÁGINA CLIENTES EM ANÁLISE)
-# ---------------------------------------------------------
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID_ANALISES = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_ANALISES}"
-
 # ---------------------------------------------------------
 # CARREGAR E PREPARAR DADOS
 # ---------------------------------------------------------
-@st.cache_data(ttl=60)
-def carregar_dados():
-    df = pd.read_csv(CSV_URL)
+@st.cache_data(max_entries=2, show_spinner=False)
+def carregar_dados(versao: str, _conteudo: bytes):
+    df = ler_planilha_csv(_conteudo)
 
     df.columns = [c.strip().upper() for c in df.columns]
 
@@ -194,7 +197,8 @@ def carregar_dados():
     return df
 
 
-df = carregar_dados()
+versao, conteudo = baixar_planilha_csv()
+df = carregar_dados(versao, conteudo)
 
 if df.empty:
     st.error("Não foi possível carregar dados da planilha.")
@@ -211,14 +215,14 @@ else:
 
 # garante datetime
 df["DIA"] = pd.to_datetime(df["DIA"], errors="coerce")
-df_valid = df.dropna(subset=["DIA"]).copy()
+df_valid = df.dropna(subset=["DIA"])
 df_valid = df_valid.sort_values(by=[col_cliente, "DIA"])
 
 # Última linha por cliente (status atual)
-df_status_atual = df_valid.drop_duplicates(subset=[col_cliente], keep="last").copy()
+df_status_atual = df_valid.drop_duplicates(subset=[col_cliente], keep="last")
 
 # apenas APROVADOS
-df_aprovados_atual = df_status_atual[df_status_atual["STATUS_BASE"] == "APROVADO"].copy()
+df_aprovados_atual = df_status_atual[df_status_atual["STATUS_BASE"] == "APROVADO"]
 
 if df_aprovados_atual.empty:
     st.info("No momento não há clientes com APROVAÇÃO registrada.")
@@ -254,13 +258,13 @@ limite_tempo = data_ref - timedelta(days=periodo)
 
 df_aprovados_periodo = df_aprovados_atual[
     df_aprovados_atual["DIA"] >= limite_tempo
-].copy()
+]
 
 if df_aprovados_periodo.empty:
     st.info(f"Não há aprovação nos últimos {periodo} dias.")
     st.stop()
 
-df_filtrado = df_aprovados_periodo.copy()
+df_filtrado = df_aprovados_periodo
 
 st.markdown("Filtrar por equipe:")
 if "EQUIPE" in df_filtrado.columns:
@@ -275,7 +279,7 @@ if "EQUIPE" in df_filtrado.columns:
     equipe_sel = st.selectbox("", ["Todas"] + equipes, index=0)
 
     if equipe_sel != "Todas":
-        df_filtrado = df_filtrado[df_filtrado["EQUIPE"] == equipe_sel].copy()
+        df_filtrado = df_filtrado[df_filtrado["EQUIPE"] == equipe_sel]
 
 st.markdown("Filtrar por corretor:")
 if "CORRETOR" in df_filtrado.columns:
@@ -290,7 +294,7 @@ if "CORRETOR" in df_filtrado.columns:
     corretor_sel = st.selectbox("", ["Todos"] + corretores, index=0)
 
     if corretor_sel != "Todos":
-        df_filtrado = df_filtrado[df_filtrado["CORRETOR"] == corretor_sel].copy()
+        df_filtrado = df_filtrado[df_filtrado["CORRETOR"] == corretor_sel]
 
 if df_filtrado.empty:
     st.info("Nenhum cliente aprovado dentro desse filtro.")
@@ -305,23 +309,14 @@ vgv_total = df_filtrado["VGV"].sum()
 ticket_medio = vgv_total / total_aprovados if total_aprovados > 0 else 0.0
 
 
-def format_currency(valor: float) -> str:
-    return (
-        f"R$ {valor:,.2f}"
-        .replace(",", "X")
-        .replace(".", ",")
-        .replace("X", ".")
-    )
-
-
 c1, c2, c3 = st.columns(3)
 c1.metric("Clientes aprovados (status atual)", total_aprovados)
 c2.metric("Período (dias)", int(periodo))
 c3.metric("Equipes com aprovação", int(equipes_com_aprovados))
 
 k1, k2, k3 = st.columns(3)
-k1.metric("VGV total", format_currency(vgv_total))
-k2.metric("Ticket médio", format_currency(ticket_medio))
+k1.metric("VGV total", moeda_valor(vgv_total))
+k2.metric("Ticket médio", moeda_valor(ticket_medio))
 k3.metric(
     "Média aprovações por equipe",
     f"{total_aprovados / max(equipes_com_aprovados, 1):.1f}",
@@ -334,64 +329,30 @@ if termo_busca.strip():
     termo_limpo = termo_busca.strip().upper()
     df_resultado = pd.DataFrame()
 
-    if tipo_busca.startswith("Nome"):
-        df_resultado = df[
-            df["NOME_CLIENTE_BASE"].str.contains(termo_limpo, na=False)
-        ].copy()
-    else:
-        termo_cpf = "".join(ch for ch in termo_busca if ch.isdigit())
-        df_resultado = df[
-            df["CPF_CLIENTE_BASE"].str.contains(termo_cpf, na=False)
-        ].copy()
+    # índice montado 1x por versão da planilha (sem varrer a coluna inteira)
+    indice = indice_busca(("11_Clientes_Aprovados", versao), df["NOME_CLIENTE_BASE"], df["CPF_CLIENTE_BASE"])
+
+    with medir("busca_clientes") as m:
+        if tipo_busca.startswith("Nome"):
+            posicoes = buscar_nome(indice, termo_limpo)
+        else:
+            posicoes = buscar_cpf(indice, termo_busca, parcial=True)
+        df_resultado = df.iloc[posicoes]
+        m["linhas"] = len(df_resultado)
 
     if df_resultado.empty:
         st.warning("Nenhum cliente encontrado com esse critério de busca.")
     else:
-        # garante chave e datas
-        df_resultado["CHAVE_CLIENTE"] = (
-            df_resultado["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO")
-            + " | "
-            + df_resultado["CPF_CLIENTE_BASE"].fillna("")
-        )
-        df_resultado["DIA"] = pd.to_datetime(df_resultado["DIA"], errors="coerce")
+        # Histórico por cliente pré-calculado (1x por versão da planilha)
+        historico = historico_clientes(("11_Clientes_Aprovados", versao), df)
 
         # chaves que estão aprovadas dentro do filtro atual
-        df_filtrado["CHAVE_CLIENTE"] = (
-            df_filtrado["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO")
-            + " | "
-            + df_filtrado["CPF_CLIENTE_BASE"].fillna("")
-        )
+        df_filtrado = com_colunas(df_filtrado, CHAVE_CLIENTE=chave_cliente(df_filtrado))
         chaves_aprovados = set(df_filtrado["CHAVE_CLIENTE"].unique())
 
-        df_resultado_ordenado = df_resultado.sort_values(
-            by=["CHAVE_CLIENTE", "DIA"]
-        ).copy()
-
-        def conta_analises(s):
-            return s.isin(["EM ANÁLISE", "REANÁLISE"]).sum()
-
-        def conta_aprovacoes(s):
-            return (s == "APROVADO").sum()
-
-        def conta_vendas(s):
-            return s.isin(["VENDA GERADA", "VENDA INFORMADA"]).sum()
-
-        resumo = (
-            df_resultado_ordenado.groupby("CHAVE_CLIENTE")
-            .agg(
-                NOME=("NOME_CLIENTE_BASE", "first"),
-                CPF=("CPF_CLIENTE_BASE", "first"),
-                ANALISES=("STATUS_BASE", conta_analises),
-                APROVACAOES=("STATUS_BASE", conta_aprovacoes),
-                VENDAS=("STATUS_BASE", conta_vendas),
-                VGV=("VGV", "sum"),
-                ULT_STATUS=("SITUACAO_ORIGINAL", "last"),
-                ULT_DATA=("DIA", "max"),
-            )
-            .reset_index()
-        )
-
-        resumo = resumo[resumo["CHAVE_CLIENTE"].isin(chaves_aprovados)].copy()
+        resumo = resumo_dos_clientes(
+            historico, set(chave_cliente(df_resultado)) & chaves_aprovados
+        ).rename(columns={"APROVACOES": "APROVACAOES"})
 
         if resumo.empty:
             st.warning(
@@ -414,12 +375,10 @@ if termo_busca.strip():
                 "VENDAS",
                 "VGV",
             ]
-            visao = resumo[visao_cols].copy()
+            visao = resumo[visao_cols]
 
-            visao["ULT_DATA"] = pd.to_datetime(
-                visao["ULT_DATA"], errors="coerce"
-            ).dt.strftime("%d/%m/%Y")
-            visao["VGV"] = visao["VGV"].apply(format_currency)
+            visao["ULT_DATA"] = data_br(visao["ULT_DATA"])
+            visao["VGV"] = moeda(visao["VGV"])
 
             visao = visao.rename(
                 columns={
@@ -444,46 +403,24 @@ if termo_busca.strip():
             # DETALHAMENTO POR CLIENTE
             st.markdown("### 📂 Detalhamento por cliente")
 
-            def observacao_e_numero(txt: str) -> bool:
-                if not txt:
-                    return False
-                t = (
-                    txt.upper()
-                    .replace("R$", "")
-                    .replace(".", "")
-                    .replace(",", "")
-                    .replace(" ", "")
-                )
-                return t.isdigit()
-
-            for _, row in resumo.sort_values(
-                ["VENDAS", "VGV"], ascending=False
-            ).iterrows():
-                chave = row["CHAVE_CLIENTE"]
-                df_cli = df_resultado_ordenado[
-                    df_resultado_ordenado["CHAVE_CLIENTE"] == chave
-                ].copy()
-
-                df_cli = df_cli.sort_values("DIA")
-                ultima_linha = df_cli.iloc[-1]
-
-                ult_constr = ultima_linha.get("CONSTRUTORA_BASE", "NÃO INFORMADO")
-                ult_empr = ultima_linha.get("EMPREENDIMENTO_BASE", "NÃO INFORMADO")
-                ult_corretor = ultima_linha.get("CORRETOR", "NÃO INFORMADO")
-                ult_status_original = ultima_linha.get(
-                    "SITUACAO_ORIGINAL", row["ULT_STATUS"]
-                )
-
-                obs_validas = [
-                    obs
-                    for obs in df_cli["OBSERVACOES_RAW"].fillna("")
-                    if obs and not observacao_e_numero(obs)
-                ]
-                ultima_obs = obs_validas[-1] if obs_validas else ""
-
-                analises_em = (df_cli["STATUS_BASE"] == "EM ANÁLISE").sum()
-                reanalises = (df_cli["STATUS_BASE"] == "REANÁLISE").sum()
-                analises_total = analises_em + reanalises
+            cards = resumo.sort_values(["VENDAS", "VGV"], ascending=False)
+            inicio, fim = paginar(
+                len(cards),
+                "11_cards",
+                assinatura=(versao, tipo_busca, termo_limpo, len(cards)),
+            )
+
+            for _, row in cards.iloc[inicio:fim].iterrows():
+                # campos da última movimentação já vêm prontos do histórico
+                ult_constr = row["ULT_CONSTRUTORA"]
+                ult_empr = row["ULT_EMPREENDIMENTO"]
+                ult_corretor = row["ULT_CORRETOR"]
+                ult_status_original = row["ULT_STATUS"]
+                ultima_obs = row["ULT_OBS"]
+
+                analises_em = row["ANALISES_EM"]
+                reanalises = row["REANALISES"]
+                analises_total = row["ANALISES"]
 
                 st.markdown("---")
                 st.markdown(f"##### 👤 {row['NOME']}")
@@ -525,7 +462,7 @@ if termo_busca.strip():
                 m4, m5, m6 = st.columns(3)
                 m4.metric("Aprovações", int(row["APROVACAOES"]))
                 m5.metric("Vendas", int(row["VENDAS"]))
-                m6.metric("VGV total", format_currency(row["VGV"]))
+                m6.metric("VGV total", moeda_valor(row["VGV"]))
 
 # ---------------------------------------------------------
 # LINHA DE SEPARAÇÃO
@@ -548,7 +485,7 @@ colunas_preferidas = [
 ]
 colunas_existentes = [c for c in colunas_preferidas if c in df_filtrado.columns]
 
-df_tabela = df_filtrado[colunas_existentes].copy()
+df_tabela = df_filtrado[colunas_existentes]
 
 if "DIA" in df_tabela.columns:
     df_tabela["DIA"] = pd.to_datetime(
@@ -574,3 +511,5 @@ st.dataframe(
     use_container_width=True,
     hide_index=True,
 )
+
+finalizar_medicao()
@@ -3,7 +3,6 @@ from pathlib import Path
 from datetime import timedelta
 
 import streamlit as st
-from streamlit_autorefresh import st_autorefresh
 import pandas as pd
 
 # =========================================================
@@ -14,7 +13,15 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
 from utils.bootstrap import iniciar_app
-from utils.data_loader import carregar_dados_planilha
+from utils.data_loader import carregar_dados_planilha, versao_planilha
+from utils.formatacao import moeda
+from utils.indicadores import ultima_linha_por_chave
+from utils.particoes import fatiar, indice_particoes
+from utils.versao_dados import atualizar_quando_mudar
+from utils.perf import finalizar_medicao, iniciar_medicao, medir
+from utils.visoes import com_colunas
+
+iniciar_medicao("12_Carteira_Clientes")
 
 # =========================================================
 # CONFIG
@@ -24,8 +31,8 @@ st.set_page_config(
     page_icon="📂",
     layout="wide"
 )
-# Auto refresh
-st_autorefresh(interval=30 * 1000, key="auto_refresh_carteira")
+# Auto refresh (só quando a planilha muda)
+atualizar_quando_mudar("auto_refresh_carteira", fontes=("planilha",))
 
 iniciar_app()
 
@@ -59,7 +66,7 @@ with col_title:
 # LOAD DATA (BLINDADO PARA DATA)
 # =========================================================
 @st.cache_data(ttl=60)
-def carregar():
+def carregar(versao: str):
     df = carregar_dados_planilha()
     df.columns = df.columns.str.upper().str.strip()
 
@@ -151,28 +158,34 @@ def carregar():
     return df
 
 
-df = carregar()
+versao = versao_planilha()
+df = carregar(versao)
+
+# partições CORRETOR/EQUIPE -> posições, montadas 1x por versão da planilha
+particoes = indice_particoes(("12_Carteira_Clientes", versao), df)
 
 # =========================================================
 # SIDEBAR — FILTROS DE EQUIPE / CORRETOR
 # =========================================================
 st.sidebar.title("Filtros 🔎")
 
-df_visivel = df.copy()
+df_visivel = df
 
 if perfil == "corretor":
-    df_visivel = df_visivel[df_visivel["CORRETOR"] == nome_corretor]
+    df_visivel = fatiar(df, particoes, CORRETOR=nome_corretor)
     st.sidebar.info(f"👤 Corretor: {nome_corretor}")
 else:
-    equipes = sorted([e for e in df_visivel["EQUIPE"].unique() if e])
+    equipes = sorted([e for e in particoes["EQUIPE"] if e])
     equipe_sel = st.sidebar.selectbox(
         "Equipe:",
         ["Todas"] + equipes,
         index=0
     )
 
+    filtros = {}
     if equipe_sel != "Todas":
-        df_visivel = df_visivel[df_visivel["EQUIPE"] == equipe_sel]
+        filtros["EQUIPE"] = equipe_sel
+        df_visivel = fatiar(df, particoes, **filtros)
 
     corretores = sorted([c for c in df_visivel["CORRETOR"].unique() if c])
     corretor_sel = st.sidebar.selectbox(
@@ -182,7 +195,8 @@ else:
     )
 
     if corretor_sel != "Todos":
-        df_visivel = df_visivel[df_visivel["CORRETOR"] == corretor_sel]
+        filtros["CORRETOR"] = corretor_sel
+        df_visivel = fatiar(df, particoes, **filtros)
 # ---------------------------------------------------------
 # SELETOR DE PERÍODO (TOPO — FORMATO BR)
 # ---------------------------------------------------------
@@ -215,15 +229,9 @@ df_visivel = df_visivel[
 # =========================================================
 # ÚLTIMA SITUAÇÃO POR CLIENTE
 # =========================================================
-def ultima_linha(grupo: pd.DataFrame) -> pd.Series:
-    return grupo.sort_values("DATA").iloc[-1]
-
-
-df_resumo = (
-    df_visivel.groupby(["CLIENTE", "CPF"], as_index=False)
-    .apply(ultima_linha)
-    .reset_index(drop=True)
-)
+# já no recorte do corretor/equipe e do período: ordena 1x e pega a última
+with medir("ultima_linha_por_cliente", linhas=len(df_visivel)):
+    df_resumo = ultima_linha_por_chave(df_visivel, ["CLIENTE", "CPF"], ordem="DATA")
 
 # =========================================================
 # FILTRO POR SITUAÇÃO
@@ -248,7 +256,7 @@ situacoes_sel = st.multiselect(
     default=situacoes_base
 )
 
-df_view = df_resumo.copy()
+df_view = df_resumo
 
 if situacoes_sel:
     df_view = df_view[df_view["SITUACAO"].isin(situacoes_sel)]
@@ -260,7 +268,7 @@ if df_view.empty:
 # =========================================================
 # DATA FORMATADA
 # =========================================================
-df_view["DATA_EXIBICAO"] = df_view["DATA"].dt.strftime("%d/%m/%Y")
+df_view = com_colunas(df_view, DATA_EXIBICAO=df_view["DATA"].dt.strftime("%d/%m/%Y"))
 
 # =========================================================
 # EXIBIÇÃO FINAL
@@ -269,8 +277,9 @@ st.markdown("---")
 st.markdown("## 📋 Carteira de Clientes")
 st.caption(f"Total de clientes exibidos: {len(df_view)}")
 
-df_view["VGV"] = df_view["VGV"].apply(
-    lambda x: f"R$ {x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+df_view = com_colunas(
+    df_view,
+    VGV=moeda(df_view["VGV"]),
 )
 
 st.dataframe(
@@ -302,3 +311,5 @@ st.dataframe(
     use_container_width=True,
     hide_index=True
 )
+
+finalizar_medicao()
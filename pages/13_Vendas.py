@@ -3,6 +3,13 @@ import pandas as pd
 import numpy as np
 import altair as alt
 from datetime import date, timedelta
+from utils.data_loader import baixar_planilha_csv, ler_planilha_csv
+from utils.filtros_cache import agregado_filtrado, filtro_normalizado, recorte_filtrado
+from utils.formatacao import moeda_valor
+from utils.perf import finalizar_medicao, iniciar_medicao
+
+iniciar_medicao("13_Vendas")
+
 if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
     st.stop()
@@ -34,14 +41,6 @@ with col_title:
         "evolução diária e mix por construtora/empreendimento, já com a regra do DESISTIU aplicada."
     )
 
-# ---------------------------------------------------------
-# LINK DA PLANILHA
-# ---------------------------------------------------------
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID_ANALISES = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_ANALISES}"
-
-
 def limpar_para_data(serie: pd.Series) -> pd.Series:
     dt = pd.to_datetime(serie, dayfirst=True, errors="coerce")
     return dt.dt.date
@@ -82,9 +81,10 @@ def mes_ano_ptbr_para_date(texto: str):
         return pd.NaT
 
 
-@st.cache_data(ttl=60)
-def carregar_dados() -> pd.DataFrame:
-    df = pd.read_csv(CSV_URL)
+@st.cache_data(max_entries=2, show_spinner=False)
+def carregar_dados(versao: str, _conteudo: bytes) -> pd.DataFrame:
+    # download compartilhado (utils.data_loader); recalcula só quando a versão muda
+    df = ler_planilha_csv(_conteudo)
 
     # Padroniza colunas
     df.columns = [c.strip().upper() for c in df.columns]
@@ -208,15 +208,6 @@ def carregar_dados() -> pd.DataFrame:
     return df
 
 
-def format_currency(valor: float) -> str:
-    return (
-        f"R$ {valor:,.2f}"
-        .replace(",", "X")
-        .replace(".", ",")
-        .replace("X", ".")
-    )
-
-
 def conta_aprovacoes(status_serie: pd.Series) -> int:
     if status_serie is None or status_serie.empty:
         return 0
@@ -241,7 +232,7 @@ def obter_vendas_unicas(
         status_vendas = ["VENDA GERADA", "VENDA INFORMADA"]
 
     s = df_scope["STATUS_BASE"].fillna("").astype(str).str.upper()
-    df_v = df_scope[s.isin(status_vendas)].copy()
+    df_v = df_scope[s.isin(status_vendas)]
     if df_v.empty:
         return df_v
 
@@ -264,14 +255,15 @@ def obter_vendas_unicas(
         return df_v
 
     df_v = df_v.sort_values("DIA")
-    df_ult = df_v.groupby("CHAVE_CLIENTE").tail(1).copy()
+    df_ult = df_v.groupby("CHAVE_CLIENTE").tail(1)
     return df_ult
 
 
 # ---------------------------------------------------------
 # CARREGA BASE
 # ---------------------------------------------------------
-df = carregar_dados()
+versao, conteudo = baixar_planilha_csv()
+df = carregar_dados(versao, conteudo)
 
 if df.empty:
     st.error("Não foi possível carregar dados da planilha de vendas.")
@@ -331,22 +323,18 @@ bases_selecionadas = st.sidebar.multiselect(
 if not bases_selecionadas:
     bases_selecionadas = opcoes_bases
 
-mask_db = df["DATA_BASE_LABEL"].isin(bases_selecionadas)
-df_periodo = df[mask_db].copy()
 # ---------------------------------------------------------
 # 🔒 TRAVA — CORRETOR VÊ APENAS OS PRÓPRIOS NÚMEROS
 # (MESMA LÓGICA DA PÁGINA FUNIL)
 # ---------------------------------------------------------
-if perfil == "corretor" and nome_usuario:
-    if "CORRETOR" in df_periodo.columns:
-        df_periodo = df_periodo[
-            df_periodo["CORRETOR"]
-            .astype(str)
-            .str.upper()
-            .str.strip()
-            == nome_usuario
-        ].copy()
+# CORRETOR já vem maiúsculo/sem espaços do carregar_dados
+escopo_corretor = nome_usuario if perfil == "corretor" and nome_usuario else None
+
+# recorte em cache compartilhado: (versão, filtro) iguais = mesmo objeto
+filtro_periodo = filtro_normalizado(bases=bases_selecionadas, corretor=escopo_corretor)
+df_periodo = recorte_filtrado("13_Vendas", versao, filtro_periodo, df)
 
+if escopo_corretor:
     # força selects e visão
     corretor_sel = nome_usuario
     equipe_sel = "Todas"
@@ -435,10 +423,8 @@ meta_vendas = st.sidebar.slider(
 )
 
 # Aplica filtros de equipe/corretor
-if equipe_sel != "Todas":
-    df_periodo = df_periodo[df_periodo["EQUIPE"] == equipe_sel]
-if corretor_sel != "Todos":
-    df_periodo = df_periodo[df_periodo["CORRETOR"] == corretor_sel]
+filtro = filtro_normalizado(bases=bases_selecionadas, equipe=equipe_sel, corretor=corretor_sel)
+df_periodo = recorte_filtrado("13_Vendas", versao, filtro, df)
 
 registros_filtrados = len(df_periodo)
 
@@ -472,22 +458,25 @@ st.caption(
 # ---------------------------------------------------------
 
 # Sempre pegamos as vendas únicas (GER + INF) aplicando regra DESISTIU global
-df_vendas_base = obter_vendas_unicas(
-    df_periodo,
-    status_vendas=["VENDA GERADA", "VENDA INFORMADA"],
-    status_final_map=status_final_por_cliente,
+df_vendas_base = agregado_filtrado(
+    "13_Vendas", versao, filtro, df, "vendas_unicas",
+    lambda recorte: obter_vendas_unicas(
+        recorte,
+        status_vendas=["VENDA GERADA", "VENDA INFORMADA"],
+        status_final_map=status_final_por_cliente,
+    ),
 )
 
 if df_vendas_base.empty:
-    df_vendas = df_vendas_base.copy()
+    df_vendas = df_vendas_base
 else:
     status_upper_base = df_vendas_base["STATUS_BASE"].fillna("").astype(str).str.upper()
     if opcao_tipo_venda == "Só VENDA GERADA":
-        df_vendas = df_vendas_base[status_upper_base == "VENDA GERADA"].copy()
+        df_vendas = df_vendas_base[status_upper_base == "VENDA GERADA"]
     elif opcao_tipo_venda == "Só VENDA INFORMADA":
-        df_vendas = df_vendas_base[status_upper_base == "VENDA INFORMADA"].copy()
+        df_vendas = df_vendas_base[status_upper_base == "VENDA INFORMADA"]
     else:
-        df_vendas = df_vendas_base.copy()
+        df_vendas = df_vendas_base
 
 qtd_vendas = len(df_vendas)
 vgv_total = df_vendas["VGV"].sum() if not df_vendas.empty else 0.0
@@ -518,7 +507,7 @@ if df_leads is not None and not df_leads.empty:
         mask_leads = (df_leads[col_data_lead] >= data_ini_mov) & (
             df_leads[col_data_lead] <= data_fim_mov
         )
-        df_leads_periodo = df_leads[mask_leads].copy()
+        df_leads_periodo = df_leads[mask_leads]
         total_leads_periodo = len(df_leads_periodo)
         if qtd_vendas > 0:
             leads_por_venda = total_leads_periodo / qtd_vendas
@@ -560,11 +549,11 @@ c1, c2, c3, c4, c5, c6 = st.columns(6)
 with c1:
     st.metric("Vendas no período", qtd_vendas)
 with c2:
-    st.metric("VGV Total", format_currency(vgv_total))
+    st.metric("VGV Total", moeda_valor(vgv_total))
 with c3:
     st.metric(
         "Ticket médio",
-        format_currency(ticket_medio) if ticket_medio > 0 else "R$ 0,00",
+        moeda_valor(ticket_medio) if ticket_medio > 0 else "R$ 0,00",
     )
 with c4:
     st.metric("Meta de vendas (qtde)", meta_vendas)
@@ -723,7 +712,7 @@ else:
 st.markdown("---")
 st.markdown("## 📋 Base de vendas detalhada")
 
-df_tab = df_vendas.copy()
+df_tab = df_vendas
 
 if df_tab.empty:
     st.info("Não há vendas para exibir.")
@@ -740,7 +729,7 @@ else:
         "VGV",
     ]
     col_existentes = [c for c in colunas_preferidas if c in df_tab.columns]
-    df_tab = df_tab[col_existentes].copy()
+    df_tab = df_tab[col_existentes]
 
     df_tab["Data"] = pd.to_datetime(df_tab["DIA"], errors="coerce").dt.strftime("%d/%m/%Y")
     df_tab = df_tab.drop(columns=["DIA"], errors="ignore")
@@ -767,3 +756,5 @@ else:
         use_container_width=True,
         hide_index=True,
     )
+
+finalizar_medicao()
@@ -2,7 +2,22 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta, date
-from fpdf import FPDF
+from utils.casamento_crm import nomes_canonicos
+from utils.data_loader import baixar_planilha_csv, ler_planilha_csv
+from utils.filtros_cache import agregado_filtrado, filtro_normalizado, recorte_filtrado
+from utils.formatacao import data_br, data_br_valor, inteiro, moeda, moeda_valor
+from utils.pdf_leads import exportar_pdf_leads
+from utils.perf import cache_medido, finalizar_medicao, iniciar_medicao
+from utils.presenca import (
+    dias_sem_movimento,
+    faltas_por_corretor,
+    matriz_presenca,
+    ultimo_movimento,
+)
+from utils.tabelas import tabela_paginada
+from utils.visoes import visao
+
+iniciar_medicao("14_Corretores_Visao_Geral")
 
 
 if "logado" not in st.session_state or not st.session_state.logado:
@@ -43,65 +58,13 @@ def limpar_data(serie: pd.Series) -> pd.Series:
     return dt.dt.date
 
 
-def format_currency(valor: float) -> str:
-    if pd.isna(valor):
-        valor = 0
-    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-def limpar_texto_pdf(texto):
-    if pd.isna(texto):
-        return ""
-    return (
-        str(texto)
-        .encode("latin-1", errors="ignore")
-        .decode("latin-1")
-    )
-
-
-def gerar_pdf(df_pdf):
-    pdf = FPDF(orientation="P", unit="mm", format="A4")
-    pdf.set_auto_page_break(auto=True, margin=10)
-
-    linhas_por_pagina = 33
-    col_nome = 70
-    col_tel = 40
-    col_obs = 80
-
-    for i in range(0, len(df_pdf), linhas_por_pagina):
-        pdf.add_page()
-        pdf.set_font("Arial", "B", 10)
-
-        pdf.cell(col_nome, 8, "NOME", border=1)
-        pdf.cell(col_tel, 8, "TELEFONE", border=1)
-        pdf.cell(col_obs, 8, "INFORMAÇÕES", border=1)
-        pdf.ln()
-
-        pdf.set_font("Arial", size=9)
-
-        bloco = df_pdf.iloc[i:i + linhas_por_pagina]
-
-        for _, row in bloco.iterrows():
-            nome = limpar_texto_pdf(row["NOME"])
-            telefone = limpar_texto_pdf(row["TELEFONE"])
-
-            pdf.cell(col_nome, 8, nome[:40], border=1)
-            pdf.cell(col_tel, 8, telefone[:20], border=1)
-            pdf.cell(col_obs, 8, "", border=1)
-            pdf.ln()
-
-    return bytes(pdf.output(dest="S"))
-
-
 # ---------------------------------------------------------
 # BASE PLANILHA (MESMA LÓGICA DO APP PRINCIPAL)
 # ---------------------------------------------------------
-SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-GID_ANALISES = "1574157905"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID_ANALISES}"
-
-
-@st.cache_data(ttl=300)
-def carregar_planilha():
-    df = pd.read_csv(CSV_URL)
+@cache_medido("planilha_corretores", st.cache_data, max_entries=2, show_spinner=False)
+def carregar_planilha(versao: str, _conteudo: bytes):
+    # download compartilhado (utils.data_loader); recalcula só quando a versão muda
+    df = ler_planilha_csv(_conteudo)
     df.columns = [c.upper().strip() for c in df.columns]
 
     # DIA
@@ -191,7 +154,8 @@ def carregar_planilha():
     return df
 
 
-df_planilha = carregar_planilha()
+versao, conteudo = baixar_planilha_csv()
+df_planilha = carregar_planilha(versao, conteudo)
 if df_planilha.empty:
     st.error("Erro ao carregar a planilha de análises/vendas.")
     st.stop()
@@ -222,7 +186,7 @@ if df_leads_raw is None or df_leads_raw.empty:
     )
     df_leads = pd.DataFrame()
 else:
-    df_leads = df_leads_raw.copy()
+    df_leads = visao(df_leads_raw)
 
 lower_cols = {c.lower(): c for c in df_leads.columns}
 
@@ -247,12 +211,11 @@ col_corretor_crm = get_col(
     ]
 )
 if col_corretor_crm:
-    df_leads["CORRETOR_CRM"] = (
-        df_leads[col_corretor_crm]
-        .fillna("SEM CORRETOR")
-        .astype(str)
-        .str.upper()
-        .str.strip()
+    # mesma grafia da planilha quando o nome só difere em acento/espaços
+    # (chave de nome do casamento CRM ↔ planilha)
+    df_leads["CORRETOR_CRM"] = nomes_canonicos(
+        df_leads[col_corretor_crm].fillna("SEM CORRETOR"),
+        df_planilha["CORRETOR"].dropna().unique(),
     )
 else:
     df_leads["CORRETOR_CRM"] = "SEM CORRETOR"
@@ -345,34 +308,39 @@ corretores_ativos = sorted(
 # ---------------------------------------------------------
 # 🔒 TRAVA — CORRETOR VÊ APENAS OS PRÓPRIOS NÚMEROS
 # ---------------------------------------------------------
-if perfil == "corretor" and nome_usuario:
+# CORRETOR já vem maiúsculo/sem espaços do carregar_planilha
+escopo_corretor = nome_usuario if perfil == "corretor" and nome_usuario else None
+df_planilha_total = df_planilha
+
+if escopo_corretor:
     # força lista de corretores para apenas ele
     corretores_ativos = [nome_usuario]
 
-    # filtra planilha para o corretor logado
-    if "CORRETOR" in df_planilha.columns:
-        df_planilha = df_planilha[
-            df_planilha["CORRETOR"].astype(str).str.upper().str.strip() == nome_usuario
-        ].copy()
+    # filtra planilha para o corretor logado (recorte em cache compartilhado)
+    df_planilha = recorte_filtrado(
+        "14_Corretores_Visao_Geral", versao,
+        filtro_normalizado(corretor=escopo_corretor), df_planilha_total,
+    )
 
     # filtra CRM (se existir)
     if "CORRETOR_CRM" in df_leads.columns:
         df_leads = df_leads[
             df_leads["CORRETOR_CRM"].astype(str).str.upper().str.strip() == nome_usuario
-        ].copy()
+        ]
 
 # ---------------------------------------------------------
 # FILTROS DE PERÍODO – PLANILHA E CRM
 # ---------------------------------------------------------
-df_plan_periodo = df_planilha[
-    (df_planilha["DIA"] >= data_ini) & (df_planilha["DIA"] <= data_fim)
-].copy()
+filtro_plan = filtro_normalizado(periodo=(data_ini, data_fim), corretor=escopo_corretor)
+df_plan_periodo = recorte_filtrado(
+    "14_Corretores_Visao_Geral", versao, filtro_plan, df_planilha_total
+)
 
 if not df_leads.empty and "DATA_CAPTURA_DT" in df_leads.columns:
     df_leads_periodo = df_leads[
         (df_leads["DATA_CAPTURA_DT"].dt.date >= data_ini)
         & (df_leads["DATA_CAPTURA_DT"].dt.date <= data_fim)
-    ].copy()
+    ]
 else:
     df_leads_periodo = pd.DataFrame()
 # ---------------------------------------------------------
@@ -430,79 +398,77 @@ def conta_analises(serie_status):
     return ((s == "EM ANÁLISE") | (s == "REANÁLISE")).sum()
 
 
-df_analises = (
-    df_plan_periodo.groupby("CORRETOR", dropna=False)["STATUS_BASE"]
-    .agg(
-        ANALISES=conta_analises,
-        APROVACOES=lambda s: (s == "APROVADO").sum(),
-        REPROVACOES=lambda s: (s == "REPROVADO").sum(),
-    )
-    .reset_index()
-)
-
-# 🔥 Vendas (com regra DESISTIU global)
-df_vendas_ref = df_plan_periodo[
-    df_plan_periodo["STATUS_BASE"].isin(["VENDA GERADA", "VENDA INFORMADA"])
-].copy()
-
-if not df_vendas_ref.empty:
-    # garante CHAVE_CLIENTE para esse subconjunto
-    if "CHAVE_CLIENTE" not in df_vendas_ref.columns:
-        df_vendas_ref["CHAVE_CLIENTE"] = (
-            df_vendas_ref["NOME_CLIENTE_BASE"]
-            .fillna("NÃO INFORMADO")
-            .astype(str)
-            .str.upper()
-            .str.strip()
-            + " | "
-            + df_vendas_ref["CPF_CLIENTE_BASE"].fillna("").astype(str).str.strip()
+def kpis_planilha(df_plan_periodo, status_final_por_cliente, tipo_venda):
+    """Análises/aprovações/reprovações + vendas únicas e VGV por corretor."""
+    df_analises = (
+        df_plan_periodo.groupby("CORRETOR", dropna=False)["STATUS_BASE"]
+        .agg(
+            ANALISES=conta_analises,
+            APROVACOES=lambda s: (s == "APROVADO").sum(),
+            REPROVACOES=lambda s: (s == "REPROVADO").sum(),
         )
-
-    # junta STATUS_FINAL_CLIENTE (global)
-    df_vendas_ref = df_vendas_ref.merge(
-        status_final_por_cliente,
-        on="CHAVE_CLIENTE",
-        how="left",
+        .reset_index()
     )
 
-    # remove clientes cujo status final global é DESISTIU
-    df_vendas_ref = df_vendas_ref[df_vendas_ref["STATUS_FINAL_CLIENTE"] != "DESISTIU"]
+    # 🔥 Vendas (com regra DESISTIU global)
+    df_vendas_ref = df_plan_periodo[
+        df_plan_periodo["STATUS_BASE"].isin(["VENDA GERADA", "VENDA INFORMADA"])
+    ]
 
     if not df_vendas_ref.empty:
-        # pega só o último registro por cliente dentro do período
-        df_vendas_ref = df_vendas_ref.sort_values(["CHAVE_CLIENTE", "DIA"])
-        df_vendas_ult = df_vendas_ref.groupby("CHAVE_CLIENTE", as_index=False).tail(1)
+        # junta STATUS_FINAL_CLIENTE (global; CHAVE_CLIENTE vem do carregar_planilha)
+        df_vendas_ref = df_vendas_ref.merge(
+            status_final_por_cliente,
+            on="CHAVE_CLIENTE",
+            how="left",
+        )
 
-        if tipo_venda == "GERADAS + INFORMADAS":
-            mask_venda = df_vendas_ult["STATUS_BASE"].isin(
-                ["VENDA GERADA", "VENDA INFORMADA"]
-            )
-        elif tipo_venda == "Apenas GERADAS":
-            mask_venda = df_vendas_ult["STATUS_BASE"].eq("VENDA GERADA")
-        else:  # Apenas INFORMADAS
-            mask_venda = df_vendas_ult["STATUS_BASE"].eq("VENDA INFORMADA")
-
-        df_vendas_final = df_vendas_ult[mask_venda].copy()
-
-        df_vendas_kpi = (
-            df_vendas_final.groupby("CORRETOR", dropna=False)
-            .agg(
-                VENDAS=("CHAVE_CLIENTE", "nunique"),
-                VGV=("VGV", "sum"),
+        # remove clientes cujo status final global é DESISTIU
+        df_vendas_ref = df_vendas_ref[df_vendas_ref["STATUS_FINAL_CLIENTE"] != "DESISTIU"]
+
+        if not df_vendas_ref.empty:
+            # pega só o último registro por cliente dentro do período
+            df_vendas_ref = df_vendas_ref.sort_values(["CHAVE_CLIENTE", "DIA"])
+            df_vendas_ult = df_vendas_ref.groupby("CHAVE_CLIENTE", as_index=False).tail(1)
+
+            if tipo_venda == "GERADAS + INFORMADAS":
+                mask_venda = df_vendas_ult["STATUS_BASE"].isin(
+                    ["VENDA GERADA", "VENDA INFORMADA"]
+                )
+            elif tipo_venda == "Apenas GERADAS":
+                mask_venda = df_vendas_ult["STATUS_BASE"].eq("VENDA GERADA")
+            else:  # Apenas INFORMADAS
+                mask_venda = df_vendas_ult["STATUS_BASE"].eq("VENDA INFORMADA")
+
+            df_vendas_final = df_vendas_ult[mask_venda]
+
+            df_vendas_kpi = (
+                df_vendas_final.groupby("CORRETOR", dropna=False)
+                .agg(
+                    VENDAS=("CHAVE_CLIENTE", "nunique"),
+                    VGV=("VGV", "sum"),
+                )
+                .reset_index()
             )
-            .reset_index()
-        )
+        else:
+            df_vendas_kpi = pd.DataFrame(columns=["CORRETOR", "VENDAS", "VGV"])
     else:
         df_vendas_kpi = pd.DataFrame(columns=["CORRETOR", "VENDAS", "VGV"])
-else:
-    df_vendas_kpi = pd.DataFrame(columns=["CORRETOR", "VENDAS", "VGV"])
 
-df_kpis_plan = pd.merge(
-    df_analises,
-    df_vendas_kpi,
-    on="CORRETOR",
-    how="outer",
-).fillna(0)
+    return pd.merge(
+        df_analises,
+        df_vendas_kpi,
+        on="CORRETOR",
+        how="outer",
+    ).fillna(0)
+
+
+# KPIs em cache junto com o recorte (cópia: as colunas abaixo alteram o df)
+df_kpis_plan = agregado_filtrado(
+    "14_Corretores_Visao_Geral", versao, filtro_plan, df_planilha_total, "kpis_planilha",
+    lambda recorte, tipo: kpis_planilha(recorte, status_final_por_cliente, tipo),
+    tipo_venda,
+).copy()
 
 df_kpis_plan["VGV"] = df_kpis_plan["VGV"].astype(float)
 df_kpis_plan["VENDAS"] = df_kpis_plan["VENDAS"].astype(int)
@@ -529,21 +495,22 @@ df_kpis_plan["TAXA_VENDA_APROV"] = np.where(
     0,
 )
 
-st.dataframe(
-    df_kpis_plan[
-        [
-            "CORRETOR",
-            "ANALISES",
-            "APROVACOES",
-            "REPROVACOES",
-            "VENDAS",
-            "VGV",
-            "TICKET_MEDIO",
-            "TAXA_APROV_ANALISE",
-            "TAXA_VENDA_ANALISE",
-            "TAXA_VENDA_APROV",
-        ]
+tabela_paginada(
+    df_kpis_plan,
+    "kpis_planilha",
+    colunas=[
+        "CORRETOR",
+        "ANALISES",
+        "APROVACOES",
+        "REPROVACOES",
+        "VENDAS",
+        "VGV",
+        "TICKET_MEDIO",
+        "TAXA_APROV_ANALISE",
+        "TAXA_VENDA_ANALISE",
+        "TAXA_VENDA_APROV",
     ],
+    busca=["CORRETOR"],
     use_container_width=True,
     hide_index=True,
 )
@@ -571,150 +538,45 @@ st.subheader("4️⃣ Movimento e dias sem ação por corretor")
 
 hoje = date.today()
 
-# ---- Último movimento na planilha (sem groupby.max) ----
-tmp_plan = (
-    df_planilha[df_planilha["CORRETOR"].isin(corretores_ativos)]
-    .dropna(subset=["DIA"])
-    .copy()
-)
-tmp_plan = tmp_plan.sort_values(["CORRETOR", "DIA"])
-df_ult_plan = tmp_plan.drop_duplicates(subset=["CORRETOR"], keep="last")[
-    ["CORRETOR", "DIA"]
-].rename(columns={"DIA": "ULT_MOV_PLAN"})
-
-# ---- Último movimento no CRM (sem groupby.max) ----
-df_leads_val = df_leads[df_leads["CORRETOR_CRM"].isin(corretores_ativos)].copy()
-if not df_leads_val.empty and df_leads_val["ULT_ATIVIDADE_CRM"].notna().any():
-    tmp_crm = df_leads_val.dropna(subset=["ULT_ATIVIDADE_CRM"]).copy()
-    tmp_crm["DATA_ULT"] = tmp_crm["ULT_ATIVIDADE_CRM"].dt.date
-    tmp_crm = tmp_crm.sort_values(["CORRETOR_CRM", "DATA_ULT"])
-    df_ult_crm = tmp_crm.drop_duplicates(
-        subset=["CORRETOR_CRM"], keep="last"
-    )[
-        ["CORRETOR_CRM", "DATA_ULT"]
-    ].rename(
-        columns={
-            "CORRETOR_CRM": "CORRETOR",
-            "DATA_ULT": "ULT_MOV_CRM",
-        }
-    )
-else:
-    df_ult_crm = pd.DataFrame(columns=["CORRETOR", "ULT_MOV_CRM"])
-
-# junta últimos movimentos
-df_ult_mov = pd.merge(
-    pd.DataFrame({"CORRETOR": corretores_ativos}),
-    df_ult_plan,
-    on="CORRETOR",
-    how="left",
-)
+# ---- Último movimento (planilha + CRM), máximo por corretor em arrays ----
+df_leads_val = df_leads[df_leads["CORRETOR_CRM"].isin(corretores_ativos)]
 
-df_ult_mov = pd.merge(
-    df_ult_mov,
-    df_ult_crm,
-    on="CORRETOR",
-    how="left",
-)
+eventos_ult = [(df_planilha["CORRETOR"], df_planilha["DIA"])]
+if "ULT_ATIVIDADE_CRM" in df_leads_val.columns:
+    eventos_ult.append((df_leads_val["CORRETOR_CRM"], df_leads_val["ULT_ATIVIDADE_CRM"]))
 
+ultimo_mov = ultimo_movimento(corretores_ativos, eventos_ult)
 
-def pick_max(row):
-    datas = []
-    if pd.notna(row.get("ULT_MOV_PLAN")):
-        datas.append(row.get("ULT_MOV_PLAN"))
-    if pd.notna(row.get("ULT_MOV_CRM")):
-        datas.append(row.get("ULT_MOV_CRM"))
-    if not datas:
-        return pd.NaT
-    return max(datas)
-
-
-df_ult_mov["ULTIMO_MOVIMENTO"] = df_ult_mov.apply(pick_max, axis=1)
-df_ult_mov["DIAS_SEM_MOV"] = df_ult_mov["ULTIMO_MOVIMENTO"].apply(
-    lambda d: (hoje - d).days if pd.notna(d) else None
-)
-
-# ---- Presença / dias sem ação por dia ----
-df_pres_plan = (
-    df_plan_periodo[["CORRETOR", "DIA"]].dropna().drop_duplicates().copy()
-)
-df_pres_plan["PRESENTE"] = True
-
-dfs_crm_pres = []
+# ---- Presença / dias sem ação: matriz corretor × dia ----
+eventos_pres = [(df_plan_periodo["CORRETOR"], df_plan_periodo["DIA"])]
 for col in ["DATA_CAPTURA_DT", "DATA_COM_CORRETOR_DT", "DATA_ULT_INTERACAO_DT"]:
     if col in df_leads_val.columns:
-        tmp = df_leads_val[
-            (df_leads_val[col].notna())
-            & (df_leads_val[col].dt.date >= data_ini)
-            & (df_leads_val[col].dt.date <= data_fim)
-        ][["CORRETOR_CRM", col]].copy()
-        if not tmp.empty:
-            tmp["DIA"] = tmp[col].dt.date
-            tmp = tmp.rename(columns={"CORRETOR_CRM": "CORRETOR"})
-            dfs_crm_pres.append(tmp[["CORRETOR", "DIA"]])
-
-if dfs_crm_pres:
-    df_pres_crm = pd.concat(dfs_crm_pres, ignore_index=True).drop_duplicates()
-    df_pres_crm["PRESENTE"] = True
-else:
-    df_pres_crm = pd.DataFrame(columns=["CORRETOR", "DIA", "PRESENTE"])
-
-df_presenca = pd.concat(
-    [
-        df_pres_plan[["CORRETOR", "DIA", "PRESENTE"]],
-        df_pres_crm[["CORRETOR", "DIA", "PRESENTE"]],
-    ],
-    ignore_index=True,
-)
-
-df_presenca = df_presenca.drop_duplicates(subset=["CORRETOR", "DIA"])
-
-dias_range = pd.date_range(start=data_ini, end=data_fim, freq="D").date
-grid_index = pd.MultiIndex.from_product(
-    [corretores_ativos, dias_range], names=["CORRETOR", "DIA"]
-)
-df_grid = pd.DataFrame(index=grid_index).reset_index()
-
-df_grid = df_grid.merge(
-    df_presenca, on=["CORRETOR", "DIA"], how="left"
-)
-df_grid["PRESENTE"] = df_grid["PRESENTE"].fillna(False)
-df_grid["FALTA"] = ~df_grid["PRESENTE"]
-
-df_faltas = (
-    df_grid.groupby("CORRETOR", dropna=False)["FALTA"]
-    .sum()
-    .reset_index()
-    .rename(columns={"FALTA": "FALTAS"})
-)
-df_faltas["TOTAL_DIAS"] = len(dias_range)
-
-df_movimento = pd.merge(
-    df_ult_mov[["CORRETOR", "ULTIMO_MOVIMENTO", "DIAS_SEM_MOV"]],
-    df_faltas,
-    on="CORRETOR",
-    how="left",
-).fillna({"FALTAS": 0, "TOTAL_DIAS": 0})
-
-df_movimento["ULTIMO_MOVIMENTO_STR"] = df_movimento["ULTIMO_MOVIMENTO"].apply(
-    lambda d: d.strftime("%d/%m/%Y") if pd.notna(d) else "-"
+        eventos_pres.append((df_leads_val["CORRETOR_CRM"], df_leads_val[col]))
+
+presenca = matriz_presenca(corretores_ativos, data_ini, data_fim, eventos_pres)
+
+df_movimento = pd.DataFrame(
+    {
+        "CORRETOR": corretores_ativos,
+        "ULTIMO_MOVIMENTO": ultimo_mov.array,
+        "DIAS_SEM_MOV": dias_sem_movimento(ultimo_mov, hoje).array,
+        "FALTAS": faltas_por_corretor(presenca),
+        "TOTAL_DIAS": len(presenca["dias"]),
+    }
 )
 
-st.dataframe(
-    df_movimento[
-        [
-            "CORRETOR",
-            "ULTIMO_MOVIMENTO_STR",
-            "DIAS_SEM_MOV",
-            "FALTAS",
-            "TOTAL_DIAS",
-        ]
-    ].rename(
+tabela_paginada(
+    df_movimento.rename(
         columns={
-            "ULTIMO_MOVIMENTO_STR": "Último movimento",
+            "ULTIMO_MOVIMENTO": "Último movimento",
             "DIAS_SEM_MOV": "Dias sem movimento",
             "FALTAS": "Dias sem ação",
         }
     ),
+    "movimento",
+    colunas=["CORRETOR", "Último movimento", "Dias sem movimento", "Dias sem ação", "TOTAL_DIAS"],
+    busca=["CORRETOR"],
+    formatos={"Último movimento": data_br, "Dias sem movimento": inteiro},
     use_container_width=True,
     hide_index=True,
 )
@@ -735,8 +597,7 @@ df_exibe = pd.merge(
 
 df_exibe["LEADS"] = df_exibe["LEADS"].fillna(0).astype(int)
 
-df_exibe["Ticket médio"] = df_exibe["TICKET_MEDIO"].apply(format_currency)
-df_exibe["VGV"] = df_exibe["VGV"].apply(format_currency)
+df_exibe["Ticket médio"] = df_exibe["TICKET_MEDIO"]
 
 df_exibe["Taxa aprov./análises (%)"] = df_exibe["TAXA_APROV_ANALISE"].round(1)
 df_exibe["Taxa vendas/análises (%)"] = df_exibe["TAXA_VENDA_ANALISE"].round(1)
@@ -750,12 +611,8 @@ df_exibe["Presença (%)"] = np.where(
     np.nan,
 ).round(1)
 
-df_exibe["Último movimento"] = df_exibe["ULTIMO_MOVIMENTO"].apply(
-    lambda d: d.strftime("%d/%m/%Y") if pd.notna(d) else "-"
-)
-df_exibe["Dias sem movimento"] = df_exibe["DIAS_SEM_MOV"].apply(
-    lambda x: int(x) if pd.notna(x) else "-"
-)
+df_exibe["Último movimento"] = df_exibe["ULTIMO_MOVIMENTO"]
+df_exibe["Dias sem movimento"] = df_exibe["DIAS_SEM_MOV"]
 
 colunas_ordem = [
     "CORRETOR",
@@ -778,8 +635,19 @@ colunas_ordem = [
 colunas_ordem = [c for c in colunas_ordem if c in df_exibe.columns]
 
 st.subheader("5️⃣ Visão geral consolidada por corretor")
-st.dataframe(
-    df_exibe[colunas_ordem].sort_values("CORRETOR"),
+# colunas com valor bruto; R$, datas e "-" só nas linhas da página
+tabela_paginada(
+    df_exibe,
+    "consolidado",
+    colunas=colunas_ordem,
+    busca=["CORRETOR"],
+    formatos={
+        "VGV": moeda,
+        "Ticket médio": moeda,
+        "Último movimento": data_br,
+        "Dias sem movimento": inteiro,
+    },
+    ordem_padrao="CORRETOR",
     use_container_width=True,
     hide_index=True,
 )
@@ -813,81 +681,51 @@ if corretor_sel:
     c4.metric("Reprovações", int(linha.get("REPROVACOES", 0)))
 # ---------------------------------------------------------
 # PDF DE LEADS DO CORRETOR (mesmo período do filtro)
+# - usa df_leads_periodo (já filtrado por data_ini/data_fim)
+# - filtra por CORRETOR_CRM == corretor_sel
+# - PDF com 3 colunas: NOME | TELEFONE | INFORMAÇÕES (vazia)
+# - só é gerado no clique, com cache por recorte (utils.pdf_leads)
 # ---------------------------------------------------------
-df_leads_do_corretor = pd.DataFrame()
-
-if not df_leads_periodo.empty and "CORRETOR_CRM" in df_leads_periodo.columns:
-    df_leads_do_corretor = df_leads_periodo[
-        df_leads_periodo["CORRETOR_CRM"].astype(str).str.upper().str.strip() == corretor_sel
-    ].copy()
 if not corretor_sel:
-
     st.info("Selecione um corretor acima para gerar o PDF de leads.")
 if corretor_sel:
-    with c1:
-        if df_leads_do_corretor.empty:
-            st.caption("Sem leads do CRM no período.")
-        else:
-            df_pdf = pd.DataFrame({
-                "NOME": df_leads_do_corretor["NOME"].fillna("").astype(str).str.upper().str.strip(),
-                "TELEFONE": df_leads_do_corretor["TELEFONE"].fillna("").astype(str).str.strip(),
-                "INFORMAÇÕES": ""
-            })
-
-            pdf_bytes = gerar_pdf(df_pdf)
-
-            st.download_button(
-                label="📄 Gerar PDF de Leads",
-                data=pdf_bytes,
-                file_name=f"leads_{corretor_sel.replace(' ', '_')}.pdf",
-                mime="application/pdf",
-            )
-
- 
-    # ---------------------------------------------------------
-    # BOTÃO: GERAR PDF DOS LEADS (CRM) DO CORRETOR NO PERÍODO
-    # - usa df_leads_periodo (já filtrado por data_ini/data_fim)
-    # - filtra por CORRETOR_CRM == corretor_sel
-    # - PDF com 3 colunas: NOME | TELEFONE | INFORMAÇÕES (vazia)
-    # ---------------------------------------------------------
     df_leads_do_corretor = pd.DataFrame()
     if "CORRETOR_CRM" in df_leads_periodo.columns and not df_leads_periodo.empty:
         df_leads_do_corretor = df_leads_periodo[
             df_leads_periodo["CORRETOR_CRM"].astype(str).str.upper().str.strip() == corretor_sel
-        ].copy()
+        ]
 
     # tenta achar colunas de nome e telefone no df_leads (sem achismo: só varredura por nomes comuns)
     col_nome_lead = get_col(["nome", "nome_lead", "nome_cliente", "cliente", "lead"])
     col_tel_lead = get_col(["telefone", "celular", "fone", "whatsapp", "phone"])
 
+    def montar_pdf_corretor():
+        return pd.DataFrame({
+            "NOME": df_leads_do_corretor[col_nome_lead].fillna("").astype(str).str.upper().str.strip(),
+            "TELEFONE": df_leads_do_corretor[col_tel_lead].fillna("").astype(str).str.strip(),
+        })
+
     with c1:
         if df_leads_do_corretor.empty:
             st.caption("Sem leads do CRM no período para gerar PDF.")
         elif not col_nome_lead or not col_tel_lead:
             st.caption("Não encontrei colunas de NOME/TELEFONE no retorno do CRM.")
         else:
-            df_pdf = pd.DataFrame({
-                "NOME": df_leads_do_corretor[col_nome_lead].fillna("").astype(str).str.upper().str.strip(),
-                "TELEFONE": df_leads_do_corretor[col_tel_lead].fillna("").astype(str).str.strip(),
-                "INFORMAÇÕES": ""
-            })
-
-            titulo_pdf = f"LEADS - {corretor_sel} ({data_ini.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')})"
-            pdf_buffer = gerar_pdf_leads_tabela(df_pdf, titulo_pdf)
-
-            st.download_button(
-                "Gerar PDF de Leads",
-                data=pdf_buffer,
-                file_name=f"leads_{corretor_sel.replace(' ', '_')}_{data_ini.strftime('%d%m%Y')}_{data_fim.strftime('%d%m%Y')}.pdf",
-                mime="application/pdf",
+            exportar_pdf_leads(
+                "leads_corretor",
+                (corretor_sel, data_ini, data_fim),
+                montar_pdf_corretor,
+                f"leads_{corretor_sel.replace(' ', '_')}_{data_ini.strftime('%d%m%Y')}_{data_fim.strftime('%d%m%Y')}.pdf",
+                titulo=f"LEADS - {corretor_sel} ({data_ini.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')})",
+                rotulo="📄 Gerar PDF de Leads",
             )
 
     c5, c6, c7 = st.columns(3)
     c5.metric("Vendas", int(linha.get("VENDAS", 0)))
-    c6.metric("VGV", format_currency(linha.get("VGV_RAW", 0)))
+    c6.metric("VGV", moeda_valor(linha.get("VGV", 0)))
     c7.metric(
         "Ticket médio (R$)",
-        format_currency(linha.get("TICKET_MEDIO", 0)),
+        moeda_valor(linha.get("TICKET_MEDIO", 0)),
     )
 
     c8, c9, c10 = st.columns(3)
@@ -905,7 +743,7 @@ if corretor_sel:
     )
 
     c11, c12, c13 = st.columns(3)
-    c11.metric("Último movimento", linha.get("Último movimento", "-"))
+    c11.metric("Último movimento", data_br_valor(linha.get("ULTIMO_MOVIMENTO")))
     dias_sem = linha.get("DIAS_SEM_MOV", np.nan)
     c12.metric(
         "Dias sem movimento",
@@ -921,3 +759,5 @@ if corretor_sel:
         "e qualquer atividade no CRM (captura, primeiro contato ou última interação). "
         "Se em um dia não houve nenhuma dessas ações, o dia conta como **dia sem ação**."
     )
+
+finalizar_medicao()
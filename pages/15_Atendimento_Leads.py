@@ -2,6 +2,13 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from utils.formatacao import data_hora_br, duracao_min, duracao_min_valor
+from utils.perf import finalizar_medicao, iniciar_medicao
+from utils.tabelas import tabela_paginada
+from utils.visoes import visao
+
+iniciar_medicao("15_Atendimento_Leads")
+
 if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
     st.stop()
@@ -33,7 +40,7 @@ if "df_leads" not in st.session_state or st.session_state["df_leads"] is None:
     st.error("Nenhum dado carregado. Volte para a tela inicial.")
     st.stop()
 
-df_raw = st.session_state["df_leads"].copy()
+df_raw = st.session_state["df_leads"]
 
 # ---------------------------------------------------------
 # FUNÇÃO DE BUSCA INTELIGENTE DE COLUNAS
@@ -50,7 +57,8 @@ def get_col(possiveis_nomes):
 # ---------------------------------------------------------
 # NORMALIZAÇÃO DAS COLUNAS
 # ---------------------------------------------------------
-df = df_raw.copy()
+# visão própria: as colunas normalizadas não vão para o df_leads da sessão
+df = visao(df_raw)
 
 # Nome lead
 col_nome_lead = get_col(["nome_pessoa", "nome", "lead"])
@@ -112,13 +120,27 @@ df["TEMPO_INTERACOES_MIN"] = (
     (df["DATA_ULT_INTERACAO_DT"] - df["DATA_COM_CORRETOR_DT"]).dt.total_seconds() / 60
 )
 
-def fmt_dt(dt):
-    return "" if pd.isna(dt) else dt.strftime("%d/%m/%Y %H:%M")
-
-def fmt_min(x):
-    if pd.isna(x): return "-"
-    x = int(x)
-    return f"{x//60}h {x%60}min" if x >= 60 else f"{x} min"
+# datas e tempos ficam brutos nas tabelas (ordenam pelo valor); o texto
+# "dd/mm/aaaa HH:MM" / "Xh Ymin" é montado só para as linhas da página
+COLUNAS_EXIBICAO = {
+    "DATA_CAPTURA_DT": "Captura",
+    "DATA_COM_CORRETOR_DT": "1º contato",
+    "DATA_ULT_INTERACAO_DT": "Última interação",
+    "TEMPO_ATEND_MIN": "Tempo atendimento",
+    "TM_ATEND_MIN": "Tempo atendimento",
+    "TM_INTERACOES_MIN": "Tempo interações",
+}
+FORMATOS = {
+    "Captura": data_hora_br,
+    "1º contato": data_hora_br,
+    "Última interação": data_hora_br,
+    "Tempo atendimento": duracao_min,
+    "Tempo interações": duracao_min,
+}
+
+
+def formatos_de(colunas):
+    return {c: FORMATOS[c] for c in colunas if c in FORMATOS}
 
 # ---------------------------------------------------------
 # FILTROS
@@ -132,7 +154,7 @@ data_ini = st.sidebar.date_input("Data inicial", value=data_max.date() - timedel
 data_fim = st.sidebar.date_input("Data final", value=data_max.date())
 
 mask = (df["DATA_CAPTURA_DT"].dt.date >= data_ini) & (df["DATA_CAPTURA_DT"].dt.date <= data_fim)
-df_periodo = df[mask].copy()
+df_periodo = df[mask]
 
 # filtro corretor
 corretores = sorted(df_periodo["Corretor responsável"].unique().tolist())
@@ -168,7 +190,7 @@ c1.metric("Leads no período", leads)
 c2.metric("Atendidos", atendidos)
 c3.metric("Não atendidos", nao_atendidos)
 c4.metric("Perdidos", perdidos)
-c5.metric("Tempo médio atendimento", fmt_min(tempo_med) if not pd.isna(tempo_med) else "-")
+c5.metric("Tempo médio atendimento", duracao_min_valor(tempo_med))
 c6.metric("Leads novos", qtd_novos)
 c7.metric("% até 15 min", f"{pct_15:.1f}%")
 
@@ -179,9 +201,14 @@ st.markdown("### 📥 Leads novos (não atendidos + não perdidos)")
 if qtd_novos == 0:
     st.info("Nenhum lead novo encontrado.")
 else:
-    df_temp = df_novos.copy()
-    df_temp["Captura"] = df_temp["DATA_CAPTURA_DT"].apply(fmt_dt)
-    st.dataframe(df_temp[["NOME_LEAD", "TELEFONE_LEAD", "Corretor responsável", "Captura"]])
+    cols = ["NOME_LEAD", "TELEFONE_LEAD", "Corretor responsável", "Captura"]
+    tabela_paginada(
+        df_novos.rename(columns=COLUNAS_EXIBICAO),
+        "leads_novos",
+        colunas=cols,
+        busca=["NOME_LEAD", "TELEFONE_LEAD", "Corretor responsável"],
+        formatos=formatos_de(cols),
+    )
 
 # ---------------------------------------------------------
 # RESUMO POR CORRETOR
@@ -195,12 +222,14 @@ agr = df_periodo.groupby("Corretor responsável").agg(
     TM_INTERACOES_MIN=("TEMPO_INTERACOES_MIN", "mean")
 ).reset_index()
 
-agr["Tempo atendimento"] = agr["TM_ATEND_MIN"].apply(fmt_min)
-agr["Tempo interações"] = agr["TM_INTERACOES_MIN"].apply(fmt_min)
-
-st.dataframe(
-    agr[["Corretor responsável", "LEADS", "ATENDIDOS", "Tempo atendimento", "Tempo interações"]],
-    use_container_width=True
+cols = ["Corretor responsável", "LEADS", "ATENDIDOS", "Tempo atendimento", "Tempo interações"]
+tabela_paginada(
+    agr.rename(columns=COLUNAS_EXIBICAO),
+    "resumo_corretor",
+    colunas=cols,
+    busca=["Corretor responsável"],
+    formatos=formatos_de(cols),
+    use_container_width=True,
 )
 
 # ---------------------------------------------------------
@@ -212,26 +241,35 @@ aba1, aba2, aba3 = st.tabs(["Atendidos", "Não atendidos", "Apenas 1 contato"])
 
 # --- Atendidos
 with aba1:
-    df_at = df_periodo[df_periodo["ATENDIDO"] & (~df_periodo["PERDIDO"])].copy()
+    df_at = df_periodo[df_periodo["ATENDIDO"] & (~df_periodo["PERDIDO"])]
     if df_at.empty:
         st.info("Nenhum lead atendido.")
     else:
-        df_at["Captura"] = df_at["DATA_CAPTURA_DT"].apply(fmt_dt)
-        df_at["1º contato"] = df_at["DATA_COM_CORRETOR_DT"].apply(fmt_dt)
-        df_at["Última interação"] = df_at["DATA_ULT_INTERACAO_DT"].apply(fmt_dt)
-        df_at["Tempo atendimento"] = df_at["TEMPO_ATEND_MIN"].apply(fmt_min)
-
         cols = ["NOME_LEAD", "TELEFONE_LEAD", "Corretor responsável", "Captura", "1º contato", "Última interação", "Tempo atendimento"]
-        st.dataframe(df_at[cols], use_container_width=True)
+        tabela_paginada(
+            df_at.rename(columns=COLUNAS_EXIBICAO),
+            "leads_atendidos",
+            colunas=cols,
+            busca=["NOME_LEAD", "TELEFONE_LEAD", "Corretor responsável"],
+            formatos=formatos_de(cols),
+            use_container_width=True,
+        )
 
 # --- Não atendidos
 with aba2:
-    df_na = df_periodo[(~df_periodo["ATENDIDO"]) & (~df_periodo["PERDIDO"])].copy()
+    df_na = df_periodo[(~df_periodo["ATENDIDO"]) & (~df_periodo["PERDIDO"])]
     if df_na.empty:
         st.info("Nenhum lead não atendido.")
     else:
-        df_na["Captura"] = df_na["DATA_CAPTURA_DT"].apply(fmt_dt)
-        st.dataframe(df_na[["NOME_LEAD", "TELEFONE_LEAD", "Corretor responsável", "Captura"]], use_container_width=True)
+        cols = ["NOME_LEAD", "TELEFONE_LEAD", "Corretor responsável", "Captura"]
+        tabela_paginada(
+            df_na.rename(columns=COLUNAS_EXIBICAO),
+            "leads_nao_atendidos",
+            colunas=cols,
+            busca=["NOME_LEAD", "TELEFONE_LEAD", "Corretor responsável"],
+            formatos=formatos_de(cols),
+            use_container_width=True,
+        )
 
 # --- Apenas 1 contato
 with aba3:
@@ -239,11 +277,19 @@ with aba3:
         (df_periodo["ATENDIDO"]) &
         (df_periodo["DATA_ULT_INTERACAO_DT"].isna()) &
         (~df_periodo["PERDIDO"])
-    ].copy()
+    ]
 
     if df_1.empty:
         st.info("Nenhum lead com apenas 1 contato.")
     else:
-        df_1["Captura"] = df_1["DATA_CAPTURA_DT"].apply(fmt_dt)
-        df_1["1º contato"] = df_1["DATA_COM_CORRETOR_DT"].apply(fmt_dt)
-        st.dataframe(df_1[["NOME_LEAD", "TELEFONE_LEAD", "Corretor responsável", "Captura", "1º contato"]], use_container_width=True)
+        cols = ["NOME_LEAD", "TELEFONE_LEAD", "Corretor responsável", "Captura", "1º contato"]
+        tabela_paginada(
+            df_1.rename(columns=COLUNAS_EXIBICAO),
+            "leads_1_contato",
+            colunas=cols,
+            busca=["NOME_LEAD", "TELEFONE_LEAD", "Corretor responsável"],
+            formatos=formatos_de(cols),
+            use_container_width=True,
+        )
+
+finalizar_medicao()
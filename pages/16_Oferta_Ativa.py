@@ -3,7 +3,6 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import requests
-from fpdf import FPDF
 if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
     st.stop()
@@ -15,6 +14,12 @@ if st.session_state.get("perfil") == "corretor":
     st.stop()
 
 from utils.supremo_config import TOKEN_SUPREMO
+from utils.oferta_ativa import elegiveis, recorte_oferta
+from utils.pdf_leads import exportar_pdf_leads, exportar_zip_por_corretor
+from utils.perf import cache_medido, finalizar_medicao, iniciar_medicao
+from utils.tabelas import tabela_paginada
+
+iniciar_medicao("16_Oferta_Ativa")
 
 # ---------------------------------------------------------
 # CONFIGURAÇÃO DA PÁGINA
@@ -31,7 +36,7 @@ st.caption("Base limpa de leads do CRM, pronta para contato ativo.")
 # ---------------------------------------------------------
 # FUNÇÃO – BUSCAR LEADS NO SUPREMO CRM
 # ---------------------------------------------------------
-@st.cache_data(ttl=1800)
+@cache_medido("leads_oferta", st.cache_data, ttl=1800)
 def carregar_leads_oferta(limit=3000, max_pages=200):
     url = "https://api.supremocrm.com.br/v1/leads"
     headers = {"Authorization": f"Bearer {TOKEN_SUPREMO}"}
@@ -72,25 +77,9 @@ def carregar_leads_oferta(limit=3000, max_pages=200):
     df = df.dropna(subset=["DATA_CAPTURA"])
 
     # -----------------------------------------------------
-    # REGRAS DE NEGÓCIO – OFERTA ATIVA
+    # REGRAS DE NEGÓCIO – OFERTA ATIVA (utils.oferta_ativa)
     # -----------------------------------------------------
-    origem_upper = df["ORIGEM"]
-
-    mask_excluir_origem = (
-        origem_upper.str.contains("CARTEIRA", na=False)
-        | origem_upper.str.contains("INDICA", na=False)
-        | origem_upper.str.contains("IMPULSIONAMENTO CORRETOR", na=False)
-    )
-
-    df = df[~mask_excluir_origem]
-
-    palavras_finalizacao = ["VENDA", "COMPROU", "CLIENTE", "FINALIZ", "CONCLU"]
-
-    for termo in palavras_finalizacao:
-        df = df[
-            ~df["ORIGEM"].str.contains(termo, na=False)
-            & ~df["CAMPANHA"].str.contains(termo, na=False)
-        ]
+    df = elegiveis(df)
 
     return df.reset_index(drop=True)
 
@@ -122,16 +111,13 @@ data_fim = st.sidebar.date_input("Data final", hoje)
 if data_ini > data_fim:
     data_ini, data_fim = data_fim, data_ini
 
-df = df[
-    (df["DATA_CAPTURA"].dt.date >= data_ini)
-    & (df["DATA_CAPTURA"].dt.date <= data_fim)
-]
+df = recorte_oferta(df, data_ini, data_fim)
 
+# lista de corretores vem do período; o recorte final aplica a mesma regra com o corretor
 corretores = sorted(df["CORRETOR"].dropna().unique())
 corretor_sel = st.sidebar.selectbox("Corretor", ["Todos"] + corretores)
 
-if corretor_sel != "Todos":
-    df = df[df["CORRETOR"] == corretor_sel]
+df = recorte_oferta(df, data_ini, data_fim, corretor=corretor_sel)
 
 if df.empty:
     st.warning("Nenhum lead para os filtros selecionados.")
@@ -153,66 +139,36 @@ c3.metric("Período", f"{data_ini} → {data_fim}")
 st.divider()
 st.subheader("📋 Leads para contato")
 
-tabela = df[["NOME", "TELEFONE", "ORIGEM", "CAMPANHA"]].copy()
-st.dataframe(tabela, use_container_width=True)
+# busca/ordenação no servidor; o navegador recebe só a página visível
+tabela_paginada(
+    df,
+    "leads_oferta",
+    colunas=["NOME", "TELEFONE", "ORIGEM", "CAMPANHA"],
+    busca=["NOME", "TELEFONE"],
+    use_container_width=True,
+)
 
 # ---------------------------------------------------------
-# PDF
+# PDF (só gera quando pedido; bytes em cache por recorte)
 # ---------------------------------------------------------
-def limpar_texto_pdf(texto):
-    if pd.isna(texto):
-        return ""
-    return (
-        str(texto)
-        .encode("latin-1", errors="ignore")
-        .decode("latin-1")
-    )
-
-def gerar_pdf(df_pdf):
-    pdf = FPDF(orientation="P", unit="mm", format="A4")
-    pdf.set_auto_page_break(auto=True, margin=10)
-
-    # 🔧 AJUSTE AQUI
-    linhas_por_pagina = 33  # máximo 33 linhas por página
-
-    col_nome = 70
-    col_tel = 40
-    col_obs = 80
-
-    for i in range(0, len(df_pdf), linhas_por_pagina):
-        pdf.add_page()
-        pdf.set_font("Arial", "B", 10)
-
-        pdf.cell(col_nome, 8, "NOME", border=1)
-        pdf.cell(col_tel, 8, "TELEFONE", border=1)
-        pdf.cell(col_obs, 8, "INFORMAÇÕES", border=1)
-        pdf.ln()
-
-        pdf.set_font("Arial", size=9)
-
-        bloco = df_pdf.iloc[i:i + linhas_por_pagina]
-
-        for _, row in bloco.iterrows():
-            nome = limpar_texto_pdf(row["NOME"])
-            telefone = limpar_texto_pdf(row["TELEFONE"])
-
-            pdf.cell(col_nome, 8, nome[:40], border=1)
-            pdf.cell(col_tel, 8, telefone[:20], border=1)
-            pdf.cell(col_obs, 8, "", border=1)
-            pdf.ln()
-
-    return bytes(pdf.output(dest="S"))
-
-
-
-
 st.divider()
 
-if st.button("📄 Gerar PDF para Oferta Ativa"):
-    pdf_bytes = gerar_pdf(df[["NOME", "TELEFONE"]])
-    st.download_button(
-        "⬇️ Baixar PDF",
-        data=pdf_bytes,
-        file_name="oferta_ativa_leads.pdf",
-        mime="application/pdf",
+exportar_pdf_leads(
+    "oferta_ativa",
+    (usar_api, limite if usar_api else None, data_ini, data_fim, corretor_sel),
+    lambda: df,
+    "oferta_ativa_leads.pdf",
+    rotulo="📄 Gerar PDF para Oferta Ativa",
+)
+
+# lote para o gestor: um PDF por corretor do recorte, num ZIP
+if corretor_sel == "Todos" and df["CORRETOR"].nunique() > 1:
+    exportar_zip_por_corretor(
+        "oferta_ativa_corretores",
+        (usar_api, limite if usar_api else None, data_ini, data_fim),
+        lambda: df,
+        f"oferta_ativa_corretores_{data_ini.strftime('%d%m%Y')}_{data_fim.strftime('%d%m%Y')}.zip",
+        titulo=f"OFERTA ATIVA {data_ini.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}",
     )
+
+finalizar_medicao()
@@ -7,6 +7,11 @@ import pandas as pd
 import requests
 from datetime import date
 from utils.supremo_config import TOKEN_SUPREMO
+from utils.casamento_crm import construir_indice_crm, enriquecer, resolver
+from utils.perf import cache_medido, finalizar_medicao, iniciar_medicao, medir
+from utils.tabelas import tabela_paginada
+
+iniciar_medicao("17_Funil_de_leads")
 
 # =========================================================
 # BLOQUEIO DE LOGIN (IGUAL PÁGINA 03)
@@ -76,7 +81,7 @@ def parse_data_base(label):
 # =========================================================
 # CARGA PLANILHA
 # =========================================================
-@st.cache_data(ttl=300)
+@cache_medido("planilha_funil_leads", st.cache_data, ttl=300)
 def carregar_planilha():
     df = pd.read_csv(CSV_URL, dtype=str)
     df.columns = df.columns.str.upper().str.strip()
@@ -121,15 +126,17 @@ def carregar_planilha():
     return df[df["STATUS_BASE"] != ""]
 
 # =========================================================
-# CARGA CRM – ORIGEM (LIMITADO / SEGURO)
+# CARGA CRM – ÍNDICE DE LEADS (LIMITADO / SEGURO)
 # =========================================================
-@st.cache_data(ttl=1800)
-def carregar_crm():
+# O índice (e-mail/telefone/nome -> 1 lead) é montado 1x por carga e
+# compartilhado entre sessões (somente leitura).
+@cache_medido("crm_funil_leads", st.cache_resource, ttl=1800)
+def carregar_indice_crm():
     url = "https://api.supremocrm.com.br/v1/leads"
     headers = {"Authorization": f"Bearer {TOKEN_SUPREMO}"}
 
     dados, pagina = [], 1
-    LIMITE = 300
+    LIMITE = 3000
 
     try:
         while len(dados) < LIMITE:
@@ -150,23 +157,25 @@ def carregar_crm():
             pagina += 1
 
     except requests.exceptions.RequestException:
-        return pd.DataFrame(columns=["CLIENTE", "ORIGEM_CRM"])
-
-    dados = dados[:LIMITE]
-
-    df = pd.DataFrame(dados)
-    df["CLIENTE"] = df.get("nome_pessoa", "").astype(str).str.upper().str.strip()
-    df["ORIGEM_CRM"] = df.get("nome_origem", "").fillna("").astype(str).str.upper().str.strip()
+        dados = []
 
-    return df[["CLIENTE", "ORIGEM_CRM"]]
+    with medir("indice_crm (montagem)", linhas=len(dados)):
+        return construir_indice_crm(pd.DataFrame(dados[:LIMITE]))
 
 # =========================================================
 # DATASET FINAL
 # =========================================================
 df_hist = carregar_planilha()
-df_crm = carregar_crm()
+indice = carregar_indice_crm()
 
-df_hist = df_hist.merge(df_crm, on="CLIENTE", how="left")
+# cada linha da planilha -> no máximo 1 lead (nomes repetidos não multiplicam linhas)
+lead_do_cliente = resolver(
+    indice,
+    df_hist["CLIENTE"],
+    telefones=df_hist["TELEFONE"] if "TELEFONE" in df_hist.columns else None,
+)
+df_hist = enriquecer(df_hist, indice, {"ORIGEM_CRM": "nome_origem"}, lead_do_cliente)
+df_hist["ORIGEM_CRM"] = df_hist["ORIGEM_CRM"].fillna("").astype(str).str.upper().str.strip()
 
 df_hist["ORIGEM"] = df_hist["ORIGEM"].where(
     df_hist["ORIGEM"] != "",
@@ -182,7 +191,7 @@ df_hist["ORIGEM"] = df_hist["ORIGEM"].fillna("SEM CADASTRO NO CRM")
 st.sidebar.title("Filtros 🔎")
 
 modo = st.sidebar.radio("Modo de período", ["DIA", "DATA BASE"])
-df_f = df_hist.copy()
+df_f = df_hist
 
 if modo == "DIA":
     ini, fim = st.sidebar.date_input(
@@ -276,9 +285,14 @@ for _, row in dist.iterrows():
 st.divider()
 st.subheader("📋 Eventos do KPI Selecionado")
 
-st.dataframe(
-    df_kpi[
-        ["CLIENTE", "CORRETOR", "EQUIPE", "ORIGEM", "STATUS_BASE", "DATA"]
-    ].sort_values("DATA", ascending=False),
-    use_container_width=True
+tabela_paginada(
+    df_kpi,
+    "eventos_kpi",
+    colunas=["CLIENTE", "CORRETOR", "EQUIPE", "ORIGEM", "STATUS_BASE", "DATA"],
+    busca=["CLIENTE", "CORRETOR", "EQUIPE"],
+    ordem_padrao="DATA",
+    decrescente_padrao=True,
+    use_container_width=True,
 )
+
+finalizar_medicao()
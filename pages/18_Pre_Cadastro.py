@@ -10,12 +10,17 @@
 import streamlit as st
 import pandas as pd
 import requests
-import unicodedata
+import numpy as np
 from datetime import datetime, timedelta
 
-from streamlit_autorefresh import st_autorefresh
 from utils.supremo_config import TOKEN_SUPREMO
 from app_dashboard import carregar_dados_planilha
+from utils.casamento_crm import chave_nome
+from utils.versao_dados import atualizar_quando_mudar, versao_crm
+from utils.paginacao import paginar
+from utils.perf import finalizar_medicao, iniciar_medicao
+
+iniciar_medicao("18_Pre_Cadastro")
 
 # =========================================================
 # TRAVA DE LOGIN
@@ -39,9 +44,9 @@ st.set_page_config(
 st.title("📂 Pré-Cadastro – Análises Pendentes")
 
 # =========================================================
-# AUTO REFRESH (30s)
+# AUTO REFRESH (só quando CRM ou planilha mudam)
 # =========================================================
-st_autorefresh(interval=30 * 1000, key="auto_refresh_pre_cadastro_18")
+atualizar_quando_mudar("auto_refresh_pre_cadastro_18", fontes=("crm", "planilha"))
 
 # =========================================================
 # CONFIGURAÇÕES
@@ -53,21 +58,11 @@ SITUACAO_ALVO = "ANALISE PENDENTE"
 DIAS_JANELA_CRM = 7
 LIMITE_REANALISE = 60
 
-# =========================================================
-# FUNÇÕES AUXILIARES
-# =========================================================
-def normalizar(txt):
-    if pd.isna(txt):
-        return ""
-    txt = str(txt).strip().upper()
-    txt = unicodedata.normalize("NFKD", txt).encode("ASCII", "ignore").decode("ASCII")
-    return txt
-
 # =========================================================
 # CARGA CRM (ÚLTIMOS 7 DIAS)
 # =========================================================
 @st.cache_data(ttl=30)
-def carregar_leads_crm():
+def carregar_leads_crm(versao: str):
     dados = []
     pagina = 1
     data_limite = datetime.now() - timedelta(days=DIAS_JANELA_CRM)
@@ -104,7 +99,7 @@ def carregar_leads_crm():
 # =========================================================
 # LOAD DADOS
 # =========================================================
-df_leads = carregar_leads_crm()
+df_leads = carregar_leads_crm(versao_crm())
 df_plan = carregar_dados_planilha()
 
 if df_leads.empty:
@@ -114,11 +109,12 @@ if df_leads.empty:
 # =========================================================
 # NORMALIZA CHAVES
 # =========================================================
-df_leads["CLIENTE_KEY"] = df_leads["nome_pessoa"].apply(normalizar)
-df_leads["CORRETOR_KEY"] = df_leads["nome_corretor"].apply(normalizar)
+# mesma chave de nome do casamento CRM ↔ planilha (utils.casamento_crm)
+df_leads["CLIENTE_KEY"] = chave_nome(df_leads["nome_pessoa"])
+df_leads["CORRETOR_KEY"] = chave_nome(df_leads["nome_corretor"])
 
-df_plan["CLIENTE_KEY"] = df_plan["CLIENTE"].apply(normalizar)
-df_plan["CORRETOR_KEY"] = df_plan["CORRETOR"].apply(normalizar)
+df_plan["CLIENTE_KEY"] = chave_nome(df_plan["CLIENTE"])
+df_plan["CORRETOR_KEY"] = chave_nome(df_plan["CORRETOR"])
 
 # DATA DA ANÁLISE (COLUNA A – BR)
 df_plan["DATA"] = df_plan["DATA"].astype(str).str.strip()
@@ -131,28 +127,20 @@ df_plan["DATA"] = dt1.fillna(dt2)
 # =========================================================
 df = df_leads[
     df_leads["nome_situacao"].astype(str).str.upper() == SITUACAO_ALVO
-].copy()
+]
 
 # =========================================================
 # CLASSIFICAÇÃO NOVA x REANÁLISE
 # =========================================================
-def classificar_analise(row):
-    registros = df_plan[
-        (df_plan["CLIENTE_KEY"] == row["CLIENTE_KEY"]) &
-        (df_plan["CORRETOR_KEY"] == row["CORRETOR_KEY"])
-    ]
-
-    if registros.empty:
-        return "NOVA"
-
-    ultima_data = registros["DATA"].max()
-    if pd.isna(ultima_data):
-        return "NOVA"
-
-    dias = (pd.Timestamp.now().normalize() - ultima_data.normalize()).days
-    return "REANÁLISE" if dias <= LIMITE_REANALISE else "NOVA"
+# última análise de cada (cliente, corretor) na planilha: uma busca por
+# lead no índice, em vez de filtrar a planilha inteira a cada lead
+ultima_analise = df_plan.groupby(["CLIENTE_KEY", "CORRETOR_KEY"])["DATA"].max()
+ultima_do_lead = ultima_analise.reindex(
+    pd.MultiIndex.from_arrays([df["CLIENTE_KEY"], df["CORRETOR_KEY"]])
+)
+dias = (pd.Timestamp.now().normalize() - ultima_do_lead.dt.normalize()).dt.days
 
-df["TIPO_ANALISE"] = df.apply(classificar_analise, axis=1)
+df["TIPO_ANALISE"] = np.where(dias.to_numpy() <= LIMITE_REANALISE, "REANÁLISE", "NOVA")
 
 # =========================================================
 # ORDENAÇÃO FIFO
@@ -169,9 +157,12 @@ st.divider()
 # =========================================================
 # CARDS COM GLOW
 # =========================================================
+# só a página visível vira card (FIFO preservado entre as páginas)
+inicio, fim = paginar(len(df), "18_pre_cadastro", por_pagina=30, assinatura=len(df))
+
 cols = st.columns(3)
 
-for i, row in df.iterrows():
+for i, (_, row) in enumerate(df.iloc[inicio:fim].iterrows()):
     with cols[i % 3]:
 
         is_nova = row["TIPO_ANALISE"] == "NOVA"
@@ -210,3 +201,4 @@ for i, row in df.iterrows():
             unsafe_allow_html=True
         )
 
+finalizar_medicao()
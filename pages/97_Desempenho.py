@@ -0,0 +1,81 @@
+import streamlit as st
+
+from utils.perf import ETAPA_RERUN, limpar_medicoes, resumo_cache, resumo_etapas
+
+# =========================================================
+# TRAVA DE LOGIN (SOMENTE ADMIN)
+# =========================================================
+if "logado" not in st.session_state or not st.session_state.logado:
+    st.warning("🔒 Acesso restrito. Faça login para continuar.")
+    st.stop()
+
+if st.session_state.get("perfil") != "admin":
+    st.error("⛔ Acesso restrito ao administrador.")
+    st.stop()
+
+# =========================================================
+# CONFIG DA PÁGINA
+# =========================================================
+st.set_page_config(
+    page_title="Desempenho do Dashboard",
+    page_icon="⏱",
+    layout="wide"
+)
+
+st.title("⏱ Desempenho do Dashboard")
+st.caption(
+    "Tempos medidos no próprio servidor (janela móvel das últimas "
+    "execuções de cada etapa). Valores zeram quando o app reinicia."
+)
+
+df_etapas = resumo_etapas()
+df_cache = resumo_cache()
+
+if df_etapas.empty and df_cache.empty:
+    st.info("Nenhuma medição registrada ainda. Navegue pelas páginas e volte aqui.")
+    st.stop()
+
+# =========================================================
+# RERUN POR PÁGINA (P50 / P95)
+# =========================================================
+st.subheader("📄 Rerun completo por página")
+
+if not df_etapas.empty:
+    df_rerun = df_etapas[df_etapas["ETAPA"] == ETAPA_RERUN].drop(columns=["ETAPA", "LINHAS (últ.)"])
+    if df_rerun.empty:
+        st.caption("Ainda sem reruns completos registrados.")
+    else:
+        st.dataframe(
+            df_rerun.sort_values("P95 (ms)", ascending=False),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+# =========================================================
+# ETAPAS DE UMA PÁGINA
+# =========================================================
+st.subheader("🔬 Etapas por página")
+
+if not df_etapas.empty:
+    paginas = sorted(df_etapas["PÁGINA"].unique())
+    pagina_sel = st.selectbox("Página", paginas)
+
+    df_pag = df_etapas[
+        (df_etapas["PÁGINA"] == pagina_sel) & (df_etapas["ETAPA"] != ETAPA_RERUN)
+    ]
+    st.dataframe(df_pag.drop(columns=["PÁGINA"]), use_container_width=True, hide_index=True)
+
+# =========================================================
+# CACHE
+# =========================================================
+st.subheader("🗄️ Cache (hit / miss)")
+
+if df_cache.empty:
+    st.caption("Nenhum cache instrumentado foi chamado ainda.")
+else:
+    st.dataframe(df_cache, use_container_width=True, hide_index=True)
+
+st.markdown("---")
+if st.button("🧹 Zerar medições"):
+    limpar_medicoes()
+    st.rerun()
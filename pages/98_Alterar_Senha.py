@@ -1,8 +1,11 @@
 import streamlit as st
-import json
-from pathlib import Path
 import re
 
+from utils.auth_users import alterar_senha
+from utils.perf import finalizar_medicao, iniciar_medicao
+
+iniciar_medicao("98_Alterar_Senha")
+
 # =========================================================
 # BLOQUEIO SEM LOGIN
 # =========================================================
@@ -10,54 +13,6 @@ if "logado" not in st.session_state or not st.session_state.logado:
     st.warning("🔒 Acesso restrito. Faça login para continuar.")
     st.stop()
 
-# =========================================================
-# ARQUIVO DE USUÁRIOS
-# =========================================================
-CAMINHO_USERS = Path("users.json")
-
-def carregar_users():
-    if CAMINHO_USERS.exists():
-        with open(CAMINHO_USERS, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
-
-def salvar_users(users: dict):
-    with open(CAMINHO_USERS, "w", encoding="utf-8") as f:
-        json.dump(users, f, indent=2, ensure_ascii=False)
-
-# =========================================================
-# FUNÇÕES DE NEGÓCIO
-# =========================================================
-def validar_senha(usuario_login: str, senha_digitada: str) -> bool:
-    users = carregar_users()
-
-    usuario_login = usuario_login.strip()
-    senha_digitada = senha_digitada.strip()
-
-    if usuario_login not in users:
-        return False
-
-    return users[usuario_login]["senha"].strip() == senha_digitada
-
-
-def salvar_nova_senha(usuario_login: str, senha_atual: str, nova_senha: str):
-    users = carregar_users()
-
-    usuario_login = usuario_login.strip()
-    senha_atual = senha_atual.strip()
-    nova_senha = nova_senha.strip()
-
-    if usuario_login not in users:
-        return False, "Usuário não encontrado."
-
-    if not validar_senha(usuario_login, senha_atual):
-        return False, "Senha atual incorreta."
-
-    users[usuario_login]["senha"] = nova_senha
-    salvar_users(users)
-
-    return True, None
-
 # =========================================================
 # INTERFACE
 # =========================================================
@@ -112,7 +67,7 @@ if st.button("Salvar nova senha", use_container_width=True):
         st.error("A senha deve conter letras e números.")
         st.stop()
 
-    ok, erro = salvar_nova_senha(usuario_login, senha_atual, nova_senha)
+    ok, erro = alterar_senha(usuario_login, senha_atual, nova_senha)
 
     if not ok:
         st.error(erro)
@@ -120,3 +75,5 @@ if st.button("Salvar nova senha", use_container_width=True):
 
     st.success("✅ Senha alterada com sucesso!")
     st.info("Use a nova senha no próximo login.")
+
+finalizar_medicao()
@@ -1,12 +1,25 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import altair as alt
 from datetime import date, datetime, timedelta
 
 from utils.bootstrap import iniciar_app
 from app_dashboard import carregar_dados_planilha
-from streamlit_autorefresh import st_autorefresh
+from utils.data_loader import versao_planilha
+from utils.graficos import dados_linhas, exibir_grafico, grafico_linhas
+from utils.planejamento import chave_escopo, janela_do_escopo, tabela_planejamento
+from utils.series_diarias import (
+    indicador_da_meta,
+    linha_meta,
+    serie_diaria,
+    series_diarias,
+    ultimo_dia_com_registro,
+)
+from utils.series_diarias import ritmo_necessario as ritmo_por_dia
+from utils.versao_dados import atualizar_quando_mudar
+from utils.perf import finalizar_medicao, iniciar_medicao
+
+iniciar_medicao("99_pagina_teste")
 
 
 # ---------------------------------------------------------
@@ -18,7 +31,7 @@ st.set_page_config(
     layout="wide",
 )
 
-st_autorefresh(interval=30 * 1000, key="auto_refresh_meta")
+atualizar_quando_mudar("auto_refresh_meta", fontes=("planilha",))
 
 
 # ---------------------------------------------------------
@@ -47,81 +60,6 @@ def format_pct(x: float) -> str:
     return f"{x:.1%}"
 
 
-def obter_vendas_unicas(df_scope: pd.DataFrame, status_final_map=None):
-    """
-    Vendas únicas: considera VENDA GERADA e mantém 1 por cliente (última ocorrência).
-    Exclui clientes cujo status final seja DESISTIU (quando status_final_map é fornecido).
-    """
-    if df_scope is None or df_scope.empty:
-        return df_scope.iloc[0:0].copy()
-
-    df_scope = df_scope.copy()
-
-    if "CHAVE_CLIENTE" not in df_scope.columns:
-        # fallback: tenta criar chave com nome/cpf se existirem
-        nome_col = "NOME_CLIENTE_BASE" if "NOME_CLIENTE_BASE" in df_scope.columns else None
-        cpf_col = "CPF_CLIENTE_BASE" if "CPF_CLIENTE_BASE" in df_scope.columns else None
-        if nome_col:
-            nome = df_scope[nome_col].fillna("NÃO INFORMADO").astype(str).str.upper().str.strip()
-        else:
-            nome = pd.Series(["NÃO INFORMADO"] * len(df_scope))
-        if cpf_col:
-            cpf = df_scope[cpf_col].fillna("").astype(str).str.replace(r"\D", "", regex=True)
-        else:
-            cpf = pd.Series([""] * len(df_scope))
-        df_scope["CHAVE_CLIENTE"] = nome + " | " + cpf
-
-    # filtra status venda
-    if "STATUS_BASE" not in df_scope.columns:
-        return df_scope.iloc[0:0].copy()
-
-    df_v = df_scope[df_scope["STATUS_BASE"] == "VENDA GERADA"].copy()
-    if df_v.empty:
-        return df_v
-
-    # excluir desistidos pelo status final do cliente
-    if status_final_map is not None:
-        try:
-            if isinstance(status_final_map, dict):
-                df_v["STATUS_FINAL"] = df_v["CHAVE_CLIENTE"].map(status_final_map)
-            else:
-                df_v["STATUS_FINAL"] = df_v["CHAVE_CLIENTE"].map(status_final_map.to_dict())
-            df_v = df_v[df_v["STATUS_FINAL"] != "DESISTIU"]
-        except Exception:
-            pass
-
-    # mantém 1 por cliente (última ocorrência por data)
-    if "DIA" in df_v.columns:
-        df_v = df_v.sort_values("DIA")
-    df_v = df_v.groupby("CHAVE_CLIENTE").tail(1)
-
-    return df_v
-
-
-def contar_analises_volume(df: pd.DataFrame) -> int:
-    """Volume de análises = EM ANÁLISE + REANÁLISE."""
-    if df.empty:
-        return 0
-    s = df["STATUS_BASE"].fillna("").astype(str).str.upper().str.strip()
-    return int((s == "EM ANÁLISE").sum() + (s == "REANÁLISE").sum())
-
-
-def contar_aprovacoes(df: pd.DataFrame) -> int:
-    if df.empty:
-        return 0
-    s = df["STATUS_BASE"].fillna("").astype(str).str.upper().str.strip()
-    return int((s == "APROVADO").sum())
-
-
-def ultimo_dia_com_registro(df: pd.DataFrame) -> date | None:
-    if df.empty or "DIA" not in df.columns:
-        return None
-    d = pd.to_datetime(df["DIA"], errors="coerce").dropna()
-    if d.empty:
-        return None
-    return d.max().date()
-
-
 # ---------------------------------------------------------
 # CARREGA BASE
 # ---------------------------------------------------------
@@ -190,7 +128,7 @@ visao = st.sidebar.radio(
 )
 
 # 🔒 Trava de corretor: força visão e escopo
-df_scope = df_global.copy()
+df_scope = df_global
 
 if perfil == "corretor":
     visao = "Corretor"
@@ -222,6 +160,14 @@ if df_scope.empty:
     st.warning("Sem dados para o escopo selecionado.")
     st.stop()
 
+# Mesmo escopo na tabela de planejamento (montada 1x por versão da planilha)
+escopo = chave_escopo(
+    equipe=equipe_sel,
+    corretor=nome_usuario if perfil == "corretor" else corretor_sel,
+)
+planejamento = tabela_planejamento(("99_pagina_teste", versao_planilha()), df_global, status_final_por_cliente)
+series = series_diarias(("99_pagina_teste", versao_planilha()), df_global, status_final_por_cliente)
+
 
 # ---------------------------------------------------------
 # TOPO – PLANEJAMENTO (MÊS COMERCIAL)
@@ -280,69 +226,25 @@ if dt_ini_mes > dt_fim_mes:
 # ---------------------------------------------------------
 # BASE DO MÊS COMERCIAL (PARA O GRÁFICO E REAL)
 # ---------------------------------------------------------
-df_mes = df_scope.copy()
-df_mes["DIA_DATA"] = pd.to_datetime(df_mes["DIA"], errors="coerce").dt.date
-df_mes = df_mes[(df_mes["DIA_DATA"] >= dt_ini_mes) & (df_mes["DIA_DATA"] <= dt_fim_mes)].copy()
-
 # Último dia REAL (para cortar a linha real)
-ultimo_dia_planilha_no_mes = ultimo_dia_com_registro(df_mes)
+ultimo_dia_planilha_no_mes = ultimo_dia_com_registro(series, escopo, dt_ini_mes, dt_fim_mes)
 if ultimo_dia_planilha_no_mes is None:
     ultimo_dia_planilha_no_mes = dt_ini_mes  # evita quebrar
 
-# Base até o último dia disponível na planilha (REAL)
-df_real = df_mes[df_mes["DIA_DATA"] <= ultimo_dia_planilha_no_mes].copy()
-
 # Lista completa de dias do mês comercial (para a linha da META)
 dias_mes = pd.date_range(start=dt_ini_mes, end=dt_fim_mes, freq="D")
-dias_mes_lista = [d.date() for d in dias_mes]
 
-# Lista de dias até o último dia na planilha (para a linha REAL)
+# Dias até o último dia na planilha (para a linha REAL)
 dias_real = pd.date_range(start=dt_ini_mes, end=ultimo_dia_planilha_no_mes, freq="D")
-dias_real_lista = [d.date() for d in dias_real]
 
 
 # ---------------------------------------------------------
 # CÁLCULOS DO INDICADOR SELECIONADO
 # ---------------------------------------------------------
-def calcular_total_real(df_real_base: pd.DataFrame) -> int:
-    if tipo_meta == "Número de Análises":
-        return contar_analises_volume(df_real_base)
-    if tipo_meta == "Número de Aprovações":
-        return contar_aprovacoes(df_real_base)
-    # Vendas
-    df_v = obter_vendas_unicas(df_real_base, status_final_map=status_final_por_cliente)
-    return int(len(df_v))
-
+# contagem diária (densa, dias_real) do indicador; vendas = únicas na janela
+cont_real = serie_diaria(series, escopo, indicador_da_meta(tipo_meta), dt_ini_mes, ultimo_dia_planilha_no_mes)
 
-def serie_diaria_real(df_real_base: pd.DataFrame) -> pd.Series:
-    """
-    Retorna contagem diária do indicador, reindexado nos dias_real_lista.
-    """
-    if df_real_base.empty:
-        return pd.Series([0] * len(dias_real_lista), index=dias_real_lista)
-
-    if tipo_meta == "Número de Análises":
-        s = df_real_base["STATUS_BASE"].fillna("").astype(str).str.upper().str.strip()
-        df_ind = df_real_base[(s == "EM ANÁLISE") | (s == "REANÁLISE")].copy()
-        cont = df_ind.groupby("DIA_DATA").size().reindex(dias_real_lista, fill_value=0)
-        return cont
-
-    if tipo_meta == "Número de Aprovações":
-        s = df_real_base["STATUS_BASE"].fillna("").astype(str).str.upper().str.strip()
-        df_ind = df_real_base[s == "APROVADO"].copy()
-        cont = df_ind.groupby("DIA_DATA").size().reindex(dias_real_lista, fill_value=0)
-        return cont
-
-    # Vendas únicas por dia (data do registro do “último” status de venda por cliente dentro do range real)
-    df_v = obter_vendas_unicas(df_real_base, status_final_map=status_final_por_cliente).copy()
-    if df_v.empty:
-        return pd.Series([0] * len(dias_real_lista), index=dias_real_lista)
-    df_v["DIA_DATA"] = pd.to_datetime(df_v["DIA"], errors="coerce").dt.date
-    cont = df_v.groupby("DIA_DATA").size().reindex(dias_real_lista, fill_value=0)
-    return cont
-
-
-real_total = calcular_total_real(df_real)
+real_total = int(cont_real.sum())
 faltam = max(int(meta_valor) - int(real_total), 0)
 pct = (real_total / meta_valor) if meta_valor > 0 else 0.0
 
@@ -356,7 +258,7 @@ else:
     base_ritmo = hoje
 
 dias_restantes = max((dt_fim_mes - base_ritmo).days + 1, 0)  # inclui o dia de hoje
-ritmo_necessario = (faltam / dias_restantes) if dias_restantes > 0 else 0.0
+ritmo_necessario = ritmo_por_dia(meta_valor, real_total, dias_restantes)
 
 
 # ---------------------------------------------------------
@@ -383,20 +285,15 @@ st.markdown("---")
 # ---------------------------------------------------------
 st.subheader("🧠 Planejamento de Produção (base: últimos 90 dias)")
 
-data_max_global = pd.to_datetime(df_scope["DIA"], errors="coerce").dropna()
-if data_max_global.empty:
+# Janela de 90 dias (até a última data do escopo) já somada na tabela
+janela_90 = janela_do_escopo(planejamento, escopo)
+if janela_90["DIA_FIM"] is None:
     st.info("Sem datas válidas para calcular histórico.")
-    df_90 = df_scope.iloc[0:0].copy()
-else:
-    max_d = data_max_global.max()
-    min_90 = max_d - pd.Timedelta(days=90)
-    df_90 = df_scope[(df_scope["DIA"] >= min_90) & (df_scope["DIA"] <= max_d)].copy()
-    df_90["DIA_DATA"] = pd.to_datetime(df_90["DIA"], errors="coerce").dt.date
 
 # Métricas base histórico
-analises_90 = contar_analises_volume(df_90)
-aprov_90 = contar_aprovacoes(df_90)
-vendas_90 = len(obter_vendas_unicas(df_90, status_final_map=status_final_por_cliente)) if not df_90.empty else 0
+analises_90 = int(janela_90["ANALISES"])
+aprov_90 = int(janela_90["APROVACOES"])
+vendas_90 = int(janela_90["VENDAS"])
 
 # Conversões (evita divisão por zero)
 analises_por_aprov = (analises_90 / aprov_90) if aprov_90 > 0 else 0.0
@@ -489,46 +386,20 @@ if meta_valor <= 0:
     st.info("Defina um valor de meta acima de 0 para exibir o gráfico.")
 else:
     # Série REAL acumulada (até o último dia da planilha)
-    cont_real = serie_diaria_real(df_real)
-    real_acum = cont_real.cumsum()
+    real_acum = np.cumsum(cont_real)
 
     # Série META linear (do início ao fim do mês comercial)
-    meta_linear = np.linspace(0, meta_valor, num=len(dias_mes_lista), endpoint=True)
-
-    # Monta DF de plot
-    df_plot_parts = []
-
-    # REAL (só até último dia da planilha)
-    df_real_line = pd.DataFrame({
-        "DIA": pd.to_datetime(dias_real_lista),
-        "Série": "Real",
-        "Valor": real_acum.values
-    })
-    df_plot_parts.append(df_real_line)
-
-    # META (até fim do mês)
-    df_meta_line = pd.DataFrame({
-        "DIA": pd.to_datetime(dias_mes_lista),
-        "Série": "Meta",
-        "Valor": meta_linear
-    })
-    df_plot_parts.append(df_meta_line)
-
-    df_plot = pd.concat(df_plot_parts, ignore_index=True)
-
-    chart = (
-        alt.Chart(df_plot)
-        .mark_line(point=True)
-        .encode(
-            x=alt.X("DIA:T", title="Dia"),
-            y=alt.Y("Valor:Q", title="Total acumulado"),
-            color=alt.Color("Série:N", title=""),
-        )
-        .properties(height=360)
+    meta_linear = linha_meta(meta_valor, len(dias_mes))
+
+    # Só os pontos que definem cada linha vão para o spec (em cache por escopo/mês/meta)
+    exibir_grafico(
+        ("99_pagina_teste", versao_planilha(), escopo, tipo_meta, dt_ini_mes, dt_fim_mes, int(meta_valor)),
+        lambda: grafico_linhas(dados_linhas({
+            "Real": (dias_real, real_acum),  # só até último dia da planilha
+            "Meta": (dias_mes, meta_linear),  # até fim do mês
+        })),
     )
 
-    st.altair_chart(chart, use_container_width=True)
-
     # Leitura inteligente
     if dias_restantes > 0:
         proj_final = real_total + ritmo_necessario * dias_restantes
@@ -560,3 +431,5 @@ st.markdown("---")
 st.caption(
     "Regra da página: **Real** para na última data registrada na planilha. **Meta** segue até o fim do mês comercial."
 )
+
+finalizar_medicao()
@@ -0,0 +1,248 @@
+import html
+from datetime import date
+
+import streamlit as st
+import pandas as pd
+
+from utils.data_loader import baixar_planilha_csv, ler_planilha_csv
+from utils.perf import cache_medido, medir
+
+# =========================================================
+# ANÁLISES DIÁRIAS – GESTÃO À VISTA
+# =========================================================
+# Base, resumo do dia e painel de TV usados pela página
+# 01_Analises_Diarias (modo normal e modo TV/quiosque).
+
+# ---------------------------------------------------------
+# FUNÇÕES AUXILIARES
+# ---------------------------------------------------------
+def limpar_para_data(serie: pd.Series) -> pd.Series:
+    dt = pd.to_datetime(serie, dayfirst=True, errors="coerce")
+    return dt.dt.date
+
+
+@cache_medido("planilha_analises", st.cache_data, max_entries=2, show_spinner=False)
+def carregar_dados(versao: str, _conteudo: bytes) -> pd.DataFrame:
+    """Carrega a base em tempo real (tratada uma vez por versão da planilha)."""
+    df = ler_planilha_csv(_conteudo)
+    df.columns = [c.strip().upper() for c in df.columns]
+
+    # DATA
+    if "DATA" in df.columns:
+        df["DIA"] = limpar_para_data(df["DATA"])
+    elif "DIA" in df.columns:
+        df["DIA"] = limpar_para_data(df["DIA"])
+    else:
+        df["DIA"] = pd.NaT
+
+    # EQUIPE / CORRETOR
+    for col in ["EQUIPE", "CORRETOR"]:
+        if col in df.columns:
+            df[col] = (
+                df[col]
+                .fillna("NÃO INFORMADO")
+                .astype(str)
+                .str.upper()
+                .str.strip()
+            )
+        else:
+            df[col] = "NÃO INFORMADO"
+
+    # STATUS
+    possiveis_cols_situacao = [
+        "SITUAÇÃO",
+        "SITUAÇÃO ATUAL",
+        "STATUS",
+        "SITUACAO",
+        "SITUACAO ATUAL",
+    ]
+    col_sit = next((c for c in possiveis_cols_situacao if c in df.columns), None)
+
+    with medir("classificacao_status"):
+        df["STATUS_BASE"] = ""
+        if col_sit:
+            status_original = df[col_sit].fillna("").astype(str)
+            s = status_original.str.upper()
+
+            # EM ANÁLISE
+            df.loc[s.str.contains("EM ANÁLISE"), "STATUS_BASE"] = "EM ANÁLISE"
+            # REANÁLISE (só pra registro / não entra nas contas)
+            df.loc[s.str.contains("REANÁLISE"), "STATUS_BASE"] = "REANÁLISE"
+            # APROVADO apenas quando tiver APROVAÇÃO
+            df.loc[s.str.contains(r"\bAPROVAÇÃO\b"), "STATUS_BASE"] = "APROVADO"
+
+    return df
+
+
+def formatar_data_br(d: date) -> str:
+    if pd.isna(d):
+        return "-"
+    return d.strftime("%d/%m/%Y")
+
+
+def criar_coluna_rank(n: int) -> list:
+    ranks = []
+    for i in range(n):
+        pos = i + 1
+        if pos == 1:
+            ranks.append("🥇 1º")
+        elif pos == 2:
+            ranks.append("🥈 2º")
+        elif pos == 3:
+            ranks.append("🥉 3º")
+        else:
+            ranks.append(f"{pos}º")
+    return ranks
+
+
+def rankings_do_dia(df_em_analise: pd.DataFrame):
+    """Ranking de equipes e de corretores (análises EM ANÁLISE no dia)."""
+    df_equipes = (
+        df_em_analise.groupby("EQUIPE").size().reset_index(name="ANÁLISES")
+    )
+    df_equipes = (
+        df_equipes.sort_values("ANÁLISES", ascending=False)
+        .reset_index(drop=True)
+    )
+    df_equipes.insert(0, "POSIÇÃO", criar_coluna_rank(len(df_equipes)))
+    df_equipes = df_equipes.rename(
+        columns={"EQUIPE": "Equipe", "ANÁLISES": "Análises no dia"}
+    )
+
+    df_corretor = (
+        df_em_analise.groupby("CORRETOR").size().reset_index(name="ANÁLISES")
+    )
+    df_corretor = (
+        df_corretor.sort_values("ANÁLISES", ascending=False)
+        .reset_index(drop=True)
+    )
+    df_corretor.insert(0, "POSIÇÃO", criar_coluna_rank(len(df_corretor)))
+    df_corretor = df_corretor.rename(
+        columns={"CORRETOR": "Corretor", "ANÁLISES": "Análises no dia"}
+    )
+
+    return df_equipes, df_corretor
+
+
+# ---------------------------------------------------------
+# RESUMO DO DIA (BASE ATUAL, CACHE POR VERSÃO)
+# ---------------------------------------------------------
+@st.cache_data(max_entries=16, show_spinner=False)
+def _resumo_do_dia(versao: str, dia, _conteudo: bytes) -> dict:
+    df_atual = carregar_dados(versao, _conteudo)
+    df_dia = df_atual[df_atual["DIA"] == dia]
+    return {
+        "data_max": df_atual["DIA"].dropna().max(),
+        "df_em_analise": df_dia[df_dia["STATUS_BASE"] == "EM ANÁLISE"],
+    }
+
+
+def resumo_do_dia(dia) -> dict:
+    """Só as linhas do dia: é o que os fragmentos releem a cada intervalo."""
+    versao, conteudo = baixar_planilha_csv()
+    return _resumo_do_dia(versao, dia, conteudo)
+
+
+# ---------------------------------------------------------
+# MODO TV / QUIOSQUE (HTML PRÉ-RENDERIZADO)
+# ---------------------------------------------------------
+CSS_TV = """
+<style>
+section[data-testid="stSidebar"], header[data-testid="stHeader"],
+div[data-testid="stToolbar"], div[data-testid="stSidebarNav"] { display: none; }
+.stApp { background-color: #050814; color: #f5f5f5; }
+.main .block-container { max-width: 100%; padding: 1.2rem 2rem; }
+.tv-topo { display: flex; gap: 24px; align-items: stretch; margin-bottom: 1.2rem; }
+.tv-banner {
+    flex: 3; background: linear-gradient(90deg, #111827, #1f2937);
+    padding: 18px 24px; border-radius: 20px; border: 1px solid #1f2937;
+}
+.tv-banner h1 { font-size: 2rem; margin: 0; color: #f5f5f5; }
+.tv-banner p { font-size: 1.1rem; color: #9ca3af; margin: 6px 0 0 0; }
+.tv-meta {
+    flex: 1; border-radius: 20px; padding: 16px; text-align: center;
+    background: #0b1220; border: 1px solid #1f2937;
+}
+.tv-meta.batida {
+    background: linear-gradient(135deg, #15803d, #22c55e);
+    box-shadow: 0 0 28px rgba(34,197,94,0.6); border: none;
+}
+.tv-meta .titulo { font-size: 1.3rem; font-weight: 700; color: #e5e7eb; }
+.tv-meta .numero { font-size: 2.4rem; font-weight: 800; color: #f5f5f5; margin-top: 4px; }
+.tv-meta .faltam { font-size: 1.1rem; color: #38bdf8; margin-top: 2px; }
+.tv-rankings { display: flex; gap: 24px; }
+.tv-rankings > div { flex: 1; }
+.tv-rankings h3 { font-size: 1.3rem; margin: 0 0 8px 0; color: #e5e7eb; }
+.tv-rankings table { width: 100%; border-collapse: collapse; font-size: 1.15rem; }
+.tv-rankings th { background: #111827; color: #9ca3af; text-align: left; padding: 8px 10px; }
+.tv-rankings td { border-top: 1px solid #1f2937; padding: 8px 10px; color: #e5e7eb; }
+.tv-rankings td.num { text-align: right; font-weight: 700; color: #38bdf8; }
+.tv-vazio { font-size: 1.3rem; color: #e5e7eb; margin-top: 1rem; }
+</style>
+"""
+
+
+def _tabela_html(df: pd.DataFrame) -> str:
+    cab = "".join(f"<th>{html.escape(str(c))}</th>" for c in df.columns)
+    linhas = []
+    for valores in df.itertuples(index=False):
+        pos, nome, qtd = valores
+        linhas.append(
+            f"<tr><td>{html.escape(str(pos))}</td>"
+            f"<td>{html.escape(str(nome))}</td>"
+            f"<td class='num'>{int(qtd)}</td></tr>"
+        )
+    return f"<table><thead><tr>{cab}</tr></thead><tbody>{''.join(linhas)}</tbody></table>"
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def painel_tv_html(versao: str, dia_iso, meta: int, _conteudo: bytes) -> str:
+    """
+    Painel somente leitura (ranking + card de meta) já em HTML.
+    cache_resource: calculado UMA vez por (versão, dia, meta) e entregue
+    a todas as TVs; cada tela só reenvia a string pronta.
+    dia_iso: "AAAA-MM-DD" já validado pela página, ou None.
+    """
+    if dia_iso:
+        dia = date.fromisoformat(dia_iso)
+    else:
+        # sem dia na URL: acompanha o último dia com registro
+        dia = _resumo_do_dia(versao, None, _conteudo)["data_max"]
+
+    df_em_analise = _resumo_do_dia(versao, dia, _conteudo)["df_em_analise"]
+    total = len(df_em_analise)
+    faltam = max(meta - total, 0)
+    batida = total >= meta
+
+    card = (
+        f"<div class='tv-meta{' batida' if batida else ''}'>"
+        f"<div class='titulo'>{'🎉 META BATIDA' if batida else '🎯 Meta do dia'}</div>"
+        f"<div class='numero'>{total} / {meta}</div>"
+        + ("" if batida else f"<div class='faltam'>Faltam {faltam}</div>")
+        + "</div>"
+    )
+
+    topo = (
+        "<div class='tv-topo'>"
+        "<div class='tv-banner'><h1>📅 Análises Diárias – Gestão à Vista</h1>"
+        f"<p>Dia <strong>{formatar_data_br(dia)}</strong> • "
+        f"Equipes ativas: <strong>{df_em_analise['EQUIPE'].nunique()}</strong> • "
+        f"Corretores ativos: <strong>{df_em_analise['CORRETOR'].nunique()}</strong></p></div>"
+        f"{card}</div>"
+    )
+
+    if total == 0:
+        corpo = (
+            "<p class='tv-vazio'>Ainda não temos análises em <strong>EM ANÁLISE</strong> "
+            "para este dia. Assim que a primeira subir, o painel acende. 😉</p>"
+        )
+    else:
+        df_equipes, df_corretor = rankings_do_dia(df_em_analise)
+        corpo = (
+            "<div class='tv-rankings'>"
+            f"<div><h3>📌 Análises por Equipe</h3>{_tabela_html(df_equipes)}</div>"
+            f"<div><h3>👥 Ranking de Corretores</h3>{_tabela_html(df_corretor)}</div>"
+            "</div>"
+        )
+
+    return topo + corpo
@@ -1,6 +1,13 @@
 # ==========================================
 # AUTENTICAÇÃO DE USUÁRIOS – DASHBOARD MR
 # ==========================================
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
 
 def normalizar_nome(nome: str) -> str:
     return " ".join(nome.strip().upper().split())
@@ -122,3 +129,163 @@ for nome in NOMES_CORRETORES:
             "senha": gerar_senha(nome_norm),
             "perfil": "corretor"
         }
+
+
+# ------------------------------------------
+# DIRETÓRIO DE USUÁRIOS (users.json EM MEMÓRIA)
+# ------------------------------------------
+# users.json é a única fonte de verdade do login. O diretório abaixo é
+# compartilhado por todas as sessões do processo: o arquivo só é relido
+# quando mtime/tamanho mudam, e só é reparseado quando o hash muda.
+CAMINHO_USERS = Path("users.json")
+
+_lock_usuarios = threading.RLock()
+_diretorio = {
+    "assinatura": None,   # (mtime_ns, tamanho) do último arquivo lido
+    "hash": None,         # sha1 do conteúdo lido
+    "usuarios": {},       # login (lowercase) -> {nome, senha, perfil}
+}
+
+
+def _assinatura_users():
+    try:
+        info = CAMINHO_USERS.stat()
+    except OSError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+
+def carregar_usuarios() -> dict:
+    """
+    Retorna o diretório de usuários (login -> dados).
+    NÃO altere o dicionário retornado: use alterar_senha / bootstrap_usuarios.
+    """
+    assinatura = _assinatura_users()
+
+    with _lock_usuarios:
+        if assinatura is not None and assinatura == _diretorio["assinatura"]:
+            return _diretorio["usuarios"]
+
+        if assinatura is None:
+            _diretorio.update(assinatura=None, hash=None, usuarios={})
+            return _diretorio["usuarios"]
+
+        try:
+            bruto = CAMINHO_USERS.read_bytes()
+        except OSError:
+            return _diretorio["usuarios"]
+
+        hash_atual = hashlib.sha1(bruto).hexdigest()
+
+        if hash_atual != _diretorio["hash"]:
+            try:
+                data = json.loads(bruto.decode("utf-8")) or {}
+            except Exception:
+                data = {}
+            # garante chaves em lowercase
+            _diretorio["usuarios"] = {
+                str(k).strip().lower(): v for k, v in data.items()
+            }
+
+        _diretorio["assinatura"] = assinatura
+        _diretorio["hash"] = hash_atual
+        return _diretorio["usuarios"]
+
+
+def _salvar_usuarios(usuarios: dict):
+    """
+    Escrita atômica (arquivo temporário + os.replace) e atualização
+    imediata do diretório em memória.
+    """
+    conteudo = json.dumps(usuarios, indent=2, ensure_ascii=False).encode("utf-8")
+
+    fd, caminho_tmp = tempfile.mkstemp(
+        prefix=".users.", suffix=".tmp", dir=CAMINHO_USERS.resolve().parent
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(caminho_tmp, CAMINHO_USERS)
+    except Exception:
+        if os.path.exists(caminho_tmp):
+            os.remove(caminho_tmp)
+        raise
+
+    _diretorio["usuarios"] = usuarios
+    _diretorio["hash"] = hashlib.sha1(conteudo).hexdigest()
+    _diretorio["assinatura"] = _assinatura_users()
+
+
+def bootstrap_usuarios():
+    """
+    Garante que users.json existe e tem pelo menos os usuários de USUARIOS.
+    IMPORTANTE: não sobrescreve senha já alterada no JSON e só grava
+    quando algo realmente mudou.
+    """
+    with _lock_usuarios:
+        atuais = carregar_usuarios()
+        usuarios = {k: dict(v) for k, v in atuais.items()}
+
+        for login_fixo, info in (USUARIOS or {}).items():
+            k = str(login_fixo).strip().lower()
+            if not k:
+                continue
+
+            if k not in usuarios:
+                usuarios[k] = {
+                    "nome": info.get("nome", k.upper()),
+                    "senha": str(info.get("senha", "")),
+                    "perfil": info.get("perfil", "corretor"),
+                }
+            else:
+                # garante campos mínimos sem mexer na senha atual do JSON
+                usuarios[k]["nome"] = usuarios[k].get("nome") or info.get("nome", k.upper())
+                usuarios[k]["perfil"] = usuarios[k].get("perfil") or info.get("perfil", "corretor")
+                if "senha" not in usuarios[k]:
+                    usuarios[k]["senha"] = str(info.get("senha", ""))
+
+        if usuarios != atuais or _diretorio["assinatura"] is None:
+            _salvar_usuarios(usuarios)
+
+
+def validar_login(usuario: str, senha: str):
+    """
+    Retorna (ok, user_dict)
+    user_dict precisa ter: nome, perfil
+    """
+    usuario = (usuario or "").strip().lower()
+    senha = (senha or "").strip()
+
+    user = carregar_usuarios().get(usuario)
+
+    if user and senha == str(user.get("senha", "")).strip():
+        return True, dict(user)
+
+    return False, None
+
+
+def alterar_senha(usuario: str, senha_atual: str, nova_senha: str):
+    """
+    Troca a senha no diretório e grava no users.json (write-through).
+    Retorna (ok, mensagem_erro).
+    """
+    usuario = (usuario or "").strip().lower()
+    senha_atual = (senha_atual or "").strip()
+    nova_senha = (nova_senha or "").strip()
+
+    with _lock_usuarios:
+        atuais = carregar_usuarios()
+
+        if usuario not in atuais:
+            return False, "Usuário não encontrado."
+
+        if str(atuais[usuario].get("senha", "")).strip() != senha_atual:
+            return False, "Senha atual incorreta."
+
+        usuarios = dict(atuais)
+        usuarios[usuario] = {**atuais[usuario], "senha": nova_senha}
+        _salvar_usuarios(usuarios)
+
+    return True, None
@@ -6,6 +6,8 @@ from pathlib import Path
 from login import tela_login
 from utils.data_loader import carregar_dados_planilha
 from utils.notificacoes_json import processar_eventos
+from utils.visoes import ativar_copy_on_write
+from utils.versao_dados import INTERVALO_VERIFICACAO_S
 
 
 # -------------------------------------------------
@@ -67,6 +69,11 @@ def iniciar_app():
     - exibe notificações persistentes
     """
 
+    # -------------------------------------------------
+    # PANDAS: COPY-ON-WRITE (ver utils.visoes)
+    # -------------------------------------------------
+    ativar_copy_on_write()
+
     # -------------------------------------------------
     # LOGIN
     # -------------------------------------------------
@@ -100,6 +107,19 @@ def iniciar_app():
     if perfil not in {"corretor", "gestor", "admin"}:
         return
 
+    # -------------------------------------------------
+    # NOTIFICAÇÕES (FRAGMENTO QUE SE ATUALIZA SOZINHO)
+    # -------------------------------------------------
+    painel_notificacoes(nome_corretor, page_scope_id)
+
+
+@st.fragment(run_every=INTERVALO_VERIFICACAO_S)
+def painel_notificacoes(nome_corretor: str, page_scope_id: str):
+    """
+    Lista de notificações pendentes do corretor.
+    Roda isolada do resto da página: só ela é reavaliada a cada intervalo.
+    """
+
     # -------------------------------------------------
     # CARREGA NOTIFICAÇÕES PENDENTES
     # -------------------------------------------------
@@ -133,4 +153,4 @@ def iniciar_app():
                     key=f"fechar_alerta_{page_scope_id}_{alerta['id']}"
                 ):
                     marcar_como_lido(nome_corretor, alerta["id"])
-                    st.rerun()
+                    st.rerun(scope="fragment")
@@ -0,0 +1,124 @@
+import unicodedata
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.perf import medir
+
+# =========================================================
+# ÍNDICE DE BUSCA DE CLIENTES (NOME / CPF)
+# =========================================================
+# Montado uma vez por versão da planilha e compartilhado entre sessões.
+# - CPF: dicionário CPF -> posições das linhas (busca exata em O(1)).
+# - Nome: trigramas sobre os nomes ÚNICOS sem acento; a busca cruza as
+#   listas dos trigramas do termo e confere o "contém" só nos candidatos.
+# Devolve posições de linha (para df.iloc), sem varrer a coluna inteira.
+
+TAMANHO_NGRAMA = 3
+
+
+def dobrar_acentos(texto: str) -> str:
+    """'JOSÉ CONCEIÇÃO' -> 'JOSE CONCEICAO' (maiúsculo, sem acento)."""
+    texto = unicodedata.normalize("NFKD", str(texto).upper())
+    return "".join(ch for ch in texto if not unicodedata.combining(ch)).strip()
+
+
+def _ngramas(texto: str) -> set:
+    return {texto[i:i + TAMANHO_NGRAMA] for i in range(len(texto) - TAMANHO_NGRAMA + 1)}
+
+
+def _agrupar_posicoes(codigos: np.ndarray, total: int) -> list:
+    """codigos (um por linha) -> lista onde o item k tem as posições do código k."""
+    ordem = np.argsort(codigos, kind="stable")
+    limites = np.searchsorted(codigos[ordem], np.arange(total + 1))
+    return [ordem[limites[k]:limites[k + 1]] for k in range(total)]
+
+
+def construir_indice(nomes: pd.Series, cpfs: pd.Series) -> dict:
+    nomes_dobrados = nomes.fillna("").astype(str).map(dobrar_acentos)
+    codigos_nome, nomes_unicos = pd.factorize(nomes_dobrados)
+
+    ngramas = {}
+    for codigo, nome in enumerate(nomes_unicos):
+        for ng in _ngramas(nome):
+            ngramas.setdefault(ng, []).append(codigo)
+
+    cpfs = cpfs.fillna("").astype(str)
+    codigos_cpf, cpfs_unicos = pd.factorize(cpfs)
+    linhas_por_cpf = _agrupar_posicoes(codigos_cpf, len(cpfs_unicos))
+
+    return {
+        "total_linhas": len(nomes),
+        "nomes_unicos": np.asarray(nomes_unicos, dtype=object),
+        "linhas_por_nome": _agrupar_posicoes(codigos_nome, len(nomes_unicos)),
+        "ngramas": {ng: np.array(cods, dtype=np.int64) for ng, cods in ngramas.items()},
+        "cpfs_unicos": pd.Series(cpfs_unicos),
+        "linhas_por_cpf": linhas_por_cpf,
+        "cpf_para_codigo": {cpf: i for i, cpf in enumerate(cpfs_unicos)},
+    }
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def indice_busca(chave: tuple, _nomes: pd.Series, _cpfs: pd.Series) -> dict:
+    """
+    `chave` = (página, versão da planilha): é o que invalida o índice.
+    As séries não entram no hash do cache.
+    """
+    with medir("indice_busca (montagem)", linhas=len(_nomes)):
+        return construir_indice(_nomes, _cpfs)
+
+
+def _juntar(listas: list) -> np.ndarray:
+    if not listas:
+        return np.array([], dtype=np.int64)
+    return np.sort(np.concatenate(listas))
+
+
+# ---------------------------------------------------------
+# CONSULTAS
+# ---------------------------------------------------------
+def buscar_nome(indice: dict, termo: str) -> np.ndarray:
+    """Posições das linhas cujo nome CONTÉM o termo (ignorando acentos)."""
+    termo = dobrar_acentos(termo)
+    if not termo:
+        return np.arange(indice["total_linhas"])
+
+    nomes_unicos = indice["nomes_unicos"]
+
+    if len(termo) < TAMANHO_NGRAMA:
+        candidatos = np.flatnonzero(pd.Series(nomes_unicos).str.contains(termo, regex=False).to_numpy())
+    else:
+        listas = [indice["ngramas"].get(ng) for ng in _ngramas(termo)]
+        if any(lst is None for lst in listas):
+            return np.array([], dtype=np.int64)
+        listas.sort(key=len)
+        candidatos = listas[0]
+        for lst in listas[1:]:
+            candidatos = np.intersect1d(candidatos, lst, assume_unique=True)
+            if not len(candidatos):
+                return np.array([], dtype=np.int64)
+        # os trigramas só garantem presença, não a ordem: confere o "contém"
+        candidatos = [c for c in candidatos if termo in nomes_unicos[c]]
+
+    return _juntar([indice["linhas_por_nome"][c] for c in candidatos])
+
+
+def buscar_cpf(indice: dict, termo: str, parcial: bool = False) -> np.ndarray:
+    """
+    Posições das linhas com o CPF informado (só dígitos são considerados).
+    parcial=True mantém o comportamento de "contém" (varre só CPFs únicos).
+    """
+    cpf = "".join(ch for ch in str(termo) if ch.isdigit())
+
+    if not parcial or len(cpf) == 11:
+        codigo = indice["cpf_para_codigo"].get(cpf)
+        if codigo is None:
+            return np.array([], dtype=np.int64)
+        return indice["linhas_por_cpf"][codigo]
+
+    if not cpf:
+        return np.arange(indice["total_linhas"])
+
+    codigos = np.flatnonzero(indice["cpfs_unicos"].str.contains(cpf, regex=False).to_numpy())
+    return _juntar([indice["linhas_por_cpf"][c] for c in codigos])
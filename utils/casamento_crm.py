@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+from utils.busca_clientes import dobrar_acentos
+
+# =========================================================
+# CASAMENTO CRM ↔ PLANILHA (ÍNDICE DE CHAVES)
+# =========================================================
+# Cada página casava nomes do seu jeito: o Funil de Leads fazia merge no
+# nome cru em maiúsculas (nomes repetidos no CRM multiplicavam as linhas
+# da planilha e inflavam as contagens), o Pré-Cadastro filtrava a planilha
+# inteira para cada lead e Corretores comparava nomes com/sem acento.
+#
+# Aqui:
+#   - chave_nome(): maiúsculo, sem acento, espaços colapsados — calculada
+#     uma vez por nome DISTINTO e espalhada pelas linhas;
+#   - construir_indice_crm(): 1x por sincronização do CRM (dentro do cache
+#     da carga), um índice de hash por chave
+#     (e-mail, telefone, nome) -> posição de UM lead (o mais recente);
+#   - resolver(): cada linha da planilha vira no máximo um lead
+#     (get_indexer: busca em hash, sem merge), na ordem e-mail > telefone
+#     > nome. Enriquecer (ORIGEM etc.) é um take, sem duplicar linhas.
+#
+# O índice é compartilhado entre sessões — somente leitura.
+
+SEM_LEAD = -1
+
+
+# ---------------------------------------------------------
+# CHAVES NORMALIZADAS
+# ---------------------------------------------------------
+def _por_valor_distinto(valores: pd.Series, func) -> pd.Series:
+    codigos, unicos = pd.factorize(valores.fillna("").astype(str))
+    convertidos = np.array([func(v) for v in unicos], dtype=object)
+    return pd.Series(convertidos[codigos], index=valores.index, dtype=object)
+
+
+def _nome(texto: str) -> str:
+    return " ".join(dobrar_acentos(texto).split())
+
+
+def chave_nome(valores: pd.Series) -> pd.Series:
+    """'  José  da Conceição ' -> 'JOSE DA CONCEICAO'."""
+    return _por_valor_distinto(valores, _nome)
+
+
+def chave_telefone(valores: pd.Series) -> pd.Series:
+    """Só dígitos, sem o 55 do país; menos de 8 dígitos = sem chave ("")."""
+    digitos = valores.fillna("").astype(str).str.replace(r"\D", "", regex=True)
+    digitos = digitos.where(~((digitos.str.len() >= 12) & digitos.str.startswith("55")), digitos.str[2:])
+    return digitos.where(digitos.str.len() >= 8, "")
+
+
+def chave_email(valores: pd.Series) -> pd.Series:
+    emails = valores.fillna("").astype(str).str.strip().str.lower()
+    return emails.where(emails.str.contains("@", regex=False), "")
+
+
+# ---------------------------------------------------------
+# ÍNDICE DO CRM
+# ---------------------------------------------------------
+def _indice_por_chave(chaves: pd.Series) -> pd.Series:
+    """chave -> posição do lead; chaves vazias fora; repetidas: 1ª ocorrência."""
+    validas = chaves[chaves != ""]
+    validas = validas[~validas.duplicated(keep="first")]
+    return pd.Series(validas.index.to_numpy(dtype=np.int64), index=pd.Index(validas.to_numpy(), dtype=object))
+
+
+def construir_indice_crm(df_crm: pd.DataFrame, nome: str = "nome_pessoa", telefone: str = "telefone_pessoa",
+                         email: str = "email_pessoa", data: str = "data_captura") -> dict:
+    """
+    df_crm com os campos crus da API. Leads do mais recente para o mais
+    antigo: quando uma chave se repete, fica o lead mais recente.
+    """
+    leads = df_crm
+    if data in leads.columns:
+        recencia = pd.to_datetime(leads[data], errors="coerce")
+        ordem = recencia.rank(method="first", ascending=False, na_option="bottom").to_numpy()
+        leads = leads.iloc[np.argsort(ordem, kind="stable")]
+    leads = leads.reset_index(drop=True)
+
+    vazio = pd.Series("", index=leads.index, dtype=object)
+    chaves = {
+        "email": chave_email(leads[email]) if email in leads.columns else vazio,
+        "telefone": chave_telefone(leads[telefone]) if telefone in leads.columns else vazio,
+        "nome": chave_nome(leads[nome]) if nome in leads.columns else vazio,
+    }
+    return {
+        "leads": leads,
+        "por_chave": {tipo: _indice_por_chave(c) for tipo, c in chaves.items()},
+    }
+
+
+# ---------------------------------------------------------
+# CONSULTAS
+# ---------------------------------------------------------
+def _tomar(valores: np.ndarray, achados: np.ndarray, padrao) -> np.ndarray:
+    """valores[achados] onde achados >= 0; `padrao` onde get_indexer deu -1."""
+    saida = np.full(len(achados), padrao, dtype=valores.dtype)
+    ok = achados >= 0
+    saida[ok] = valores[achados[ok]]
+    return saida
+
+
+def resolver(indice: dict, nomes: pd.Series, telefones=None, emails=None) -> np.ndarray:
+    """
+    Posição do lead (em indice["leads"]) para cada linha; SEM_LEAD se
+    nenhuma chave bate. Mesma ordem/tamanho de `nomes`.
+    """
+    posicoes = np.full(len(nomes), SEM_LEAD, dtype=np.int64)
+    tentativas = [
+        ("email", emails, chave_email),
+        ("telefone", telefones, chave_telefone),
+        ("nome", nomes, chave_nome),
+    ]
+    for tipo, valores, normalizar in tentativas:
+        if valores is None:
+            continue
+        faltam = posicoes == SEM_LEAD
+        if not faltam.any():
+            break
+        por_chave = indice["por_chave"][tipo]
+        achados = por_chave.index.get_indexer(normalizar(valores[faltam]).to_numpy())
+        posicoes[faltam] = _tomar(por_chave.to_numpy(), achados, SEM_LEAD)
+    return posicoes
+
+
+def enriquecer(df: pd.DataFrame, indice: dict, colunas: dict, posicoes: np.ndarray) -> pd.DataFrame:
+    """
+    colunas: nome da coluna nova -> coluna do lead. Sem lead -> "".
+    Uma linha de saída por linha de `df` (nunca multiplica).
+    """
+    leads = indice["leads"]
+    tem_lead = posicoes != SEM_LEAD
+    novas = {}
+    for saida, origem in colunas.items():
+        valores = np.full(len(df), "", dtype=object)
+        if origem in leads.columns:
+            valores[tem_lead] = leads[origem].to_numpy(dtype=object)[posicoes[tem_lead]]
+        novas[saida] = valores
+    return df.assign(**novas)
+
+
+def nomes_canonicos(nomes: pd.Series, referencia) -> pd.Series:
+    """
+    Cada nome com a grafia da `referencia` (ex.: corretores da planilha)
+    que tem a mesma chave_nome; sem correspondente, o nome em maiúsculas.
+    """
+    referencia = pd.Series(list(referencia), dtype=object)
+    canon = pd.Series(referencia.to_numpy(), index=chave_nome(referencia).to_numpy())
+    canon = canon[~canon.index.duplicated(keep="first")]
+
+    chaves = chave_nome(nomes)
+    achados = canon.index.get_indexer(chaves.to_numpy())
+    proprios = nomes.fillna("").astype(str).str.upper().str.strip().to_numpy(dtype=object)
+    saida = proprios.copy()
+    ok = achados >= 0
+    saida[ok] = canon.to_numpy()[achados[ok]]
+    return pd.Series(saida, index=nomes.index, dtype=object)
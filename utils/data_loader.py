@@ -1,27 +1,76 @@
+import hashlib
+import io
+from datetime import datetime
+
+import requests
 import streamlit as st
 import pandas as pd
 
+from utils.perf import cache_medido, medir
+from utils.visoes import ativar_copy_on_write
+
+# as páginas contam com o copy-on-write (sem .copy() defensivo) e nem todas
+# passam por iniciar_app(): toda carga da planilha vem por aqui
+ativar_copy_on_write()
+
 # =========================================================
-# CARREGAMENTO DA PLANILHA (SEM QUALQUER FILTRO)
+# PLANILHA – GOOGLE SHEETS
 # =========================================================
-@st.cache_data(ttl=60)
-def carregar_dados_planilha(_refresh_key=None) -> pd.DataFrame:
+SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
+GID = "1574157905"
 
+CSV_URL = (
+    f"https://docs.google.com/spreadsheets/d/"
+    f"{SHEET_ID}/export?format=csv&gid={GID}"
+)
+
+
+# =========================================================
+# DOWNLOAD ÚNICO DO CSV (COMPARTILHADO ENTRE SESSÕES)
+# =========================================================
+@cache_medido("download_planilha", st.cache_resource, ttl=20, show_spinner=False)
+def baixar_planilha_csv() -> tuple:
     """
-    Lê a planilha INTEIRA, sem filtros de data, mês ou base.
-    Qualquer filtro deve ser feito SOMENTE nas páginas.
+    Baixa o CSV bruto UMA vez para o processo inteiro (a cada 20s no máximo).
+    Retorna (versao, conteudo): a versão é o hash do conteúdo e serve de
+    chave de cache para tudo que é derivado da planilha.
     """
+    resp = requests.get(CSV_URL, timeout=30)
+    resp.raise_for_status()
 
-    SHEET_ID = "1Ir_fPugLsfHNk6iH0XPCA6xM92bq8tTrn7UnunGRwCw"
-    GID = "1574157905"
+    conteudo = resp.content
+    versao = hashlib.sha1(conteudo).hexdigest()[:16]
+
+    return versao, conteudo
+
+
+def versao_planilha() -> str:
+    """Token barato que muda somente quando o conteúdo da planilha muda."""
+    return baixar_planilha_csv()[0]
+
+
+def ler_planilha_csv(conteudo: bytes = None, **kwargs) -> pd.DataFrame:
+    """
+    pd.read_csv sobre o CSV já baixado (sem nova requisição).
+    Caches por versão passam o `conteudo` da MESMA chamada de
+    baixar_planilha_csv() que deu a versão: o download tem TTL próprio e,
+    relido aqui, poderia já ser de outra versão (dados gravados na chave errada).
+    """
+    if conteudo is None:
+        _, conteudo = baixar_planilha_csv()
+    with medir("read_csv") as m:
+        df = pd.read_csv(io.BytesIO(conteudo), **kwargs)
+        m["linhas"] = len(df)
+    return df
 
-    url = (
-        f"https://docs.google.com/spreadsheets/d/"
-        f"{SHEET_ID}/export?format=csv&gid={GID}"
-    )
 
-    df = pd.read_csv(
-        url,
+# =========================================================
+# CARREGAMENTO DA PLANILHA (SEM QUALQUER FILTRO)
+# =========================================================
+@cache_medido("planilha_bruta", st.cache_data, max_entries=2, show_spinner=False)
+def _carregar_planilha_versao(versao: str, _conteudo: bytes) -> pd.DataFrame:
+    df = ler_planilha_csv(
+        _conteudo,
         dtype=str,          # NÃO inferir tipos
         keep_default_na=False
     )
@@ -30,3 +79,204 @@ def carregar_dados_planilha(_refresh_key=None) -> pd.DataFrame:
     df.columns = df.columns.str.upper().str.strip()
 
     return df
+
+
+def carregar_dados_planilha(_refresh_key=None) -> pd.DataFrame:
+
+    """
+    Lê a planilha INTEIRA, sem filtros de data, mês ou base.
+    Qualquer filtro deve ser feito SOMENTE nas páginas.
+    Recarrega sozinha quando a versão da planilha muda.
+    """
+
+    versao, conteudo = baixar_planilha_csv()
+    return _carregar_planilha_versao(versao, conteudo)
+
+
+# =========================================================
+# TRATAMENTO PADRÃO (COLUNAS DERIVADAS)
+# =========================================================
+# DIA, DATA_BASE, DATA_BASE_LABEL, EQUIPE, CORRETOR, STATUS_BASE, VGV,
+# NOME_CLIENTE_BASE, CPF_CLIENTE_BASE e CHAVE_CLIENTE. Funções puras (sem
+# Streamlit): usadas pelas páginas e pelo benchmark em bench/.
+MESES_PTBR = {
+    "janeiro": 1,
+    "fevereiro": 2,
+    "março": 3,
+    "marco": 3,
+    "abril": 4,
+    "maio": 5,
+    "junho": 6,
+    "julho": 7,
+    "agosto": 8,
+    "setembro": 9,
+    "outubro": 10,
+    "novembro": 11,
+    "dezembro": 12,
+}
+
+
+def limpar_para_data(serie: pd.Series) -> pd.Series:
+    dt = pd.to_datetime(serie, dayfirst=True, errors="coerce")
+    return dt.dt.date
+
+
+def mes_ano_ptbr_para_date(valor: str):
+    """
+    Converte textos tipo 'novembro 2025' em date(2025, 11, 1).
+    Se não conseguir, retorna NaT.
+    """
+    if pd.isna(valor):
+        return pd.NaT
+    s = str(valor).strip().lower()
+    if not s:
+        return pd.NaT
+
+    partes = s.split()
+    try:
+        mes_txt = partes[0]
+        ano = int(partes[-1])
+        mes_num = MESES_PTBR.get(mes_txt)
+        if mes_num is None:
+            return pd.NaT
+        return datetime(ano, mes_num, 1).date()
+    except Exception:
+        return pd.NaT
+
+
+def classificar_status_base(situacao: pd.Series, aprovacao_exata: bool = True) -> pd.Series:
+    """
+    SITUAÇÃO da planilha -> STATUS_BASE. A ordem importa: a última regra
+    que casar vence (DESIST sempre por último).
+
+    aprovacao_exata=True  -> só "APROVAÇÃO" (painel principal)
+    aprovacao_exata=False -> qualquer texto com "APROV" (rankings)
+    """
+    s = situacao.fillna("").astype(str).str.upper()
+    status = pd.Series("", index=situacao.index, dtype=object)
+
+    status[s.str.contains("EM ANÁLISE")] = "EM ANÁLISE"
+    status[s.str.contains("REANÁLISE")] = "REANÁLISE"
+    if aprovacao_exata:
+        status[s.str.strip() == "APROVAÇÃO"] = "APROVADO"
+    else:
+        status[s.str.contains("APROV")] = "APROVADO"
+    status[s.str.contains("REPROV")] = "REPROVADO"
+    status[s.str.contains("VENDA GERADA")] = "VENDA GERADA"
+    status[s.str.contains("VENDA INFORMADA")] = "VENDA INFORMADA"
+    # mapeia qualquer coisa com DESIST (DESISTIU, DESISTÊNCIA etc.)
+    status[s.str.contains("DESIST")] = "DESISTIU"
+
+    return status
+
+
+def tratar_planilha(df: pd.DataFrame, aprovacao_exata: bool = True) -> pd.DataFrame:
+    """Cria as colunas derivadas sobre o CSV bruto (altera e devolve o df)."""
+    df.columns = [c.strip().upper() for c in df.columns]
+
+    # DATA / DIA
+    if "DATA" in df.columns:
+        df["DIA"] = limpar_para_data(df["DATA"])
+    elif "DIA" in df.columns:
+        df["DIA"] = limpar_para_data(df["DIA"])
+    else:
+        df["DIA"] = pd.NaT
+
+    # DATA BASE (MÊS COMERCIAL) - TEXTO IGUAL À PLANILHA + REFERÊNCIA DE DATA
+    possiveis_cols_base = [
+        "DATA BASE",
+        "DATA_BASE",
+        "DT BASE",
+        "DATA REF",
+        "DATA REFERÊNCIA",
+        "DATA REFERENCIA",
+    ]
+    col_data_base = next((c for c in possiveis_cols_base if c in df.columns), None)
+
+    if col_data_base:
+        base_raw = df[col_data_base].astype(str).str.strip()
+        df["DATA_BASE_LABEL"] = base_raw.str.lower().str.title()
+        df["DATA_BASE"] = base_raw.apply(mes_ano_ptbr_para_date)
+
+        if df["DATA_BASE"].dropna().empty:
+            df["DATA_BASE"] = df["DIA"]
+            df["DATA_BASE_LABEL"] = df["DIA"].apply(
+                lambda d: d.strftime("%m/%Y") if pd.notnull(d) else ""
+            )
+    else:
+        df["DATA_BASE"] = df["DIA"]
+        df["DATA_BASE_LABEL"] = df["DIA"].apply(
+            lambda d: d.strftime("%m/%Y") if pd.notnull(d) else ""
+        )
+
+    # EQUIPE / CORRETOR
+    for col in ["EQUIPE", "CORRETOR"]:
+        if col in df.columns:
+            df[col] = (
+                df[col]
+                .fillna("NÃO INFORMADO")
+                .astype(str)
+                .str.upper()
+                .str.strip()
+            )
+        else:
+            df[col] = "NÃO INFORMADO"
+
+    # STATUS BASE
+    possiveis_cols_situacao = [
+        "SITUAÇÃO",
+        "SITUAÇÃO ATUAL",
+        "STATUS",
+        "SITUACAO",
+        "SITUACAO ATUAL",
+    ]
+    col_situacao = next((c for c in possiveis_cols_situacao if c in df.columns), None)
+
+    with medir("classificacao_status"):
+        if col_situacao:
+            df["STATUS_BASE"] = classificar_status_base(df[col_situacao], aprovacao_exata)
+        else:
+            df["STATUS_BASE"] = ""
+
+    # VGV
+    if "OBSERVAÇÕES" in df.columns:
+        df["VGV"] = pd.to_numeric(df["OBSERVAÇÕES"], errors="coerce").fillna(0)
+    else:
+        df["VGV"] = 0.0
+
+    # NOME / CPF BASE
+    possiveis_nome = ["NOME", "CLIENTE", "NOME CLIENTE", "NOME DO CLIENTE"]
+    possiveis_cpf = ["CPF", "CPF CLIENTE", "CPF DO CLIENTE"]
+
+    col_nome = next((c for c in possiveis_nome if c in df.columns), None)
+    col_cpf = next((c for c in possiveis_cpf if c in df.columns), None)
+
+    if col_nome is None:
+        df["NOME_CLIENTE_BASE"] = "NÃO INFORMADO"
+    else:
+        df["NOME_CLIENTE_BASE"] = (
+            df[col_nome]
+            .fillna("NÃO INFORMADO")
+            .astype(str)
+            .str.upper()
+            .str.strip()
+        )
+
+    if col_cpf is None:
+        df["CPF_CLIENTE_BASE"] = ""
+    else:
+        df["CPF_CLIENTE_BASE"] = (
+            df[col_cpf]
+            .fillna("")
+            .astype(str)
+            .str.replace(r"\D", "", regex=True)
+        )
+
+    # CHAVE_CLIENTE global (nome + CPF) para todas as regras
+    df["CHAVE_CLIENTE"] = (
+        df["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO")
+        + " | "
+        + df["CPF_CLIENTE_BASE"].fillna("")
+    )
+
+    return df
@@ -0,0 +1,87 @@
+import pandas as pd
+import streamlit as st
+
+from utils.perf import cache_medido
+
+# =========================================================
+# CACHE DE RECORTES FILTRADOS (LRU COMPARTILHADO)
+# =========================================================
+# Painel, rankings, vendas e corretores refaziam a cada interação as mesmas
+# máscaras (DIA entre datas ou DATA_BASE_LABEL isin, EQUIPE, CORRETOR) e
+# copiavam o resultado. Boa parte dos usuários usa os filtros padrão.
+#
+# Aqui o recorte (e os agregados calculados em cima dele) fica num cache
+# LRU limitado, compartilhado entre sessões, com chave:
+#   (contexto da página, versão dos dados, filtro normalizado, agregado)
+# Combinações iguais são calculadas 1x por versão dos dados.
+#
+# IMPORTANTE: o objeto devolvido é compartilhado — trate como somente leitura
+# (nada de df["COL"] = ... no resultado; derive numa cópia se precisar).
+
+TAMANHO_LRU = 64
+
+
+def filtro_normalizado(periodo=None, bases=None, equipe=None, corretor=None) -> tuple:
+    """
+    Tupla estável para a chave do cache.
+    periodo  -> (data_ini, data_fim) sobre a coluna DIA
+    bases    -> labels de DATA_BASE_LABEL (a ordem não importa)
+    equipe / corretor -> "Todas" / "Todos" / None = sem filtro
+    """
+    if periodo is not None:
+        periodo = tuple(periodo)
+    if bases is not None:
+        bases = tuple(sorted(set(bases)))
+    if equipe in ("Todas", ""):
+        equipe = None
+    if corretor in ("Todos", ""):
+        corretor = None
+    return (periodo, bases, equipe, corretor)
+
+
+def aplicar_filtro(df: pd.DataFrame, filtro: tuple) -> pd.DataFrame:
+    """Uma máscara só para todos os filtros (sem cópias intermediárias)."""
+    periodo, bases, equipe, corretor = filtro
+
+    mascara = pd.Series(True, index=df.index)
+    if periodo is not None:
+        data_ini, data_fim = periodo
+        mascara &= (df["DIA"] >= data_ini) & (df["DIA"] <= data_fim)
+    if bases is not None:
+        mascara &= df["DATA_BASE_LABEL"].isin(bases)
+    if equipe is not None:
+        mascara &= df["EQUIPE"] == equipe
+    if corretor is not None:
+        mascara &= df["CORRETOR"] == corretor
+
+    return df[mascara]
+
+
+@cache_medido("recortes_filtrados", st.cache_resource, max_entries=TAMANHO_LRU, show_spinner=False)
+def _em_cache(chave: tuple, _df: pd.DataFrame, _calcular):
+    # só `chave` entra no hash: df e função são resolvidos por ela
+    return _calcular(_df)
+
+
+def recorte_filtrado(contexto, versao: str, filtro: tuple, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    `contexto` separa bases diferentes (página, perfil/escopo do usuário):
+    o mesmo filtro sobre outra base precisa de outra entrada.
+    """
+    return _em_cache(
+        (contexto, versao, filtro, "recorte"),
+        df,
+        lambda base: aplicar_filtro(base, filtro),
+    )
+
+
+def agregado_filtrado(contexto, versao: str, filtro: tuple, df: pd.DataFrame, nome: str, calcular, *params):
+    """
+    calcular(recorte, *params) em cache, ex.: o ranking de um recorte por tipo
+    de venda. `params` entram na chave (precisam ser hasheáveis).
+    """
+    return _em_cache(
+        (contexto, versao, filtro, nome, params),
+        df,
+        lambda base: calcular(recorte_filtrado(contexto, versao, filtro, base), *params),
+    )
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# FORMATAÇÃO PT-BR (COLUNA INTEIRA DE UMA VEZ)
+# =========================================================
+# Cada página tinha o seu format_currency / formata_moeda / fmt_dt / fmt_min
+# aplicados com .apply — uma chamada Python por célula, com o truque do
+# replace(",", "X") em cada valor.
+#
+# Aqui a coluna é formatada em operações de coluna (inteiros + regex de
+# milhar para moeda, .dt.strftime para datas, np.where para durações) e as
+# tabelas paginadas só formatam as linhas da página visível
+# (tabela_paginada(..., formatos={coluna: função})), ordenando pelo valor.
+#
+# Todas recebem Series (ou lista/array) e devolvem Series de texto com o
+# mesmo índice.
+
+_MILHAR = r"\B(?=(\d{3})+(?!\d))"
+
+
+def _serie(valores) -> pd.Series:
+    return valores if isinstance(valores, pd.Series) else pd.Series(valores)
+
+
+# ---------------------------------------------------------
+# MOEDA
+# ---------------------------------------------------------
+def moeda(valores) -> pd.Series:
+    """R$ 1.234,56 — vazio/NaN como R$ 0,00."""
+    s = pd.to_numeric(_serie(valores), errors="coerce")
+    centavos = np.round(s.fillna(0).to_numpy(dtype=float) * 100).astype(np.int64)
+
+    sinal = pd.Series(np.where(centavos < 0, "-", ""), index=s.index)
+    centavos = pd.Series(np.abs(centavos), index=s.index)
+    inteiros = (centavos // 100).astype(str).str.replace(_MILHAR, ".", regex=True)
+    decimais = (centavos % 100).astype(str).str.zfill(2)
+
+    return "R$ " + sinal + inteiros + "," + decimais
+
+
+def moeda_valor(valor) -> str:
+    """Um valor só (st.metric, textos)."""
+    return moeda([valor]).iloc[0]
+
+
+# ---------------------------------------------------------
+# PERCENTUAL
+# ---------------------------------------------------------
+def percentual(valores, casas: int = 1) -> pd.Series:
+    """12.5% (mesmo texto de f"{v:.1f}%")."""
+    s = pd.to_numeric(_serie(valores), errors="coerce").fillna(0)
+    texto = np.char.mod(f"%.{casas}f%%", s.to_numpy(dtype=float))
+    return pd.Series(texto, index=s.index, dtype=object)
+
+
+def inteiro(valores, vazio: str = "-") -> pd.Series:
+    """Contagens (Int64/float com NaN) como texto sem casas; NaN -> `vazio`."""
+    s = pd.to_numeric(_serie(valores), errors="coerce")
+    return s.fillna(0).astype(np.int64).astype(str).where(s.notna(), vazio)
+
+
+# ---------------------------------------------------------
+# DATAS
+# ---------------------------------------------------------
+def data_br(datas, vazio: str = "-") -> pd.Series:
+    """dd/mm/aaaa; NaT -> `vazio`."""
+    datas = pd.to_datetime(_serie(datas), errors="coerce")
+    return datas.dt.strftime("%d/%m/%Y").fillna(vazio)
+
+
+def data_br_valor(data, vazio: str = "-") -> str:
+    return data_br([data], vazio=vazio).iloc[0]
+
+
+def data_hora_br(datas, vazio: str = "") -> pd.Series:
+    """dd/mm/aaaa HH:MM; NaT -> `vazio`."""
+    datas = pd.to_datetime(_serie(datas), errors="coerce")
+    return datas.dt.strftime("%d/%m/%Y %H:%M").fillna(vazio)
+
+
+# ---------------------------------------------------------
+# DURAÇÃO (MINUTOS)
+# ---------------------------------------------------------
+def duracao_min(minutos, vazio: str = "-") -> pd.Series:
+    """'2h 5min' a partir de 60 min, '45 min' abaixo; NaN -> `vazio`."""
+    s = pd.to_numeric(_serie(minutos), errors="coerce")
+    x = s.fillna(0).astype(np.int64)  # trunca como int()
+
+    horas = (x // 60).astype(str) + "h " + (x % 60).astype(str) + "min"
+    texto = horas.where(x >= 60, x.astype(str) + " min")
+    return texto.where(s.notna(), vazio)
+
+
+def duracao_min_valor(minutos, vazio: str = "-") -> str:
+    return duracao_min([minutos], vazio=vazio).iloc[0]
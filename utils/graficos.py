@@ -0,0 +1,182 @@
+import altair as alt
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.perf import cache_medido, medir
+
+# =========================================================
+# GRÁFICOS (DADOS MÍNIMOS + SPEC EM CACHE)
+# =========================================================
+# st.altair_chart serializava no spec Vega-Lite o DataFrame inteiro que
+# recebia (ranking com colunas formatadas, linhas de registro, datas como
+# objeto), a cada rerun — inclusive no refresh de 30s das TVs.
+#
+# Aqui:
+#   - os dados do gráfico são agregados/reduzidos no servidor e só as
+#     colunas usadas nos encodings vão para o spec;
+#   - o spec pronto (dict) fica em cache por (página, versão dos dados,
+#     filtros): rerun sem mudança não monta Chart nem serializa de novo.
+#
+# st.cache_data devolve uma cópia do dict a cada chamada — necessário,
+# porque st.vega_lite_chart retira "datasets" do spec que recebe.
+
+TAMANHO_LRU = 64
+MAX_COLUNAS_HEATMAP = 62  # acima disso o mapa de calor agrupa por semana
+
+COLUNAS_BARRAS = [
+    "VGV",
+    "VENDAS",
+    "ANALISES",
+    "APROVACOES",
+    "TAXA_APROV_ANALISES",
+    "TAXA_VENDAS_ANALISES",
+]
+
+
+@cache_medido("specs_graficos", st.cache_data, max_entries=TAMANHO_LRU, show_spinner=False)
+def _spec_em_cache(chave: tuple, _montar) -> dict:
+    # só `chave` entra no hash: o gráfico é resolvido por ela
+    with medir("altair_spec"):
+        return _montar().to_dict()
+
+
+def exibir_grafico(chave: tuple, montar):
+    """
+    `chave` = (página, versão, filtros...) — tudo que muda o gráfico.
+    montar() -> alt.Chart só roda quando a chave é nova.
+    """
+    spec = _spec_em_cache(chave, montar)
+    with medir("st_vega_lite_chart"):
+        st.vega_lite_chart(spec, use_container_width=True)
+
+
+# ---------------------------------------------------------
+# MAPA DE CALOR (LINHA × DIA)
+# ---------------------------------------------------------
+def dados_heatmap(df_base: pd.DataFrame, data_ini, data_fim, linha: str = "EQUIPE"):
+    """
+    Contagem por (linha, dia) já agregada, com rótulo dd/mm e a ordem
+    cronológica do eixo. Períodos longos viram semanas (início na segunda).
+    Retorna (dados, ordem_rotulos, titulo_eixo).
+    """
+    dias = pd.to_datetime(df_base["DIA"], errors="coerce")
+    total_dias = (pd.Timestamp(data_fim) - pd.Timestamp(data_ini)).days + 1
+
+    if total_dias > MAX_COLUNAS_HEATMAP:
+        periodo = dias.dt.normalize() - pd.to_timedelta(dias.dt.weekday, unit="D")
+        prefixo, titulo = "sem. ", "Semana"
+    else:
+        periodo = dias.dt.normalize()
+        prefixo, titulo = "", "Dia"
+
+    dados = (
+        pd.DataFrame({linha: df_base[linha].to_numpy(), "PERIODO": periodo.to_numpy()})
+        .dropna(subset=["PERIODO"])
+        .groupby([linha, "PERIODO"])
+        .size()
+        .reset_index(name="QTDE")
+        .sort_values("PERIODO", kind="mergesort")
+    )
+    dados["ROTULO"] = prefixo + dados["PERIODO"].dt.strftime("%d/%m")
+    ordem = dados["ROTULO"].drop_duplicates().tolist()
+
+    return dados[[linha, "ROTULO", "QTDE"]], ordem, titulo
+
+
+def grafico_heatmap(dados: pd.DataFrame, ordem: list, titulo_x: str, linha: str = "EQUIPE",
+                    titulo_linha: str = "Equipe", altura: int = 260) -> alt.Chart:
+    return (
+        alt.Chart(dados)
+        .mark_rect()
+        .encode(
+            x=alt.X("ROTULO:N", title=titulo_x, sort=ordem),
+            y=alt.Y(f"{linha}:N", title=titulo_linha),
+            color=alt.Color("QTDE:Q", title="Qtd."),
+            tooltip=[
+                alt.Tooltip(f"{linha}:N", title=titulo_linha),
+                alt.Tooltip("ROTULO:N", title=titulo_x),
+                alt.Tooltip("QTDE:Q", title="Qtd."),
+            ],
+        )
+        .properties(height=altura)
+    )
+
+
+# ---------------------------------------------------------
+# BARRAS DE VGV (RANKINGS)
+# ---------------------------------------------------------
+def dados_barras_vgv(ranking: pd.DataFrame, chave: str) -> pd.DataFrame:
+    """Só as colunas do gráfico, com VGV em 2 casas e taxas em 1."""
+    dados = ranking[[chave] + COLUNAS_BARRAS]
+    return dados.assign(
+        VGV=dados["VGV"].round(2),
+        TAXA_APROV_ANALISES=dados["TAXA_APROV_ANALISES"].round(1),
+        TAXA_VENDAS_ANALISES=dados["TAXA_VENDAS_ANALISES"].round(1),
+    )
+
+
+def grafico_barras_vgv(dados: pd.DataFrame, chave: str, titulo: str, altura: int = 500) -> alt.Chart:
+    return (
+        alt.Chart(dados)
+        .mark_bar()
+        .encode(
+            x=alt.X(f"{chave}:N", sort="-y", title=titulo),
+            y=alt.Y("VGV:Q", title="VGV"),
+            tooltip=[
+                alt.Tooltip(f"{chave}:N", title=titulo),
+                alt.Tooltip("VGV:Q", title="VGV", format=",.2f"),
+                alt.Tooltip("VENDAS:Q", title="Vendas"),
+                alt.Tooltip("ANALISES:Q", title="Análises"),
+                alt.Tooltip("APROVACOES:Q", title="Aprovações"),
+                alt.Tooltip("TAXA_APROV_ANALISES:Q", title="% Aprov./Análises", format=".1f"),
+                alt.Tooltip("TAXA_VENDAS_ANALISES:Q", title="% Vendas/Análises", format=".1f"),
+            ],
+        )
+        .properties(height=altura)
+    )
+
+
+# ---------------------------------------------------------
+# LINHAS ACUMULADAS (META x REAL)
+# ---------------------------------------------------------
+def pontos_essenciais(valores) -> np.ndarray:
+    """
+    Máscara dos pontos que definem a linha: tira os pontos do meio de
+    trechos retos (segunda diferença zero), como dias sem produção no
+    acumulado ou a reta da meta linear. O desenho da linha não muda.
+    """
+    valores = np.asarray(valores, dtype=float)
+    manter = np.ones(len(valores), dtype=bool)
+    if len(valores) > 2:
+        curvatura = valores[:-2] - 2 * valores[1:-1] + valores[2:]
+        manter[1:-1] = ~np.isclose(curvatura, 0)
+    return manter
+
+
+def dados_linhas(series: dict) -> pd.DataFrame:
+    """series: nome -> (dias, valores). Cada série só com os pontos essenciais."""
+    partes = []
+    for nome, (dias, valores) in series.items():
+        manter = pontos_essenciais(valores)
+        partes.append(
+            pd.DataFrame({
+                "DIA": pd.to_datetime(np.asarray(dias)[manter]),
+                "Série": nome,
+                "Valor": np.round(np.asarray(valores, dtype=float)[manter], 2),
+            })
+        )
+    return pd.concat(partes, ignore_index=True)
+
+
+def grafico_linhas(dados: pd.DataFrame, titulo_y: str = "Total acumulado", altura: int = 360) -> alt.Chart:
+    return (
+        alt.Chart(dados)
+        .mark_line(point=True)
+        .encode(
+            x=alt.X("DIA:T", title="Dia"),
+            y=alt.Y("Valor:Q", title=titulo_y),
+            color=alt.Color("Série:N", title=""),
+        )
+        .properties(height=altura)
+    )
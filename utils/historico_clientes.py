@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.perf import medir
+
+# =========================================================
+# HISTÓRICO POR CLIENTE (PRÉ-CALCULADO POR VERSÃO)
+# =========================================================
+# A base é ordenada UMA vez por (CHAVE_CLIENTE, DIA). Cada cliente vira um
+# intervalo [INICIO, FIM) dessa ordem, e os campos que os cards exibem
+# (última construtora/empreendimento/corretor, última observação válida,
+# contagens de análise...) já saem calculados. Cada card custa O(1).
+
+STATUS_ANALISE = ["EM ANÁLISE", "REANÁLISE"]
+STATUS_VENDA = ["VENDA GERADA", "VENDA INFORMADA"]
+
+
+def chave_cliente(df: pd.DataFrame) -> pd.Series:
+    return (
+        df["NOME_CLIENTE_BASE"].fillna("NÃO INFORMADO")
+        + " | "
+        + df["CPF_CLIENTE_BASE"].fillna("")
+    )
+
+
+def observacao_e_numero(obs: pd.Series) -> pd.Series:
+    """Observações que são só número (VGV digitado no campo de observação)."""
+    t = (
+        obs.fillna("")
+        .astype(str)
+        .str.upper()
+        .str.replace(r"R\$|[., ]", "", regex=True)
+    )
+    return t.str.isdigit()
+
+
+def construir_historico(df: pd.DataFrame) -> dict:
+    chaves = chave_cliente(df)
+    if df.empty:
+        return {"ordem": np.array([], dtype=np.int64), "resumo": pd.DataFrame()}
+
+    ordem = (
+        pd.DataFrame({"CHAVE": chaves.to_numpy(), "DIA": df["DIA"].to_numpy()})
+        .sort_values(["CHAVE", "DIA"], kind="mergesort", na_position="last")
+        .index.to_numpy()
+    )
+    ord_df = df.iloc[ordem]
+    ord_chaves = chaves.to_numpy()[ordem]
+
+    # limites de cada cliente dentro da ordem
+    novo = np.ones(len(ord_chaves), dtype=bool)
+    novo[1:] = ord_chaves[1:] != ord_chaves[:-1]
+    inicio = np.flatnonzero(novo)
+    fim = np.append(inicio[1:], len(ord_chaves))
+    ultima = fim - 1
+
+    status = ord_df["STATUS_BASE"].to_numpy()
+    grupo = np.cumsum(novo) - 1
+
+    def _contar(mascara):
+        return np.bincount(grupo[mascara], minlength=len(inicio))
+
+    def _ultimo(coluna, padrao="NÃO INFORMADO"):
+        if coluna not in ord_df.columns:
+            return np.full(len(inicio), padrao, dtype=object)
+        return ord_df[coluna].to_numpy()[ultima]
+
+    # última observação válida (não vazia e não numérica)
+    ult_obs = np.full(len(inicio), "", dtype=object)
+    if "OBSERVACOES_RAW" in ord_df.columns:
+        obs = ord_df["OBSERVACOES_RAW"].fillna("").astype(str)
+        valida = (obs != "") & ~observacao_e_numero(obs)
+        posicoes_validas = np.flatnonzero(valida.to_numpy())
+        if len(posicoes_validas):
+            # para cada cliente, a última posição válida antes do fim
+            idx = np.searchsorted(posicoes_validas, fim) - 1
+            ok = (idx >= 0) & (posicoes_validas[np.maximum(idx, 0)] >= inicio)
+            ult_obs[ok] = obs.to_numpy()[posicoes_validas[idx[ok]]]
+
+    analises_em = _contar(status == "EM ANÁLISE")
+    reanalises = _contar(status == "REANÁLISE")
+    if "VGV" in ord_df.columns:
+        vgv = np.bincount(grupo, weights=ord_df["VGV"].to_numpy(dtype=float), minlength=len(inicio))
+    else:
+        vgv = np.zeros(len(inicio))
+
+    resumo = pd.DataFrame(
+        {
+            "NOME": ord_df["NOME_CLIENTE_BASE"].to_numpy()[inicio],
+            "CPF": ord_df["CPF_CLIENTE_BASE"].to_numpy()[inicio],
+            "ANALISES": analises_em + reanalises,
+            "ANALISES_EM": analises_em,
+            "REANALISES": reanalises,
+            "APROVACOES": _contar(status == "APROVADO"),
+            "VENDAS": _contar(np.isin(status, STATUS_VENDA)),
+            "VGV": vgv,
+            "ULT_STATUS": _ultimo("SITUACAO_ORIGINAL", ""),
+            "ULT_DATA": ord_df.groupby(grupo)["DIA"].max().to_numpy(),
+            "ULT_CONSTRUTORA": _ultimo("CONSTRUTORA_BASE"),
+            "ULT_EMPREENDIMENTO": _ultimo("EMPREENDIMENTO_BASE"),
+            "ULT_CORRETOR": _ultimo("CORRETOR"),
+            "ULT_OBS": ult_obs,
+            "INICIO": inicio,
+            "FIM": fim,
+        },
+        index=pd.Index(ord_chaves[inicio], name="CHAVE_CLIENTE"),
+    )
+
+    return {"ordem": ordem, "resumo": resumo}
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def historico_clientes(chave: tuple, _df: pd.DataFrame) -> dict:
+    """`chave` = (página, versão da planilha); o df não entra no hash."""
+    with medir("historico_clientes (montagem)", linhas=len(_df)):
+        return construir_historico(_df)
+
+
+def resumo_dos_clientes(historico: dict, chaves) -> pd.DataFrame:
+    """Linhas do resumo (uma por cliente) para as chaves informadas."""
+    resumo = historico["resumo"]
+    return resumo[resumo.index.isin(list(chaves))].reset_index()
+
+
+def linhas_do_cliente(historico: dict, info) -> np.ndarray:
+    """Posições (para df.iloc) do histórico do cliente, já em ordem de DIA."""
+    return historico["ordem"][int(info["INICIO"]):int(info["FIM"])]
@@ -0,0 +1,166 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# INDICADORES COMERCIAIS (REGRAS COMPARTILHADAS)
+# =========================================================
+# Funções puras sobre a base já tratada (utils.data_loader.tratar_planilha).
+# Sem Streamlit: as páginas chamam estas funções e o benchmark em bench/
+# mede exatamente o mesmo código.
+
+STATUS_ANALISE = ["EM ANÁLISE", "REANÁLISE"]
+
+
+# ---------------------------------------------------------
+# STATUS FINAL DO CLIENTE (HISTÓRICO COMPLETO)
+# ---------------------------------------------------------
+def calcular_status_final(df: pd.DataFrame) -> pd.Series:
+    """Último STATUS_BASE de cada CHAVE_CLIENTE, por ordem de DIA."""
+    status_final = (
+        df.sort_values("DIA").groupby("CHAVE_CLIENTE")["STATUS_BASE"].last().fillna("")
+    )
+    status_final.name = "STATUS_FINAL_CLIENTE"
+    return status_final
+
+
+# ---------------------------------------------------------
+# ÚLTIMA LINHA POR CHAVE (ORDENA UMA VEZ)
+# ---------------------------------------------------------
+def ultima_linha_por_chave(df: pd.DataFrame, chaves, ordem: str = "DIA") -> pd.DataFrame:
+    """
+    Última linha (por `ordem`) de cada combinação de `chaves`, numa passada só:
+    ordenação estável + drop_duplicates, sem apply por grupo.
+    Empate na data fica com a linha que vem depois na planilha.
+    """
+    chaves = [chaves] if isinstance(chaves, str) else list(chaves)
+    return (
+        df.sort_values(ordem, kind="mergesort")
+        .drop_duplicates(subset=chaves, keep="last")
+        .sort_values(chaves, kind="mergesort")
+        .reset_index(drop=True)
+    )
+
+
+# ---------------------------------------------------------
+# VENDAS ÚNICAS (REGRA DO DESISTIU)
+# ---------------------------------------------------------
+def vendas_unicas(df: pd.DataFrame, status_final, status_venda=("VENDA GERADA",)) -> pd.DataFrame:
+    """
+    1 venda por cliente (o último registro de venda do recorte), excluindo
+    clientes cujo status final no histórico completo é DESISTIU.
+    `status_final` pode ser Series ou dict CHAVE_CLIENTE -> status.
+    """
+    df_v = df[df["STATUS_BASE"].isin(list(status_venda))]
+    if df_v.empty:
+        return df_v
+
+    final = df_v["CHAVE_CLIENTE"].map(status_final)
+    df_v = df_v[final != "DESISTIU"]
+
+    return df_v.sort_values("DIA").groupby("CHAVE_CLIENTE").tail(1)
+
+
+# ---------------------------------------------------------
+# RANKING (CORRETOR / EQUIPE)
+# ---------------------------------------------------------
+def ranking_por(df_ref: pd.DataFrame, status_final, chave: str, status_venda) -> pd.DataFrame:
+    """
+    Análises (EM ANÁLISE + REANÁLISE), aprovações, vendas únicas e VGV por
+    `chave`, com taxas e ordenação VGV > VENDAS > APROVACOES > ANALISES.
+    """
+    analises = df_ref[df_ref["STATUS_BASE"].isin(STATUS_ANALISE)].groupby(chave).size().rename("ANALISES")
+    aprovacoes = df_ref[df_ref["STATUS_BASE"] == "APROVADO"].groupby(chave).size().rename("APROVACOES")
+
+    df_vendas = vendas_unicas(df_ref, status_final, status_venda)
+    vendas = df_vendas.groupby(chave).size().rename("VENDAS")
+    vgv = df_vendas.groupby(chave)["VGV"].sum().rename("VGV")
+
+    ranking = (
+        pd.concat([analises, aprovacoes, vendas, vgv], axis=1)
+        .fillna(0)
+        .rename_axis(chave)
+        .reset_index()
+    )
+    if ranking.empty:
+        return ranking
+
+    ranking["ANALISES"] = ranking["ANALISES"].astype(int)
+    ranking["APROVACOES"] = ranking["APROVACOES"].astype(int)
+    ranking["VENDAS"] = ranking["VENDAS"].astype(int)
+    ranking["VGV"] = ranking["VGV"].astype(float)
+
+    ranking["TAXA_APROV_ANALISES"] = np.where(
+        ranking["ANALISES"] > 0,
+        ranking["APROVACOES"] / ranking["ANALISES"] * 100,
+        0.0,
+    )
+    ranking["TAXA_VENDAS_ANALISES"] = np.where(
+        ranking["ANALISES"] > 0,
+        ranking["VENDAS"] / ranking["ANALISES"] * 100,
+        0.0,
+    )
+
+    ranking = ranking.sort_values(
+        by=["VGV", "VENDAS", "APROVACOES", "ANALISES"],
+        ascending=[False, False, False, False],
+    ).reset_index(drop=True)
+
+    medalhas = {1: "🥇 1º", 2: "🥈 2º", 3: "🥉 3º"}
+    ranking["POSICAO"] = [medalhas.get(i, f"{i}º") for i in range(1, len(ranking) + 1)]
+
+    return ranking
+
+
+# ---------------------------------------------------------
+# FUNIL / META (MÉDIA DAS BASES ANTERIORES)
+# ---------------------------------------------------------
+def total_por_tipo(df, tipo, status_final_map, modo="volume"):
+    """
+    modo:
+      - "volume": análises = EM ANÁLISE + REANÁLISE
+      - "realizado": análises = APENAS EM ANÁLISE
+    """
+    if df.empty:
+        return 0
+
+    if tipo == "Número de Análises":
+        if modo == "realizado":
+            return int((df["STATUS_BASE"] == "EM ANÁLISE").sum())
+        return int(df["STATUS_BASE"].isin(STATUS_ANALISE).sum())
+
+    if tipo == "Número de Aprovações":
+        return int((df["STATUS_BASE"] == "APROVADO").sum())
+
+    return int(len(vendas_unicas(df, status_final_map)))
+
+
+def bases_anteriores(df_scope, base_ref, n=3):
+    """
+    Retorna as N DATA_BASE_LABEL imediatamente anteriores à base_ref (DATA_BASE datetime).
+    """
+    if df_scope.empty or "DATA_BASE" not in df_scope.columns:
+        return []
+
+    uniq = (
+        df_scope[["DATA_BASE", "DATA_BASE_LABEL"]]
+        .dropna()
+        .drop_duplicates()
+        .sort_values("DATA_BASE")
+        .reset_index(drop=True)
+    )
+
+    prev = uniq[uniq["DATA_BASE"] < base_ref]
+    labels = prev["DATA_BASE_LABEL"].tolist()
+
+    return labels[-n:] if labels else []
+
+
+def meta_historica(df_scope, labels_base, tipo, status_final_map) -> int:
+    """Média (arredondada para cima) do volume nas bases informadas."""
+    valores = [
+        total_por_tipo(df_scope[df_scope["DATA_BASE_LABEL"] == lab], tipo, status_final_map, modo="volume")
+        for lab in labels_base
+    ]
+    return int(math.ceil(np.mean(valores))) if valores else 0
@@ -4,6 +4,8 @@ from pathlib import Path
 from datetime import datetime
 import pandas as pd
 
+from utils.visoes import visao
+
 # =================================================
 # CAMINHOS DOS DADOS
 # =================================================
@@ -54,7 +56,7 @@ def processar_eventos(df: pd.DataFrame):
     notificacoes = _ler_json(ARQ_NOTIFICACOES)
     snapshot = _ler_json(ARQ_SNAPSHOT)
 
-    df = df.copy()
+    df = visao(df)
 
     df["STATUS_BASE"] = df["STATUS_BASE"].astype(str).str.upper().str.strip()
     df["CORRETOR"] = df["CORRETOR"].astype(str).str.upper().str.strip()
@@ -70,6 +72,7 @@ def processar_eventos(df: pd.DataFrame):
     )
 
     novo_snapshot = {}
+    houve_notificacao = False
 
     for _, row in ultimos.iterrows():
         chave = row["CHAVE_CLIENTE"]
@@ -87,6 +90,7 @@ def processar_eventos(df: pd.DataFrame):
         # CLIENTE NOVO
         # -------------------------
         if not estado_antigo:
+            houve_notificacao = True
             notificacoes[corretor].append({
                 "id": str(uuid.uuid4()),
                 "cliente": cliente,
@@ -100,6 +104,7 @@ def processar_eventos(df: pd.DataFrame):
         # MUDANÇA DE STATUS
         # -------------------------
         elif estado_antigo.get("status") != status_atual:
+            houve_notificacao = True
             notificacoes[corretor].append({
                 "id": str(uuid.uuid4()),
                 "cliente": cliente,
@@ -119,7 +124,10 @@ def processar_eventos(df: pd.DataFrame):
         }
 
     # -------------------------
-    # Persistência
+    # Persistência (só grava o que mudou: o mtime do JSON de
+    # notificações é usado como versão pelas páginas)
     # -------------------------
-    _salvar_json(ARQ_NOTIFICACOES, notificacoes)
-    _salvar_json(ARQ_SNAPSHOT, novo_snapshot)
+    if houve_notificacao:
+        _salvar_json(ARQ_NOTIFICACOES, notificacoes)
+    if novo_snapshot != snapshot:
+        _salvar_json(ARQ_SNAPSHOT, novo_snapshot)
@@ -0,0 +1,82 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# ELEGIBILIDADE DE LEADS – OFERTA ATIVA
+# =========================================================
+# As regras ficavam espalhadas em carregar_leads_oferta: três
+# str.contains em ORIGEM e, para cada palavra de finalização, mais dois
+# (ORIGEM e CAMPANHA) reatribuindo o df — ~13 varreduras da coluna.
+#
+# Aqui as regras são dados (REGRAS_OFERTA_ATIVA). Os termos de exclusão
+# de cada coluna viram UM padrão combinado, avaliado uma vez por valor
+# DISTINTO da coluna (origens/campanhas se repetem muito) e espalhado
+# para as linhas pelos códigos do factorize: o custo não cresce com o
+# número de regras nem com o de linhas repetidas.
+#
+# Janela de datas e corretor são os filtros da página, aplicados por
+# recorte_oferta() sobre a base já elegível.
+
+PALAVRAS_FINALIZACAO = ["VENDA", "COMPROU", "CLIENTE", "FINALIZ", "CONCLU"]
+
+REGRAS_OFERTA_ATIVA = {
+    # coluna -> termos (maiúsculos, "contém"): a linha sai se qualquer um aparecer
+    "excluir": {
+        "ORIGEM": ["CARTEIRA", "INDICA", "IMPULSIONAMENTO CORRETOR"] + PALAVRAS_FINALIZACAO,
+        "CAMPANHA": PALAVRAS_FINALIZACAO,
+    },
+    "coluna_data": "DATA_CAPTURA",
+    "coluna_corretor": "CORRETOR",
+}
+
+
+def compilar_regras(regras: dict) -> dict:
+    """coluna -> padrão único com todos os termos de exclusão da coluna."""
+    return {
+        coluna: re.compile("|".join(re.escape(t) for t in termos))
+        for coluna, termos in regras["excluir"].items()
+        if termos
+    }
+
+
+PADROES_OFERTA_ATIVA = compilar_regras(REGRAS_OFERTA_ATIVA)
+
+
+def _bate(valores: pd.Series, padrao: re.Pattern) -> np.ndarray:
+    """Padrão avaliado nos valores distintos e espalhado para as linhas."""
+    codigos, unicos = pd.factorize(valores.fillna("").astype(str))
+    por_valor = np.fromiter((padrao.search(v) is not None for v in unicos), dtype=bool, count=len(unicos))
+    return por_valor[codigos]
+
+
+def mascara_excluidos(df: pd.DataFrame, padroes: dict = PADROES_OFERTA_ATIVA) -> np.ndarray:
+    """True nas linhas que alguma regra de exclusão pega."""
+    excluir = np.zeros(len(df), dtype=bool)
+    for coluna, padrao in padroes.items():
+        if coluna in df.columns:
+            excluir |= _bate(df[coluna], padrao)
+    return excluir
+
+
+def elegiveis(df: pd.DataFrame, padroes: dict = PADROES_OFERTA_ATIVA) -> pd.DataFrame:
+    return df[~mascara_excluidos(df, padroes)]
+
+
+def _dias(datas: pd.Series) -> pd.Series:
+    """Data do dia, sem fuso (horário local do CRM), comparável com date_input."""
+    if not pd.api.types.is_datetime64_any_dtype(datas):
+        datas = pd.to_datetime(datas, errors="coerce")
+    if getattr(datas.dt, "tz", None) is not None:
+        datas = datas.dt.tz_localize(None)
+    return datas.dt.normalize()
+
+
+def recorte_oferta(df: pd.DataFrame, data_ini, data_fim, corretor=None, regras: dict = REGRAS_OFERTA_ATIVA) -> pd.DataFrame:
+    """Janela de datas (dias inteiros, inclusive) + corretor (None/"Todos" = todos)."""
+    datas = _dias(df[regras["coluna_data"]])
+    mascara = (datas >= pd.Timestamp(data_ini)) & (datas <= pd.Timestamp(data_fim))
+    if corretor and corretor != "Todos":
+        mascara &= df[regras["coluna_corretor"]] == corretor
+    return df[mascara]
@@ -0,0 +1,58 @@
+import math
+
+import streamlit as st
+
+# =========================================================
+# PAGINAÇÃO DE CARDS
+# =========================================================
+# As páginas de clientes montam um bloco de elementos por cliente. Com
+# buscas amplas ("SILVA") ou backlog grande do CRM isso vira centenas de
+# elementos por rerun. Aqui só se calcula o intervalo da página visível:
+# quem chama fatia o resultado e monta apenas esses cards.
+
+POR_PAGINA_PADRAO = 20
+
+
+def paginar(total: int, chave: str, por_pagina: int = POR_PAGINA_PADRAO, assinatura=None) -> tuple:
+    """
+    Mostra o seletor de página + "Mostrando X–Y de Z" e devolve (inicio, fim)
+    para fatiar o resultado (iloc[inicio:fim]).
+
+    `chave` identifica o paginador no session_state.
+    `assinatura` (termo de busca, filtros...) volta para a página 1 quando muda.
+    """
+    if total <= por_pagina:
+        if total:
+            st.caption(f"Mostrando **{total}** de **{total}**")
+        return 0, total
+
+    n_paginas = math.ceil(total / por_pagina)
+    chave_pagina = f"pagina_{chave}"
+    chave_assinatura = f"pagina_{chave}_assinatura"
+
+    # nova busca/filtro (ou resultado menor que a página guardada) -> página 1
+    if (
+        st.session_state.get(chave_assinatura) != assinatura
+        or st.session_state.get(chave_pagina, 1) > n_paginas
+    ):
+        st.session_state[chave_pagina] = 1
+        st.session_state[chave_assinatura] = assinatura
+
+    col_pag, col_info = st.columns([1, 3])
+    with col_pag:
+        pagina = st.number_input(
+            f"Página (de {n_paginas})",
+            min_value=1,
+            max_value=n_paginas,
+            step=1,
+            key=chave_pagina,
+        )
+
+    inicio = (int(pagina) - 1) * por_pagina
+    fim = min(inicio + por_pagina, total)
+
+    with col_info:
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.caption(f"Mostrando **{inicio + 1}–{fim}** de **{total}**")
+
+    return inicio, fim
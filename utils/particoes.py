@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.perf import medir
+
+# =========================================================
+# ÍNDICE DE PARTIÇÕES (CORRETOR / EQUIPE)
+# =========================================================
+# A maioria das sessões é de corretor, e cada rerun fazia
+# df[df["CORRETOR"] == nome] varrendo a empresa inteira.
+# O índice guarda, por versão da planilha, valor -> posições das linhas
+# de cada coluna de partição. A sessão pega a sua fatia com df.iloc,
+# em O(linhas próprias).
+
+COLUNAS_PARTICAO = ("CORRETOR", "EQUIPE")
+
+
+def construir_particoes(df: pd.DataFrame, colunas=COLUNAS_PARTICAO) -> dict:
+    return {
+        col: df.groupby(col, sort=False).indices
+        for col in colunas
+        if col in df.columns
+    }
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def indice_particoes(chave: tuple, _df: pd.DataFrame) -> dict:
+    """
+    `chave` = (página, versão da planilha): é o que invalida o índice.
+    O df não entra no hash; as posições valem para o df montado na mesma versão.
+    """
+    with medir("indice_particoes (montagem)", linhas=len(_df)):
+        return construir_particoes(_df)
+
+
+def posicoes_particao(indice: dict, coluna: str, valor) -> np.ndarray:
+    """Posições (para df.iloc) das linhas com coluna == valor."""
+    return indice[coluna].get(valor, np.array([], dtype=np.int64))
+
+
+def fatiar(df: pd.DataFrame, indice: dict, **filtros) -> pd.DataFrame:
+    """
+    Linhas de `df` que atendem TODOS os filtros coluna=valor,
+    ex.: fatiar(df, indice, EQUIPE="ALFA", CORRETOR="FULANO").
+    """
+    posicoes = None
+    for coluna, valor in filtros.items():
+        atuais = posicoes_particao(indice, coluna, valor)
+        posicoes = atuais if posicoes is None else np.intersect1d(posicoes, atuais)
+    if posicoes is None:
+        return df
+    return df.iloc[np.sort(posicoes)]
@@ -0,0 +1,247 @@
+import io
+import multiprocessing
+import os
+import pickle
+import re
+import subprocess
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import streamlit as st
+from fpdf import FPDF
+
+from utils.perf import cache_medido, medir
+from utils.tabelas import impressao
+
+# =========================================================
+# PDF DE LEADS PARA LIGAÇÃO (NOME | TELEFONE | INFORMAÇÕES)
+# =========================================================
+# Oferta Ativa e Corretores tinham cada um o seu gerar_pdf: iterrows() +
+# limpar_texto_pdf célula a célula, e o PDF era montado a cada rerun
+# (em Corretores, sempre que havia corretor selecionado), mesmo sem
+# ninguém baixar.
+#
+# Aqui:
+#   - nada é montado até o clique em "Gerar PDF"; o pedido fica na sessão
+#     enquanto o filtro não muda;
+#   - os bytes ficam em cache por (tabela, versão do conteúdo, filtro) —
+#     mesmo recorte em outra sessão/rerun não gera de novo;
+#   - os textos são limpos em coluna (latin-1, corte de tamanho) e as
+#     páginas são escritas bloco a bloco a partir das listas.
+#
+# Lote por corretor (Oferta Ativa): um PDF por corretor, devolvidos num
+# único ZIP. Em série até MIN_LEADS_POOL; acima disso, num pool de
+# processos (o FPDF é Python puro, preso ao GIL) aberto num subprocesso
+# `python -m utils.pdf_leads`. O pool não pode nascer do servidor: no
+# Streamlit o __main__ é a página, e cada worker do spawn rodaria a página
+# de novo (CRM, st.*) antes de escrever o primeiro PDF.
+
+LINHAS_POR_PAGINA = 33  # máximo que cabe no A4 com o cabeçalho
+ALTURA_LINHA = 8
+COL_NOME, COL_TEL, COL_OBS = 70, 40, 80
+MAX_NOME, MAX_TEL = 40, 20
+TAMANHO_LRU = 16
+# ~0,15 ms por lead em série; subir o subprocesso + workers (pandas, fpdf)
+# custa ~1,5 s cada. Abaixo disso o pool custa mais do que economiza.
+MIN_LEADS_POOL = 20_000
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def textos_pdf(valores: pd.Series, limite: int) -> list:
+    """Coluna -> lista de textos latin-1 (fonte Arial do FPDF), já cortados."""
+    return (
+        valores.fillna("")
+        .astype(str)
+        .str.encode("latin-1", errors="ignore")
+        .str.decode("latin-1")
+        .str[:limite]
+        .tolist()
+    )
+
+
+def _cabecalho(pdf: FPDF, titulo):
+    pdf.add_page()
+    if titulo:
+        pdf.set_font("Arial", "B", 11)
+        pdf.cell(0, ALTURA_LINHA, textos_pdf(pd.Series([titulo]), 120)[0])
+        pdf.ln()
+    pdf.set_font("Arial", "B", 10)
+    pdf.cell(COL_NOME, ALTURA_LINHA, "NOME", border=1)
+    pdf.cell(COL_TEL, ALTURA_LINHA, "TELEFONE", border=1)
+    pdf.cell(COL_OBS, ALTURA_LINHA, "INFORMAÇÕES", border=1)
+    pdf.ln()
+    pdf.set_font("Arial", size=9)
+
+
+def _escrever(nomes: list, telefones: list, titulo=None) -> bytes:
+    pdf = FPDF(orientation="P", unit="mm", format="A4")
+    pdf.set_auto_page_break(auto=True, margin=10)
+
+    por_pagina = LINHAS_POR_PAGINA - (1 if titulo else 0)
+    for i in range(0, max(len(nomes), 1), por_pagina):
+        _cabecalho(pdf, titulo)
+        for nome, telefone in zip(nomes[i:i + por_pagina], telefones[i:i + por_pagina]):
+            pdf.cell(COL_NOME, ALTURA_LINHA, nome, border=1)
+            pdf.cell(COL_TEL, ALTURA_LINHA, telefone, border=1)
+            pdf.cell(COL_OBS, ALTURA_LINHA, "", border=1)
+            pdf.ln()
+
+    return bytes(pdf.output())
+
+
+def _escrever_tarefa(tarefa: tuple) -> bytes:
+    # função de módulo: é o que o pool de processos consegue serializar
+    return _escrever(*tarefa)
+
+
+def escrever_pdf_leads(df_pdf: pd.DataFrame, titulo=None) -> bytes:
+    """df_pdf com NOME e TELEFONE; INFORMAÇÕES sai em branco para anotação."""
+    return _escrever(
+        textos_pdf(df_pdf["NOME"], MAX_NOME),
+        textos_pdf(df_pdf["TELEFONE"], MAX_TEL),
+        titulo,
+    )
+
+
+# ---------------------------------------------------------
+# LOTE: UM PDF POR CORRETOR (ZIP)
+# ---------------------------------------------------------
+def _nome_arquivo(corretor: str) -> str:
+    nome = re.sub(r"[^0-9A-Za-zÀ-ÿ]+", "_", corretor or "SEM CORRETOR").strip("_")
+    return f"leads_{nome or 'SEM_CORRETOR'}.pdf"
+
+
+def escrever_zip_por_corretor(df_pdf: pd.DataFrame, titulo: str = "LEADS", max_processos=None) -> bytes:
+    """
+    df_pdf com CORRETOR, NOME e TELEFONE. Um PDF por corretor (título
+    "<titulo> - <CORRETOR>"), em paralelo quando há corretores suficientes.
+    """
+    corretores = df_pdf["CORRETOR"].fillna("").astype(str)
+    nomes = pd.Series(textos_pdf(df_pdf["NOME"], MAX_NOME), index=df_pdf.index)
+    telefones = pd.Series(textos_pdf(df_pdf["TELEFONE"], MAX_TEL), index=df_pdf.index)
+
+    arquivos, tarefas = [], []
+    for corretor, idx in corretores.groupby(corretores, sort=True).groups.items():
+        arquivos.append(_nome_arquivo(corretor))
+        tarefas.append((
+            nomes.loc[idx].tolist(),
+            telefones.loc[idx].tolist(),
+            f"{titulo} - {corretor or 'SEM CORRETOR'}",
+        ))
+
+    processos = min(max_processos or os.cpu_count() or 1, len(tarefas))
+    if len(df_pdf) < MIN_LEADS_POOL or processos < 2:
+        pdfs = [_escrever_tarefa(t) for t in tarefas]
+    else:
+        pdfs = _escrever_em_subprocesso(tarefas, processos)
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for arquivo, conteudo in zip(arquivos, pdfs):
+            zf.writestr(arquivo, conteudo)
+    return buffer.getvalue()
+
+
+def _escrever_em_subprocesso(tarefas: list, processos: int) -> list:
+    """Tarefas vão por stdin e os PDFs voltam por stdout (pickle, só entre nós)."""
+    resultado = subprocess.run(
+        [sys.executable, "-m", "utils.pdf_leads", str(processos)],
+        input=pickle.dumps(tarefas),
+        capture_output=True,
+        cwd=RAIZ,
+        check=True,
+    )
+    return pickle.loads(resultado.stdout)
+
+
+def _escrever_em_pool(tarefas: list, processos: int) -> list:
+    # spawn: fork de um processo com threads pode travar; aqui o __main__ é
+    # este módulo (-m), então os workers só importam utils.pdf_leads
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as pool:
+        return list(pool.map(_escrever_tarefa, tarefas))
+
+
+@cache_medido("pdf_leads", st.cache_resource, max_entries=TAMANHO_LRU, show_spinner=False)
+def _pdf_em_cache(chave: tuple, _df_pdf: pd.DataFrame, _titulo) -> bytes:
+    # só `chave` entra no hash; bytes são imutáveis, podem ser compartilhados
+    with medir("pdf_leads (geração)", linhas=len(_df_pdf)):
+        return escrever_pdf_leads(_df_pdf, _titulo)
+
+
+@cache_medido("zip_leads_corretores", st.cache_resource, max_entries=4, show_spinner=False)
+def _zip_em_cache(chave: tuple, _df_pdf: pd.DataFrame, _titulo) -> bytes:
+    with medir("zip_leads_corretores (geração)", linhas=len(_df_pdf)):
+        return escrever_zip_por_corretor(_df_pdf, _titulo)
+
+
+def _pedido(chave: str, filtro: tuple, rotulo: str) -> bool:
+    """True quando o botão foi clicado para este mesmo filtro (nesta ou numa interação anterior)."""
+    pedido = f"pdf_pedido_{chave}"
+    if st.button(rotulo, key=f"pdf_gerar_{chave}"):
+        st.session_state[pedido] = filtro
+    return st.session_state.get(pedido) == filtro
+
+
+def exportar_pdf_leads(
+    chave: str,
+    filtro: tuple,
+    montar_df,
+    nome_arquivo: str,
+    titulo=None,
+    rotulo: str = "📄 Gerar PDF",
+):
+    """
+    Botão "Gerar PDF" + download, sem custo enquanto ninguém pede.
+
+    `chave`     identifica a exportação (widgets e cache) — única na página.
+    `filtro`    tupla com tudo que define o recorte (datas, corretor...);
+                mudou o filtro, o pedido anterior deixa de valer.
+    montar_df() -> DataFrame com NOME e TELEFONE; só roda após o pedido.
+    """
+    if not _pedido(chave, filtro, rotulo):
+        return
+
+    df_pdf = montar_df()[["NOME", "TELEFONE"]]
+    pdf_bytes = _pdf_em_cache((chave, impressao(df_pdf), filtro), df_pdf, titulo)
+
+    st.download_button(
+        "⬇️ Baixar PDF",
+        data=pdf_bytes,
+        file_name=nome_arquivo,
+        mime="application/pdf",
+        key=f"pdf_baixar_{chave}",
+    )
+
+
+def exportar_zip_por_corretor(
+    chave: str,
+    filtro: tuple,
+    montar_df,
+    nome_arquivo: str,
+    titulo: str = "LEADS",
+    rotulo: str = "📦 Gerar ZIP (um PDF por corretor)",
+):
+    """Como exportar_pdf_leads, mas montar_df() traz CORRETOR e sai um ZIP."""
+    if not _pedido(chave, filtro, rotulo):
+        return
+
+    df_pdf = montar_df()[["CORRETOR", "NOME", "TELEFONE"]]
+    with st.spinner("Gerando os PDFs dos corretores..."):
+        zip_bytes = _zip_em_cache((chave, impressao(df_pdf), filtro), df_pdf, titulo)
+
+    st.download_button(
+        "⬇️ Baixar ZIP",
+        data=zip_bytes,
+        file_name=nome_arquivo,
+        mime="application/zip",
+        key=f"pdf_baixar_{chave}",
+    )
+
+
+if __name__ == "__main__":
+    # entrada do subprocesso de escrever_zip_por_corretor
+    tarefas = pickle.loads(sys.stdin.buffer.read())
+    sys.stdout.buffer.write(pickle.dumps(_escrever_em_pool(tarefas, int(sys.argv[1]))))
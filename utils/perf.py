@@ -0,0 +1,178 @@
+import functools
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# =========================================================
+# INSTRUMENTAÇÃO (TEMPOS POR ETAPA / CACHE / LINHAS)
+# =========================================================
+# Uso:
+#   iniciar_medicao("05_Funil")                  # topo da página
+#   with medir("read_csv") as m:                  # etapa cronometrada
+#       df = ...
+#       m["linhas"] = len(df)
+#   finalizar_medicao()                           # fim da página
+#
+#   @cache_medido("planilha", st.cache_data, ttl=60)   # no lugar do @st.cache_data
+#
+# As amostras ficam em memória no processo (janela móvel por página/etapa)
+# e são exibidas para admin na página 97_Desempenho.
+
+JANELA_AMOSTRAS = 500
+ETAPA_RERUN = "⏱ rerun completo"
+
+_lock = threading.Lock()
+_amostras = defaultdict(lambda: deque(maxlen=JANELA_AMOSTRAS))   # (pagina, etapa) -> [(ms, linhas)]
+_cache = defaultdict(lambda: {"chamadas": 0, "misses": 0})       # (pagina, nome)
+_local = threading.local()
+
+
+def _pagina_atual() -> str:
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        if get_script_run_ctx() is None:
+            return "offline"
+        return st.session_state.get("_perf_pagina", "—")
+    except Exception:
+        return "offline"
+
+
+def _registrar(etapa: str, ms: float, linhas=None):
+    with _lock:
+        _amostras[(_pagina_atual(), etapa)].append((ms, linhas))
+
+
+# ---------------------------------------------------------
+# RERUN DA PÁGINA
+# ---------------------------------------------------------
+def iniciar_medicao(pagina: str):
+    st.session_state["_perf_pagina"] = pagina
+    st.session_state["_perf_inicio"] = time.perf_counter()
+
+
+def finalizar_medicao():
+    """Reruns interrompidos por st.stop() não chegam aqui e não entram na conta."""
+    inicio = st.session_state.pop("_perf_inicio", None)
+    if inicio is not None:
+        _registrar(ETAPA_RERUN, (time.perf_counter() - inicio) * 1000)
+
+
+# ---------------------------------------------------------
+# ETAPAS
+# ---------------------------------------------------------
+@contextmanager
+def medir(etapa: str, linhas=None):
+    info = {"linhas": linhas}
+    inicio = time.perf_counter()
+    try:
+        yield info
+    finally:
+        _registrar(etapa, (time.perf_counter() - inicio) * 1000, info.get("linhas"))
+
+
+# ---------------------------------------------------------
+# CACHE (HIT / MISS)
+# ---------------------------------------------------------
+def cache_medido(nome: str, decorador_cache=st.cache_data, **kwargs_cache):
+    """
+    Substitui @st.cache_data / @st.cache_resource contando hit/miss:
+    o corpo da função só executa em miss, então ele marca a chamada
+    corrente (pilha por thread, pois caches podem se aninhar).
+    """
+    def decorar(func):
+        @functools.wraps(func)
+        def corpo(*args, **kwargs):
+            pilha = getattr(_local, "pilha", None)
+            if pilha:
+                pilha[-1]["miss"] = True
+            with medir(f"{nome} (miss)") as m:
+                resultado = func(*args, **kwargs)
+                if hasattr(resultado, "__len__") and not isinstance(resultado, (str, bytes)):
+                    m["linhas"] = len(resultado)
+            return resultado
+
+        cacheada = decorador_cache(**kwargs_cache)(corpo)
+
+        @functools.wraps(func)
+        def chamada(*args, **kwargs):
+            if not hasattr(_local, "pilha"):
+                _local.pilha = []
+            _local.pilha.append({"miss": False})
+            try:
+                return cacheada(*args, **kwargs)
+            finally:
+                miss = _local.pilha.pop()["miss"]
+                with _lock:
+                    contador = _cache[(_pagina_atual(), nome)]
+                    contador["chamadas"] += 1
+                    contador["misses"] += int(miss)
+
+        chamada.clear = cacheada.clear
+        return chamada
+
+    return decorar
+
+
+# ---------------------------------------------------------
+# RELATÓRIOS
+# ---------------------------------------------------------
+def resumo_etapas() -> pd.DataFrame:
+    with _lock:
+        itens = [(k, list(v)) for k, v in _amostras.items()]
+
+    linhas = []
+    for (pagina, etapa), amostras in itens:
+        if not amostras:
+            continue
+        tempos = np.array([a[0] for a in amostras])
+        qtd_linhas = [a[1] for a in amostras if a[1] is not None]
+        linhas.append({
+            "PÁGINA": pagina,
+            "ETAPA": etapa,
+            "AMOSTRAS": len(tempos),
+            "P50 (ms)": round(float(np.percentile(tempos, 50)), 1),
+            "P95 (ms)": round(float(np.percentile(tempos, 95)), 1),
+            "MÉDIA (ms)": round(float(tempos.mean()), 1),
+            "TOTAL (s)": round(float(tempos.sum()) / 1000, 2),
+            "LINHAS (últ.)": qtd_linhas[-1] if qtd_linhas else None,
+        })
+
+    if not linhas:
+        return pd.DataFrame()
+
+    return pd.DataFrame(linhas).sort_values(
+        ["PÁGINA", "TOTAL (s)"], ascending=[True, False]
+    )
+
+
+def resumo_cache() -> pd.DataFrame:
+    with _lock:
+        itens = [(k, dict(v)) for k, v in _cache.items()]
+
+    linhas = []
+    for (pagina, nome), c in itens:
+        hits = c["chamadas"] - c["misses"]
+        linhas.append({
+            "PÁGINA": pagina,
+            "CACHE": nome,
+            "CHAMADAS": c["chamadas"],
+            "HITS": hits,
+            "MISSES": c["misses"],
+            "HIT RATE": f"{(hits / c['chamadas'] * 100) if c['chamadas'] else 0:.1f}%",
+        })
+
+    if not linhas:
+        return pd.DataFrame()
+
+    return pd.DataFrame(linhas).sort_values(["PÁGINA", "CACHE"])
+
+
+def limpar_medicoes():
+    with _lock:
+        _amostras.clear()
+        _cache.clear()
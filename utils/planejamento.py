@@ -0,0 +1,211 @@
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.indicadores import STATUS_ANALISE
+from utils.perf import medir
+
+# =========================================================
+# TABELA DE PLANEJAMENTO (ESCOPO × DATA_BASE)
+# =========================================================
+# Meta & Planejamento refazia a cada interação, para o escopo escolhido,
+# um filtro por DATA_BASE anterior (conversões, meta histórica, acumulado
+# das 3 bases) e a página de teste varria a janela de 90 dias.
+#
+# Aqui tudo sai de uma passada, por versão da planilha, para TODOS os
+# escopos de uma vez:
+#   MR (empresa), EQUIPE, CORRETOR e EQUIPE_CORRETOR (corretor dentro da equipe)
+# Por escopo × DATA_BASE_LABEL: análises (volume), análises "EM ANÁLISE"
+# (realizado), aprovações e vendas únicas, mais as somas das 3 bases
+# anteriores do escopo. Por escopo: a janela dos últimos 90 dias.
+# O simulador só faz contas em cima de uma linha.
+#
+# Vendas únicas seguem vendas_unicas(): VENDA GERADA, 1 por cliente no
+# recorte, excluindo clientes com status final DESISTIU. Nas 3 bases
+# anteriores o cliente conta 1x na janela (VENDAS_ANT); a meta histórica
+# usa a soma das vendas de cada base (VENDAS_SOMA_ANT), como meta_historica().
+
+ESCOPO_MR = "MR IMÓVEIS"
+CHAVES_ESCOPO = ["TIPO", "ESCOPO"]
+JANELA_BASES = 3
+JANELA_DIAS = 90
+
+COLUNA_POR_TIPO_META = {
+    "Número de Análises": "ANALISES",
+    "Número de Aprovações": "APROVACOES",
+    "Número de Vendas": "VENDAS",
+}
+
+
+def chave_escopo(equipe=None, corretor=None) -> tuple:
+    """(TIPO, ESCOPO) da linha da tabela para o filtro da página."""
+    if equipe and corretor:
+        return ("EQUIPE_CORRETOR", f"{equipe} | {corretor}")
+    if corretor:
+        return ("CORRETOR", corretor)
+    if equipe:
+        return ("EQUIPE", equipe)
+    return ("MR", ESCOPO_MR)
+
+
+# ---------------------------------------------------------
+# MONTAGEM
+# ---------------------------------------------------------
+def linhas_por_escopo(df: pd.DataFrame, status_final) -> pd.DataFrame:
+    """Colunas mínimas com as marcações de cada linha, repetidas por tipo de escopo."""
+    status = df["STATUS_BASE"]
+    venda_valida = (status == "VENDA GERADA") & (df["CHAVE_CLIENTE"].map(status_final) != "DESISTIU")
+
+    base = pd.DataFrame(
+        {
+            "DATA_BASE": pd.to_datetime(df["DATA_BASE"], errors="coerce").to_numpy(),
+            "DATA_BASE_LABEL": df["DATA_BASE_LABEL"].to_numpy(),
+            "DIA": pd.to_datetime(df["DIA"], errors="coerce").to_numpy(),
+            "CHAVE_CLIENTE": df["CHAVE_CLIENTE"].to_numpy(),
+            "ANALISES": status.isin(STATUS_ANALISE).to_numpy(),
+            "ANALISES_EM": (status == "EM ANÁLISE").to_numpy(),
+            "APROVACOES": (status == "APROVADO").to_numpy(),
+            "VENDA_VALIDA": venda_valida.to_numpy(),
+        }
+    )
+
+    equipe = df["EQUIPE"].astype(str)
+    corretor = df["CORRETOR"].astype(str)
+    escopos = {
+        "MR": ESCOPO_MR,
+        "EQUIPE": equipe.to_numpy(),
+        "CORRETOR": corretor.to_numpy(),
+        "EQUIPE_CORRETOR": (equipe + " | " + corretor).to_numpy(),
+    }
+    return pd.concat(
+        [base.assign(TIPO=tipo, ESCOPO=valores) for tipo, valores in escopos.items()],
+        ignore_index=True,
+    )
+
+
+def _vendas_unicas_por(linhas: pd.DataFrame, chaves: list) -> pd.Series:
+    return linhas[linhas["VENDA_VALIDA"]].groupby(chaves)["CHAVE_CLIENTE"].nunique()
+
+
+def _tabela_bases(linhas: pd.DataFrame) -> pd.DataFrame:
+    chaves = CHAVES_ESCOPO + ["DATA_BASE_LABEL"]
+    grupos = linhas.groupby(chaves, sort=False)
+
+    tabela = grupos[["ANALISES", "ANALISES_EM", "APROVACOES"]].sum()
+    tabela["VENDAS"] = _vendas_unicas_por(linhas, chaves).reindex(tabela.index, fill_value=0)
+    tabela["DATA_BASE"] = grupos["DATA_BASE"].min()
+    tabela = (
+        tabela.dropna(subset=["DATA_BASE"])
+        .reset_index()
+        .sort_values(CHAVES_ESCOPO + ["DATA_BASE"], kind="mergesort")
+        .reset_index(drop=True)
+    )
+
+    # posição da base dentro do escopo (as "anteriores" são por escopo)
+    por_escopo = tabela.groupby(CHAVES_ESCOPO, sort=False)
+    tabela["POSICAO"] = por_escopo.cumcount()
+
+    # somas das 3 bases anteriores = acumulado até a base anterior
+    # menos o acumulado até 4 bases antes
+    metricas = ["ANALISES", "ANALISES_EM", "APROVACOES", "VENDAS"]
+    acumulado = por_escopo[metricas].cumsum()
+    acum_escopo = acumulado.groupby([tabela["TIPO"], tabela["ESCOPO"]], sort=False)
+    anteriores = acum_escopo.shift(1).fillna(0) - acum_escopo.shift(JANELA_BASES + 1).fillna(0)
+    for col in ["ANALISES", "ANALISES_EM", "APROVACOES"]:
+        tabela[f"{col}_ANT"] = anteriores[col].astype(int)
+    tabela["VENDAS_SOMA_ANT"] = anteriores["VENDAS"].astype(int)
+    tabela["N_BASES_ANT"] = np.minimum(tabela["POSICAO"], JANELA_BASES)
+
+    rotulos = [por_escopo["DATA_BASE_LABEL"].shift(k) for k in range(JANELA_BASES, 0, -1)]
+    tabela["BASES_ANT"] = [
+        tuple(r for r in trio if isinstance(r, str)) for trio in zip(*rotulos)
+    ]
+
+    # vendas únicas na janela: cada (cliente, base) vale para as 3 bases seguintes
+    vendas = (
+        linhas.loc[linhas["VENDA_VALIDA"], chaves + ["CHAVE_CLIENTE"]]
+        .drop_duplicates()
+        .merge(tabela[chaves + ["POSICAO"]], on=chaves)
+    )
+    alvos = pd.concat(
+        [vendas.assign(ALVO=vendas["POSICAO"] + k) for k in range(1, JANELA_BASES + 1)],
+        ignore_index=True,
+    )
+    vendas_janela = (
+        alvos.drop_duplicates(CHAVES_ESCOPO + ["CHAVE_CLIENTE", "ALVO"])
+        .groupby(CHAVES_ESCOPO + ["ALVO"])
+        .size()
+        .rename("VENDAS_ANT")
+        .reset_index()
+        .rename(columns={"ALVO": "POSICAO"})
+    )
+    tabela = tabela.merge(vendas_janela, on=CHAVES_ESCOPO + ["POSICAO"], how="left")
+    tabela["VENDAS_ANT"] = tabela["VENDAS_ANT"].fillna(0).astype(int)
+
+    return tabela.set_index(chaves).sort_index()
+
+
+def _tabela_janela_dias(linhas: pd.DataFrame, dias: int = JANELA_DIAS) -> pd.DataFrame:
+    """Somas dos últimos `dias` dias de cada escopo (até o último DIA do escopo)."""
+    validas = linhas[linhas["DIA"].notna()]
+    fim = validas.groupby(CHAVES_ESCOPO, sort=False)["DIA"].transform("max")
+    na_janela = validas[validas["DIA"] >= fim - pd.Timedelta(days=dias)]
+
+    grupos = na_janela.groupby(CHAVES_ESCOPO)
+    janela = grupos[["ANALISES", "ANALISES_EM", "APROVACOES"]].sum().astype(int)
+    janela["VENDAS"] = _vendas_unicas_por(na_janela, CHAVES_ESCOPO).reindex(janela.index, fill_value=0)
+    janela["DIA_FIM"] = grupos["DIA"].max()
+    return janela.sort_index()
+
+
+def construir_planejamento(df: pd.DataFrame, status_final) -> dict:
+    """
+    {"bases": escopo × DATA_BASE_LABEL, "janela_dias": escopo}.
+    `df` com DIA, DATA_BASE, DATA_BASE_LABEL, EQUIPE, CORRETOR, STATUS_BASE e
+    CHAVE_CLIENTE; `status_final` = Series ou dict CHAVE_CLIENTE -> status.
+    """
+    linhas = linhas_por_escopo(df, status_final)
+    return {
+        "bases": _tabela_bases(linhas),
+        "janela_dias": _tabela_janela_dias(linhas),
+    }
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def tabela_planejamento(chave: tuple, _df: pd.DataFrame, _status_final) -> dict:
+    """`chave` = (página, versão da planilha); df e status final não entram no hash."""
+    with medir("tabela_planejamento (montagem)", linhas=len(_df)):
+        return construir_planejamento(_df, _status_final)
+
+
+# ---------------------------------------------------------
+# CONSULTAS (O OBJETO É COMPARTILHADO: SOMENTE LEITURA)
+# ---------------------------------------------------------
+def bases_do_escopo(planejamento: dict, escopo: tuple) -> pd.DataFrame:
+    """Linhas do escopo em ordem de DATA_BASE (vazio se o escopo não existe)."""
+    bases = planejamento["bases"]
+    try:
+        linhas = bases.loc[escopo, :]
+    except KeyError:
+        return bases.iloc[0:0].reset_index()
+    return linhas.reset_index().sort_values("DATA_BASE", kind="mergesort").reset_index(drop=True)
+
+
+def janela_do_escopo(planejamento: dict, escopo: tuple) -> dict:
+    """Somas da janela de 90 dias do escopo (zeros se não houver datas)."""
+    janela = planejamento["janela_dias"]
+    if escopo not in janela.index:
+        return {"ANALISES": 0, "ANALISES_EM": 0, "APROVACOES": 0, "VENDAS": 0, "DIA_FIM": None}
+    return janela.loc[escopo].to_dict()
+
+
+def meta_das_anteriores(linha, tipo_meta: str) -> int:
+    """Média (arredondada para cima) do volume nas bases anteriores da linha."""
+    n = int(linha["N_BASES_ANT"])
+    if n == 0:
+        return 0
+    coluna = COLUNA_POR_TIPO_META[tipo_meta]
+    total = linha["VENDAS_SOMA_ANT"] if coluna == "VENDAS" else linha[f"{coluna}_ANT"]
+    return int(math.ceil(total / n))
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# PRESENÇA CORRETOR × DIA (MATRIZ BOOLEANA)
+# =========================================================
+# Em vez de montar um DataFrame corretores × dias (MultiIndex.from_product),
+# fazer merge e agrupar de novo, cada evento (planilha / CRM) vira um par
+# (linha do corretor, coluna do dia) e é "espalhado" numa matriz booleana
+# por indexação inteira. Faltas, último movimento e dias sem movimento saem
+# de reduções sobre arrays.
+#
+# Memória: 1 byte por célula (100 corretores × 365 dias ≈ 36 KB).
+
+
+def _codigos_corretor(corretores: pd.Index, serie: pd.Series) -> np.ndarray:
+    """Posição de cada valor em `corretores` (-1 = fora da lista)."""
+    return corretores.get_indexer(serie.astype(str))
+
+
+def _dias_desde(serie, origem: pd.Timestamp) -> np.ndarray:
+    """
+    Número de dias entre `origem` e cada data (datetime ou date); NaT -> -1.
+    Datas com fuso (CRM) contam pelo horário local, sem o fuso.
+    """
+    datas = pd.to_datetime(pd.Series(serie), errors="coerce")
+    if getattr(datas.dt, "tz", None) is not None:
+        datas = datas.dt.tz_localize(None)
+    datas = datas.dt.normalize()
+    dias = (datas - origem).dt.days
+    return dias.fillna(-1).to_numpy(dtype=np.int64)
+
+
+def matriz_presenca(corretores, data_ini, data_fim, eventos) -> dict:
+    """
+    eventos: lista de (serie_corretor, serie_data) com o mesmo tamanho cada.
+    Retorna {"corretores", "dias", "matriz"} com matriz[i, j] = corretor i
+    teve algum evento no dia j do período.
+    """
+    corretores = pd.Index(list(corretores), dtype=object)
+    inicio = pd.Timestamp(data_ini).normalize()
+    dias = pd.date_range(start=inicio, end=pd.Timestamp(data_fim).normalize(), freq="D")
+
+    matriz = np.zeros((len(corretores), len(dias)), dtype=bool)
+    for serie_corretor, serie_data in eventos:
+        linhas = _codigos_corretor(corretores, serie_corretor)
+        colunas = _dias_desde(serie_data, inicio)
+        ok = (linhas >= 0) & (colunas >= 0) & (colunas < len(dias))
+        matriz[linhas[ok], colunas[ok]] = True
+
+    return {"corretores": corretores, "dias": dias, "matriz": matriz}
+
+
+def faltas_por_corretor(presenca: dict) -> np.ndarray:
+    """Dias do período sem nenhum evento, por corretor."""
+    matriz = presenca["matriz"]
+    return matriz.shape[1] - matriz.sum(axis=1)
+
+
+def ultimo_movimento(corretores, eventos) -> pd.Series:
+    """
+    Data mais recente (todos os eventos, sem recorte de período) por corretor,
+    via máximo por código (np.maximum.at). Sem evento -> NaT.
+    """
+    corretores = pd.Index(list(corretores), dtype=object)
+    origem = pd.Timestamp("1970-01-01")
+
+    ultimo = np.full(len(corretores), -1, dtype=np.int64)
+    for serie_corretor, serie_data in eventos:
+        linhas = _codigos_corretor(corretores, serie_corretor)
+        dias = _dias_desde(serie_data, origem)
+        ok = (linhas >= 0) & (dias >= 0)
+        np.maximum.at(ultimo, linhas[ok], dias[ok])
+
+    datas = origem + pd.to_timedelta(np.where(ultimo >= 0, ultimo, np.nan), unit="D")
+    return pd.Series(datas, index=corretores, name="ULTIMO_MOVIMENTO")
+
+
+def dias_sem_movimento(ultimo: pd.Series, hoje) -> pd.Series:
+    """(hoje - último movimento) em dias; sem movimento -> <NA>."""
+    dias = (pd.Timestamp(hoje).normalize() - ultimo).dt.days
+    return dias.astype("Int64").rename("DIAS_SEM_MOV")
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.perf import medir
+from utils.planejamento import COLUNA_POR_TIPO_META, linhas_por_escopo
+
+# =========================================================
+# SÉRIES DIÁRIAS POR ESCOPO (META x REAL)
+# =========================================================
+# O gráfico Meta x Real agrupava o escopo por DIA, reindexava nos dias do
+# mês comercial e acumulava, a cada rerun e a cada troca de indicador — e
+# a versão de vendas refazia o filtro de vendas únicas inteiro.
+#
+# Aqui, por versão da planilha, cada escopo (mesmos escopos da tabela de
+# planejamento) vira uma linha de matriz densa escopo × dia com o ACUMULADO
+# de cada indicador (soma de prefixos). Qualquer mês comercial sai por
+# diferença de prefixos, sem voltar ao DataFrame.
+#
+# Vendas únicas dependem da janela (1 por cliente, no último dia de venda
+# dentro do recorte): ficam como eventos (dia, cliente) ordenados por escopo,
+# e a janela só olha os eventos do próprio escopo.
+#
+# A planilha é relida inteira a cada versão (linhas podem ser editadas e o
+# status final do cliente muda com linhas novas), então a matriz é remontada
+# por versão em vez de atualizada linha a linha.
+
+INDICADORES = ("REGISTROS", "ANALISES", "ANALISES_EM", "APROVACOES")
+
+
+def indicador_da_meta(tipo_meta: str, modo: str = "volume") -> str:
+    """
+    modo:
+      - "volume": análises = EM ANÁLISE + REANÁLISE
+      - "realizado": análises = APENAS EM ANÁLISE
+    """
+    coluna = COLUNA_POR_TIPO_META[tipo_meta]
+    if coluna == "ANALISES" and modo == "realizado":
+        return "ANALISES_EM"
+    return coluna
+
+
+# ---------------------------------------------------------
+# MONTAGEM
+# ---------------------------------------------------------
+def construir_series(df: pd.DataFrame, status_final) -> dict:
+    linhas = linhas_por_escopo(df, status_final)
+    linhas = linhas[linhas["DIA"].notna()]
+    if linhas.empty:
+        return {"codigos": {}, "inicio": None, "n_dias": 0}
+
+    dias = linhas["DIA"].dt.normalize()
+    inicio = dias.min()
+    n_dias = (dias.max() - inicio).days + 1
+    pos_dia = (dias - inicio).dt.days.to_numpy(dtype=np.int64)
+
+    codigos, escopos = pd.MultiIndex.from_arrays([linhas["TIPO"], linhas["ESCOPO"]]).factorize()
+    n_escopos = len(escopos)
+    celula = codigos * n_dias + pos_dia
+
+    # acumulado[e, k] = total do escopo e nos dias anteriores ao dia k
+    acumulado = {}
+    for indicador in INDICADORES:
+        pesos = None if indicador == "REGISTROS" else linhas[indicador].to_numpy(dtype=float)
+        contagem = np.bincount(celula, weights=pesos, minlength=n_escopos * n_dias)
+        contagem = contagem.reshape(n_escopos, n_dias).astype(np.int64)
+        acumulado[indicador] = np.hstack(
+            [np.zeros((n_escopos, 1), dtype=np.int64), np.cumsum(contagem, axis=1)]
+        )
+
+    # eventos de venda válida, ordenados por (escopo, dia)
+    venda = linhas["VENDA_VALIDA"].to_numpy()
+    clientes, _ = pd.factorize(linhas["CHAVE_CLIENTE"])
+    v_escopo, v_dia, v_cliente = codigos[venda], pos_dia[venda], clientes[venda]
+    ordem = np.lexsort((v_dia, v_escopo))
+
+    return {
+        "codigos": {escopo: i for i, escopo in enumerate(escopos)},
+        "inicio": inicio,
+        "n_dias": n_dias,
+        "acumulado": acumulado,
+        "vendas_dia": v_dia[ordem],
+        "vendas_cliente": v_cliente[ordem],
+        "vendas_limites": np.searchsorted(v_escopo[ordem], np.arange(n_escopos + 1)),
+    }
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def series_diarias(chave: tuple, _df: pd.DataFrame, _status_final) -> dict:
+    """`chave` = (página, versão da planilha); df e status final não entram no hash."""
+    with medir("series_diarias (montagem)", linhas=len(_df)):
+        return construir_series(_df, _status_final)
+
+
+# ---------------------------------------------------------
+# CONSULTAS
+# ---------------------------------------------------------
+def serie_diaria(series: dict, escopo: tuple, indicador: str, data_ini, data_fim) -> np.ndarray:
+    """
+    Contagem do indicador em cada dia de [data_ini, data_fim] (um item por
+    dia, zeros onde não há registro). indicador: INDICADORES ou "VENDAS".
+    """
+    data_ini = pd.Timestamp(data_ini).normalize()
+    n = (pd.Timestamp(data_fim).normalize() - data_ini).days + 1
+    saida = np.zeros(max(n, 0), dtype=np.int64)
+
+    codigo = series["codigos"].get(escopo)
+    if codigo is None or n <= 0:
+        return saida
+
+    # janela em posições da matriz, recortada ao período da planilha
+    a = (data_ini - series["inicio"]).days
+    a0, b0 = max(a, 0), min(a + n, series["n_dias"])
+    if a0 >= b0:
+        return saida
+
+    if indicador == "VENDAS":
+        ini, fim = series["vendas_limites"][codigo], series["vendas_limites"][codigo + 1]
+        dias = series["vendas_dia"][ini:fim]
+        clientes = series["vendas_cliente"][ini:fim]
+        dentro = (dias >= a0) & (dias < b0)
+        dias, clientes = dias[dentro][::-1], clientes[dentro][::-1]
+        # de trás para frente, a 1ª ocorrência de cada cliente é a última venda
+        _, ultima = np.unique(clientes, return_index=True)
+        saida[a0 - a:b0 - a] = np.bincount(dias[ultima] - a0, minlength=b0 - a0)
+    else:
+        acumulado = series["acumulado"][indicador][codigo]
+        saida[a0 - a:b0 - a] = np.diff(acumulado[a0:b0 + 1])
+
+    return saida
+
+
+def ultimo_dia_com_registro(series: dict, escopo: tuple, data_ini, data_fim):
+    """Último dia de [data_ini, data_fim] com algum registro do escopo (ou None)."""
+    registros = serie_diaria(series, escopo, "REGISTROS", data_ini, data_fim)
+    com_registro = np.flatnonzero(registros)
+    if not len(com_registro):
+        return None
+    return (pd.Timestamp(data_ini).normalize() + pd.Timedelta(days=int(com_registro[-1]))).date()
+
+
+def linha_meta(meta_valor, n_dias: int) -> np.ndarray:
+    """Meta linear acumulada: de 0 no 1º dia até a meta no último."""
+    return np.linspace(0, meta_valor, num=n_dias, endpoint=True)
+
+
+def ritmo_necessario(meta_valor, realizado, dias_restantes: int) -> float:
+    """Quanto falta por dia restante (0 se a meta já foi atingida ou o mês acabou)."""
+    faltam = max(meta_valor - realizado, 0)
+    return (faltam / dias_restantes) if dias_restantes > 0 else 0.0
@@ -0,0 +1,150 @@
+import hashlib
+
+import pandas as pd
+import streamlit as st
+
+from utils.busca_clientes import dobrar_acentos
+from utils.paginacao import paginar
+from utils.perf import cache_medido, medir
+
+# =========================================================
+# TABELAS PAGINADAS NO SERVIDOR
+# =========================================================
+# st.dataframe converte o DataFrame inteiro em Arrow e manda para o
+# navegador a cada rerun (lista de leads, eventos do KPI, tabelas por
+# corretor...). Aqui o resultado filtrado (busca) e ordenado fica em cache
+# no servidor e só a página visível vai para o st.dataframe, com o total
+# no "Mostrando X–Y de Z".
+#
+# A chave do cache é o CONTEÚDO da tabela (hash das colunas usadas), não o
+# objeto: mesma tabela em outra sessão/rerun = mesmo resultado, e qualquer
+# mudança nos dados gera outra entrada. Trocar de página não refaz nada.
+#
+# O resultado é compartilhado — somente leitura.
+
+POR_PAGINA_TABELA = 50
+TAMANHO_LRU = 32
+SEM_ORDEM = "—"
+
+
+def impressao(df: pd.DataFrame) -> tuple:
+    """
+    Identidade do conteúdo: muda quando qualquer célula, o índice ou a
+    ordem das linhas muda (os hashes por linha são combinados em sequência).
+    """
+    if df.empty:
+        return (0, tuple(df.columns))
+    try:
+        hashes = pd.util.hash_pandas_object(df, index=True)
+    except TypeError:  # células não hasheáveis (listas/dicts vindos do CRM)
+        hashes = pd.util.hash_pandas_object(df.astype(str), index=True)
+    digest = hashlib.blake2b(hashes.to_numpy().tobytes(), digest_size=16).hexdigest()
+    return (len(df), tuple(df.columns), digest)
+
+
+@cache_medido("tabelas_paginadas", st.cache_resource, max_entries=TAMANHO_LRU, show_spinner=False)
+def _em_cache(chave: tuple, _calcular):
+    # só `chave` entra no hash: o resultado é resolvido por ela
+    return _calcular()
+
+
+def _texto_busca(chave_base: tuple, df: pd.DataFrame, colunas_busca: list) -> pd.Series:
+    """Colunas de busca juntas, maiúsculas e sem acento (1x por conteúdo)."""
+    def calcular():
+        texto = df[colunas_busca[0]].fillna("").astype(str)
+        for col in colunas_busca[1:]:
+            texto = texto + " | " + df[col].fillna("").astype(str)
+        return texto.map(dobrar_acentos)
+
+    return _em_cache(chave_base + ("texto_busca",), calcular)
+
+
+def _resultado(chave_base: tuple, df: pd.DataFrame, colunas_busca, termo: str, ordem, decrescente: bool):
+    def calcular():
+        base = df
+        if termo:
+            texto = _texto_busca(chave_base, df, colunas_busca)
+            base = base[texto.str.contains(termo, regex=False).to_numpy()]
+        if ordem:
+            base = base.sort_values(ordem, ascending=not decrescente, kind="mergesort", na_position="last")
+        return base
+
+    return _em_cache(chave_base + (termo, ordem, decrescente), calcular)
+
+
+def tabela_paginada(
+    df: pd.DataFrame,
+    chave: str,
+    colunas=None,
+    busca=None,
+    ordem_valores=None,
+    ordem_padrao=None,
+    decrescente_padrao: bool = False,
+    formatos=None,
+    por_pagina: int = POR_PAGINA_TABELA,
+    **kwargs_dataframe,
+) -> pd.DataFrame:
+    """
+    Busca + ordenação + página, com só a página visível no st.dataframe.
+
+    `chave`        identifica a tabela (widgets e cache) — única na página.
+    `colunas`      exibidas, na ordem (padrão: todas).
+    `busca`        colunas onde o termo é procurado (None = sem campo de busca).
+    `ordem_valores` coluna exibida -> coluna usada para ordenar, para textos
+                    formatados ("R$ 1.234,00", "01/02/2025 10:00"); a coluna
+                    de valor pode não estar em `colunas`.
+    `formatos`     coluna exibida -> função de utils.formatacao, aplicada só
+                   nas linhas da página; a coluna guarda o valor bruto e a
+                   ordenação usa o próprio valor.
+    Devolve o resultado completo (filtrado e ordenado).
+    """
+    colunas = list(colunas) if colunas is not None else list(df.columns)
+    busca = list(busca) if busca else []
+    ordem_valores = ordem_valores or {}
+    formatos = formatos or {}
+
+    usadas = list(dict.fromkeys(colunas + busca + list(ordem_valores.values())))
+    df = df[usadas]
+    with medir("tabela_paginada (impressão)", linhas=len(df)):
+        chave_base = (chave, impressao(df))
+
+    c_busca, c_ordem, c_desc = st.columns([3, 2, 1])
+    termo = ""
+    if busca:
+        with c_busca:
+            termo = st.text_input("🔎 Buscar", key=f"busca_{chave}", placeholder=" / ".join(busca))
+    with c_ordem:
+        opcoes = [SEM_ORDEM] + colunas
+        ordem_sel = st.selectbox(
+            "Ordenar por",
+            opcoes,
+            index=opcoes.index(ordem_padrao) if ordem_padrao in opcoes else 0,
+            key=f"ordem_{chave}",
+        )
+    with c_desc:
+        st.markdown("<br>", unsafe_allow_html=True)
+        decrescente = st.checkbox("Decrescente", value=decrescente_padrao, key=f"desc_{chave}")
+
+    termo = dobrar_acentos(termo)
+    ordem = None if ordem_sel == SEM_ORDEM else ordem_valores.get(ordem_sel, ordem_sel)
+
+    resultado = _resultado(chave_base, df, busca, termo, ordem, decrescente)
+
+    if resultado.empty:
+        st.info("Nenhum registro encontrado.")
+        return resultado
+
+    inicio, fim = paginar(
+        len(resultado),
+        f"tabela_{chave}",
+        por_pagina=por_pagina,
+        assinatura=(chave_base[1], termo, ordem, decrescente),
+    )
+    pagina = resultado[colunas].iloc[inicio:fim]
+    if formatos:
+        with medir("tabela_paginada (formatação)", linhas=len(pagina)):
+            pagina = pagina.assign(**{col: fmt(pagina[col]) for col, fmt in formatos.items()})
+    with medir("st_dataframe", linhas=fim - inicio):
+        st.dataframe(pagina, **kwargs_dataframe)
+
+    return resultado
@@ -0,0 +1,90 @@
+import hashlib
+
+import requests
+import streamlit as st
+
+from utils.data_loader import versao_planilha
+from utils.notificacoes_json import ARQ_NOTIFICACOES
+from utils.supremo_config import TOKEN_SUPREMO
+
+# =========================================================
+# TOKENS DE VERSÃO DOS DADOS
+# =========================================================
+# Cada fonte expõe um token barato que só muda quando o dado muda.
+# As páginas comparam os tokens em vez de rodar o script inteiro
+# a cada N segundos.
+
+INTERVALO_VERIFICACAO_S = 30
+
+
+@st.cache_resource(ttl=30, show_spinner=False)
+def versao_crm() -> str:
+    """
+    Assinatura da primeira página de leads do CRM (leads mais recentes).
+    Um lead novo ou uma interação nova muda o token.
+    """
+    try:
+        resp = requests.get(
+            "https://api.supremocrm.com.br/v1/leads",
+            headers={"Authorization": f"Bearer {TOKEN_SUPREMO}"},
+            params={"pagina": 1},
+            timeout=15,
+        )
+        if resp.status_code != 200:
+            return "indisponivel"
+        js = resp.json()
+        dados = js.get("data", []) if isinstance(js, dict) else js
+    except Exception:
+        return "indisponivel"
+
+    assinatura = "|".join(
+        f"{d.get('id')}:{d.get('nome_situacao')}:{d.get('data_ultima_interacao')}"
+        for d in dados
+    )
+    return hashlib.sha1(assinatura.encode("utf-8")).hexdigest()[:16]
+
+
+def versao_notificacoes() -> str:
+    """mtime + tamanho do JSON de notificações."""
+    try:
+        info = ARQ_NOTIFICACOES.stat()
+    except OSError:
+        return "sem_arquivo"
+    return f"{info.st_mtime_ns}:{info.st_size}"
+
+
+FONTES_VERSAO = {
+    "planilha": versao_planilha,
+    "crm": versao_crm,
+    "notificacoes": versao_notificacoes,
+}
+
+
+def versao_dados(fontes=("planilha",)) -> tuple:
+    return tuple(FONTES_VERSAO[f]() for f in fontes)
+
+
+# =========================================================
+# REFRESH ORIENTADO A VERSÃO (SUBSTITUI O st_autorefresh)
+# =========================================================
+def atualizar_quando_mudar(
+    chave: str,
+    fontes=("planilha",),
+    intervalo_s: int = INTERVALO_VERIFICACAO_S,
+):
+    """
+    A cada `intervalo_s` roda só um fragmento minúsculo que compara os
+    tokens das fontes que a página usa. O rerun completo da página
+    acontece apenas quando algum token mudou.
+    """
+    chave_estado = f"_versao_dados_{chave}"
+    st.session_state[chave_estado] = versao_dados(fontes)
+
+    @st.fragment(run_every=intervalo_s)
+    def _verificar_versao():
+        atual = versao_dados(fontes)
+        if atual != st.session_state.get(chave_estado):
+            st.session_state[chave_estado] = atual
+            st.rerun()
+
+    _verificar_versao()
@@ -0,0 +1,63 @@
+import pandas as pd
+
+# =========================================================
+# VISÕES "COPY-ON-WRITE" DA BASE
+# =========================================================
+# As páginas encadeavam df.copy() -> filtro -> .copy() de novo, duplicando a
+# base inteira várias vezes por rerun. Com o copy-on-write do pandas ligado,
+# filtros e seleções devolvem objetos novos que só copiam dados quando uma
+# coluna é de fato alterada — não é preciso .copy() defensivo.
+#
+# Ligado explicitamente por ativar_copy_on_write(): iniciar_app() e o
+# utils.data_loader (páginas que não passam pelo bootstrap) chamam.
+# requirements.txt exige pandas >= 2.2.
+# Regras para as páginas:
+#   - filtro / seleção de colunas: df[mascara], df[colunas] (sem .copy())
+#   - "quero mexer sem afetar a origem": visao(df)
+#   - colunas derivadas: com_colunas(df, NOVA=...)
+
+
+def _pandas_3() -> bool:
+    return int(pd.__version__.split(".")[0]) >= 3
+
+
+def ativar_copy_on_write() -> bool:
+    """Liga o copy-on-write do pandas para o processo (idempotente)."""
+    if _pandas_3():
+        return True  # padrão a partir do pandas 3
+    try:
+        pd.set_option("mode.copy_on_write", True)
+        return True
+    except (KeyError, pd.errors.OptionError):
+        return False  # pandas antigo: visao() cai para cópia completa
+
+
+def copy_on_write_ativo() -> bool:
+    if _pandas_3():
+        return True
+    try:
+        return pd.get_option("mode.copy_on_write") is True
+    except (KeyError, pd.errors.OptionError):
+        return False
+
+
+def visao(df: pd.DataFrame, mascara=None, colunas=None) -> pd.DataFrame:
+    """
+    Recorte independente da origem: pode receber/alterar colunas sem afetar
+    `df` (nem o objeto em cache/session_state de onde ele veio).
+    Com copy-on-write não copia dados; só as colunas alteradas são copiadas.
+    """
+    if mascara is not None:
+        df = df.loc[mascara]
+    if colunas is not None:
+        df = df[list(colunas)]
+    return df.copy(deep=not copy_on_write_ativo())
+
+
+def com_colunas(df: pd.DataFrame, **novas) -> pd.DataFrame:
+    """
+    df com colunas novas/substituídas (como df.assign), compartilhando as
+    demais colunas com a origem em vez de materializar uma cópia completa.
+    Valores podem ser Series, escalares ou funções df -> Series.
+    """
+    return df.assign(**novas)